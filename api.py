@@ -1,52 +1,64 @@
 # api.py
+import asyncio
 import os
 import sys
 import logging
-import base64
-from fastapi import FastAPI, HTTPException
+import hashlib
+import shutil
+import tempfile
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+from multipart.multipart import MultipartParser, parse_options_header
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 from lang_memgpt.graph import process_chat  # Ensure this path is correct in your project
+from lang_memgpt import _consolidation as consolidation  # registers the "consolidate" job handler
+from lang_memgpt import _corpus as corpus
+from lang_memgpt import _jobs as jobs
+from lang_memgpt import _limits as limits
+from lang_memgpt import _memory_buffer as memory_buffer
+from lang_memgpt import _metrics as metrics
+from lang_memgpt import _pdf as pdf
 from lang_memgpt import _schemas as schemas
-from lang_memgpt.RAG_Structure.nodes.ingestion import ingest_data
-
-# Set up paths
-ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
-LANG_MEMGPT_DIR = os.path.join(ROOT_DIR, "lang_memgpt")
-DATA_DIR = os.path.join(LANG_MEMGPT_DIR, "data")
-PDF_DIR = os.path.join(DATA_DIR, "pdf_docs")
-CSV_DIR = os.path.join(DATA_DIR, "csv_docs")
-PERSIST_DIRECTORY = os.path.join(DATA_DIR, ".chroma")
-
-print("[API] Directory structure:", flush=True)
-print(f"[API] ROOT_DIR: {ROOT_DIR}", flush=True)
-print(f"[API] LANG_MEMGPT_DIR: {LANG_MEMGPT_DIR}", flush=True)
-print(f"[API] DATA_DIR: {DATA_DIR}", flush=True)
-print(f"[API] PDF_DIR: {PDF_DIR}", flush=True)
-print(f"[API] CSV_DIR: {CSV_DIR}", flush=True)
-print(f"[API] PERSIST_DIRECTORY: {PERSIST_DIRECTORY}", flush=True)
-
-# Create directories if they do not exist
-for dir_path in [LANG_MEMGPT_DIR, DATA_DIR, PDF_DIR, CSV_DIR, PERSIST_DIRECTORY]:
-    os.makedirs(dir_path, exist_ok=True)
-    print(f"[API] Created/verified directory: {dir_path}", flush=True)
+from lang_memgpt import _settings as settings
+from lang_memgpt.RAG_Structure.nodes import ingestion  # registers the "ingest" job handler
 
 logging.basicConfig(
-    level=logging.DEBUG,
+    level=settings.SETTINGS.log_level,
     stream=sys.stdout,
     format="%(asctime)s %(levelname)s %(name)s %(message)s"
 )
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+logger.debug(f"[API] Data root: {settings.SETTINGS.data_root}")
+logger.debug(f"[API] Docs directory: {settings.SETTINGS.docs_directory}")
+os.makedirs(settings.SETTINGS.data_root, exist_ok=True)
 
-@app.on_event("startup")
-async def startup_event():
-    """Run any startup tasks if needed."""
-    pass
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start the background workers, the PDF process pool and periodic
+    memory consolidation; on shutdown, write out buffered memories and let
+    ingestion workers finish the batch they are on."""
+    pdf.start_process_pool()
+    jobs.get_job_queue()
+    memory_buffer.get_memory_buffer()
+    interval = settings.SETTINGS.memory_consolidation_interval
+    consolidating = asyncio.create_task(consolidation.run_periodically(interval)) if interval > 0 else None
+    try:
+        yield
+    finally:
+        if consolidating is not None:
+            consolidating.cancel()
+        written = await asyncio.to_thread(memory_buffer.get_memory_buffer().stop, 10)
+        logger.info(f"[API] Flushed {written} buffered recall memories")
+        jobs.get_job_queue().stop(timeout=10)
+        pdf.shutdown_process_pool()
+
+app = FastAPI(lifespan=lifespan)
 
 # Configure CORS (allow all origins for testing)
 app.add_middleware(
@@ -64,67 +76,40 @@ class ChatRequest(BaseModel):
 
 @app.post("/api/chat")
 async def chat(request: ChatRequest):
-    # Process any file upload messages from the conversation.
-    for idx, msg in enumerate(request.messages):
+    # Hold an admission slot for the whole turn; a turn that cannot start
+    # before the queue deadline is rejected with a Retry-After hint.
+    user_id = request.configurable.get("user_id", "default-user")
+    try:
+        async with limits.get_admission_controller().admit(user_id):
+            return await _handle_chat(request)
+    except limits.AdmissionRejected as e:
+        logger.warning(f"[API CHAT] Rejected request for {user_id}: {e.reason}")
+        metrics.REGISTRY.inc("alfred_chat_rejected_total", help="Chat requests rejected by admission control.")
+        raise HTTPException(
+            status_code=429,
+            detail=e.reason,
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+async def _handle_chat(request: ChatRequest):
+    # Files go through /api/upload. Older clients still inline them as
+    # "File uploaded: <name>\nContent: data:...;base64,..."; drop the payload
+    # so it is neither kept in the conversation nor logged.
+    for msg in request.messages:
         content = msg.get("content", "")
-        if msg.get("role") == "user" and content.startswith("File uploaded:"):
-            try:
-                # Expected format:
-                # File uploaded: filename.ext
-                # Content: data:<mime>;base64,<base64_string>
-                parts = content.split('\nContent:')
-                if len(parts) != 2:
-                    logger.error("Invalid file upload message format.")
-                    continue
-
-                header = parts[0].strip()
-                file_data = parts[1].strip()
-
-                # Extract filename (everything after "File uploaded:")
-                file_name = header.replace("File uploaded:", "").strip()
-
-                # Remove Data URL prefix if present (e.g., "data:application/pdf;base64,")
-                if file_data.startswith("data:"):
-                    comma_index = file_data.find(',')
-                    if comma_index != -1:
-                        file_data = file_data[comma_index+1:]
-
-                file_bytes = base64.b64decode(file_data)
-
-                # Determine the docs path (adjusting path as needed for your project structure)
-                base_dir = os.path.dirname(__file__)  # Current script directory
-                app_dir = os.path.abspath(os.path.join(base_dir, "../app"))  # Navigate to the app directory
-                docs_path = os.path.join(app_dir, "docs")  # Set the docs path to app/docs
-                if not os.path.exists(docs_path):
-                    os.makedirs(docs_path, exist_ok=True)
-
-                file_save_path = os.path.join(docs_path, file_name)
-                with open(file_save_path, "wb") as f:
-                    f.write(file_bytes)
-
-                print(f"Saved file {file_name} to {file_save_path} for ingestion.", flush=True)
-
-                request.messages.append({
-                    "role": "system",
-                    "content": f"load_docs: {file_name}"
-                })
-                # # Now, update the message so that the agent sees only the file name.
-                # # For example, change the message to "File uploaded: filename.ext"
-                request.messages[idx]["content"] = f"File uploaded: {file_name}"
-
-            except Exception as e:
-                logger.error(f"Error processing file upload message: {str(e)}")
-                raise HTTPException(status_code=500, detail=f"File processing error: {str(e)}")
-    
+        if content.startswith("File uploaded:") and "\nContent:" in content:
+            msg["content"] = content.split("\nContent:", 1)[0].strip()
+            logger.warning("[API CHAT] Dropped inline file content; clients should use /api/upload.")
+
     try:
-        logger.info(f"Received chat request: messages={request.messages} configurable={request.configurable}")
-        print(f"Received chat request: messages={request.messages} configurable={request.configurable}", flush=True)
+        logger.info(f"Received chat request: {len(request.messages)} messages configurable={request.configurable}")
+        logger.debug("Received chat request: messages=%s", request.messages)
         
         # Build configuration for the graph/LLM with already_ingested flag
         config: schemas.GraphConfig = {
             "configurable": {
                 "user_id": request.configurable.get("user_id", "default-user"),
-                "model": request.configurable.get("model", "gpt-4o")
+                "model": request.configurable.get("model", settings.SETTINGS.agent_model)
             }
         }
         
@@ -145,23 +130,226 @@ async def chat(request: ChatRequest):
             "has_files": has_previous_upload
         }
         
-        logger.info(f"[API CHAT] Processing chat with config: {config}")
-        response = await process_chat(
-            messages=request.messages,
-            config=config
-        )
-        logger.info(f"[API CHAT] Got response: {response}")
+        logger.debug("[API CHAT] Processing chat with config: %s", config)
+        with metrics.request_trace() as trace:
+            with metrics.span("request", "chat"):
+                response = await process_chat(
+                    messages=request.messages,
+                    config=config
+                )
+        logger.debug("[API CHAT] Got response: %s", response)
+        logger.info(f"[API CHAT] Timing: {trace.server_timing()}")
         
         if response and response.get("messages"):
             last_message = response["messages"][-1]
-            return {"response": last_message['content']}
+            body = {"response": last_message['content']}
         else:
-            return {"response": "I apologize, but I couldn't generate a proper response."}
+            body = {"response": "I apologize, but I couldn't generate a proper response."}
+        # Per-request latency breakdown; full span list only when asked for.
+        if request.configurable.get("debug"):
+            body["timing"] = trace.as_dict()
+        return JSONResponse(body, headers={"Server-Timing": trace.server_timing()})
             
     except Exception as e:
         logger.error(f"[api.py] Error in chat: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+UPLOAD_EXTENSIONS = (".pdf", ".csv")
+# Room for the multipart boundaries, part headers and form fields around the file
+UPLOAD_FORM_OVERHEAD = 64 * 1024
+
+
+class _UploadForm:
+    """Callbacks for ``MultipartParser`` that keep the form fields in memory
+    and write the file part straight to a temporary file as it arrives."""
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        self.fields: Dict[str, str] = {}
+        self.filename: Optional[str] = None
+        self.tmp_path: Optional[str] = None
+        self.size = 0
+        self.digest = hashlib.sha256()
+        self._out = None
+        self._headers: Dict[bytes, bytes] = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._name = ""
+        self._value = bytearray()
+
+    def callbacks(self) -> Dict[str, Any]:
+        return {
+            "on_part_begin": self._part_begin,
+            "on_header_field": self._header_field_data,
+            "on_header_value": self._header_value_data,
+            "on_header_end": self._header_end,
+            "on_headers_finished": self._headers_finished,
+            "on_part_data": self._part_data,
+            "on_part_end": self._part_end,
+        }
+
+    def _part_begin(self) -> None:
+        self._headers, self._name, self._value = {}, "", bytearray()
+
+    def _header_field_data(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def _header_value_data(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _header_end(self) -> None:
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = self._header_value = b""
+
+    def _headers_finished(self) -> None:
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        self._name = options.get(b"name", b"").decode("utf-8", "replace")
+        if self._name == "file" and b"filename" in options and self._out is None:
+            self.filename = os.path.basename(options[b"filename"].decode("utf-8", "replace"))
+            fd, self.tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".upload-", suffix=".part")
+            self._out = os.fdopen(fd, "wb")
+
+    def _part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._name == "file" and self._out is not None and not self._out.closed:
+            chunk = data[start:end]
+            self.size += len(chunk)
+            self.digest.update(chunk)
+            self._out.write(chunk)
+        elif len(self._value) < UPLOAD_FORM_OVERHEAD:
+            self._value += data[start:end]
+
+    def _part_end(self) -> None:
+        if self._name == "file" and self._out is not None:
+            self._out.close()
+        elif self._name:
+            self.fields[self._name] = self._value.decode("utf-8", "replace")
+
+    def discard(self) -> None:
+        if self._out is not None:
+            self._out.close()
+        if self.tmp_path and os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+@app.post("/api/upload", status_code=202)
+async def upload(request: Request):
+    """Stream an uploaded document to the user's folder and queue it for ingestion.
+
+    Takes a ``multipart/form-data`` body with a ``file`` part and optional
+    ``user_id`` and ``shared`` fields. The file goes to the user's document
+    namespace, or to the shared docs folder (the global namespace) with
+    ``shared``. The body is parsed as it is received and the file part
+    written to disk piece by piece, so memory use stays bounded regardless
+    of file size, and an upload is rejected with 413 as soon as it passes
+    ``max_upload_bytes``. The returned ``document_id`` is derived from the
+    file contents; ``job_id`` can be polled at ``/api/ingest/{job_id}``.
+    """
+    max_bytes = settings.SETTINGS.max_upload_bytes
+    too_large = HTTPException(status_code=413, detail=f"File exceeds the {max_bytes} byte upload limit.")
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > max_bytes + UPLOAD_FORM_OVERHEAD:
+        raise too_large
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or not options.get(b"boundary"):
+        raise HTTPException(status_code=400, detail="Expected a multipart/form-data upload.")
+
+    # The namespace is only known once the form fields have been read, and
+    # they may follow the file, so it is received into the uploads folder.
+    os.makedirs(settings.SETTINGS.uploads_directory, exist_ok=True)
+    form = _UploadForm(settings.SETTINGS.uploads_directory)
+    parser = MultipartParser(options[b"boundary"], form.callbacks())
+    received = 0
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > max_bytes + UPLOAD_FORM_OVERHEAD:
+                raise too_large
+            parser.write(chunk)
+            if form.size > max_bytes:
+                raise too_large
+            if form.filename is not None and not form.filename.lower().endswith(UPLOAD_EXTENSIONS):
+                raise HTTPException(status_code=415, detail=f"Unsupported file type: {form.filename or 'unnamed'}")
+        parser.finalize()
+        if form.tmp_path is None:
+            raise HTTPException(status_code=422, detail="The upload has no file part.")
+
+        user_id = form.fields.get("user_id") or "default-user"
+        shared = form.fields.get("shared", "").strip().lower() in ("1", "true", "yes", "on")
+        namespace = corpus.GLOBAL_NAMESPACE if shared else corpus.user_namespace(user_id)
+        docs_path = corpus.namespace_files_directory(namespace)
+        os.makedirs(docs_path, exist_ok=True)
+        file_save_path = os.path.join(docs_path, form.filename)
+        # A rename within the uploads folder; a copy when the docs folder is on another file system.
+        shutil.move(form.tmp_path, file_save_path)
+    except BaseException:
+        form.discard()
+        raise
+
+    file_name, size = form.filename, form.size
+    document_id = form.digest.hexdigest()[:16]
+    logger.info(f"[API UPLOAD] Saved {file_name} ({size} bytes) as {document_id} in {namespace}")
+    metrics.REGISTRY.inc("alfred_upload_bytes_total", size, help="Bytes received through /api/upload.")
+    job_id = jobs.get_job_queue().submit("ingest", [file_save_path])
+    return {
+        "document_id": document_id,
+        "filename": file_name,
+        "namespace": namespace,
+        "bytes": size,
+        "job_id": job_id,
+        "status": jobs.QUEUED,
+    }
+
+
+class IngestRequest(BaseModel):
+    filenames: List[str] = []
+    user_id: str = ""
+
+
+@app.post("/api/ingest", status_code=202)
+async def start_ingest(request: IngestRequest):
+    """Queue ingestion of the named files (all files if none are named) in the
+    user's upload folder, or the docs folder when no user is given."""
+    namespace = corpus.user_namespace(request.user_id) if request.user_id else corpus.GLOBAL_NAMESPACE
+    docs_path = corpus.namespace_files_directory(namespace)
+    if not os.path.isdir(docs_path):
+        raise HTTPException(status_code=404, detail=f"No uploaded files for {request.user_id}")
+    names = [os.path.basename(name) for name in request.filenames] or sorted(os.listdir(docs_path))
+    paths = [os.path.join(docs_path, name) for name in names]
+    missing = [name for name, path in zip(names, paths) if not os.path.isfile(path)]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Files not found: {', '.join(missing)}")
+    job_id = jobs.get_job_queue().submit("ingest", paths)
+    return jobs.get_job_queue().get(job_id)
+
+
+@app.get("/api/ingest/{job_id}")
+async def ingest_status(job_id: str):
+    """Status and progress counts of an ingestion job."""
+    job = jobs.get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job
+
+
+@app.delete("/api/ingest/{job_id}")
+async def cancel_ingest(job_id: str):
+    """Cancel a queued job, or stop a running one after its current batch."""
+    job = jobs.get_job_queue().cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job
+
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Expose span timings, token counts and cache hits in Prometheus format."""
+    admission = limits.get_admission_controller()
+    metrics.REGISTRY.set_gauge("alfred_chat_active", admission.active, help="Chat requests currently running.")
+    metrics.REGISTRY.set_gauge("alfred_chat_waiting", admission.waiting, help="Chat requests waiting for a slot.")
+    for status, count in jobs.get_job_queue().store.counts().items():
+        metrics.REGISTRY.set_gauge("alfred_ingest_jobs", count, help="Ingestion jobs by status.", status=status)
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 # Mount static files for your frontend (adjust directory paths as needed)
 app.mount("/static", StaticFiles(directory="static/static"), name="static")
 app.mount("/", StaticFiles(directory="static", html=True), name="root")
\ No newline at end of file
@@ -0,0 +1,294 @@
+"""Deterministic stand-ins for the upstream services Alfred talks to.
+
+None of these make network calls. Latencies are fixed sleeps so that runs are
+comparable across machines: what changes between runs is our own overhead.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import RunnableLambda
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+EMBEDDING_DIM = 1536
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model with fixed latency and a fixed number of output tokens.
+
+    ``tool_plan`` maps a lowercase keyword to ``(tool_name, args)``. When the
+    latest human message contains the keyword and no tool result has come
+    back yet, the model answers with that tool call instead of text.
+    """
+
+    latency: float = 0.02
+    output_tokens: int = 64
+    tool_plan: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _pick_tool_call(self, messages: List[BaseMessage]) -> Optional[Dict[str, Any]]:
+        # The agent prompt ends with a system message (memories and time)
+        # after the conversation; look at the last conversation message.
+        conversation = [m for m in messages if not isinstance(m, SystemMessage)]
+        if conversation and isinstance(conversation[-1], ToolMessage):
+            return None
+        human = next((m for m in reversed(messages) if isinstance(m, HumanMessage)), None)
+        if human is None:
+            return None
+        text = str(human.content).lower()
+        for keyword, (name, args) in self.tool_plan.items():
+            if keyword in text:
+                call_id = "call_" + hashlib.sha1(f"{name}{text}".encode()).hexdigest()[:12]
+                return {"name": name, "args": args, "id": call_id}
+        return None
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.latency)
+        prompt_tokens = sum(len(str(m.content).split()) for m in messages)
+        tool_call = self._pick_tool_call(messages) if kwargs.get("tools") else None
+        usage = {
+            "input_tokens": prompt_tokens,
+            "output_tokens": self.output_tokens,
+            "total_tokens": prompt_tokens + self.output_tokens,
+        }
+        if tool_call:
+            message = AIMessage(content="", tool_calls=[tool_call], usage_metadata=usage)
+        else:
+            content = " ".join(["token"] * self.output_tokens)
+            message = AIMessage(content=content, usage_metadata=usage)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any):
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+    def with_structured_output(self, schema: Any, **kwargs: Any):
+        def respond(_: Any) -> Any:
+            time.sleep(self.latency)
+            return schema(**_structured_defaults(schema))
+
+        return RunnableLambda(respond)
+
+
+def _structured_defaults(schema: Any) -> Dict[str, Any]:
+    """Return a deterministic, "happy path" value for each schema field."""
+    fields = getattr(schema, "model_fields", None) or getattr(schema, "__fields__", {})
+    values = {}
+    for name, field in fields.items():
+        annotation = getattr(field, "annotation", None) or getattr(field, "outer_type_", None)
+        if name == "binary_score":
+            values[name] = True if annotation is bool else "yes"
+        elif name == "datasource":
+            values[name] = "vectorstore"
+        elif annotation is bool:
+            values[name] = True
+        elif annotation in (int, float):
+            values[name] = 0
+        else:
+            values[name] = "benchmark"
+    return values
+
+
+def fake_chat_model_factory(latency: float, output_tokens: int, tool_plan=None):
+    """Return a callable usable in place of ``ChatOpenAI`` / ``init_chat_model``."""
+
+    def factory(*args: Any, **kwargs: Any) -> FakeChatModel:
+        return FakeChatModel(
+            latency=latency,
+            output_tokens=output_tokens,
+            tool_plan=tool_plan or {},
+            rate_limiter=kwargs.get("rate_limiter"),
+        )
+
+    return factory
+
+
+class FakeEmbeddings(Embeddings):
+    """Hash-seeded unit vectors with a fixed per-request latency."""
+
+    def __init__(self, latency: float = 0.005, dim: int = EMBEDDING_DIM, **_: Any) -> None:
+        self.latency = latency
+        self.dim = dim
+        self.requests = 0
+        self.texts = 0
+
+    def _vector(self, text: str) -> List[float]:
+        seed = int.from_bytes(hashlib.sha1(text.encode()).digest()[:8], "little")
+        vec = np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+        return (vec / np.linalg.norm(vec)).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        time.sleep(self.latency)
+        self.requests += 1
+        self.texts += len(texts)
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+def _matches(metadata: Dict[str, Any], flt: Optional[Dict[str, Any]]) -> bool:
+    for key, cond in (flt or {}).items():
+        value = metadata.get(key)
+        if isinstance(cond, dict):
+            if "$eq" in cond and value != cond["$eq"]:
+                return False
+            if "$in" in cond and value not in cond["$in"]:
+                return False
+        elif value != cond:
+            return False
+    return True
+
+
+class InMemoryIndex:
+    """Subset of the Pinecone ``Index`` API backed by dictionaries."""
+
+    def __init__(self, latency: float = 0.003) -> None:
+        self.latency = latency
+        self._lock = threading.Lock()
+        self._data: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+    def upsert(self, vectors: Iterable[Dict[str, Any]], namespace: str = "") -> Dict[str, int]:
+        time.sleep(self.latency)
+        count = 0
+        with self._lock:
+            ns = self._data.setdefault(namespace, {})
+            for v in vectors:
+                ns[v["id"]] = {
+                    "id": v["id"],
+                    "values": list(v["values"]),
+                    "metadata": dict(v.get("metadata") or {}),
+                }
+                count += 1
+        return {"upserted_count": count}
+
+    def query(self, vector, top_k: int = 10, filter=None, namespace: str = "", include_metadata: bool = False, include_values: bool = False, **_: Any) -> Dict[str, Any]:
+        time.sleep(self.latency)
+        with self._lock:
+            rows = [r for r in self._data.get(namespace, {}).values() if _matches(r["metadata"], filter)]
+        if not rows:
+            return {"matches": [], "namespace": namespace}
+        mat = np.asarray([r["values"] for r in rows], dtype=np.float32)
+        q = np.asarray(vector, dtype=np.float32)
+        scores = mat @ q / (np.linalg.norm(mat, axis=1) * np.linalg.norm(q) + 1e-12)
+        order = np.argsort(-scores)[:top_k]
+        matches = []
+        for i in order:
+            match = {"id": rows[i]["id"], "score": float(scores[i])}
+            if include_metadata:
+                match["metadata"] = rows[i]["metadata"]
+            if include_values:
+                match["values"] = rows[i]["values"]
+            matches.append(match)
+        return {"matches": matches, "namespace": namespace}
+
+    def fetch(self, ids: List[str], namespace: str = "") -> Dict[str, Any]:
+        time.sleep(self.latency)
+        with self._lock:
+            ns = self._data.get(namespace, {})
+            return {"vectors": {i: ns[i] for i in ids if i in ns}, "namespace": namespace}
+
+    def delete(self, ids: Optional[List[str]] = None, namespace: str = "", **_: Any) -> Dict[str, Any]:
+        time.sleep(self.latency)
+        with self._lock:
+            ns = self._data.get(namespace, {})
+            for i in ids or []:
+                ns.pop(i, None)
+        return {}
+
+    def list(self, prefix: str = "", namespace: str = "", **_: Any):
+        with self._lock:
+            ids = sorted(i for i in self._data.get(namespace, {}) if i.startswith(prefix))
+        for start in range(0, len(ids), 100):
+            yield ids[start:start + 100]
+
+    def describe_index_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"namespaces": {ns: {"vector_count": len(v)} for ns, v in self._data.items()}}
+
+
+class FakePinecone:
+    """Drop-in for ``pinecone.Pinecone`` that always returns one shared index."""
+
+    index = InMemoryIndex()
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        pass
+
+    def Index(self, *args: Any, **kwargs: Any) -> InMemoryIndex:  # noqa: N802
+        return self.index
+
+
+_METAR = "<response><data><METAR><raw_text>KNKX 011755Z 27008KT 10SM FEW020 22/14 A2992</raw_text></METAR></data></response>"
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    latency = 0.01
+
+    def _reply(self, payload: Any, content_type: str = "application/json") -> None:
+        time.sleep(self.latency)
+        body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:  # noqa: N802
+        path = urlparse(self.path).path
+        if path.endswith("/dataserver"):
+            self._reply(_METAR.encode(), "application/xml")
+        elif path.endswith("/latest"):
+            self._reply({"status": "success", "results": [{"title": "Benchmark headline", "description": "stub"}]})
+        else:
+            self.send_error(404)
+
+    def do_POST(self) -> None:  # noqa: N802
+        length = int(self.headers.get("Content-Length") or 0)
+        query = json.loads(self.rfile.read(length) or b"{}").get("query", "")
+        if urlparse(self.path).path.endswith("/search"):
+            self._reply({
+                "query": query,
+                "results": [{"url": "http://stub.local/result", "content": f"Stub result for {query}"}],
+            })
+        else:
+            self.send_error(404)
+
+    def log_message(self, *args: Any) -> None:
+        pass
+
+
+class StubHTTPServer:
+    """Local HTTP server answering Tavily, aviationweather and newsdata calls."""
+
+    def __init__(self, latency: float = 0.01) -> None:
+        handler = type("Handler", (_StubHandler,), {"latency": latency})
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "StubHTTPServer":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.server.shutdown()
+        self.server.server_close()
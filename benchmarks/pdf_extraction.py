@@ -0,0 +1,121 @@
+"""PDF extraction benchmark: throughput and peak RSS per backend.
+
+Each backend runs in a fresh subprocess over the PDFs in ``docs/`` so its peak
+RSS is measured on its own; worker processes of the PyMuPDF pool are reported
+separately. Writes a JSON report like ``benchmarks.run``.
+
+Usage:
+    python -m benchmarks.pdf_extraction --output pdf_bench.json
+    python -m benchmarks.pdf_extraction --backend pymupdf --workers 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from benchmarks import fakes
+from benchmarks.run import DOCS_DIR, install_fakes
+
+BACKENDS = ["pypdf", "pymupdf"]
+
+
+def _rss_mb(who: int) -> float:
+    return round(resource.getrusage(who).ru_maxrss / 1024, 1)
+
+
+def _pdf_paths() -> List[str]:
+    paths = [os.path.join(DOCS_DIR, f) for f in sorted(os.listdir(DOCS_DIR)) if f.endswith(".pdf")]
+    # Empty placeholder files in docs/ are not PDFs.
+    return [p for p in paths if os.path.getsize(p) > 0]
+
+
+def measure(backend: str, repeat: int) -> Dict[str, Any]:
+    """Extract every PDF ``repeat`` times with one backend, in this process."""
+    with tempfile.TemporaryDirectory() as workdir, fakes.StubHTTPServer() as stub:
+        install_fakes(argparse.Namespace(embedding_latency=0, llm_latency=0, output_tokens=1), stub.url, workdir)
+        from lang_memgpt import _pdf as pdf
+
+        paths = _pdf_paths()
+        rss_before = _rss_mb(resource.RUSAGE_SELF)
+        samples, pages, first_page = [], 0, []
+        for _ in range(repeat):
+            pages = 0
+            start = time.perf_counter()
+            for path in paths:
+                for page in pdf.extract_pages(path, backend):
+                    if pages == 0:
+                        first_page.append(time.perf_counter() - start)
+                    pages += 1
+            samples.append(time.perf_counter() - start)
+        # Reap pool workers so RUSAGE_CHILDREN includes them.
+        pdf.shutdown_process_pool()
+
+    seconds = statistics.median(samples)
+    corpus_bytes = sum(os.path.getsize(p) for p in paths)
+    return {
+        "files": len(paths),
+        "pages": pages,
+        "seconds_s": round(seconds, 3),
+        "first_page_ms": round(statistics.median(first_page) * 1000, 3),
+        "pages_per_s": round(pages / seconds, 1),
+        "mb_per_s": round(corpus_bytes / 2**20 / seconds, 3),
+        "rss_before_mb": rss_before,
+        "max_rss_mb": _rss_mb(resource.RUSAGE_SELF),
+        "workers_max_rss_mb": _rss_mb(resource.RUSAGE_CHILDREN),
+    }
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", default="pdf_bench_report.json")
+    parser.add_argument("--backend", action="append", choices=BACKENDS, help="Default: all backends.")
+    parser.add_argument("--workers", type=int, help="PDF_WORKERS for the pymupdf backend.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(measure(args.backend[0], args.repeat)))
+        return 0
+
+    env = dict(os.environ, LOG_LEVEL="WARNING")
+    if args.workers:
+        env["PDF_WORKERS"] = str(args.workers)
+    results: Dict[str, Dict[str, Any]] = {}
+    for backend in args.backend or BACKENDS:
+        completed = subprocess.run(
+            [sys.executable, "-m", "benchmarks.pdf_extraction", "--child",
+             "--backend", backend, "--repeat", str(args.repeat)],
+            env=env, capture_output=True, text=True, check=True,
+        )
+        results[backend] = json.loads(completed.stdout.strip().splitlines()[-1])
+
+    if "pypdf" in results and "pymupdf" in results:
+        results["pymupdf"]["speedup_vs_pypdf"] = round(
+            results["pypdf"]["seconds_s"] / results["pymupdf"]["seconds_s"], 2
+        )
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "settings": {"repeat": args.repeat, "workers": env.get("PDF_WORKERS", "default")},
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,307 @@
+"""Offline performance benchmarks for Alfred.
+
+Runs ``process_chat`` end to end, document ingestion over ``docs/`` and
+retrieval against deterministic fakes (see ``benchmarks.fakes``), then writes a
+JSON report. With ``--baseline`` the report is compared against an earlier one
+and the process exits non-zero if any metric regressed past ``--tolerance``.
+
+Usage:
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.run --baseline bench.json --tolerance 0.2
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List
+
+from benchmarks import fakes
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DOCS_DIR = os.path.join(ROOT_DIR, "docs")
+
+# Chat turns replayed by the process_chat benchmark. Keywords in the fake
+# agent's tool plan make some of them go through a tool call first.
+CHAT_WORKLOAD = [
+    "Hi Alfred, how are you today?",
+    "What's the weather at KNKX right now?",
+    "What do you remember about my schedule?",
+    "Any news about aviation?",
+    "Convert 16k lbs of fuel to gallons.",
+]
+TOOL_PLAN = {
+    "weather": ("get_metar_data", {"stations": ["KNKX"]}),
+    "remember": ("search_memory", {"query": "schedule"}),
+    "news": ("fetch_latest_news", {"query": "aviation"}),
+    "convert": ("unit_converter", {"query": "convert 16k lbs to gallons"}),
+}
+RETRIEVAL_QUERIES = [
+    "agent memory",
+    "large concept models",
+    "situational awareness",
+    "prompt engineering",
+]
+
+# Metrics where a larger number is better; everything else is lower-is-better.
+HIGHER_IS_BETTER = ("_per_s",)
+
+PACKAGE_DIR = os.path.join(ROOT_DIR, "lang_memgpt")
+
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+
+    def pick(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+    return {
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p50_ms": round(pick(0.5) * 1000, 3),
+        "p95_ms": round(pick(0.95) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+@contextmanager
+def _peak_memory(result: Dict[str, Any]) -> Iterator[None]:
+    tracemalloc.start()
+    try:
+        yield
+    finally:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result["peak_python_mb"] = round(peak / 2**20, 2)
+
+
+class _ErrorCounter(logging.Handler):
+    """Counts errors lang_memgpt logs, including the ones it turns into replies."""
+
+    def __init__(self) -> None:
+        super().__init__(level=logging.ERROR)
+        self.messages: List[str] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if record.pathname.startswith(PACKAGE_DIR):
+            self.messages.append(record.getMessage())
+
+
+@contextmanager
+def _count_errors(result: Dict[str, Any]) -> Iterator[None]:
+    """Sets ``result["errors"]`` to the errors logged or raised inside the block.
+
+    process_chat and ingest_paths report failures as text rather than
+    raising, but they log every one of them first.
+    """
+    counter = _ErrorCounter()
+    root = logging.getLogger()
+    root.addHandler(counter)
+    try:
+        yield
+    except Exception as e:
+        counter.messages.append(f"{type(e).__name__}: {e}")
+    finally:
+        root.removeHandler(counter)
+        result["errors"] = len(counter.messages)
+        if counter.messages:
+            result["first_error"] = counter.messages[0][:200]
+
+
+def install_fakes(args: argparse.Namespace, stub_url: str, workdir: str) -> fakes.FakeEmbeddings:
+    """Point every upstream client at a fake before lang_memgpt is imported."""
+    os.environ.update({
+        "OPENAI_API_KEY": "sk-benchmark",
+        "TAVILY_API_KEY": "tvly-benchmark",
+        "NEWSDATA_API_KEY": "benchmark",
+        "PINECONE_API_KEY": "benchmark",
+        "PINECONE_INDEX_NAME": "benchmark",
+        "AVIATIONWEATHER_URL": f"{stub_url}/api/data/dataserver",
+        "NEWSDATA_URL": f"{stub_url}/api/1/latest",
+        "CHROMA_PERSIST_DIRECTORY": os.path.join(workdir, "chroma"),
+        "DOCS_DIRECTORY": DOCS_DIR,
+        "JOBS_DB_PATH": os.path.join(workdir, "jobs.sqlite3"),
+        "LOG_LEVEL": "WARNING",
+        "ANONYMIZED_TELEMETRY": "False",
+    })
+    # Rate limiting would measure the limiter, not our code.
+    for upstream in ("LLM", "EMBEDDINGS", "PINECONE", "TAVILY", "NEWSDATA", "AVIATIONWEATHER"):
+        os.environ[f"{upstream}_RPS"] = "0"
+
+    import langchain_openai
+    import pinecone
+    from langchain import hub
+    from langchain_community.utilities import tavily_search
+    from langchain_core.prompts import ChatPromptTemplate
+
+    embeddings = fakes.FakeEmbeddings(latency=args.embedding_latency)
+    hub.pull = lambda *a, **k: ChatPromptTemplate.from_messages(
+        [("human", "Context: {context}\n\nQuestion: {question}")]
+    )
+    langchain_openai.ChatOpenAI = fakes.fake_chat_model_factory(args.llm_latency, args.output_tokens)
+    langchain_openai.OpenAIEmbeddings = lambda *a, **k: embeddings
+    pinecone.Pinecone = fakes.FakePinecone
+    tavily_search.TAVILY_API_URL = stub_url
+    return embeddings
+
+
+def bench_ingestion(embeddings: fakes.FakeEmbeddings) -> Dict[str, Any]:
+    from lang_memgpt.RAG_Structure.nodes.ingestion import ingest_paths
+
+    # The ingestion job handler, run inline so the timing excludes queueing.
+    paths = [os.path.join(DOCS_DIR, f) for f in sorted(os.listdir(DOCS_DIR))]
+    corpus_bytes = sum(os.path.getsize(p) for p in paths)
+    before = embeddings.texts
+    result: Dict[str, Any] = {}
+    message = ""
+    with _peak_memory(result), _count_errors(result):
+        start = time.perf_counter()
+        message = ingest_paths(paths)
+    elapsed = time.perf_counter() - start
+    chunks = embeddings.texts - before
+    result.update({
+        "seconds_s": round(elapsed, 3),
+        "corpus_bytes": corpus_bytes,
+        "mb_per_s": round(corpus_bytes / 2**20 / elapsed, 3),
+        "chunks": chunks,
+        "chunks_per_s": round(chunks / elapsed, 1),
+        "embedding_requests": embeddings.requests,
+        "message": message[:200],
+    })
+    return result
+
+
+def bench_retrieval(iterations: int) -> Dict[str, Any]:
+    from lang_memgpt.RAG_Structure.nodes import retrieve as retrieve_module
+
+    samples = []
+    result: Dict[str, Any] = {}
+    with _peak_memory(result):
+        for i in range(iterations):
+            query = RETRIEVAL_QUERIES[i % len(RETRIEVAL_QUERIES)]
+            start = time.perf_counter()
+            retrieve_module.retrieve.func(query)
+            samples.append(time.perf_counter() - start)
+    result.update(_percentiles(samples))
+    return result
+
+
+def bench_process_chat(args: argparse.Namespace) -> Dict[str, Any]:
+    from lang_memgpt import _models as models
+    from lang_memgpt import graph
+
+    models.init_chat_model = fakes.fake_chat_model_factory(
+        args.llm_latency, args.output_tokens, tool_plan=TOOL_PLAN
+    )
+    models.get_agent_model.cache_clear()
+    config = {"configurable": {"user_id": "bench-user", "model": "fake"}}
+
+    async def run() -> List[float]:
+        samples = []
+        for i in range(args.iterations):
+            text = CHAT_WORKLOAD[i % len(CHAT_WORKLOAD)]
+            start = time.perf_counter()
+            await graph.process_chat([{"role": "user", "content": text}], config)
+            samples.append(time.perf_counter() - start)
+        return samples
+
+    result: Dict[str, Any] = {}
+    samples: List[float] = []
+    with _peak_memory(result), _count_errors(result):
+        samples = asyncio.run(run())
+    if samples:
+        result.update(_percentiles(samples))
+    return result
+
+
+def _flatten(report: Dict[str, Any]) -> Dict[str, float]:
+    flat = {}
+    for section, values in report["results"].items():
+        for key, value in values.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                flat[f"{section}.{key}"] = float(value)
+    return flat
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Return a description of every metric that regressed past ``tolerance``."""
+    current, previous = _flatten(report), _flatten(baseline)
+    regressions = []
+    for key, old in previous.items():
+        if key not in current or old == 0:
+            continue
+        new = current[key]
+        if not key.endswith(("_ms", "_mb", "_s")):
+            continue
+        change = (new - old) / abs(old)
+        if key.endswith(HIGHER_IS_BETTER):
+            change = -change
+        if change > tolerance:
+            regressions.append(f"{key}: {old:g} -> {new:g} ({change:+.0%})")
+    return regressions
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", default="bench_report.json")
+    parser.add_argument("--baseline", help="Earlier report to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--iterations", type=int, default=25)
+    parser.add_argument("--llm-latency", type=float, default=0.02)
+    parser.add_argument("--embedding-latency", type=float, default=0.005)
+    parser.add_argument("--output-tokens", type=int, default=64)
+    parser.add_argument("--skip", action="append", default=[], choices=["ingestion", "retrieval", "process_chat"])
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir, fakes.StubHTTPServer() as stub:
+        embeddings = install_fakes(args, stub.url, workdir)
+        results: Dict[str, Dict[str, Any]] = {}
+        if "ingestion" not in args.skip:
+            results["ingestion"] = bench_ingestion(embeddings)
+        if "retrieval" not in args.skip:
+            results["retrieval"] = bench_retrieval(args.iterations)
+        if "process_chat" not in args.skip:
+            results["process_chat"] = bench_process_chat(args)
+
+    results["process"] = {
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "settings": {k: v for k, v in vars(args).items() if k not in ("output", "baseline")},
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(results, indent=2))
+
+    # Timings from a run that hit errors measure the error path; don't let
+    # them pass as (or be compared against) a healthy baseline.
+    failed = [name for name, values in results.items() if values.get("errors")]
+    if failed:
+        print(f"Benchmark sections reported errors: {', '.join(failed)}")
+        return 2
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        if regressions:
+            print("Regressions against baseline:", *regressions, sep="\n  ")
+            return 1
+        print("No regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""Vector index benchmark: resident memory, query latency and recall.
+
+Builds a synthetic clustered corpus (embedding-sized by default) and compares
+the full-precision float64 baseline (what ``SKLearnVectorStore`` keeps in
+memory) with each ``VectorIndex`` quantization, with and without the float32
+re-scoring pass. Recall@k is measured against exact float32 search.
+
+With ``--workers N`` (Linux only), N forked processes open the same int8
+segment at once, either memory-mapped or copied into process memory, and
+report their private (copied or written) memory and proportional set size
+(PSS), which splits shared pages between the processes mapping them.
+
+Usage:
+    python -m benchmarks.vector_index --output vector_bench.json
+    python -m benchmarks.vector_index --vectors 100000 --dim 1536
+    python -m benchmarks.vector_index --workers 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+from benchmarks import fakes
+from benchmarks.run import _percentiles, install_fakes
+
+
+def _corpus(n: int, dim: int, clusters: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    noise = rng.standard_normal((n, dim)).astype(np.float32)
+    return centers[rng.integers(0, clusters, n)] + 0.5 * noise
+
+
+def _recall(found: List[List[int]], expected: np.ndarray) -> float:
+    hits = sum(len(set(f) & set(e.tolist())) for f, e in zip(found, expected))
+    return round(hits / expected.size, 4)
+
+
+def _smaps_mb() -> Dict[str, float]:
+    with open("/proc/self/smaps_rollup") as f:
+        fields = dict(line.split(":", 1) for line in f if ":" in line and not line[0].isspace())
+    return {k: int(fields[k].split()[0]) / 1024 for k in ("Pss", "Private_Dirty")}
+
+
+def _worker(path: str, mmap: bool, queries: np.ndarray, barrier: Any, results: Any) -> None:
+    from lang_memgpt import _vector_index as vector_index
+
+    before = _smaps_mb()
+    index = vector_index.VectorIndex.load(path, mmap=mmap)
+    for query in queries:
+        index.search(query, k=10)
+    barrier.wait()  # every worker has the segment open while we measure
+    after = _smaps_mb()
+    barrier.wait()
+    results.put({"private_mb": after["Private_Dirty"] - before["Private_Dirty"], "pss_mb": after["Pss"] - before["Pss"]})
+
+
+def bench_workers(args: argparse.Namespace, workdir: str, vectors: np.ndarray, queries: np.ndarray) -> Dict[str, Any]:
+    from lang_memgpt import _vector_index as vector_index
+
+    path = os.path.join(workdir, "shared")
+    vector_index.VectorIndex.build(vectors, [""] * len(vectors), [{}] * len(vectors), "int8").save(path)
+    context = multiprocessing.get_context("fork")
+    results: Dict[str, Any] = {}
+    for mode, mmap in (("mmap", True), ("copy", False)):
+        barrier, queue = context.Barrier(args.workers), context.Queue()
+        processes = [context.Process(target=_worker, args=(path, mmap, queries, barrier, queue))
+                     for _ in range(args.workers)]
+        for process in processes:
+            process.start()
+        samples = [queue.get() for _ in processes]
+        for process in processes:
+            process.join()
+        results[f"workers_{mode}"] = {
+            "workers": args.workers,
+            "private_mb_per_worker": round(max(s["private_mb"] for s in samples), 2),
+            "pss_mb_total": round(sum(s["pss_mb"] for s in samples), 2),
+        }
+    return results
+
+
+def bench(args: argparse.Namespace) -> Dict[str, Any]:
+    from lang_memgpt import _vector_index as vector_index
+
+    vectors = _corpus(args.vectors, args.dim, args.clusters, seed=0)
+    queries = _corpus(args.queries, args.dim, args.clusters, seed=1)
+    exact = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    expected = np.argsort(-(queries @ exact.T), axis=1)[:, :args.k]
+    texts = [""] * len(vectors)
+    metadatas = [{}] * len(vectors)
+
+    results: Dict[str, Any] = {
+        "float64_baseline": {"resident_mb": round(vectors.size * 8 / 2**20, 2)},
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        for quantization in vector_index.QUANTIZATIONS:
+            start = time.perf_counter()
+            path = os.path.join(workdir, quantization)
+            vector_index.VectorIndex.build(vectors, texts, metadatas, quantization).save(path)
+            build_s = time.perf_counter() - start
+            index = vector_index.VectorIndex.load(path)
+
+            for oversample in (1, args.oversample):
+                samples, found = [], []
+                for query in queries:
+                    start = time.perf_counter()
+                    found.append([row for row, _ in index.search(query, args.k, oversample)])
+                    samples.append(time.perf_counter() - start)
+                name = quantization if oversample == 1 else f"{quantization}_rescored"
+                results[name] = {
+                    "resident_mb": round(index.resident_bytes / 2**20, 2),
+                    "compression_x": round(vectors.size * 8 / index.resident_bytes, 2),
+                    "build_s": round(build_s, 3),
+                    f"recall_at_{args.k}": _recall(found, expected),
+                    **_percentiles(samples),
+                }
+        if args.workers:
+            results.update(bench_workers(args, workdir, vectors, queries))
+    return results
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", default="vector_bench_report.json")
+    parser.add_argument("--vectors", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--oversample", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=0, help="Also measure N worker processes (Linux).")
+    args = parser.parse_args(argv)
+
+    # Importing lang_memgpt builds the graph, which needs its upstreams faked.
+    with tempfile.TemporaryDirectory() as workdir, fakes.StubHTTPServer() as stub:
+        install_fakes(argparse.Namespace(embedding_latency=0, llm_latency=0, output_tokens=1), stub.url, workdir)
+        results = bench(args)
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "settings": {k: v for k, v in vars(args).items() if k != "output"},
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,6 @@
 # lang-memgpt-main/lang_memgpt/RAG_Structure/__init__.py
 
-from .nodes.ingestion import ingest_data  # Add ingestion
+from .nodes.ingestion import ingest_data, ingestion_status  # Add ingestion
 # Import the main RAG tool
 from .nodes.retrieve import retrieve  # Entry point as a tool
 
@@ -8,12 +8,16 @@ from .nodes.retrieve import retrieve  # Entry point as a tool
 from .nodes.grade_documents import grade_documents
 # Removed the import of 'generate' to prevent circular dependency.
 from .nodes.web_search import web_search
+# retrieve -> grade -> web search -> generate as one tool
+from .crag import corrective_rag
 
 # Expose public API
 __all__ = [
     "ingest_data",
+    "ingestion_status",    # Polls background ingestion jobs
     "retrieve",            # Main tool exposed for agent calls
     "grade_documents",     # Internal nodes for conditional graph flow
     # "generate",         # Omit 'generate' here to avoid circular import
     "web_search",
+    "corrective_rag",      # Corrective-RAG subgraph exposed as one tool
 ]
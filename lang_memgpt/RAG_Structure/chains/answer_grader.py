@@ -1,7 +1,9 @@
 from langchain_core.prompts import ChatPromptTemplate
 from pydantic import BaseModel, Field
 from langchain_core.runnables import RunnableSequence
-from langchain_openai import ChatOpenAI
+
+from lang_memgpt import _llm_cache as llm_cache
+from lang_memgpt import _models as models
 
 
 class GradeAnswer(BaseModel):
@@ -11,7 +13,7 @@ class GradeAnswer(BaseModel):
     )
 
 
-llm = ChatOpenAI(temperature=0)
+llm = models.get_chat_model("grader", cache=llm_cache.get_cache("answer_grader"))
 structured_llm_grader = llm.with_structured_output(GradeAnswer)
 
 system = """You are a grader assessing whether an answer addresses / resolves a question \n 
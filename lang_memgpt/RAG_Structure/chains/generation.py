@@ -1,8 +1,9 @@
 from langchain import hub
 from langchain_core.output_parsers import StrOutputParser
-from langchain_openai import ChatOpenAI
 
-llm = ChatOpenAI(temperature=0)
+from lang_memgpt import _models as models
+
+llm = models.get_chat_model("generator")
 prompt = hub.pull("rlm/rag-prompt")
 
 generation_chain = prompt | llm | StrOutputParser()
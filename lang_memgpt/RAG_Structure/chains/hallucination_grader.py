@@ -1,9 +1,11 @@
 from langchain_core.prompts import ChatPromptTemplate
 from pydantic import BaseModel, Field
 from langchain_core.runnables import RunnableSequence
-from langchain_openai import ChatOpenAI
 
-llm = ChatOpenAI(temperature=0)
+from lang_memgpt import _llm_cache as llm_cache
+from lang_memgpt import _models as models
+
+llm = models.get_chat_model("grader", cache=llm_cache.get_cache("hallucination_grader"))
 
 
 class GradeHallucinations(BaseModel):
@@ -1,9 +1,11 @@
 
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.pydantic_v1 import BaseModel, Field
-from langchain_openai import ChatOpenAI
 
-llm = ChatOpenAI(temperature=0)
+from lang_memgpt import _llm_cache as llm_cache
+from lang_memgpt import _models as models
+
+llm = models.get_chat_model("grader", cache=llm_cache.get_cache("retrieval_grader"))
 
 
 class GradeDocuments(BaseModel):
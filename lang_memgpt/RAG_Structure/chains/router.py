@@ -2,7 +2,9 @@ from typing import Literal
 
 from langchain_core.prompts import ChatPromptTemplate
 from pydantic import BaseModel, Field
-from langchain_openai import ChatOpenAI
+
+from lang_memgpt import _llm_cache as llm_cache
+from lang_memgpt import _models as models
 
 
 class RouteQuery(BaseModel):
@@ -14,11 +16,12 @@ class RouteQuery(BaseModel):
     )
 
 
-llm = ChatOpenAI(temperature=0)
+llm = models.get_chat_model("router", cache=llm_cache.get_cache("router"))
 structured_llm_router = llm.with_structured_output(RouteQuery)
 
+# {topics} lists the ingested documents; see local_router.topics().
 system = """You are an expert at routing a user question to a vectorstore or web search.
-The vectorstore contains documents related to agents, prompt engineering, and adversarial attacks.
+The vectorstore contains these documents: {topics}.
 Use the vectorstore for questions on these topics. For all else, use web-search."""
 route_prompt = ChatPromptTemplate.from_messages(
     [
@@ -0,0 +1,27 @@
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+
+from lang_memgpt import _models as models
+
+llm = models.get_chat_model("summarizer")
+
+section_prompt = ChatPromptTemplate.from_messages(
+    [
+        ("system", """You summarize one section of a document for a reader deciding what the document covers. \n
+    Reply with a short title for the section on the first line, then a summary of at most four sentences
+    on the following lines. Use only facts stated in the section."""),
+        ("human", "Document: {filename} ({pages})\n\nSection text:\n\n{text}"),
+    ]
+)
+
+document_prompt = ChatPromptTemplate.from_messages(
+    [
+        ("system", """You write the overview of a document from its section summaries. \n
+    In one paragraph of at most 150 words, say what the document is, its main points and conclusions.
+    Use only facts stated in the section summaries."""),
+        ("human", "Document: {filename}\n\nSection summaries:\n{outline}"),
+    ]
+)
+
+section_summarizer = section_prompt | llm | StrOutputParser()
+document_summarizer = document_prompt | llm | StrOutputParser()
@@ -1,4 +1,7 @@
 RETRIEVE = "retrieve"
 GRADE_DOCUMENTS = "grade_documents"
 GENERATE = "generate"
+GRADE_GENERATION = "grade_generation"
 WEBSEARCH = "websearch"
+RETRIEVAL = "retrieval"
+SPECULATIVE_SEARCH = "speculative_search"
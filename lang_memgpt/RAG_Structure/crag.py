@@ -0,0 +1,169 @@
+"""Corrective RAG as one compiled LangGraph subgraph, exposed as a tool.
+
+retrieve -> grade_documents runs as its own subgraph. If grading finds an
+irrelevant chunk, web results are added before generate; the answer is then
+graded for grounding and relevance, and regenerated or supplemented with web
+results when it fails. Every model call runs in an async node or edge:
+LangGraph runs conditional edges inline on the event loop, so grading is a
+node and the edge after it only reads the grade from the state.
+
+When the local router is confident, the flow starts with retrieval or with
+web search. When it is unsure, the web search starts speculatively in the
+same step as retrieval and grading instead of asking the LLM router. The
+grades decide whether its results are used (web_search reuses them) or
+discarded (generate only sees the graded documents), so the fallback path
+costs max(retrieval + grading, search) rather than their sum.
+"""
+
+import logging
+from typing import Any, Dict, List, Union
+
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import tool
+from langgraph.graph import END, START, StateGraph
+
+from lang_memgpt import _metrics as metrics
+from lang_memgpt import _settings as settings
+from lang_memgpt import _utils as utils
+from lang_memgpt._schemas import CorrectiveRagState, RetrievalState
+from lang_memgpt.RAG_Structure.consts import (
+    GENERATE,
+    GRADE_DOCUMENTS,
+    GRADE_GENERATION,
+    RETRIEVAL,
+    RETRIEVE,
+    SPECULATIVE_SEARCH,
+    WEBSEARCH,
+)
+from lang_memgpt.RAG_Structure.decision_logic import decide_to_generate
+from lang_memgpt.RAG_Structure.grade_generation import grade_generation_grounded_in_documents_and_question as grade_generation
+from lang_memgpt.RAG_Structure.local_router import VECTORSTORE, get_local_router
+from lang_memgpt.RAG_Structure.nodes.generate import generate
+from lang_memgpt.RAG_Structure.nodes.grade_documents import grade_documents
+from lang_memgpt.RAG_Structure.nodes.retrieve import retrieve_node
+from lang_memgpt.RAG_Structure.nodes.web_search import search_web, web_search
+
+logger = logging.getLogger(__name__)
+
+# Answers generated per question, including regenerations after grading
+MAX_GENERATIONS = 2
+
+
+async def route_question(state: CorrectiveRagState, config: RunnableConfig) -> Union[str, List[str]]:
+    """Start with retrieval, web search, or both at once when the router is unsure."""
+    if state.get("filename"):
+        return RETRIEVAL
+    router = get_local_router()
+    user_id = utils.ensure_configurable(config).get("user_id")
+    with metrics.span("rag", "route_question"):
+        datasource = await router.alocal_route(state["question"], user_id)
+        if datasource is None and not settings.SETTINGS.speculative_web_search:
+            return RETRIEVAL if await router.aroute(state["question"], user_id) == VECTORSTORE else WEBSEARCH
+    if datasource is None:
+        metrics.REGISTRY.inc(
+            "alfred_router_decisions_total",
+            help="Question routing decisions by method (local or llm fallback).",
+            method="speculative",
+            datasource="both",
+        )
+        logger.debug("---ROUTE QUESTION TO RAG WITH SPECULATIVE WEB SEARCH---")
+        return [RETRIEVAL, SPECULATIVE_SEARCH]
+    return RETRIEVAL if datasource == VECTORSTORE else WEBSEARCH
+
+
+async def speculative_search(state: CorrectiveRagState) -> Dict[str, Any]:
+    """Searches the web while retrieval and grading run; web_search uses the results if needed."""
+    return {"web_documents": await search_web(state["question"])}
+
+
+def _web_results_used(state: CorrectiveRagState) -> bool:
+    web_documents = state.get("web_documents") or []
+    return bool(web_documents) and web_documents[-1] in (state.get("documents") or [])
+
+
+async def grade_answer(state: CorrectiveRagState) -> Dict[str, Any]:
+    """Grades the answer for grounding and relevance, unless it cannot be regenerated anyway."""
+    if state.get("generations", 0) >= MAX_GENERATIONS:
+        return {"generation_grade": None}
+    return {"generation_grade": await grade_generation(state)}
+
+
+def decide_after_generation(state: CorrectiveRagState) -> str:
+    """Ends on a useful answer; otherwise regenerates or adds web results."""
+    grade = state.get("generation_grade")
+    if grade is None or grade == "useful":
+        return END
+    if grade == "not supported":
+        return GENERATE
+    return END if _web_results_used(state) else WEBSEARCH
+
+
+def build_retrieval_graph():
+    """retrieve -> grade_documents, run as one node of the corrective-RAG graph."""
+    builder = StateGraph(RetrievalState)
+    builder.add_node(RETRIEVE, retrieve_node)
+    builder.add_node(GRADE_DOCUMENTS, grade_documents)
+    builder.add_edge(START, RETRIEVE)
+    builder.add_edge(RETRIEVE, GRADE_DOCUMENTS)
+    builder.add_edge(GRADE_DOCUMENTS, END)
+    return builder.compile()
+
+
+def build_corrective_rag_graph():
+    builder = StateGraph(CorrectiveRagState)
+    builder.add_node(RETRIEVAL, build_retrieval_graph())
+    builder.add_node(SPECULATIVE_SEARCH, speculative_search)
+    builder.add_node(WEBSEARCH, web_search)
+    builder.add_node(GENERATE, generate)
+    builder.add_node(GRADE_GENERATION, grade_answer)
+
+    builder.add_conditional_edges(START, route_question, [RETRIEVAL, SPECULATIVE_SEARCH, WEBSEARCH])
+    # The speculative search has no edge of its own: its results reach the
+    # state in the same step as the grades, and web_search picks them up.
+    builder.add_conditional_edges(
+        RETRIEVAL, decide_to_generate, {"WEBSEARCH": WEBSEARCH, "GENERATE": GENERATE}
+    )
+    builder.add_edge(WEBSEARCH, GENERATE)
+    builder.add_edge(GENERATE, GRADE_GENERATION)
+    builder.add_conditional_edges(GRADE_GENERATION, decide_after_generation, [GENERATE, WEBSEARCH, END])
+    return builder.compile()
+
+
+corrective_rag_graph = build_corrective_rag_graph()
+
+
+def _sources(state: CorrectiveRagState) -> List[str]:
+    names = []
+    for document in state.get("documents") or []:
+        source = document.metadata.get("source")
+        name = source.rsplit("/", 1)[-1] if source else "web search"
+        if name not in names:
+            names.append(name)
+    return names
+
+
+@tool
+async def corrective_rag(question: str, filename: str = "") -> str:
+    """
+    Answers a question from the ingested documents, checking that the
+    retrieved passages are relevant and adding web search results when they
+    are not. Use this for questions that may need documents or the web.
+
+    Args:
+        question (str): The question to answer.
+        filename (str): Optional name of an ingested file (e.g. "MemGPT.pdf")
+            to answer from only that document.
+
+    Returns:
+        str: The answer and the sources it was generated from.
+    """
+    with metrics.span("rag", "corrective_rag") as attrs:
+        state = await corrective_rag_graph.ainvoke({"question": question, "filename": filename})
+        attrs["generations"] = state.get("generations", 0)
+        attrs["web"] = _web_results_used(state)
+    sources = _sources(state)
+    answer = state.get("generation") or "No answer could be generated."
+    return f"{answer}\n\nSources: {', '.join(sources)}" if sources else answer
+
+
+__all__ = ["build_corrective_rag_graph", "corrective_rag", "corrective_rag_graph"]
@@ -1,13 +1,16 @@
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 def decide_to_generate(state):
-    print("---ASSESS GRADED DOCUMENTS---")
+    logger.debug("---ASSESS GRADED DOCUMENTS---")
 
     if state["web_search"]:
-        print(
+        logger.debug(
             "---DECISION: NOT ALL DOCUMENTS ARE NOT RELEVANT TO QUESTION, INCLUDE WEB SEARCH---"
         )
         return "WEBSEARCH"
     else:
-        print("---DECISION: GENERATE---")
+        logger.debug("---DECISION: GENERATE---")
         return "GENERATE"
@@ -1,30 +1,36 @@
+import logging
 
 from lang_memgpt.RAG_Structure.chains.hallucination_grader import hallucination_grader
 from lang_memgpt.RAG_Structure.chains.answer_grader import answer_grader
+from lang_memgpt import _metrics as metrics
 from lang_memgpt._schemas import State
 
+logger = logging.getLogger(__name__)
 
-def grade_generation_grounded_in_documents_and_question(state: State) -> str:
-    print("---CHECK HALLUCINATIONS---")
+
+async def grade_generation_grounded_in_documents_and_question(state: State) -> str:
+    logger.debug("---CHECK HALLUCINATIONS---")
     question = state["question"]
     documents = state["documents"]
     generation = state["generation"]
 
-    score = hallucination_grader.invoke(
-        {"documents": documents, "generation": generation}
-    )
+    with metrics.span("rag", "grade_hallucination"):
+        score = await hallucination_grader.ainvoke(
+            {"documents": documents, "generation": generation}
+        )
 
     if hallucination_grade := score.binary_score:
-        print("---DECISION: GENERATION IS GROUNDED IN DOCUMENTS---")
-        print("---GRADE GENERATION vs QUESTION---")
-        score = answer_grader.invoke(
-            {"question": question, "generation": generation})
+        logger.debug("---DECISION: GENERATION IS GROUNDED IN DOCUMENTS---")
+        logger.debug("---GRADE GENERATION vs QUESTION---")
+        with metrics.span("rag", "grade_answer"):
+            score = await answer_grader.ainvoke(
+                {"question": question, "generation": generation})
         if answer_grade := score.binary_score:
-            print("---DECISION: GENERATION ADDRESSES QUESTION---")
+            logger.debug("---DECISION: GENERATION ADDRESSES QUESTION---")
             return "useful"
         else:
-            print("---DECISION: GENERATION DOES NOT ADDRESS QUESTION---")
+            logger.debug("---DECISION: GENERATION DOES NOT ADDRESS QUESTION---")
             return "not useful"
     else:
-        print("---DECISION: GENERATION IS NOT GROUNDED IN DOCUMENTS, RE-TRY---")
+        logger.debug("---DECISION: GENERATION IS NOT GROUNDED IN DOCUMENTS, RE-TRY---")
         return "not supported"
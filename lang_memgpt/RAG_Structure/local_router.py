@@ -0,0 +1,315 @@
+"""Embedding-based question routing between the vectorstore and web search.
+
+Ingestion keeps one centroid (mean chunk embedding) per document, keyed by
+``document_id`` and labelled with its file name, in a small ``.npz`` file
+next to each namespace's Chroma store (see ``_corpus``). ``LocalRouter``
+compares the question embedding with the centroids of the user's namespace
+and the global one, and decides locally when the best cosine similarity is
+clearly high or clearly low. Only ambiguous questions go to the LLM router,
+whose prompt lists the documents that user can search. A document's
+centroid is dropped when the document is removed. Every API worker may run
+ingestion, so each reads the file again when another process replaced it.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import logging
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from lang_memgpt import _corpus as corpus
+from lang_memgpt import _metrics as metrics
+from lang_memgpt import _settings as settings
+from lang_memgpt import _utils as utils
+
+logger = logging.getLogger(__name__)
+
+VECTORSTORE = "vectorstore"
+WEBSEARCH = "websearch"
+
+
+class CentroidIndex:
+    """Per-document embedding sums, counts and labels, persisted as ``.npz``.
+
+    Several processes share the file: writers re-read it under an exclusive
+    ``flock`` and apply only their change before saving, and readers reload
+    it when its mtime or inode changes.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._sums: Dict[str, np.ndarray] = {}
+        self._counts: Dict[str, int] = {}
+        self._labels: Dict[str, str] = {}
+        self._snapshot: Optional[Tuple[List[str], np.ndarray]] = None
+        self._stamp: Optional[Tuple[int, int]] = None
+        with self._lock:
+            self._refresh()
+
+    def _file_stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_ino)
+
+    def _refresh(self, force: bool = False) -> None:
+        """Reload the file if another process replaced it. Caller holds ``_lock``."""
+        stamp = self._file_stamp()
+        if stamp == self._stamp and not force:
+            return
+        self._sums, self._counts, self._labels = {}, {}, {}
+        self._snapshot = None
+        self._stamp = stamp
+        if stamp is None:
+            return
+        data = np.load(self.path, allow_pickle=False)
+        # Files written before labels were kept are keyed by file name.
+        labels = data["labels"] if "labels" in data.files else data["names"]
+        for name, total, count, label in zip(data["names"], data["sums"], data["counts"], labels):
+            self._sums[str(name)] = total.astype(np.float32)
+            self._counts[str(name)] = int(count)
+            self._labels[str(name)] = str(label)
+
+    @contextmanager
+    def _writing(self) -> Iterator[None]:
+        """Hold the file lock with the latest contents loaded."""
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._lock, open(f"{self.path}.lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            self._refresh(force=True)
+            yield
+
+    def update(
+        self, sums: Dict[str, np.ndarray], counts: Dict[str, int], labels: Optional[Dict[str, str]] = None
+    ) -> None:
+        """Replace the centroids of the given documents and persist the index."""
+        with self._writing():
+            for name, total in sums.items():
+                self._sums[name] = np.asarray(total, dtype=np.float32)
+                self._counts[name] = counts[name]
+                self._labels[name] = (labels or {}).get(name, name)
+            self._save()
+
+    def remove(self, names: Iterable[str]) -> None:
+        """Drop the centroids of the given documents and persist the index."""
+        with self._writing():
+            removed = [name for name in names if self._sums.pop(name, None) is not None]
+            for name in removed:
+                self._counts.pop(name, None)
+                self._labels.pop(name, None)
+            if removed:
+                self._save()
+
+    def _save(self) -> None:
+        names = sorted(self._sums)
+        tmp_path = f"{self.path}.tmp.npz"
+        np.savez(
+            tmp_path,
+            names=np.array(names, dtype=str),
+            sums=np.stack([self._sums[n] for n in names]) if names else np.zeros((0, 0), np.float32),
+            counts=np.array([self._counts[n] for n in names], dtype=np.int64),
+            labels=np.array([self._labels[n] for n in names], dtype=str),
+        )
+        os.replace(tmp_path, self.path)
+        self._snapshot = None
+        self._stamp = self._file_stamp()
+
+    def snapshot(self) -> Tuple[List[str], np.ndarray]:
+        """Document labels and their unit-norm centroids as one matrix."""
+        with self._lock:
+            self._refresh()
+            if self._snapshot is None:
+                names = sorted(self._sums)
+                if names:
+                    matrix = np.stack([self._sums[n] / max(self._counts[n], 1) for n in names])
+                    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True) + 1e-12
+                else:
+                    matrix = np.zeros((0, 0), dtype=np.float32)
+                matrix.setflags(write=False)
+                self._snapshot = ([self._labels[n] for n in names], matrix)
+            return self._snapshot
+
+
+def combined_snapshot(indexes: List[CentroidIndex]) -> Tuple[List[str], np.ndarray]:
+    """The snapshots of several indexes stacked into one."""
+    snapshots = [index.snapshot() for index in indexes]
+    snapshots = [(names, matrix) for names, matrix in snapshots if names]
+    if len(snapshots) <= 1:
+        return snapshots[0] if snapshots else ([], np.zeros((0, 0), dtype=np.float32))
+    names = [name for snapshot_names, _ in snapshots for name in snapshot_names]
+    matrix = np.vstack([matrix for _, matrix in snapshots])
+    matrix.setflags(write=False)
+    return names, matrix
+
+
+def topics(names: List[str]) -> str:
+    """Readable document list for the LLM router prompt."""
+    if not names:
+        return "no documents"
+    return ", ".join(os.path.splitext(os.path.basename(n))[0].replace("_", " ") for n in names)
+
+
+class LocalRouter:
+    """Routes by centroid similarity, deferring to an LLM router when unsure.
+
+    Args:
+        centroids: The per-document centroid index, or a function returning
+            the indexes a user's questions are routed against.
+        embeddings: Used to embed questions. Embeddings are cached per question.
+        llm_router: Runnable taking ``{"question", "topics"}`` and returning
+            an object with a ``datasource`` attribute.
+        vectorstore_threshold: Best similarity at or above which the question
+            goes to the vectorstore without asking the LLM.
+        websearch_threshold: Best similarity at or below which the question
+            goes to web search without asking the LLM.
+    """
+
+    def __init__(
+        self,
+        centroids: Union[CentroidIndex, Callable[[Optional[str]], List[CentroidIndex]]],
+        embeddings: Any,
+        llm_router: Any,
+        vectorstore_threshold: float,
+        websearch_threshold: float,
+        cache_size: int = 1024,
+    ) -> None:
+        self.centroids = centroids if callable(centroids) else (lambda user_id: [centroids])
+        self.embeddings = embeddings
+        self.llm_router = llm_router
+        self.vectorstore_threshold = vectorstore_threshold
+        self.websearch_threshold = websearch_threshold
+        self.cache_size = cache_size
+        self._vectors: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._vectors_lock = threading.Lock()
+
+    def _cached(self, question: str) -> Optional[np.ndarray]:
+        with self._vectors_lock:
+            vector = self._vectors.get(question)
+            if vector is not None:
+                self._vectors.move_to_end(question)
+            return vector
+
+    def _remember(self, question: str, embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        vector /= np.linalg.norm(vector) + 1e-12
+        vector.setflags(write=False)
+        with self._vectors_lock:
+            self._vectors[question] = vector
+            while len(self._vectors) > self.cache_size:
+                self._vectors.popitem(last=False)
+        return vector
+
+    def _embed(self, question: str) -> np.ndarray:
+        vector = self._cached(question)
+        return vector if vector is not None else self._remember(question, self.embeddings.embed_query(question))
+
+    async def _aembed(self, question: str) -> np.ndarray:
+        vector = self._cached(question)
+        if vector is None:
+            vector = self._remember(question, await self.embeddings.aembed_query(question))
+        return vector
+
+    def _decide(self, names: List[str], matrix: np.ndarray, vector: np.ndarray, attrs: Dict[str, Any]) -> Optional[str]:
+        scores = matrix @ vector
+        best = int(np.argmax(scores))
+        score = float(scores[best])
+        attrs.update(score=round(score, 4), document=names[best])
+        if score >= self.vectorstore_threshold:
+            return VECTORSTORE
+        if score <= self.websearch_threshold:
+            return WEBSEARCH
+        return None
+
+    def local_route(self, question: str, user_id: Optional[str] = None) -> Optional[str]:
+        """Return the datasource decided by centroid similarity, or None when ambiguous."""
+        with metrics.span("router", "local") as attrs:
+            names, matrix = combined_snapshot(self.centroids(user_id))
+            # Nothing ingested: the vectorstore cannot help.
+            datasource = self._decide(names, matrix, self._embed(question), attrs) if names else WEBSEARCH
+            attrs["datasource"] = datasource
+        return datasource
+
+    async def alocal_route(self, question: str, user_id: Optional[str] = None) -> Optional[str]:
+        with metrics.span("router", "local") as attrs:
+            names, matrix = combined_snapshot(self.centroids(user_id))
+            datasource = self._decide(names, matrix, await self._aembed(question), attrs) if names else WEBSEARCH
+            attrs["datasource"] = datasource
+        return datasource
+
+    def route(self, question: str, user_id: Optional[str] = None) -> str:
+        """Return ``"vectorstore"`` or ``"websearch"`` for ``question``."""
+        datasource = self.local_route(question, user_id)
+        method = "local"
+        if datasource is None:
+            method = "llm"
+            with metrics.span("router", "llm_fallback") as attrs:
+                names, _ = combined_snapshot(self.centroids(user_id))
+                result = self.llm_router.invoke({"question": question, "topics": topics(names)})
+                datasource = attrs["datasource"] = result.datasource
+        return self._record(datasource, method)
+
+    async def aroute(self, question: str, user_id: Optional[str] = None) -> str:
+        datasource = await self.alocal_route(question, user_id)
+        method = "local"
+        if datasource is None:
+            method = "llm"
+            with metrics.span("router", "llm_fallback") as attrs:
+                names, _ = combined_snapshot(self.centroids(user_id))
+                result = await self.llm_router.ainvoke({"question": question, "topics": topics(names)})
+                datasource = attrs["datasource"] = result.datasource
+        return self._record(datasource, method)
+
+    def _record(self, datasource: str, method: str) -> str:
+        metrics.REGISTRY.inc(
+            "alfred_router_decisions_total",
+            help="Question routing decisions by method (local or llm fallback).",
+            method=method,
+            datasource=datasource,
+        )
+        logger.debug("[ROUTER] %s via %s", datasource, method)
+        return datasource
+
+
+@lru_cache(maxsize=corpus.OPEN_NAMESPACES)
+def get_centroid_index(namespace: str = corpus.GLOBAL_NAMESPACE) -> CentroidIndex:
+    """Return the centroid index of a namespace, stored next to its Chroma store."""
+    return CentroidIndex(os.path.join(corpus.get_namespace_index(namespace).root, "router_centroids.npz"))
+
+
+def user_centroids(user_id: Optional[str]) -> List[CentroidIndex]:
+    """The centroid indexes of the namespaces ``user_id`` searches."""
+    return [get_centroid_index(namespace) for namespace in corpus.user_namespaces(user_id)]
+
+
+@corpus.on_remove
+def remove_centroid(namespace: str, document: corpus.DocumentInfo) -> None:
+    # Older indexes keyed centroids by file name; a newer version of the file
+    # has its own centroid under its document_id.
+    get_centroid_index(namespace).remove([document.document_id, document.filename])
+
+
+@lru_cache
+def get_local_router() -> LocalRouter:
+    """Return the process-wide router backed by the LLM ``question_router``."""
+    from lang_memgpt.RAG_Structure.chains.router import question_router
+
+    return LocalRouter(
+        user_centroids,
+        embeddings=utils.get_embeddings(),
+        llm_router=question_router,
+        vectorstore_threshold=settings.SETTINGS.router_vectorstore_threshold,
+        websearch_threshold=settings.SETTINGS.router_websearch_threshold,
+    )
+
+
+__all__ = ["CentroidIndex", "LocalRouter", "get_centroid_index", "get_local_router", "user_centroids"]
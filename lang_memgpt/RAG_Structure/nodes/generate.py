@@ -1,15 +1,25 @@
 # lang-memgpt-main/lang_memgpt/RAG_Structure/nodes/generate.py
+import logging
 from typing import Any, Dict
 
 from lang_memgpt.RAG_Structure.chains.generation import generation_chain
+from lang_memgpt import _metrics as metrics
 from lang_memgpt._schemas import State  # Updated to new schema
 
+logger = logging.getLogger(__name__)
+
 
 async def generate(state: State) -> Dict[str, Any]:
-    print("---GENERATE---")
+    logger.debug("---GENERATE---")
     question = state["question"]
     documents = state["documents"]
 
-    generation = generation_chain.invoke(
-        {"context": documents, "question": question})
-    return {"documents": documents, "question": question, "generation": generation}
+    with metrics.span("rag", "generate"):
+        generation = await generation_chain.ainvoke(
+            {"context": documents, "question": question})
+    return {
+        "documents": documents,
+        "question": question,
+        "generation": generation,
+        "generations": state.get("generations", 0) + 1,
+    }
@@ -1,9 +1,12 @@
-
+import logging
 from typing import Any, Dict
 
-from lang_memgpt.RAG_Structure.chains import retrieval_grader
+from lang_memgpt.RAG_Structure.chains.retrieval_grader import retrieval_grader
+from lang_memgpt import _metrics as metrics
 from lang_memgpt._schemas import State  # Updated to new schema
 
+logger = logging.getLogger(__name__)
+
 
 async def grade_documents(state: State) -> Dict[str, Any]:
     """
@@ -17,7 +20,7 @@ async def grade_documents(state: State) -> Dict[str, Any]:
         state: Filtered out irrelevant documents and updated web_search state
     """
 
-    print("---CHECK DOCUMENT RELEVANCE TO QUESTION---")
+    logger.debug("---CHECK DOCUMENT RELEVANCE TO QUESTION---")
     # Check if 'question' exists in state
     if "question" not in state:
         raise ValueError(
@@ -29,15 +32,16 @@ async def grade_documents(state: State) -> Dict[str, Any]:
     filtered_docs = []
     web_search = False
     for d in documents:
-        score = retrieval_grader.invoke(
-            {"question": question, "document": d.page_content}
-        )
+        with metrics.span("rag", "grade_document"):
+            score = await retrieval_grader.ainvoke(
+                {"question": question, "document": d.page_content}
+            )
         grade = score.binary_score
         if grade.lower() == "yes":
-            print("---GRADE: DOCUMENT RELEVANT---")
+            logger.debug("---GRADE: DOCUMENT RELEVANT---")
             filtered_docs.append(d)
         else:
-            print("---GRADE: DOCUMENT NOT RELEVANT---")
+            logger.debug("---GRADE: DOCUMENT NOT RELEVANT---")
             web_search = True
             continue
     return {"documents": filtered_docs, "question": question, "web_search": web_search}
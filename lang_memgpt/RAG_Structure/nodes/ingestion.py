@@ -1,16 +1,25 @@
 import os
 import logging
 from dotenv import load_dotenv
-from typing import List
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import PyPDFLoader, CSVLoader
+from typing import Dict, List, Optional
 # from langchain_community.embeddings import OpenAIEmbeddings
-from langchain_community.vectorstores import Chroma
-from langchain_openai import OpenAIEmbeddings
 # from langchain_chroma import Chroma
 from langchain.tools import tool
+from langchain_core.runnables import ensure_config
+import numpy as np
+
+from lang_memgpt import _corpus as corpus
+from lang_memgpt import _dedup as dedup
+from lang_memgpt import _jobs as jobs
+from lang_memgpt import _pdf as pdf
+from lang_memgpt import _settings as settings
+from lang_memgpt import _summaries as summaries
+from lang_memgpt import _utils as utils
+from lang_memgpt.RAG_Structure.local_router import get_centroid_index
+from lang_memgpt.tools import table_tool as tables
 
 load_dotenv()
+logger = logging.getLogger(__name__)
 # Ensure the directory exists
 # log_dir = "./logs"
 
@@ -23,142 +32,280 @@ load_dotenv()
 # Initialize retriever globally to avoid ImportError
 retriever = None  # Placeholder to be initialized later
 
+# Report page progress this often while a large PDF streams in.
+PROGRESS_EVERY_PAGES = 16
+
+
+def _no_progress(**counts: int) -> None:
+    pass
+
+
+def document_paths(user_id: Optional[str] = None) -> List[str]:
+    """Every file in the docs folder and the user's uploads, in name order."""
+    directories = [settings.SETTINGS.docs_directory]
+    if user_id:
+        directories.append(corpus.namespace_files_directory(corpus.user_namespace(user_id)))
+    return [os.path.join(directory, file) for directory in directories if os.path.isdir(directory)
+            for file in sorted(os.listdir(directory))]
+
+
+def summarize_documents(index: corpus.CorpusIndex, docs_list: List, progress: jobs.Progress) -> int:
+    """Stores a summary and outline for each ingested document; returns how many were built."""
+    from lang_memgpt.RAG_Structure.chains.summarizer import document_summarizer, section_summarizer
+
+    pages_by_document: Dict[str, List] = {}
+    for page in docs_list:
+        pages_by_document.setdefault(page.metadata["document_id"], []).append(page)
+    built = 0
+    for document_id, pages in pages_by_document.items():
+        filename = os.path.basename(pages[0].metadata.get("source", document_id))
+        try:
+            result = summaries.summarize_document(filename, pages, section_summarizer, document_summarizer)
+        except Exception as e:
+            logger.error(f"Failed to summarize {filename}: {str(e)}")
+            continue
+        index.registry.set_summary(document_id, result["summary"], result["outline"])
+        built += 1
+        progress()  # observe cancellation between documents
+    return built
+
+
+@jobs.register("ingest")
+def ingest_paths(paths: List[str], progress: jobs.Progress = _no_progress) -> str:
+    """
+    Loads the given PDF and CSV files and adds them to the document corpus
+    (see ``_corpus``), which chunks and embeds them in batches. Files in a
+    user's upload folder go to that user's namespace, others to the global
+    one.
+
+    Args:
+        paths (List[str]): Absolute paths of the files to ingest.
+        progress (Progress): Called with files/pages/chunks counts as work
+            completes. Raises ``JobCancelled`` when the job was cancelled, in
+            which case the chunks added so far are removed again.
+
+    Returns:
+        str: Metadata including counts, file names, and errors.
+    """
+    # Initialize metadata
+    pdf_files = []
+    csv_files = []
+    error_files = []
+    unchanged_files = []
+    # Per namespace: loaded pages/rows and documents they replace
+    docs_by_namespace: Dict[str, List] = {}
+    replaced_ids: Dict[str, List[str]] = {}
+    document_ids = set()
+    pages = 0
+
+    for files_done, file_path in enumerate(paths, start=1):
+        file = os.path.basename(file_path)
+        logger.debug(f"Processing file: {file}")
+
+        previous = document_id = None
+        namespace = corpus.namespace_for_path(file_path)
+        index = corpus.get_namespace_index(namespace)
+        docs_list = docs_by_namespace.setdefault(namespace, [])
+        try:
+            # Files whose contents are already in the corpus are not embedded
+            # again; a changed file replaces its previous version.
+            if file.endswith((".pdf", ".csv")):
+                document_id = corpus.file_digest(file_path)
+                known = index.registry.get(document_id)
+                if known is not None or (namespace, document_id) in document_ids:
+                    logger.debug(f"Skipping {file}: its contents are already ingested ({document_id})")
+                    unchanged_files.append(file)
+                    progress(files_total=len(paths), files_done=files_done, pages=pages)
+                    continue
+                document_ids.add((namespace, document_id))
+                previous = index.registry.by_filename(file)
+
+            # Handle PDFs. Pages are kept aside until the whole file has been
+            # read: a file that fails part way is not embedded or registered
+            # under its digest, so the next run tries it again.
+            if file.endswith(".pdf"):
+                logger.debug(f"Detected PDF file: {file_path}")
+                file_pages = []
+                for page in pdf.extract_pages(file_path):
+                    page.metadata["document_id"] = document_id
+                    file_pages.append(page)
+                    pages += 1
+                    if pages % PROGRESS_EVERY_PAGES == 0:
+                        progress(files_total=len(paths), files_done=files_done - 1, pages=pages)
+                docs_list.extend(file_pages)
+                logger.debug(f"Successfully loaded PDF file: {file_path} with {len(file_pages)} pages")
+                pdf_files.append(file)
+
+            # Handle CSVs: store the rows as a Parquet table for query_table
+            # and embed only the text columns, one document per row.
+            elif file.endswith(".csv"):
+                logger.debug(f"Detected CSV file: {file_path}")
+                info = tables.store_csv(file_path, namespace, document_id)
+                loaded_docs = tables.row_documents(info)
+                for row in loaded_docs:
+                    row.metadata["document_id"] = document_id
+                docs_list.extend(loaded_docs)
+                logger.debug(f"Stored CSV file {file_path} as table '{info.name}' ({info.rows} rows); "
+                             f"embedding {len(loaded_docs)} rows of {info.text_columns}")
+                csv_files.append(file)
+
+            else:
+                logger.debug(f"Skipping unsupported file type: {file}")
+
+            if previous is not None:
+                replaced_ids.setdefault(namespace, []).append(previous.document_id)
+
+        except jobs.JobCancelled:
+            raise
+
+        except Exception as e:
+            logger.error(f"Failed to process file {file}: {str(e)}")
+            document_ids.discard((namespace, document_id))
+            # Uncomment the line below to collect error details if needed
+            # error_files.append(f"{file}: {str(e)}")
+
+        progress(files_total=len(paths), files_done=files_done, pages=pages)
+
+    # Exit early if no valid files were found
+    if not any(docs_by_namespace.values()) and not csv_files and not unchanged_files:
+        return "No valid documents found in the 'docs' folder."
+
+    # Chunk, deduplicate and embed into each namespace's corpus, collecting
+    # per-document embedding sums for the local question router.
+    centroid_sums: Dict[str, Dict[str, np.ndarray]] = {}
+    centroid_counts: Dict[str, Dict[str, int]] = {}
+    centroid_labels: Dict[str, Dict[str, str]] = {}
+
+    def add_centroids(vectors: List[List[float]], metadatas: List[dict]) -> None:
+        # Called from add_documents below, for the namespace being ingested.
+        for vector, metadata in zip(vectors, metadatas):
+            metadata = metadata or {}
+            document_id = metadata.get("document_id") or os.path.basename(metadata.get("source", "unknown"))
+            sums = centroid_sums.setdefault(namespace, {})
+            counts = centroid_counts.setdefault(namespace, {})
+            sums[document_id] = sums.get(document_id, 0) + np.asarray(vector, dtype=np.float32)
+            counts[document_id] = counts.get(document_id, 0) + 1
+            centroid_labels.setdefault(namespace, {})[document_id] = os.path.basename(metadata.get("source", "unknown"))
+
+    dedup_report = dedup.DedupReport(0, 0, 0, 0)
+    evicted_files = []
+    summarized = 0
+    try:
+        for namespace, docs_list in docs_by_namespace.items():
+            index = corpus.get_namespace_index(namespace)
+            if docs_list:
+                report = index.add_documents(docs_list, progress, on_batch=add_centroids)
+                dedup_report = dedup.DedupReport(*(a + b for a, b in zip(dedup_report, report)))
+            # Replaced versions go after the new ones are stored, so passages
+            # both versions share are kept rather than embedded again.
+            for document_id in replaced_ids.get(namespace, []):
+                index.remove_document(document_id)
+            if namespace in replaced_ids:
+                index.publish()
+            # Keep the documents just ingested; evict older ones over quota.
+            evicted = index.enforce_quota(keep={d.metadata["document_id"] for d in docs_list})
+            evicted_files.extend(info.filename for info in evicted)
+            if settings.SETTINGS.document_summaries:
+                summarized += summarize_documents(index, docs_list, progress)
+        for namespace, sums in centroid_sums.items():
+            get_centroid_index(namespace).update(sums, centroid_counts[namespace], centroid_labels[namespace])
+        logger.info(f"Vectorstore created and persisted at: {settings.SETTINGS.chroma_persist_directory}")
+
+        # Initialize retriever globally
+        global retriever
+        retriever = corpus.get_corpus_index().vectorstore.as_retriever()
+
+    except jobs.JobCancelled:
+        raise
+
+    except TypeError as te:
+        logger.error(f"TypeError during vector store creation: {str(te)}")
+        return f"Failed to process embeddings due to a TypeError: {str(te)}"
+
+    except Exception as e:
+        logger.error(f"Unexpected error during vector store creation: {str(e)}")
+        return f"An unexpected error occurred while creating the vector store: {str(e)}"
+
+    # Generate metadata summary
+    metadata = {
+        "pdf_files_processed": len(pdf_files),
+        "csv_files_processed": len(csv_files),
+        "errors": len(error_files),
+        "total_files_processed": len(pdf_files) + len(csv_files),
+        "processed_files": {
+            "pdf_files": pdf_files,
+            "csv_files": csv_files,
+            "unchanged_files": unchanged_files,
+            "evicted_files": evicted_files,
+        },
+        "errors_details": error_files,
+        "chunks_embedded": dedup_report.chunks_out,
+        "duplicate_chunks_skipped": dedup_report.saved,
+        "documents_summarized": summarized,
+    }
+
+    # Return metadata summary
+    logger.info("Ingestion complete with metadata: %s", metadata)
+    return f"Ingestion complete! Metadata: {metadata}"
+
 
 @tool
 def ingest_data(command: str) -> str:
     """
-    Loads and processes all PDF and CSV files in the 'docs' folder,
-    splits them into chunks, saves embeddings to ChromaDB, 
-    and generates metadata with file names and counts.
+    Starts a background job that loads and processes all PDF and CSV files
+    in the 'docs' folder and the user's uploads, splits them into chunks and
+    saves embeddings to ChromaDB. Waits a few seconds for the job; if it is still running, returns
+    its job id so progress can be checked with ingestion_status.
 
     Args:
         command (str): Pass 'load_docs' to trigger ingestion.
 
     Returns:
-        str: Metadata including counts, file names, and errors.
+        str: Job status with file, page and chunk counts.
     """
     try:
-        # Configure logging (Moved inside the function)
-        # log_dir = "./logs"
-        # os.makedirs(log_dir, exist_ok=True)  # Ensure directory exists
-        # logging.basicConfig(level=logging.INFO,
-        #                     format="%(asctime)s - %(levelname)s - %(message)s",
-        #                     filename=os.path.join(log_dir, "ingestion.log"),
-        #                     filemode="a")
-        
-        
-        # Set up paths
-        base_dir = os.path.dirname(__file__)  # Get current script directory
-        docs_path = os.path.abspath(os.path.join(
-            base_dir, "../../../docs"))  # Move up to root
-        print(f"[INGEST] Docs path: {docs_path}", flush=True)
+        docs_path = settings.SETTINGS.docs_directory
+        logger.debug(f"[INGEST] Docs path: {docs_path}")
 
         # Check if docs directory exists
         if not os.path.exists(docs_path):
             return f"Directory does not exist: {docs_path}"
 
-        # Initialize metadata
-        pdf_files = []
-        csv_files = []
-        error_files = []
-        docs_list = []
-
-        # Process all files in the 'docs' folder
-        print(flush=True)
-        for file in os.listdir(docs_path):
-            print(f"Processing file: {file}", flush=True)
-            file_path = os.path.join(docs_path, file)
-
-            try:
-                # Handle PDFs
-                if file.endswith(".pdf"):
-                    print(f"Detected PDF file: {file_path}", flush=True)
-                    loader = PyPDFLoader(file_path)
-                    loaded_docs = loader.load()
-                    docs_list.extend(loaded_docs)
-                    print(f"Successfully loaded PDF file: {file_path} with {len(loaded_docs)} documents", flush=True)
-                    pdf_files.append(file)
-
-                # Handle CSVs
-                elif file.endswith(".csv"):
-                    print(f"Detected CSV file: {file_path}", flush=True)
-                    loader = CSVLoader(file_path)
-                    loaded_docs = loader.load()
-                    docs_list.extend(loaded_docs)
-                    print(f"Successfully loaded CSV file: {file_path} with {len(loaded_docs)} documents", flush=True)
-                    csv_files.append(file)
-
-                else:
-                    print(f"Skipping unsupported file type: {file}", flush=True)
-
-            except Exception as e:
-                print(f"Failed to process file {file}: {str(e)}", flush=True)
-                # Uncomment the line below to collect error details if needed
-                # error_files.append(f"{file}: {str(e)}")
-
-        print(flush=True)
-        # Exit early if no valid files were found
-        if not docs_list:
-            return "No valid documents found in the 'docs' folder."
-
-        # Split into chunks
-        text_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
-            chunk_size=250,
-            chunk_overlap=0
-        )
-        doc_splits = text_splitter.split_documents(docs_list)
-
-        # Create or update our local Chroma vector store
-        try:
-            vectorstore = Chroma.from_documents(
-                documents=doc_splits,
-                collection_name="rag-chroma",
-                embedding=OpenAIEmbeddings(),
-                persist_directory="/Users/.chroma"  # Replaced "./.chroma"
-            )
-            vectorstore.persist()
-            print(
-                "Vectorstore created and persisted at: /Users/.chroma")
-
-            # Initialize retriever globally
-            global retriever
-            retriever = vectorstore.as_retriever()
-
-        except TypeError as te:
-            print(f"TypeError during vector store creation: {str(te)}")
-            return f"Failed to process embeddings due to a TypeError: {str(te)}"
-
-        except Exception as e:
-            print(
-                f"Unexpected error during vector store creation: {str(e)}")
-            return f"An unexpected error occurred while creating the vector store: {str(e)}"
-
-        # Generate metadata summary
-        metadata = {
-            "pdf_files_processed": len(pdf_files),
-            "csv_files_processed": len(csv_files),
-            "errors": len(error_files),
-            "total_files_processed": len(pdf_files) + len(csv_files),
-            "processed_files": {
-                "pdf_files": pdf_files,
-                "csv_files": csv_files,
-            },
-            "errors_details": error_files,
-        }
-
-        # Return metadata summary
-        print("Ingestion complete with metadata: %s", metadata)
-        return f"Ingestion complete! Metadata: {metadata}"
+        # Reuse a job already ingesting the same files rather than queueing
+        # a duplicate when the agent retries.
+        queue = jobs.get_job_queue()
+        user_id = utils.ensure_configurable(ensure_config())["user_id"]
+        paths = document_paths(user_id)
+        active = queue.store.find_active("ingest", paths)
+        job_id = active["id"] if active else queue.submit("ingest", paths)
+        return jobs.describe(queue.wait(job_id, timeout=settings.SETTINGS.ingest_tool_wait))
 
     except Exception as e:
         # Catch any unexpected errors during the entire function execution
-        print(f"Critical error during ingestion: {str(e)}")
+        logger.error(f"Critical error during ingestion: {str(e)}")
         return f"An error occurred during ingestion: {str(e)}"
 
 
+@tool
+def ingestion_status(job_id: str) -> str:
+    """
+    Checks on a document ingestion job started by ingest_data or an upload.
+
+    Args:
+        job_id (str): The job id returned when ingestion was started.
+
+    Returns:
+        str: Job status with file, page and chunk counts.
+    """
+    job = jobs.get_job_queue().get(job_id.strip())
+    if job is None:
+        return f"No ingestion job found with id {job_id}."
+    return jobs.describe(job)
+
+
 if __name__ == "__main__":
     # For direct execution, simulate the agent call
-    result = ingest_data.invoke("load_docs")
+    result = ingest_paths(document_paths())
     print(result)  # Output metadata to terminal
     print("Ingestion script executed successfully.")
 
@@ -170,10 +317,8 @@ if __name__ == "__main__":
 # import logging
 # import json
 # from dotenv import load_dotenv
-# from typing import List
-# from langchain.text_splitter import RecursiveCharacterTextSplitter
-# from langchain_community.document_loaders import PyPDFLoader, CSVLoader
-# from langchain_community.vectorstores import Chroma
+# from typing import Dict, List, Optional
+# # # from langchain_community.vectorstores import Chroma
 # from langchain_openai import OpenAIEmbeddings
 # from langchain.tools import tool, StructuredTool
 
@@ -1,39 +1,62 @@
-from typing import Any, Dict
+import logging
+from typing import Any, Dict, List, Optional
+from lang_memgpt import _corpus as corpus
+from lang_memgpt import _metrics as metrics
+from lang_memgpt import _utils as utils
 from lang_memgpt._schemas import State
-from lang_memgpt.RAG_Structure.nodes.ingestion import retriever
+from langchain_core.documents import Document
+from langchain_core.runnables import RunnableConfig, ensure_config
 from langchain.tools import tool  # or your custom tool decorator
 
-# Import Chroma and OpenAI Embeddings
-from langchain_community.vectorstores import Chroma
-from langchain_openai import OpenAIEmbeddings
+logger = logging.getLogger(__name__)
 
-# Reload the retriever directly from the saved Chroma vector store
-# Replaced --> "./chroma"  # Path where the vectorstore is saved
-persist_directory = "/Users/.chroma"
-vectorstore = Chroma(
-    persist_directory=persist_directory,
-    embedding_function=OpenAIEmbeddings(),
-    # Ensure this matches the collection name used in ingestion
-    collection_name="rag-chroma"
-)
 
-# Initialize retriever from vectorstore
-retriever = vectorstore.as_retriever()
+def retrieve_documents(question: str, filename: str = "", user_id: Optional[str] = None) -> List[Document]:
+    """
+    Searches the user's and the global document namespaces, only within
+    ``filename`` when it names an ingested document.
+    """
+    # Search the corpus segments published by the latest ingestions, so
+    # every worker sees fresh documents.
+    with metrics.span("rag", "retrieve") as attrs:
+        documents = corpus.search(question, user_id=user_id, k=4, filename=filename)
+        attrs["documents"] = len(documents)
+        attrs["scoped"] = bool(filename)
+    return documents
+
+
+async def aretrieve_documents(question: str, filename: str = "", user_id: Optional[str] = None) -> List[Document]:
+    """``retrieve_documents`` with the query embedded without blocking the event loop."""
+    with metrics.span("rag", "retrieve") as attrs:
+        documents = await corpus.asearch(question, user_id=user_id, k=4, filename=filename)
+        attrs["documents"] = len(documents)
+        attrs["scoped"] = bool(filename)
+    return documents
 
 
 @tool
-def retrieve(state: State) -> Dict[str, Any]:
+def retrieve(query: str, filename: str = "") -> Dict[str, Any]:
     """
-    Retrieves documents from the previously ingested vector store
-    based on the user's current question in the 'state' object.
+    Retrieves passages from the ingested documents that answer a query.
+
+    Args:
+        query (str): What to look for in the documents.
+        filename (str): Optional name of an ingested file (e.g. "MemGPT.pdf")
+            to search only that document.
     """
-    print("---RETRIEVE---")
-    question = state["question"]
+    logger.debug("---RETRIEVE---")
+    user_id = utils.ensure_configurable(ensure_config())["user_id"]
+    return {
+        "documents": retrieve_documents(query, filename, user_id),
+        "question": query
+    }
 
-    # If you prefer the .invoke() style (like your screenshot):
-    documents = retriever.invoke(question)
 
+async def retrieve_node(state: State, config: RunnableConfig) -> Dict[str, Any]:
+    """Graph node: retrieves documents for the 'question' (and 'filename') in the state."""
+    question = state["question"]
+    user_id = utils.ensure_configurable(config)["user_id"]
     return {
-        "documents": documents,
+        "documents": await aretrieve_documents(question, state.get("filename", ""), user_id),
         "question": question
     }
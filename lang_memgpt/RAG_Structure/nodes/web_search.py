@@ -1,42 +1,44 @@
-
-from typing import Any, Dict
+import logging
+from typing import Any, Dict, List
 
 from langchain.schema import Document
-from langchain_community.tools.tavily_search import TavilySearchResults
 
-from lang_memgpt._schemas import State  # Updated to new schema
+from lang_memgpt import _utils as utils
+from lang_memgpt import _metrics as metrics
+from lang_memgpt._schemas import CorrectiveRagState
 from dotenv import load_dotenv
-from langchain_core.tools import tool
 
 load_dotenv()
-web_search_tool = TavilySearchResults(max_results=3)
+logger = logging.getLogger(__name__)
+web_search_tool = utils.RateLimitedTavilySearch(max_results=3)
+
+
+async def search_web(question: str) -> List[Document]:
+    """Searches the web for ``question``; the results are joined into one document."""
+    with metrics.span("rag", "web_search"):
+        tavily_results = await web_search_tool.ainvoke({"query": question})
+    if isinstance(tavily_results, str):
+        # The Tavily tool reports request errors as a string.
+        logger.error(f"Web search failed: {tavily_results}")
+        return []
+    joined_tavily_result = "\n".join(
+        [tavily_result["content"] for tavily_result in tavily_results]
+    )
+    return [Document(page_content=joined_tavily_result)]
 
 
-@tool
-async def web_search(state: State) -> Dict[str, Any]:
+async def web_search(state: CorrectiveRagState) -> Dict[str, Any]:
     """
-    Calls websearcher.
+    Adds web search results to the graded documents. Results already
+    searched speculatively, alongside retrieval, are used instead of
+    searching again.
 
     Args:
-        args (RouteQuestionSchema): Input schema containing the current state.
+        state: The current graph state
 
     Returns:
-        Literal["WEBSEARCH"]: The next step in the graph.
+        state: Documents with the web results appended
     """
-    print("---WEB SEARCH---")
-    question = state["question"]
-    documents = state["documents"]
-
-    tavily_results = web_search_tool.invoke({"query": question})
-    joined_tavily_result = "\n".join(
-        [tavily_result["content"] for tavily_result in tavily_results]
-    )
-    web_results = Document(page_content=joined_tavily_result)
-    if documents is not None:
-        documents.append(web_results)
-    else:
-        documents = [web_results]
-        return {"documents": documents, "question": question}
-
-    if __name__ == "__main__":
-        web_search(state={"question": "agent memory", "documents": None})
+    logger.debug("---WEB SEARCH---")
+    web_documents = state.get("web_documents") or await search_web(state["question"])
+    return {"documents": (state.get("documents") or []) + web_documents, "web_documents": web_documents}
@@ -1,23 +1,16 @@
+from lang_memgpt import _metrics as metrics
+from lang_memgpt import _utils as utils
 from lang_memgpt._schemas import State
-from lang_memgpt.RAG_Structure.chains.router import question_router, RouteQuery
 from lang_memgpt.RAG_Structure.consts import WEBSEARCH, RETRIEVE
+from lang_memgpt.RAG_Structure.local_router import get_local_router
+from langchain_core.runnables import ensure_config
 from langchain_core.tools import tool
 from pydantic import ValidationError
-import os
 
 import logging
 
-# Ensure the directory exists
-log_dir = "./logs"
-os.makedirs(log_dir, exist_ok=True)  # Create the directory if it doesn't exist
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,  # Log all INFO-level and above messages
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    filename=os.path.join(log_dir, "route_question.log"),  # File path
-    filemode="a"  # Append logs if the file exists; create if it doesn't
-)
+# Log through the application's handlers; the level is set by LOG_LEVEL.
+logger = logging.getLogger(__name__)
 
 
 @tool
@@ -31,10 +24,10 @@ def route_question(state: State) -> str:
 
     try:
         # Log the start of processing
-        logging.info("Starting route_question function.")
+        logger.debug("Starting route_question function.")
 
         # Log input state
-        logging.info(f"Received state: {state}")
+        logger.debug("Received state: %s", state)
 
         # Ensure 'state' contains a nested dictionary or unwrap if needed
         if "state" in state:
@@ -45,38 +38,40 @@ def route_question(state: State) -> str:
             raise ValueError(
                 "The 'state' parameter must contain a 'question' field.")
 
-        print("---ROUTE QUESTION---")
+        logger.debug("---ROUTE QUESTION---")
         question = state["question"]
 
-        source: RouteQuery = question_router.invoke({"question": question})
-        print(f"Routing source: {source}")
-        logging.info(f"Routing source identified: {source['datasource']}")
+        # Centroid similarity first; the LLM router only sees ambiguous questions.
+        with metrics.span("rag", "route_question"):
+            user_id = utils.ensure_configurable(ensure_config()).get("user_id")
+            source = get_local_router().route(question, user_id)
+        logger.info(f"Routing source identified: {source}")
 
-        if source['datasource'] == WEBSEARCH:
-            print("---ROUTE QUESTION TO WEB SEARCH---")
-            logging.info("Routing question to WEBSEARCH.")
+        if source == WEBSEARCH:
+            logger.debug("---ROUTE QUESTION TO WEB SEARCH---")
+            logger.info("Routing question to WEBSEARCH.")
             return WEBSEARCH
 
-        elif source['datasource'] == "vectorstore":
-            print("---ROUTE QUESTION TO RAG---")
-            logging.info("Routing question to RETRIEVE (RAG).")
+        elif source == "vectorstore":
+            logger.debug("---ROUTE QUESTION TO RAG---")
+            logger.info("Routing question to RETRIEVE (RAG).")
             return RETRIEVE
 
         else:
             # Handle unexpected sources gracefully
-            logging.warning(f"Unexpected routing source: {source['datasource']}")
+            logger.warning(f"Unexpected routing source: {source}")
             return "__end__"
 
     except ValidationError as ve:
         # Handle Pydantic validation errors
-        logging.error(f"Validation Error: {str(ve)}")
+        logger.error(f"Validation Error: {str(ve)}")
         return "Validation failed. Check input format."
 
     except Exception as e:
         # Catch any unexpected errors
-        logging.error(f"Unexpected error occurred: {str(e)}", exc_info=True)
+        logger.error(f"Unexpected error occurred: {str(e)}", exc_info=True)
         return "An unexpected error occurred. Please check the logs for details."
 
     finally:
         # Always log function exit
-        logging.info("Exiting route_question function.")
+        logger.debug("Exiting route_question function.")
@@ -1,15 +1,30 @@
 """Simple example memory extraction service."""
 
-from lang_memgpt.graph import memgraph
-from .tools import (
-    get_metar_data,
-    get_taf_data,
-    calculate,
-    unit_converter,
-    date_time_tool,
-    fetch_latest_news,
-)
-from lang_memgpt.RAG_Structure import retrieve  # Import RAG tool
+import importlib
+
+# Exports are imported on first access, so that importing one submodule
+# (e.g. ``lang_memgpt._pdf_worker`` in a PDF worker process) does not load
+# the graph and its tools.
+_EXPORTS = {
+    "memgraph": "lang_memgpt.graph",
+    "get_metar_data": "lang_memgpt.tools",
+    "get_taf_data": "lang_memgpt.tools",
+    "calculate": "lang_memgpt.tools",
+    "unit_converter": "lang_memgpt.tools",
+    "date_time_tool": "lang_memgpt.tools",
+    "fetch_latest_news": "lang_memgpt.tools",
+    "retrieve": "lang_memgpt.RAG_Structure",  # RAG tool
+}
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
+
+
 __all__ = [
     "memgraph",
     "get_metar_data",
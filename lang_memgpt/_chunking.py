@@ -0,0 +1,127 @@
+"""Token-offset chunking and token-budget embedding batches.
+
+Each page is tokenized once with a cached ``tiktoken`` encoding. Chunks are
+cut on token offsets, preferring paragraph, then sentence, then line breaks
+within the last half of the token window, so no text is re-encoded while
+searching for split points. Every chunk carries its ``token_count`` (and the
+``start_index`` of its text in the page), which ``token_batches`` uses to pack
+embedding requests up to a token budget without tokenizing again.
+"""
+
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import Iterable, Iterator, List, Tuple
+
+import numpy as np
+import tiktoken
+from langchain_core.documents import Document
+
+# Encoding of the OpenAI embedding models (text-embedding-ada-002 and -3).
+ENCODING_NAME = "cl100k_base"
+
+# Break preference, strongest first; the cut goes right after the match.
+_BOUNDARIES = [
+    (re.compile(r"\n[ \t]*\n\s*"), 3),
+    (re.compile(r"[.!?][\"')\]]*\s+"), 2),
+    (re.compile(r"\n\s*"), 1),
+]
+
+
+@lru_cache(maxsize=4)
+def get_encoding(name: str = ENCODING_NAME) -> tiktoken.Encoding:
+    return tiktoken.get_encoding(name)
+
+
+def _token_offsets(encoding: tiktoken.Encoding, text: str, tokens: List[int]) -> np.ndarray:
+    # Character offset where each token starts, from the tokens' UTF-8 lengths.
+    lengths = np.fromiter((len(b) for b in encoding.decode_tokens_bytes(tokens)), np.int64, len(tokens))
+    byte_offsets = np.concatenate(([0], np.cumsum(lengths[:-1])))
+    encoded = np.frombuffer(text.encode("utf-8"), dtype=np.uint8)
+    if len(encoded) == len(text):
+        return byte_offsets
+    # Count the characters (non-continuation bytes) before each token; a
+    # token starting inside a character belongs to that character.
+    lead = (encoded & 0xC0) != 0x80
+    chars_before = np.concatenate(([0], np.cumsum(lead)))
+    return chars_before[byte_offsets] - ~lead[byte_offsets]
+
+
+def _boundary_scores(text: str, offsets: np.ndarray) -> np.ndarray:
+    # scores[i] rates cutting right before token i.
+    scores = np.zeros(len(offsets) + 1, dtype=np.int8)
+    for pattern, score in reversed(_BOUNDARIES):
+        spans = np.array([m.span() for m in pattern.finditer(text)], dtype=np.int64).reshape(-1, 2)
+        tokens = np.searchsorted(offsets, spans[:, 1], side="right") - 1
+        keep = (tokens > 0) & (offsets[np.maximum(tokens, 0)] >= spans[:, 0])
+        scores[tokens[keep]] = np.maximum(scores[tokens[keep]], score)
+    return scores
+
+
+def split_text(text: str, chunk_tokens: int, overlap_tokens: int = 0) -> Iterator[Tuple[int, str, int]]:
+    """
+    Yields ``(start_index, chunk_text, token_count)`` for one text.
+
+    Chunks have at most ``chunk_tokens`` tokens and end on the strongest
+    boundary in the second half of the window, or at the window end when
+    there is none.
+    """
+    encoding = get_encoding()
+    tokens = encoding.encode(text, disallowed_special=())
+    if not tokens:
+        return
+    offsets = _token_offsets(encoding, text, tokens)
+    scores = _boundary_scores(text, offsets)
+    count = len(tokens)
+    overlap_tokens = min(overlap_tokens, chunk_tokens // 2)
+
+    start = 0
+    while start < count:
+        end = min(start + chunk_tokens, count)
+        if end < count:
+            window = scores[start + chunk_tokens // 2: end + 1]
+            if window.max() > 0:
+                # Last position with the best score.
+                end = start + chunk_tokens // 2 + len(window) - 1 - int(np.argmax(window[::-1]))
+        begin_char = int(offsets[start])
+        end_char = int(offsets[end]) if end < count else len(text)
+        chunk = text[begin_char:end_char]
+        stripped = chunk.strip()
+        if stripped:
+            yield begin_char + (len(chunk) - len(chunk.lstrip())), stripped, end - start
+        if end >= count:
+            break
+        start = max(end - overlap_tokens, start + 1)
+
+
+def split_documents(
+    documents: Iterable[Document], chunk_tokens: int = 250, overlap_tokens: int = 0
+) -> List[Document]:
+    """Splits documents into chunks with ``token_count`` and ``start_index`` metadata."""
+    chunks = []
+    for document in documents:
+        for start_index, text, token_count in split_text(document.page_content, chunk_tokens, overlap_tokens):
+            chunks.append(Document(
+                page_content=text,
+                metadata={**document.metadata, "start_index": start_index, "token_count": token_count},
+            ))
+    return chunks
+
+
+def token_batches(chunks: List[Document], max_tokens: int, max_items: int) -> Iterator[List[Document]]:
+    """
+    Packs consecutive chunks into batches of at most ``max_items`` chunks and
+    ``max_tokens`` tokens (a single larger chunk gets a batch of its own).
+    """
+    batch: List[Document] = []
+    batch_tokens = 0
+    for chunk in chunks:
+        tokens = chunk.metadata.get("token_count", 0)
+        if batch and (len(batch) >= max_items or batch_tokens + tokens > max_tokens):
+            yield batch
+            batch, batch_tokens = [], 0
+        batch.append(chunk)
+        batch_tokens += tokens
+    if batch:
+        yield batch
@@ -0,0 +1,277 @@
+"""Periodic consolidation of each user's recall memories.
+
+Every ``save_recall_memory`` call adds a vector under a fresh id, so a user
+who repeats a fact accumulates near-identical memories that fill the
+``top_k`` slots ``load_memories`` puts in the prompt. Consolidation walks one
+user's recall memories newest first and groups each with the first kept
+memory it duplicates: the same normalized text (``_dedup.content_hash``) or
+an embedding cosine similarity of at least ``settings.memory_merge_threshold``.
+The newest memory of a group survives, so the group keeps its latest wording
+and timestamp; the rest are deleted in bulk. Past
+``settings.memory_max_per_user`` surviving memories, the oldest are evicted
+as well, so a user's index footprint stays bounded.
+
+Consolidation runs as a ``consolidate`` job on the ingestion job queue (its
+paths are user ids; none means every user). The API submits one every
+``settings.memory_consolidation_interval`` seconds, once across all of its
+workers; ``make consolidate`` runs it by hand, with ``DRY_RUN=1`` to print
+the report without deleting::
+
+    python -m lang_memgpt._consolidation --user ana --dry-run
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+from lang_memgpt import _constants as constants
+from lang_memgpt import _dedup as dedup
+from lang_memgpt import _jobs as jobs
+from lang_memgpt import _memory_buffer as memory_buffer
+from lang_memgpt import _metrics as metrics
+from lang_memgpt import _settings as settings
+from lang_memgpt import _utils as utils
+
+logger = logging.getLogger(__name__)
+
+# Ids per fetch request (they go in the query string) and per delete request
+FETCH_BATCH_SIZE = 100
+DELETE_BATCH_SIZE = 1000
+
+# How often each worker checks whether a scheduled consolidation is due
+SCHEDULE_CHECK_SECONDS = 60
+
+_RECALL_MARKER = "/recall/"
+
+
+class RecallMemory(NamedTuple):
+    id: str
+    text: str
+    timestamp: str
+    vector: List[float]
+
+
+class ConsolidationReport(NamedTuple):
+    user_id: str
+    scanned: int
+    # Each group lists its surviving memory first, then the duplicates it replaces.
+    groups: List[List[RecallMemory]]
+    evicted: List[RecallMemory]
+    dry_run: bool
+
+    @property
+    def duplicates(self) -> List[RecallMemory]:
+        return [memory for group in self.groups for memory in group[1:]]
+
+    @property
+    def deleted_ids(self) -> List[str]:
+        return [memory.id for memory in self.duplicates + self.evicted]
+
+    @property
+    def kept(self) -> int:
+        return self.scanned - len(self.deleted_ids)
+
+    def format(self) -> str:
+        verb = "Would delete" if self.dry_run else "Deleted"
+        lines = [
+            f"User {self.user_id}: {self.scanned} recall memories, {len(self.duplicates)} duplicates,"
+            f" {len(self.evicted)} evicted, {self.kept} kept. {verb} {len(self.deleted_ids)}."
+        ]
+        for group in self.groups:
+            lines.append(f"  keep {group[0].timestamp} {group[0].text!r}")
+            lines.extend(f"    drop {m.timestamp} {m.text!r}" for m in group[1:])
+        lines.extend(f"  evict {m.timestamp} {m.text!r}" for m in self.evicted)
+        return "\n".join(lines)
+
+
+def recall_prefix(user_id: str) -> str:
+    return constants.INSERT_PATH.format(user_id=user_id, event_id="")
+
+
+def list_users(index: Any) -> List[str]:
+    """Users with recall memories in the namespace, from their vector ids."""
+    users = set()
+    for ids in index.list(prefix="user/", namespace=settings.SETTINGS.pinecone_namespace):
+        for vector_id in ids:
+            if _RECALL_MARKER in vector_id:
+                users.add(vector_id[len("user/"):vector_id.rindex(_RECALL_MARKER)])
+    return sorted(users)
+
+
+def fetch_recall_memories(index: Any, user_id: str) -> List[RecallMemory]:
+    """All of a user's recall memories with their vectors, newest first."""
+    namespace = settings.SETTINGS.pinecone_namespace
+    ids = [i for page in index.list(prefix=recall_prefix(user_id), namespace=namespace) for i in page]
+    memories = []
+    for start in range(0, len(ids), FETCH_BATCH_SIZE):
+        response = index.fetch(ids=ids[start:start + FETCH_BATCH_SIZE], namespace=namespace)
+        for vector_id, document in (response.get("vectors") or {}).items():
+            metadata = document["metadata"] or {}
+            if metadata.get(constants.TYPE_KEY) != "recall":
+                continue
+            memories.append(RecallMemory(
+                id=vector_id,
+                text=metadata.get(constants.PAYLOAD_KEY, ""),
+                timestamp=str(metadata.get(constants.TIMESTAMP_KEY, "")),
+                vector=list(document["values"]),
+            ))
+    # ISO timestamps of one timezone sort chronologically as strings.
+    return sorted(memories, key=lambda m: m.timestamp, reverse=True)
+
+
+def group_duplicates(memories: List[RecallMemory], threshold: float) -> List[List[RecallMemory]]:
+    """
+    Groups ``memories`` (newest first) around the first memory each one
+    duplicates. Every group starts with its newest member.
+    """
+    groups: List[List[RecallMemory]] = []
+    by_hash: Dict[str, int] = {}
+    heads = np.zeros((len(memories), len(memories[0].vector) if memories else 0), dtype=np.float32)
+    for memory in memories:
+        digest = dedup.content_hash(memory.text)
+        position = by_hash.get(digest)
+        vector = np.asarray(memory.vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        vector = vector / norm if norm else vector
+        if position is None and groups and threshold <= 1:
+            similarities = heads[:len(groups)] @ vector
+            best = int(np.argmax(similarities))
+            if similarities[best] >= threshold:
+                position = best
+        if position is None:
+            position = len(groups)
+            groups.append([])
+            heads[position] = vector
+        by_hash.setdefault(digest, position)
+        groups[position].append(memory)
+    return groups
+
+
+def _no_progress(**counts: int) -> None:
+    pass
+
+
+def delete_ids(index: Any, ids: List[str]) -> None:
+    for start in range(0, len(ids), DELETE_BATCH_SIZE):
+        index.delete(ids=ids[start:start + DELETE_BATCH_SIZE], namespace=settings.SETTINGS.pinecone_namespace)
+
+
+def consolidate_user(
+    user_id: str,
+    dry_run: bool = False,
+    threshold: float = -1,
+    max_memories: int = -1,
+    index: Optional[Any] = None,
+) -> ConsolidationReport:
+    """
+    Merges one user's duplicate recall memories and evicts the oldest past the cap.
+
+    Args:
+        user_id (str): Whose memories to consolidate.
+        dry_run (bool): Report what would be deleted without deleting it.
+        threshold (float): Cosine similarity at which two memories are
+            duplicates; defaults to ``settings.memory_merge_threshold``.
+            Values above 1 merge identical text only.
+        max_memories (int): Memories kept per user; defaults to
+            ``settings.memory_max_per_user``. 0 keeps all of them.
+
+    Returns:
+        ConsolidationReport: What was (or would be) kept and deleted.
+    """
+    threshold = settings.SETTINGS.memory_merge_threshold if threshold < 0 else threshold
+    max_memories = settings.SETTINGS.memory_max_per_user if max_memories < 0 else max_memories
+    index = index or utils.get_index()
+
+    with metrics.span("memory", "consolidate", user_id=user_id) as attrs:
+        memories = fetch_recall_memories(index, user_id)
+        groups = group_duplicates(memories, threshold)
+        # Groups are ordered by their newest member, so the oldest come last;
+        # an evicted group goes with all of its duplicates.
+        kept = groups[:max_memories] if max_memories else groups
+        report = ConsolidationReport(
+            user_id=user_id,
+            scanned=len(memories),
+            groups=[group for group in kept if len(group) > 1],
+            evicted=[memory for group in groups[len(kept):] for memory in group],
+            dry_run=dry_run,
+        )
+        attrs.update(scanned=report.scanned, deleted=len(report.deleted_ids), dry_run=dry_run)
+        if not dry_run and report.deleted_ids:
+            delete_ids(index, report.deleted_ids)
+    if not dry_run:
+        metrics.REGISTRY.inc(
+            "alfred_recall_memories_consolidated_total", len(report.duplicates),
+            help="Recall memories deleted by consolidation.", reason="duplicate",
+        )
+        metrics.REGISTRY.inc(
+            "alfred_recall_memories_consolidated_total", len(report.evicted),
+            help="Recall memories deleted by consolidation.", reason="evicted",
+        )
+    logger.info(f"[MEMORY] {report.format().splitlines()[0]}")
+    return report
+
+
+@jobs.register("consolidate")
+def consolidate_users(user_ids: List[str], progress: jobs.Progress = _no_progress) -> str:
+    """Job handler: consolidates ``user_ids``, or every user when empty."""
+    if settings.SETTINGS.memory_write_behind:
+        memory_buffer.get_memory_buffer().flush()
+    index = utils.get_index()
+    user_ids = user_ids or list_users(index)
+    progress(files_total=len(user_ids))
+    deleted = 0
+    for done, user_id in enumerate(user_ids, start=1):
+        deleted += len(consolidate_user(user_id, index=index).deleted_ids)
+        progress(files_done=done)
+    return f"Consolidated recall memories of {len(user_ids)} user(s); deleted {deleted}."
+
+
+async def run_periodically(interval: float) -> None:
+    """
+    Submit a ``consolidate`` job for every user each ``interval`` seconds.
+
+    Every API worker runs this schedule; the job store queues a job only when
+    no other worker has queued one within the interval, so there is one run
+    per interval however many workers there are.
+    """
+    started = time.time()
+    while True:
+        await asyncio.sleep(min(interval, SCHEDULE_CHECK_SECONDS))
+        if time.time() - started < interval:
+            continue
+        try:
+            jobs.get_job_queue().submit_if_due("consolidate", [], interval)
+        except Exception as e:
+            logger.error(f"[MEMORY] Failed to queue memory consolidation: {str(e)}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--user", action="append", default=[], help="user id (repeatable); default: all users")
+    parser.add_argument("--dry-run", action="store_true", help="report without deleting")
+    args = parser.parse_args(argv)
+    index = utils.get_index()
+    for user_id in args.user or list_users(index):
+        print(consolidate_user(user_id, dry_run=args.dry_run, index=index).format())
+
+
+__all__ = [
+    "ConsolidationReport",
+    "RecallMemory",
+    "consolidate_user",
+    "consolidate_users",
+    "fetch_recall_memories",
+    "group_duplicates",
+    "list_users",
+    "run_periodically",
+]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,823 @@
+"""The document corpus shared by the RAG graph and ``document_retriever``.
+
+Ingested pages and table rows are chunked, deduplicated and embedded once,
+into one Chroma collection under ``settings.chroma_persist_directory``.
+A chunk whose text is already stored (by ``_dedup.content_hash``) is not
+embedded again; the new document is added to the stored chunk's ``owners``
+and ``sources``, and a chunk is deleted only when its last owner is.
+After every ingestion the collection is published as a read-only
+``_vector_index`` segment next to it, and both the ``retrieve`` node and the
+``document_retriever`` tool search that segment. A publish reads back from
+Chroma only the chunks changed since the last one and merges them into the
+live segment's rows; the whole collection is read, a page at a time, only
+when there is no usable segment yet.
+
+Every ingested file is a document, identified by a digest of its contents
+(the ``document_id`` returned by ``/api/upload``). ``DocumentRegistry``
+records each document's file name, page range and chunk id range
+(``<document_id>:000000`` upwards), and its summary and outline (see
+``_summaries``). Published segments keep each
+document's chunks in consecutive rows, so a search scoped to a file scans
+only that file's rows.
+
+Documents are partitioned into namespaces, each a separate corpus: the
+shared ``global`` namespace (the docs folder, stored directly under
+``settings.chroma_persist_directory``) and one namespace per user, whose
+uploads live in ``settings.uploads_directory/<namespace>`` and whose corpus
+lives in ``<chroma_persist_directory>/users/<namespace>``. A user's searches
+cover their own namespace and the global one, so their cost grows with one
+user's documents rather than everyone's. User namespaces hold at most
+``settings.namespace_max_chunks`` chunks; beyond that the least recently
+searched documents are evicted, uploaded file included. Each namespace also
+has its own Parquet tables (``tools/table_tool``) and router centroids
+(``RAG_Structure/local_router``), which ``on_remove`` hooks drop along with
+their document.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from lang_memgpt import _chunking as chunking
+from lang_memgpt import _dedup as dedup
+from lang_memgpt import _settings as settings
+from lang_memgpt import _utils as utils
+from lang_memgpt import _vector_index as vector_index
+
+logger = logging.getLogger(__name__)
+
+COLLECTION_NAME = "rag-chroma"
+CHUNK_TOKENS = 250
+
+# Content hashes per stored-chunk lookup
+HASH_LOOKUP_BATCH = 500
+# Chunks read back from Chroma per request when publishing
+PUBLISH_BATCH = 1000
+
+GLOBAL_NAMESPACE = "global"
+# User corpora kept open per process; each holds a Chroma client and a mapped segment.
+OPEN_NAMESPACES = 64
+
+_UNSAFE_RE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+# Called with the namespace and ``DocumentInfo`` of every removed document,
+# so modules keeping their own per-document data (Parquet tables, router
+# centroids) drop it too.
+REMOVAL_HOOKS: List[Callable[[str, "DocumentInfo"], None]] = []
+
+
+def on_remove(func: Callable[[str, "DocumentInfo"], None]) -> Callable[[str, "DocumentInfo"], None]:
+    """Register ``func`` to run after a document is removed from a namespace."""
+    REMOVAL_HOOKS.append(func)
+    return func
+
+
+def _no_progress(**counts: int) -> None:
+    pass
+
+
+def file_digest(path: str) -> str:
+    """Document id of a file: the first 16 hex digits of its SHA-256."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(1024 * 1024):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def _ref_prefix(metadata: Dict[str, Any]) -> str:
+    """The part of a chunk's ``_dedup.source_ref`` naming its document."""
+    return str(metadata["table"]) if "table" in metadata else os.path.basename(str(metadata.get("source", "")))
+
+
+def _ref_document(ref: str) -> str:
+    """The ``_ref_prefix`` part of a ``_dedup.source_ref``."""
+    return ref.rsplit("#row", 1)[0] if "#row" in ref else ref.rsplit(":p", 1)[0]
+
+
+def _owners(metadata: Dict[str, Any], by_ref: Dict[str, str]) -> List[str]:
+    """
+    Documents sharing a chunk: its ``owners``, or for chunks stored before
+    those were recorded, its ``document_id`` and the documents its
+    ``sources`` name.
+    """
+    if metadata.get("owners"):
+        return json.loads(metadata["owners"])
+    owners = [metadata["document_id"]] if metadata.get("document_id") else []
+    for ref in json.loads(metadata.get("sources") or "[]"):
+        owner = by_ref.get(_ref_document(ref))
+        if owner and owner not in owners:
+            owners.append(owner)
+    return owners
+
+
+class DocumentInfo(NamedTuple):
+    document_id: str
+    filename: str
+    ref: str
+    kind: str
+    first_page: Optional[int]
+    last_page: Optional[int]
+    chunks: int
+    first_chunk: str
+    last_chunk: str
+    ingested_at: float
+    last_used: float
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    document_id TEXT PRIMARY KEY,
+    filename TEXT NOT NULL,
+    ref TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    first_page INTEGER,
+    last_page INTEGER,
+    chunks INTEGER NOT NULL,
+    first_chunk TEXT NOT NULL,
+    last_chunk TEXT NOT NULL,
+    ingested_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS documents_filename ON documents (filename);
+CREATE INDEX IF NOT EXISTS documents_last_used ON documents (last_used);
+CREATE TABLE IF NOT EXISTS summaries (
+    document_id TEXT PRIMARY KEY,
+    summary TEXT NOT NULL,
+    outline TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+
+class DocumentRegistry:
+    """SQLite table of the documents in the corpus. Safe to use from several threads."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def upsert(self, info: DocumentInfo) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO documents ({', '.join(DocumentInfo._fields)})"
+                f" VALUES ({', '.join('?' * len(DocumentInfo._fields))})",
+                tuple(info),
+            )
+
+    def delete(self, document_id: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM documents WHERE document_id = ?", (document_id,))
+            conn.execute("DELETE FROM summaries WHERE document_id = ?", (document_id,))
+
+    def set_summary(self, document_id: str, summary: str, outline: List[Dict[str, str]]) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO summaries (document_id, summary, outline, created_at) VALUES (?, ?, ?, ?)",
+                (document_id, summary, json.dumps(outline), time.time()),
+            )
+
+    def get_summary(self, document_id: str) -> Optional[Dict[str, Any]]:
+        """``{"summary", "outline"}`` of a document, if one was built."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT summary, outline FROM summaries WHERE document_id = ?", (document_id,)
+            ).fetchone()
+        return {"summary": row["summary"], "outline": json.loads(row["outline"])} if row else None
+
+    def get(self, document_id: str) -> Optional[DocumentInfo]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM documents WHERE document_id = ?", (document_id,)).fetchone()
+        return DocumentInfo(*row) if row else None
+
+    def add_chunks(self, document_id: str, count: int) -> None:
+        """Counts ``count`` more chunks against a document, e.g. ones handed over from another."""
+        with self._connect() as conn:
+            conn.execute("UPDATE documents SET chunks = chunks + ? WHERE document_id = ?", (count, document_id))
+
+    def touch(self, last_used: Dict[str, float]) -> None:
+        """Records when documents were last used, for least-recently-used eviction."""
+        if last_used:
+            with self._connect() as conn:
+                conn.executemany(
+                    "UPDATE documents SET last_used = MAX(last_used, ?) WHERE document_id = ?",
+                    [(used, document_id) for document_id, used in last_used.items()],
+                )
+
+    def total_chunks(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COALESCE(SUM(chunks), 0) FROM documents").fetchone()[0]
+
+    def least_recently_used(self) -> List[DocumentInfo]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT * FROM documents ORDER BY last_used").fetchall()
+        return [DocumentInfo(*row) for row in rows]
+
+    def all(self) -> List[DocumentInfo]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT * FROM documents ORDER BY filename").fetchall()
+        return [DocumentInfo(*row) for row in rows]
+
+    def by_filename(self, filename: str) -> Optional[DocumentInfo]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM documents WHERE filename = ? ORDER BY ingested_at DESC LIMIT 1", (filename,)
+            ).fetchone()
+        return DocumentInfo(*row) if row else None
+
+    def find(self, name: str) -> List[DocumentInfo]:
+        """
+        Documents matching a file name as the model wrote it: the exact name,
+        else case-insensitive matches of the name with or without extension,
+        else names containing it.
+        """
+        name = os.path.basename(name.strip())
+        if not name:
+            return []
+        documents = self.all()
+        for matches in (
+            lambda d: d.filename == name,
+            lambda d: d.filename.lower() == name.lower(),
+            lambda d: os.path.splitext(d.filename)[0].lower() == os.path.splitext(name)[0].lower(),
+            lambda d: os.path.splitext(name)[0].lower() in d.filename.lower(),
+        ):
+            found = [d for d in documents if matches(d)]
+            if found:
+                return found
+        return []
+
+
+class CorpusIndex:
+    """Chunks, embeds and searches the documents of one namespace.
+
+    Args:
+        root: Directory holding the Chroma collection and its segments.
+        document_embeddings: Embeds chunks at ingestion time.
+        query_embeddings: Embeds search queries.
+        namespace: Name of the namespace, for logs and results.
+        max_chunks: Quota enforced by ``enforce_quota`` (0 for none).
+        files_directory: Where the namespace's files are stored; evicted
+            documents' files are deleted from it.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        document_embeddings: Embeddings,
+        query_embeddings: Embeddings,
+        namespace: str = GLOBAL_NAMESPACE,
+        max_chunks: int = 0,
+        files_directory: Optional[str] = None,
+    ) -> None:
+        self.root = root
+        self.document_embeddings = document_embeddings
+        self.query_embeddings = query_embeddings
+        self.namespace = namespace
+        self.max_chunks = max_chunks
+        self.files_directory = files_directory
+        self.segments = vector_index.SegmentStore(os.path.join(root, "segments"))
+        self._registry: Optional[DocumentRegistry] = None
+        self._vectorstore = None
+        # Last use of documents searched since the registry was last touched.
+        self._last_used: Dict[str, float] = {}
+        self._touched_at = time.monotonic()
+        # Chunk ids added, updated or deleted since the last publish.
+        self._changed: set = set()
+        self._lock = threading.Lock()
+
+    @property
+    def registry(self) -> DocumentRegistry:
+        """The document registry, created on first use."""
+        if self._registry is None:
+            self._registry = DocumentRegistry(os.path.join(self.root, "documents.sqlite3"))
+        return self._registry
+
+    @property
+    def vectorstore(self):
+        """The Chroma collection, opened on first use."""
+        if self._vectorstore is None:
+            from langchain_community.vectorstores import Chroma
+
+            self._vectorstore = Chroma(
+                collection_name=COLLECTION_NAME,
+                embedding_function=self.document_embeddings,
+                persist_directory=self.root,
+            )
+        return self._vectorstore
+
+    def add_documents(
+        self,
+        documents: List[Document],
+        progress: Callable[..., None] = _no_progress,
+        on_batch: Optional[Callable[[List[List[float]], List[dict]], None]] = None,
+    ) -> dedup.DedupReport:
+        """
+        Chunks, deduplicates and embeds ``documents``, then publishes a new
+        segment with them.
+
+        Args:
+            documents (List[Document]): Loaded pages and table rows.
+            progress (Callable): Called with ``chunks_total`` and
+                ``chunks_embedded`` counts. When it raises (e.g. a cancelled
+                job), the chunks added so far are removed again.
+            on_batch (Callable): Called with the embeddings and metadata of
+                each stored batch, and once with the stored embeddings of
+                chunks that were already in the collection.
+
+        Returns:
+            DedupReport: How many chunks were embedded and skipped.
+        """
+        chunks = chunking.split_documents(documents, chunk_tokens=CHUNK_TOKENS)
+        # Embed repeated passages (boilerplate, repeated abstracts) only once,
+        # within this batch and across everything already stored.
+        unique, report = dedup.deduplicate(chunks)
+        chunks, shared, matches = self._match_stored(unique)
+        report = report._replace(stored_duplicates=len(unique) - len(chunks))
+        logger.info(f"Deduplication removed {report.saved} of {report.chunks_in} chunks "
+                    f"({report.exact_duplicates} exact, {report.near_duplicates} near, "
+                    f"{report.stored_duplicates} already stored)")
+        progress(chunks_total=len(chunks))
+
+        # Number each document's chunks, so its chunk ids form a range.
+        ids = []
+        counts: Dict[str, int] = {}
+        for chunk in chunks:
+            document_id = chunk.metadata.get("document_id")
+            if document_id:
+                ids.append(f"{document_id}:{counts.get(document_id, 0):06d}")
+                counts[document_id] = counts.get(document_id, 0) + 1
+            else:
+                ids.append(uuid.uuid4().hex)
+
+        # One token-budget embedding batch at a time, so progress and
+        # cancellation are observed between batches.
+        added_ids: List[str] = []
+        try:
+            for batch in chunking.token_batches(
+                chunks, settings.SETTINGS.embedding_batch_tokens, max(1, settings.SETTINGS.ingest_batch_size)
+            ):
+                batch_ids = self.vectorstore.add_documents(batch, ids=ids[len(added_ids):len(added_ids) + len(batch)])
+                added_ids.extend(batch_ids)
+                self._mark_changed(batch_ids)
+                if on_batch is not None:
+                    stored = self.vectorstore.get(ids=batch_ids, include=["embeddings", "metadatas"])
+                    on_batch(stored["embeddings"], stored["metadatas"])
+                progress(chunks_embedded=len(added_ids))
+        except BaseException:
+            if added_ids:
+                self.vectorstore.delete(ids=added_ids)
+            raise
+        if shared:
+            self.vectorstore._collection.update(ids=list(shared), metadatas=list(shared.values()))
+            self._mark_changed(shared)
+            if on_batch is not None:
+                # Reused passages count towards the new documents too.
+                stored = self.vectorstore._collection.get(ids=list(shared), include=["embeddings"])
+                vectors = dict(zip(stored["ids"], stored["embeddings"]))
+                on_batch([vectors[chunk_id] for chunk_id, _ in matches], [chunk.metadata for _, chunk in matches])
+        self._register(documents, unique, counts)
+        self.vectorstore.persist()
+        self.publish()
+        return report
+
+    def _match_stored(
+        self, chunks: List[Document]
+    ) -> Tuple[List[Document], Dict[str, Dict[str, Any]], List[Tuple[str, Document]]]:
+        """
+        Splits off chunks whose ``content_hash`` is already in the collection.
+
+        Returns:
+            The chunks still to embed; the updated metadata of each stored
+            chunk they match, with the new documents added to its ``owners``,
+            ``sources`` and ``duplicates``; and the ``(stored id, chunk)``
+            pairs matched.
+        """
+        hashes = sorted({chunk.metadata["content_hash"] for chunk in chunks})
+        stored: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        for start in range(0, len(hashes), HASH_LOOKUP_BATCH):
+            found = self.vectorstore._collection.get(
+                where={"content_hash": {"$in": hashes[start:start + HASH_LOOKUP_BATCH]}}, include=["metadatas"]
+            )
+            for chunk_id, metadata in zip(found["ids"], found["metadatas"]):
+                stored.setdefault(metadata["content_hash"], (chunk_id, metadata))
+        if not stored:
+            return chunks, {}, []
+
+        by_ref = {info.ref: info.document_id for info in self.registry.all()}
+        remaining, shared, matches = [], {}, []
+        for chunk in chunks:
+            match = stored.get(chunk.metadata["content_hash"])
+            if match is None:
+                remaining.append(chunk)
+                continue
+            chunk_id, metadata = match
+            matches.append((chunk_id, chunk))
+            metadata = shared.get(chunk_id, metadata)
+            owners = _owners(metadata, by_ref)
+            owners += [o for o in json.loads(chunk.metadata["owners"]) if o not in owners]
+            sources = json.loads(metadata.get("sources") or "[]")
+            sources += [ref for ref in json.loads(chunk.metadata["sources"]) if ref not in sources]
+            shared[chunk_id] = {
+                **metadata,
+                "owners": json.dumps(owners),
+                "sources": json.dumps(sources),
+                "duplicates": int(metadata.get("duplicates", 0)) + chunk.metadata["duplicates"] + 1,
+            }
+        return remaining, shared, matches
+
+    def _register(self, documents: List[Document], chunks: List[Document], counts: Dict[str, int]) -> None:
+        pages: Dict[str, List[int]] = {}
+        for chunk in chunks:
+            if "page" in chunk.metadata and chunk.metadata.get("document_id"):
+                pages.setdefault(chunk.metadata["document_id"], []).append(int(chunk.metadata["page"]))
+        registered = set()
+        for document in documents:
+            document_id = document.metadata.get("document_id")
+            if not document_id or document_id in registered:
+                continue
+            registered.add(document_id)
+            count = counts.get(document_id, 0)
+            document_pages = pages.get(document_id, [])
+            self.registry.upsert(DocumentInfo(
+                document_id=document_id,
+                filename=os.path.basename(str(document.metadata.get("source", ""))),
+                ref=_ref_prefix(document.metadata),
+                kind="table" if "table" in document.metadata else "pdf",
+                first_page=min(document_pages) if document_pages else None,
+                last_page=max(document_pages) if document_pages else None,
+                chunks=count,
+                first_chunk=f"{document_id}:{0:06d}" if count else "",
+                last_chunk=f"{document_id}:{count - 1:06d}" if count else "",
+                ingested_at=time.time(),
+                last_used=time.time(),
+            ))
+
+    def remove_document(self, document_id: str) -> int:
+        """
+        Removes a document and its registry entry; the next publish drops its rows.
+
+        Chunks deduplicated across documents stay while another document
+        still owns them: the removed document is dropped from their
+        ``owners`` and ``sources``, and a chunk it held passes to the next
+        owner. Only chunks no other document owns are deleted.
+
+        Returns:
+            The number of chunks deleted.
+        """
+        collection = self.vectorstore._collection
+        documents = {info.document_id: info for info in self.registry.all()}
+        removed = documents.pop(document_id, None)
+        by_ref = {info.ref: info.document_id for info in documents.values()}
+
+        stored = collection.get(include=["metadatas"])
+        deleted, updates = [], {}
+        handed_over: Dict[str, int] = {}
+        for chunk_id, metadata in zip(stored["ids"], stored["metadatas"]):
+            metadata = metadata or {}
+            owners = _owners(metadata, by_ref)
+            if document_id not in owners and metadata.get("document_id") != document_id:
+                continue
+            remaining = [owner for owner in owners if owner != document_id and owner in documents]
+            if not remaining:
+                deleted.append(chunk_id)
+                continue
+            holder = metadata.get("document_id")
+            if holder not in remaining:
+                holder = remaining[0]
+                handed_over[holder] = handed_over.get(holder, 0) + 1
+            # Keep refs to the removed document's file name when a remaining
+            # owner (e.g. its replacement) has the same name.
+            kept_refs = {documents[owner].ref for owner in remaining}
+            sources = [ref for ref in json.loads(metadata.get("sources") or "[]")
+                       if removed is None or _ref_document(ref) != removed.ref or _ref_document(ref) in kept_refs]
+            updates[chunk_id] = {**metadata, "document_id": holder, "owners": json.dumps(remaining),
+                                 "sources": json.dumps(sources)}
+        if deleted:
+            collection.delete(ids=deleted)
+        if updates:
+            collection.update(ids=list(updates), metadatas=list(updates.values()))
+        self._mark_changed(deleted + list(updates))
+        for holder, count in handed_over.items():
+            self.registry.add_chunks(holder, count)
+        self.registry.delete(document_id)
+        if removed is not None:
+            for hook in REMOVAL_HOOKS:
+                try:
+                    hook(self.namespace, removed)
+                except Exception as e:
+                    logger.error(f"Failed to clean up after removing {removed.filename}: {str(e)}")
+        if updates:
+            logger.info(f"Kept {len(updates)} chunks of {document_id} still owned by other documents")
+        return len(deleted)
+
+    def enforce_quota(self, keep: Optional[set] = None) -> List[DocumentInfo]:
+        """
+        Evicts least recently used documents (never those in ``keep``) until
+        the namespace is within ``max_chunks``, and publishes the result.
+
+        Returns:
+            The evicted documents.
+        """
+        if self.max_chunks <= 0:
+            return []
+        self.flush_last_used()
+        total = self.registry.total_chunks()
+        evicted = []
+        for info in self.registry.least_recently_used():
+            if total <= self.max_chunks:
+                break
+            if keep and info.document_id in keep:
+                continue
+            total -= self.remove_document(info.document_id)
+            if self.files_directory:
+                path = os.path.join(self.files_directory, info.filename)
+                if os.path.isfile(path):
+                    os.remove(path)
+            evicted.append(info)
+        if total > self.max_chunks:
+            logger.warning(f"Namespace {self.namespace} holds {total} chunks, over its quota of {self.max_chunks}")
+        if evicted:
+            logger.info(f"Evicted {len(evicted)} documents from namespace {self.namespace}: "
+                        f"{', '.join(info.filename for info in evicted)}")
+            self.publish()
+        return evicted
+
+    def _mark_changed(self, chunk_ids) -> None:
+        with self._lock:
+            self._changed.update(chunk_ids)
+
+    def publish(self) -> int:
+        """
+        Publishes the collection as the next segment generation: the live
+        segment's rows with the chunks changed since the last publish read
+        back from Chroma, or the whole collection when the live segment has
+        no row ids or no longer matches the collection's size.
+        """
+        with self._lock:
+            changed, self._changed = self._changed, set()
+        try:
+            return self.segments.update(lambda live: self._build_segment(live, changed))
+        except BaseException:
+            self._mark_changed(changed)
+            raise
+
+    def _build_segment(self, live: Optional[vector_index.VectorIndex], changed: set) -> vector_index.VectorIndex:
+        collection = self.vectorstore._collection
+        if live is not None and live.ids is not None:
+            keep = [row for row, chunk_id in enumerate(live.ids) if chunk_id not in changed]
+            rows = self._read_chunks(sorted(changed))
+            if len(keep) + len(rows["ids"]) == collection.count():
+                return self._build_index(
+                    [live.ids[row] for row in keep] + rows["ids"],
+                    [np.asarray(live.vectors[keep], dtype=np.float32), rows["embeddings"]],
+                    [live.texts[row] for row in keep] + rows["documents"],
+                    [live.metadatas[row] for row in keep] + rows["metadatas"],
+                )
+            # Another writer crashed between storing chunks and publishing them.
+            logger.warning(f"Segment of namespace {self.namespace} is out of step with its collection; "
+                           f"rebuilding it")
+        rows = self._read_chunks(sorted(collection.get(include=[])["ids"]))
+        return self._build_index(rows["ids"], [rows["embeddings"]], rows["documents"], rows["metadatas"])
+
+    def _read_chunks(self, chunk_ids: List[str]) -> Dict[str, Any]:
+        """
+        Ids, embeddings (one float32 matrix), texts and metadata of the
+        stored chunks among ``chunk_ids``, read ``PUBLISH_BATCH`` at a time.
+        """
+        rows: Dict[str, Any] = {"ids": [], "documents": [], "metadatas": []}
+        vectors = []
+        for start in range(0, len(chunk_ids), PUBLISH_BATCH):
+            stored = self.vectorstore._collection.get(
+                ids=chunk_ids[start:start + PUBLISH_BATCH], include=["embeddings", "documents", "metadatas"]
+            )
+            if not len(stored["ids"]):
+                continue
+            rows["ids"].extend(stored["ids"])
+            rows["documents"].extend(stored["documents"])
+            rows["metadatas"].extend(m or {} for m in stored["metadatas"])
+            vectors.append(np.asarray(stored["embeddings"], dtype=np.float32))
+        rows["embeddings"] = np.concatenate(vectors) if vectors else None
+        return rows
+
+    def _build_index(
+        self, ids: List[str], vectors: List[Optional[np.ndarray]], texts: List[str], metadatas: List[Dict[str, Any]]
+    ) -> vector_index.VectorIndex:
+        # Chunk ids sort by document, then position within it.
+        order = sorted(range(len(ids)), key=ids.__getitem__)
+        vectors = [v for v in vectors if v is not None and len(v)]
+        embeddings = np.concatenate(vectors)[order] if vectors else np.zeros((0, 0), dtype=np.float32)
+        metadatas = [metadatas[i] for i in order]
+        return vector_index.VectorIndex.build(
+            embeddings,
+            [texts[i] for i in order],
+            metadatas,
+            settings.SETTINGS.vector_quantization,
+            groups=self._document_groups(metadatas),
+            ids=[ids[i] for i in order],
+        )
+
+    def _document_groups(self, metadatas: List[Dict[str, Any]]) -> Dict[str, List[Tuple[int, int]]]:
+        """Row ranges per document, including chunks it shares with others after dedup."""
+        by_ref = {info.ref: info.document_id for info in self.registry.all()}
+        rows: Dict[str, List[int]] = {}
+        for row, metadata in enumerate(metadatas):
+            for owner in _owners(metadata, by_ref):
+                rows.setdefault(owner, []).append(row)
+        groups = {}
+        for owner, owned in rows.items():
+            ranges = []
+            for row in owned:
+                if ranges and ranges[-1][1] == row:
+                    ranges[-1][1] = row + 1
+                else:
+                    ranges.append([row, row + 1])
+            groups[owner] = [tuple(r) for r in ranges]
+        return groups
+
+    def current(self) -> Optional[vector_index.VectorIndex]:
+        """The live segment, published first for collections ingested before segments existed."""
+        index = self.segments.current()
+        if index is None and os.path.exists(os.path.join(self.root, "chroma.sqlite3")) \
+                and self.vectorstore._collection.count():
+            self.publish()
+            index = self.segments.current()
+        return index
+
+    def is_empty(self) -> bool:
+        index = self.current()
+        return index is None or not len(index)
+
+    def _scoped_rows(self, index: vector_index.VectorIndex, filename: str):
+        """Rows of the documents ``filename`` names, or None when it names none here."""
+        documents = self.registry.find(filename) if filename else []
+        return index.group_rows([d.document_id for d in documents]) if documents else None
+
+    def scored(self, query: List[float], k: int, filename: str = "", scoped_only: bool = False) -> List[Tuple[float, Document]]:
+        """
+        ``(score, chunk)`` pairs for an embedded query, best first. With
+        ``scoped_only``, returns nothing when ``filename`` names no document
+        in this namespace.
+        """
+        index = self.current()
+        if index is None:
+            return []
+        rows = self._scoped_rows(index, filename)
+        if rows is None and scoped_only:
+            return []
+        results = index.search(query, k=k, oversample=settings.SETTINGS.rescore_oversample, rows=rows)
+        documents = [(score, Document(page_content=index.texts[row], metadata=index.metadatas[row]))
+                     for row, score in results]
+        self._touch(d.metadata["document_id"] for _, d in documents if d.metadata.get("document_id"))
+        return documents
+
+    def _touch(self, document_ids) -> None:
+        now = time.time()
+        with self._lock:
+            self._last_used.update((document_id, now) for document_id in document_ids)
+            due = time.monotonic() - self._touched_at >= settings.SETTINGS.document_touch_interval
+        if due:
+            self.flush_last_used()
+
+    def flush_last_used(self) -> None:
+        """Writes the last use of documents searched since the previous flush to the registry."""
+        with self._lock:
+            last_used, self._last_used = self._last_used, {}
+            self._touched_at = time.monotonic()
+        self.registry.touch(last_used)
+
+    def has_document(self, filename: str) -> bool:
+        return bool(filename) and self.current() is not None and bool(self.registry.find(filename))
+
+    def search(self, query: str, k: int = 4, filename: str = "") -> List[Document]:
+        """The ``k`` chunks closest to ``query``, only from ``filename`` when it names a document."""
+        return [d for _, d in self.scored(self.query_embeddings.embed_query(query), k, filename)]
+
+    async def asearch(self, query: str, k: int = 4, filename: str = "") -> List[Document]:
+        return [d for _, d in self.scored(await self.query_embeddings.aembed_query(query), k, filename)]
+
+
+def user_namespace(user_id: str) -> str:
+    """Directory-safe namespace of a user, e.g. ``user-alice-522b276a``."""
+    digest = hashlib.sha1(user_id.encode("utf-8")).hexdigest()[:8]
+    return f"user-{_UNSAFE_RE.sub('_', user_id)[:48]}-{digest}"
+
+
+def namespace_files_directory(namespace: str) -> str:
+    """Where files of a namespace are stored before ingestion."""
+    if namespace == GLOBAL_NAMESPACE:
+        return settings.SETTINGS.docs_directory
+    return os.path.join(settings.SETTINGS.uploads_directory, namespace)
+
+
+def namespace_for_path(path: str) -> str:
+    """The namespace of a file, from the directory it was stored in."""
+    uploads = os.path.abspath(settings.SETTINGS.uploads_directory)
+    parent = os.path.dirname(os.path.abspath(path))
+    if os.path.dirname(parent) == uploads:
+        return os.path.basename(parent)
+    return GLOBAL_NAMESPACE
+
+
+@lru_cache
+def get_corpus_index() -> CorpusIndex:
+    """Return the global namespace, stored under ``settings.chroma_persist_directory``."""
+    return CorpusIndex(
+        settings.SETTINGS.chroma_persist_directory,
+        document_embeddings=utils.get_document_embeddings(),
+        query_embeddings=utils.get_embeddings(),
+        files_directory=settings.SETTINGS.docs_directory,
+    )
+
+
+@lru_cache(maxsize=OPEN_NAMESPACES)
+def _user_index(namespace: str) -> CorpusIndex:
+    return CorpusIndex(
+        os.path.join(settings.SETTINGS.chroma_persist_directory, "users", namespace),
+        document_embeddings=utils.get_document_embeddings(),
+        query_embeddings=utils.get_embeddings(),
+        namespace=namespace,
+        max_chunks=settings.SETTINGS.namespace_max_chunks,
+        files_directory=namespace_files_directory(namespace),
+    )
+
+
+def get_namespace_index(namespace: str) -> CorpusIndex:
+    return get_corpus_index() if namespace == GLOBAL_NAMESPACE else _user_index(namespace)
+
+
+def user_namespaces(user_id: Optional[str]) -> List[str]:
+    """The namespaces a user's searches cover: their own, then the global one."""
+    return ([user_namespace(user_id)] if user_id else []) + [GLOBAL_NAMESPACE]
+
+
+def user_indexes(user_id: Optional[str]) -> List[CorpusIndex]:
+    return [get_namespace_index(namespace) for namespace in user_namespaces(user_id)]
+
+
+def _merge(indexes: List[CorpusIndex], query: List[float], k: int, filename: str) -> List[Document]:
+    # A file name found in some namespace limits the search to those namespaces.
+    scoped = bool(filename) and any(index.has_document(filename) for index in indexes)
+    if filename and not scoped:
+        logger.info(f"No ingested document matches '{filename}'; searching all documents")
+    results = []
+    for index in indexes:
+        results.extend(index.scored(query, k, filename if scoped else "", scoped_only=scoped))
+    results.sort(key=lambda result: -result[0])
+    return [document for _, document in results[:k]]
+
+
+def search(query: str, user_id: Optional[str] = None, k: int = 4, filename: str = "") -> List[Document]:
+    """The ``k`` chunks closest to ``query`` in the user's and the global namespace."""
+    return _merge(user_indexes(user_id), utils.get_embeddings().embed_query(query), k, filename)
+
+
+async def asearch(query: str, user_id: Optional[str] = None, k: int = 4, filename: str = "") -> List[Document]:
+    return _merge(user_indexes(user_id), await utils.get_embeddings().aembed_query(query), k, filename)
+
+
+def is_empty(user_id: Optional[str] = None) -> bool:
+    return all(index.is_empty() for index in user_indexes(user_id))
+
+
+__all__ = [
+    "CHUNK_TOKENS",
+    "CorpusIndex",
+    "DocumentInfo",
+    "DocumentRegistry",
+    "GLOBAL_NAMESPACE",
+    "asearch",
+    "file_digest",
+    "get_corpus_index",
+    "get_namespace_index",
+    "is_empty",
+    "namespace_for_path",
+    "namespace_files_directory",
+    "on_remove",
+    "search",
+    "user_namespace",
+    "user_namespaces",
+]
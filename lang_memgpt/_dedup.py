@@ -0,0 +1,162 @@
+"""Exact and near-duplicate chunk elimination before embedding.
+
+Chunks are first grouped by a hash of their normalized text (case and
+whitespace folded). The remaining chunks get a MinHash signature over word
+5-gram shingles; LSH banding proposes candidate pairs, which are kept when the
+estimated Jaccard similarity reaches ``settings.dedup_threshold``.
+
+Each group is collapsed into its first chunk. That chunk's metadata records
+every place the text occurred: ``sources`` (a JSON list of ``file:page`` or
+``table#row`` references, since vector store metadata must be scalar),
+``owners`` (a JSON list of the ``document_id`` of every document it came
+from) and ``duplicates`` (how many chunks were folded into it).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import zlib
+from typing import Dict, List, NamedTuple, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from lang_memgpt import _settings as settings
+
+NUM_PERM = 128
+BANDS = 16  # 8 rows per band: candidates from roughly 0.7 Jaccard up
+SHINGLE_WORDS = 5
+
+_PRIME = np.uint64(4294967291)  # largest prime below 2**32
+_rng = np.random.default_rng(1)
+_A = _rng.integers(1, 2**31, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, 2**31, NUM_PERM, dtype=np.uint64)
+
+_WORD_RE = re.compile(r"\w+")
+
+
+class DedupReport(NamedTuple):
+    chunks_in: int
+    exact_duplicates: int
+    near_duplicates: int
+    # Chunks whose text was already stored by an earlier ingestion (see _corpus)
+    stored_duplicates: int = 0
+
+    @property
+    def chunks_out(self) -> int:
+        return self.chunks_in - self.saved
+
+    @property
+    def saved(self) -> int:
+        return self.exact_duplicates + self.near_duplicates + self.stored_duplicates
+
+
+def content_hash(text: str) -> str:
+    normalized = " ".join(text.lower().split())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+def source_ref(metadata: Dict) -> str:
+    """Short reference to where a chunk came from, e.g. ``MemGPT.pdf:p3``."""
+    if "table" in metadata:
+        return f"{metadata['table']}#row{metadata.get('row_id')}"
+    ref = os.path.basename(str(metadata.get("source", "unknown")))
+    return f"{ref}:p{metadata['page']}" if "page" in metadata else ref
+
+
+def minhash(text: str) -> np.ndarray:
+    """MinHash signature (``NUM_PERM`` uint64 values) of a text's word shingles."""
+    words = _WORD_RE.findall(text.lower())
+    shingles = {
+        " ".join(words[i:i + SHINGLE_WORDS]) for i in range(max(1, len(words) - SHINGLE_WORDS + 1))
+    }
+    hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), np.uint64, len(shingles))
+    return ((np.outer(hashes, _A) + _B) % _PRIME).min(axis=0)
+
+
+def _near_duplicate_groups(signatures: List[np.ndarray], threshold: float) -> List[int]:
+    # parent[i] is the index of the earliest chunk i duplicates (or i itself).
+    parent = list(range(len(signatures)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    rows = NUM_PERM // BANDS
+    buckets: Dict[Tuple[int, bytes], List[int]] = {}
+    for i, signature in enumerate(signatures):
+        for band in range(BANDS):
+            key = (band, signature[band * rows:(band + 1) * rows].tobytes())
+            for j in buckets.setdefault(key, []):
+                if find(i) != find(j) and np.mean(signatures[i] == signatures[j]) >= threshold:
+                    a, b = sorted((find(i), find(j)))
+                    parent[b] = a
+            buckets[key].append(i)
+    return [find(i) for i in range(len(signatures))]
+
+
+def deduplicate(chunks: List[Document], threshold: float = -1) -> Tuple[List[Document], DedupReport]:
+    """
+    Collapses exact and near-duplicate chunks, keeping first occurrences.
+
+    Args:
+        chunks (List[Document]): Chunks in ingestion order.
+        threshold (float): Minimum estimated Jaccard similarity for near
+            duplicates; defaults to ``settings.dedup_threshold``. Values
+            above 1 keep only the exact-hash pass.
+
+    Returns:
+        The remaining chunks, with ``content_hash``, ``sources``, ``owners``
+        and ``duplicates`` metadata, and a report of what was removed.
+    """
+    threshold = settings.SETTINGS.dedup_threshold if threshold < 0 else threshold
+
+    first_by_hash: Dict[str, int] = {}
+    owner: List[int] = []
+    hashes = []
+    for i, chunk in enumerate(chunks):
+        digest = content_hash(chunk.page_content)
+        hashes.append(digest)
+        owner.append(first_by_hash.setdefault(digest, i))
+    unique = [i for i in range(len(chunks)) if owner[i] == i]
+    exact = len(chunks) - len(unique)
+
+    near = 0
+    if threshold <= 1 and len(unique) > 1:
+        groups = _near_duplicate_groups([minhash(chunks[i].page_content) for i in unique], threshold)
+        for position, i in enumerate(unique):
+            if groups[position] != position:
+                owner[i] = unique[groups[position]]
+                near += 1
+        # Exact duplicates follow their representative into its group.
+        owner = [owner[o] for o in owner]
+
+    refs: Dict[int, List[str]] = {}
+    owners: Dict[int, List[str]] = {}
+    counts: Dict[int, int] = {}
+    for i, chunk in enumerate(chunks):
+        ref = source_ref(chunk.metadata)
+        group = refs.setdefault(owner[i], [])
+        if ref not in group:
+            group.append(ref)
+        documents = owners.setdefault(owner[i], [])
+        if chunk.metadata.get("document_id") and chunk.metadata["document_id"] not in documents:
+            documents.append(chunk.metadata["document_id"])
+        counts[owner[i]] = counts.get(owner[i], -1) + 1
+
+    kept = []
+    for i, chunk in enumerate(chunks):
+        if owner[i] == i:
+            kept.append(Document(page_content=chunk.page_content, metadata={
+                **chunk.metadata,
+                "content_hash": hashes[i],
+                "sources": json.dumps(refs[i]),
+                "owners": json.dumps(owners[i]),
+                "duplicates": counts[i],
+            }))
+    return kept, DedupReport(len(chunks), exact, near)
@@ -0,0 +1,454 @@
+"""Background job queue for long-running work such as document ingestion.
+
+Jobs are persisted in a local SQLite database so their status survives
+restarts, and are executed by a small pool of worker threads in this
+process. Several processes may share the database: a claimed job records
+its owner and a lease that the owning queue renews every
+``settings.job_lease_seconds / 3``. Only jobs whose lease has expired (their
+process died) are put back on the queue. Handlers are registered per job
+kind with ``register`` and receive the job's paths plus a ``progress``
+callback. Calling ``progress`` both records counts (files, pages, chunks)
+and is the cancellation point: once a cancel has been requested it raises
+``JobCancelled``.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional
+
+from lang_memgpt import _settings as settings
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+# Progress counters a handler may report.
+PROGRESS_FIELDS = ("files_total", "files_done", "pages", "chunks_total", "chunks_embedded")
+
+Progress = Callable[..., None]
+Handler = Callable[[List[str], Progress], str]
+
+HANDLERS: Dict[str, Handler] = {}
+
+
+def register(kind: str) -> Callable[[Handler], Handler]:
+    """Register ``func`` as the handler for jobs of ``kind``."""
+
+    def decorator(func: Handler) -> Handler:
+        HANDLERS[kind] = func
+        return func
+
+    return decorator
+
+
+class JobCancelled(Exception):
+    """Raised from a progress callback once the job has been cancelled."""
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    paths TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    files_total INTEGER NOT NULL DEFAULT 0,
+    files_done INTEGER NOT NULL DEFAULT 0,
+    pages INTEGER NOT NULL DEFAULT 0,
+    chunks_total INTEGER NOT NULL DEFAULT 0,
+    chunks_embedded INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    owner TEXT,
+    lease_expires REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at);
+"""
+
+# Columns added after the first release, for existing databases
+_MIGRATIONS = {"owner": "TEXT", "lease_expires": "REAL"}
+
+
+def new_owner() -> str:
+    """Identifies a job queue across processes and hosts."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class JobStore:
+    """SQLite-backed job table. Safe to use from several threads."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column, kind in _MIGRATIONS.items():
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def create(self, kind: str, paths: List[str]) -> str:
+        """Insert a queued job and return its id."""
+        job_id = uuid.uuid4().hex
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, status, paths, created_at, files_total)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, kind, QUEUED, json.dumps(paths), time.time(), len(paths)),
+            )
+        return job_id
+
+    def create_if_due(self, kind: str, paths: List[str], interval: float) -> Optional[str]:
+        """
+        Insert a queued job unless one of ``kind`` is still queued or running,
+        or was created less than ``interval`` seconds ago. Returns its id,
+        or None when it was not due. Several processes running the same
+        schedule therefore create one job per interval between them.
+        """
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            now = time.time()
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE kind = ? AND (status IN (?, ?) OR created_at > ?) LIMIT 1",
+                (kind, QUEUED, RUNNING, now - interval),
+            ).fetchone()
+            job_id = None
+            if row is None:
+                job_id = uuid.uuid4().hex
+                conn.execute(
+                    "INSERT INTO jobs (id, kind, status, paths, created_at, files_total)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (job_id, kind, QUEUED, json.dumps(paths), now, len(paths)),
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _row_to_dict(row) if row else None
+
+    def find_active(self, kind: str, paths: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """Return the oldest queued or running job of ``kind``, if any, only one for ``paths`` when given."""
+        query = "SELECT * FROM jobs WHERE kind = ? AND status IN (?, ?)"
+        params: tuple = (kind, QUEUED, RUNNING)
+        if paths is not None:
+            query += " AND paths = ?"
+            params += (json.dumps(paths),)
+        with self._connect() as conn:
+            row = conn.execute(query + " ORDER BY created_at LIMIT 1", params).fetchone()
+        return _row_to_dict(row) if row else None
+
+    def claim_next(self, owner: str = "", lease: float = 60.0) -> Optional[Dict[str, Any]]:
+        """
+        Atomically move the oldest queued job to running, leased to ``owner``
+        for ``lease`` seconds, and return it. Jobs whose lease has expired
+        are queued again first.
+        """
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            now = time.time()
+            _requeue_expired(conn, now)
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1",
+                (QUEUED,),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, started_at = ?, owner = ?, lease_expires = ? WHERE id = ?",
+                (RUNNING, now, owner, now + lease, row["id"]),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        job = _row_to_dict(row)
+        job.update(status=RUNNING, owner=owner, lease_expires=now + lease)
+        return job
+
+    def renew(self, owner: str, lease: float) -> int:
+        """Extend the leases of the running jobs ``owner`` holds."""
+        with self._connect() as conn:
+            cur = conn.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE owner = ? AND status = ?",
+                (time.time() + lease, owner, RUNNING),
+            )
+        return cur.rowcount
+
+    def update_progress(self, job_id: str, owner: Optional[str] = None, **counts: int) -> bool:
+        """
+        Record progress counters. Returns True if a cancel was requested, or
+        the job is no longer ``owner``'s (its lease expired and it was requeued).
+        """
+        fields = {k: int(v) for k, v in counts.items() if k in PROGRESS_FIELDS}
+        with self._connect() as conn:
+            if fields:
+                assignments = ", ".join(f"{k} = ?" for k in fields)
+                conn.execute(
+                    f"UPDATE jobs SET {assignments} WHERE id = ?",
+                    (*fields.values(), job_id),
+                )
+            row = conn.execute(
+                "SELECT cancel_requested, owner FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return False
+        return bool(row["cancel_requested"]) or (owner is not None and row["owner"] != owner)
+
+    def finish(
+        self,
+        job_id: str,
+        status: str,
+        result: Optional[str] = None,
+        error: Optional[str] = None,
+        owner: Optional[str] = None,
+    ) -> bool:
+        """Record the outcome, unless ``owner`` has lost the job to another queue."""
+        query = "UPDATE jobs SET status = ?, finished_at = ?, result = ?, error = ? WHERE id = ?"
+        params: tuple = (status, time.time(), result, error, job_id)
+        if owner is not None:
+            query += " AND owner = ?"
+            params += (owner,)
+        with self._connect() as conn:
+            cur = conn.execute(query, params)
+        return cur.rowcount > 0
+
+    def request_cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Cancel a queued job immediately, or flag a running one.
+
+        Returns the updated job, or None if it does not exist.
+        """
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, cancel_requested = 1"
+                " WHERE id = ? AND status = ?",
+                (CANCELLED, time.time(), job_id, QUEUED),
+            )
+            conn.execute(
+                "UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = ?",
+                (job_id, RUNNING),
+            )
+        return self.get(job_id)
+
+    def requeue_expired(self) -> int:
+        """Put running jobs whose owner stopped renewing their lease back on the queue."""
+        with self._connect() as conn:
+            return _requeue_expired(conn, time.time())
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs per status."""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+
+def _requeue_expired(conn: sqlite3.Connection, now: float) -> int:
+    # Jobs started before leases were recorded have none and count as expired.
+    cur = conn.execute(
+        "UPDATE jobs SET status = ?, started_at = NULL, owner = NULL, lease_expires = NULL"
+        " WHERE status = ? AND (lease_expires IS NULL OR lease_expires < ?)",
+        (QUEUED, RUNNING, now),
+    )
+    if cur.rowcount:
+        logger.info(f"[JOBS] Requeued {cur.rowcount} job(s) whose lease expired")
+    return cur.rowcount
+
+
+def _row_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+    job = dict(row)
+    job["paths"] = json.loads(job["paths"])
+    job["cancel_requested"] = bool(job["cancel_requested"])
+    return job
+
+
+class JobQueue:
+    """Worker threads that execute jobs from a ``JobStore``.
+
+    Args:
+        store: Where jobs are persisted.
+        workers: Number of worker threads.
+        poll_interval: Seconds an idle worker waits before checking the
+            store again (it is also woken whenever a job is submitted).
+        lease: Seconds a claimed job stays this queue's without a renewal;
+            a heartbeat thread renews it every third of that.
+    """
+
+    def __init__(self, store: JobStore, workers: int = 2, poll_interval: float = 1.0, lease: float = 60.0) -> None:
+        self.store = store
+        self.workers = max(1, workers)
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.owner = new_owner()
+        self._wakeup = threading.Condition()
+        self._stopping = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self.store.requeue_expired()
+        self._stopping.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        heartbeat = threading.Thread(target=self._heartbeat, name="job-heartbeat", daemon=True)
+        heartbeat.start()
+        self._threads.append(heartbeat)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop accepting work and wait for workers to finish their current job."""
+        self._stopping.set()
+        with self._wakeup:
+            self._wakeup.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def submit(self, kind: str, paths: List[str]) -> str:
+        """Queue a job and return its id."""
+        job_id = self.store.create(kind, paths)
+        logger.info(f"[JOBS] Queued {kind} job {job_id} for {len(paths)} path(s)")
+        with self._wakeup:
+            self._wakeup.notify()
+        return job_id
+
+    def submit_if_due(self, kind: str, paths: List[str], interval: float) -> Optional[str]:
+        """Queue a job when ``JobStore.create_if_due`` finds one due; return its id or None."""
+        job_id = self.store.create_if_due(kind, paths, interval)
+        if job_id is not None:
+            logger.info(f"[JOBS] Queued {kind} job {job_id} for {len(paths)} path(s)")
+            with self._wakeup:
+                self._wakeup.notify()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.store.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.store.request_cancel(job_id)
+
+    def wait(self, job_id: str, timeout: Optional[float] = None, interval: float = 0.25) -> Optional[Dict[str, Any]]:
+        """Poll until the job finishes or ``timeout`` elapses; return its latest state."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self.store.get(job_id)
+            if job is None or job["status"] in FINISHED:
+                return job
+            if deadline is not None and time.monotonic() >= deadline:
+                return job
+            time.sleep(interval)
+
+    def _work(self) -> None:
+        while not self._stopping.is_set():
+            job = self.store.claim_next(self.owner, self.lease)
+            if job is None:
+                with self._wakeup:
+                    self._wakeup.wait(self.poll_interval)
+                continue
+            self._run(job)
+
+    def _run(self, job: Dict[str, Any]) -> None:
+        job_id = job["id"]
+        handler = HANDLERS.get(job["kind"])
+        if handler is None:
+            self.store.finish(job_id, FAILED, error=f"No handler for job kind: {job['kind']}")
+            return
+
+        def progress(**counts: int) -> None:
+            if self.store.update_progress(job_id, owner=self.owner, **counts):
+                raise JobCancelled(job_id)
+
+        logger.info(f"[JOBS] Running {job['kind']} job {job_id}")
+        try:
+            progress()
+            result = handler(job["paths"], progress)
+        except JobCancelled:
+            logger.info(f"[JOBS] Cancelled job {job_id}")
+            self.store.finish(job_id, CANCELLED, owner=self.owner)
+        except Exception as e:
+            logger.error(f"[JOBS] Job {job_id} failed: {str(e)}")
+            self.store.finish(job_id, FAILED, error=str(e), owner=self.owner)
+        else:
+            if self.store.finish(job_id, SUCCEEDED, result=result, owner=self.owner):
+                logger.info(f"[JOBS] Finished job {job_id}")
+            else:
+                logger.warning(f"[JOBS] Job {job_id} finished after its lease was taken over")
+
+    def _heartbeat(self) -> None:
+        while not self._stopping.wait(self.lease / 3):
+            try:
+                self.store.renew(self.owner, self.lease)
+            except sqlite3.Error as e:
+                logger.error(f"[JOBS] Failed to renew job leases: {str(e)}")
+
+
+def describe(job: Dict[str, Any]) -> str:
+    """One-line, human readable job status for tool responses."""
+    text = (
+        f"Job {job['id']} is {job['status']}: {job['files_done']}/{job['files_total']} files,"
+        f" {job['pages']} pages, {job['chunks_embedded']}/{job['chunks_total']} chunks embedded."
+    )
+    if job.get("error"):
+        text += f" Error: {job['error']}"
+    elif job.get("result"):
+        text += f" {job['result']}"
+    return text
+
+
+@lru_cache
+def get_job_queue() -> JobQueue:
+    """Return the process-wide job queue, starting its workers on first use."""
+    queue = JobQueue(
+        JobStore(settings.SETTINGS.jobs_db_path),
+        workers=settings.SETTINGS.ingest_workers,
+        lease=settings.SETTINGS.job_lease_seconds,
+    )
+    queue.start()
+    return queue
+
+
+__all__ = [
+    "JobCancelled",
+    "JobQueue",
+    "JobStore",
+    "describe",
+    "get_job_queue",
+    "new_owner",
+    "register",
+]
@@ -0,0 +1,229 @@
+"""Admission control and upstream rate limiting.
+
+Every chat turn can fan out into several LLM, embedding, Pinecone and tool
+HTTP calls. This module keeps that fan-out bounded:
+
+* ``AdmissionController`` caps how many chat requests run at once (globally
+  and per user) and holds a bounded queue of waiting requests. Requests that
+  cannot start before their deadline are rejected up front with a retry hint
+  instead of piling onto an overloaded upstream.
+* ``TokenBucket`` limiters, one per upstream service, are shared by every
+  client that talks to that service in this process.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import threading
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import AsyncIterator, Dict, Optional
+
+from langchain_core.rate_limiters import BaseRateLimiter
+
+from lang_memgpt import _settings as settings
+
+# Upstream services that have their own shared limiter.
+UPSTREAMS = ("llm", "embeddings", "pinecone", "tavily", "newsdata", "aviationweather")
+
+
+class TokenBucket(BaseRateLimiter):
+    """Thread-safe token bucket usable from sync and async code.
+
+    Tokens refill continuously at ``requests_per_second`` up to
+    ``max_bucket_size``. A rate of zero or less disables limiting.
+    """
+
+    def __init__(
+        self,
+        requests_per_second: float,
+        max_bucket_size: float = 1,
+        check_every_n_seconds: float = 0.05,
+    ) -> None:
+        self.requests_per_second = requests_per_second
+        self.max_bucket_size = max(max_bucket_size, 1)
+        self.check_every_n_seconds = check_every_n_seconds
+        self._tokens = self.max_bucket_size
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _consume(self) -> bool:
+        if self.requests_per_second <= 0:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._last
+            self._last = now
+            self._tokens = min(
+                self.max_bucket_size,
+                self._tokens + elapsed * self.requests_per_second,
+            )
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    def acquire(self, *, blocking: bool = True) -> bool:
+        """Take one token, sleeping until one is available if ``blocking``."""
+        if not blocking:
+            return self._consume()
+        while not self._consume():
+            time.sleep(self.check_every_n_seconds)
+        return True
+
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        """Async variant of ``acquire``; yields to the event loop while waiting."""
+        if not blocking:
+            return self._consume()
+        while not self._consume():
+            await asyncio.sleep(self.check_every_n_seconds)
+        return True
+
+
+@lru_cache
+def get_rate_limiter(upstream: str) -> TokenBucket:
+    """Return the process-wide limiter shared by all clients of ``upstream``."""
+    if upstream not in UPSTREAMS:
+        raise ValueError(f"Unknown upstream: {upstream}")
+    rps = getattr(settings.SETTINGS, f"{upstream}_rps")
+    return TokenBucket(requests_per_second=rps, max_bucket_size=max(rps, 1))
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted before its deadline."""
+
+    def __init__(self, reason: str, retry_after: float) -> None:
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class AdmissionController:
+    """Bounded-concurrency gate with a deadline-aware wait queue.
+
+    Args:
+        max_concurrent: Maximum requests running at once across all users.
+        max_per_user: Maximum requests running at once for a single user.
+        max_queue: Maximum requests waiting for a slot. Beyond this, new
+            requests are rejected immediately.
+        queue_timeout: Seconds a request may wait for a slot before it is
+            rejected.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int,
+        max_per_user: int,
+        max_queue: int,
+        queue_timeout: float,
+    ) -> None:
+        self.max_concurrent = max_concurrent
+        self.max_per_user = max_per_user
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._active = 0
+        self._active_per_user: Dict[str, int] = defaultdict(int)
+        self._waiting = 0
+        # Exponentially weighted average of request service time (seconds),
+        # used to estimate queue wait and the Retry-After hint.
+        self._avg_service = 5.0
+        self._cond: Optional[asyncio.Condition] = None
+
+    @property
+    def active(self) -> int:
+        """Number of requests currently holding a slot."""
+        return self._active
+
+    @property
+    def waiting(self) -> int:
+        """Number of requests currently queued for a slot."""
+        return self._waiting
+
+    def _condition(self) -> asyncio.Condition:
+        # Created lazily so it binds to the running event loop.
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        return self._cond
+
+    def _can_start(self, user_id: str) -> bool:
+        return (
+            self._active < self.max_concurrent
+            and self._active_per_user[user_id] < self.max_per_user
+        )
+
+    def estimated_wait(self, user_id: Optional[str] = None) -> float:
+        """Estimate how long a newly queued request would wait for a slot."""
+        if user_id is not None and self._active < self.max_concurrent:
+            # Only the per-user cap is in the way: one of the user's own
+            # requests has to finish first.
+            return self._avg_service
+        return (self._waiting + 1) * self._avg_service / max(self.max_concurrent, 1)
+
+    @asynccontextmanager
+    async def admit(self, user_id: str) -> AsyncIterator[None]:
+        """Hold a slot for ``user_id`` for the duration of the block.
+
+        Raises:
+            AdmissionRejected: If the queue is full, the estimated wait exceeds
+                the queue timeout, or no slot frees up before the timeout.
+        """
+        cond = self._condition()
+        async with cond:
+            if not self._can_start(user_id):
+                if self._waiting >= self.max_queue:
+                    raise AdmissionRejected("Request queue is full.", self.estimated_wait())
+                expected = self.estimated_wait(user_id)
+                if expected > self.queue_timeout:
+                    raise AdmissionRejected(
+                        "Server is busy; expected wait exceeds deadline.", expected
+                    )
+                self._waiting += 1
+                try:
+                    await asyncio.wait_for(
+                        cond.wait_for(lambda: self._can_start(user_id)),
+                        timeout=self.queue_timeout,
+                    )
+                except asyncio.TimeoutError:
+                    raise AdmissionRejected(
+                        "Timed out waiting for a free slot.", self.estimated_wait()
+                    ) from None
+                finally:
+                    self._waiting -= 1
+            self._active += 1
+            self._active_per_user[user_id] += 1
+
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started
+            async with cond:
+                self._active -= 1
+                self._active_per_user[user_id] -= 1
+                if not self._active_per_user[user_id]:
+                    del self._active_per_user[user_id]
+                self._avg_service = 0.8 * self._avg_service + 0.2 * elapsed
+                cond.notify_all()
+
+
+@lru_cache
+def get_admission_controller() -> AdmissionController:
+    """Return the process-wide admission controller for chat requests."""
+    return AdmissionController(
+        max_concurrent=settings.SETTINGS.max_concurrent_chats,
+        max_per_user=settings.SETTINGS.max_concurrent_chats_per_user,
+        max_queue=settings.SETTINGS.chat_queue_size,
+        queue_timeout=settings.SETTINGS.chat_queue_timeout,
+    )
+
+
+__all__ = [
+    "AdmissionController",
+    "AdmissionRejected",
+    "TokenBucket",
+    "get_admission_controller",
+    "get_rate_limiter",
+]
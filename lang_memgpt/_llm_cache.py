@@ -0,0 +1,166 @@
+"""Persistent exact-match response cache for deterministic chains.
+
+The router and the graders call ``ChatOpenAI(temperature=0)`` with fixed
+prompts, so the same (question, chunk) pair always gets the same grade.
+Each such chain passes ``cache=get_cache("<chain>")`` to its model, and
+LangChain looks the rendered messages up here before calling the provider
+(and before the rate limiter).
+
+Entries are keyed by a hash of the model parameters (model name,
+temperature, bound tools) and the rendered prompt, which includes the
+chain's input. They live in one SQLite file shared by every worker process,
+expire after ``settings.llm_cache_ttl`` seconds, and past
+``settings.llm_cache_max_entries`` the least recently used are evicted.
+Lookups are counted per chain in ``alfred_llm_cache_requests_total``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Optional
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+
+from lang_memgpt import _metrics as metrics
+from lang_memgpt import _settings as settings
+
+logger = logging.getLogger(__name__)
+
+# Size and expiry are enforced once every this many inserts
+TRIM_EVERY = 64
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    chain TEXT NOT NULL,
+    response TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used);
+CREATE INDEX IF NOT EXISTS responses_created_at ON responses (created_at);
+"""
+
+
+def cache_key(prompt: str, llm_string: str) -> str:
+    return hashlib.sha256(f"{llm_string}\x00{prompt}".encode()).hexdigest()
+
+
+class SQLiteResponseCache(BaseCache):
+    """LangChain cache for one chain, stored in a shared SQLite file."""
+
+    def __init__(self, path: str, chain: str, ttl: float, max_entries: int) -> None:
+        self.path = path
+        self.chain = chain
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._ready = False
+        self._inserts = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._ready:
+            # Created on first use, so importing a chain touches no files.
+            with self._lock:
+                if not self._ready:
+                    if os.path.dirname(self.path):
+                        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                    with sqlite3.connect(self.path, timeout=30, isolation_level=None) as conn:
+                        conn.execute("PRAGMA journal_mode=WAL")
+                        conn.executescript(_SCHEMA)
+                    self._ready = True
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def _count(self, result: str) -> None:
+        metrics.REGISTRY.inc(
+            "alfred_llm_cache_requests_total",
+            help="LLM response cache lookups by chain and result (hit or miss).",
+            chain=self.chain,
+            result=result,
+        )
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = cache_key(prompt, llm_string)
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT response FROM responses WHERE key = ? AND created_at > ?", (key, now - self.ttl)
+                ).fetchone()
+                if row:
+                    conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            generations = loads(row[0]) if row else None
+        except Exception as e:
+            # A broken cache must not fail the chain; the model is called instead.
+            logger.warning(f"LLM cache lookup failed for {self.chain}: {str(e)}")
+            generations = None
+        self._count("hit" if generations else "miss")
+        return generations
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, chain, response, created_at, last_used)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (cache_key(prompt, llm_string), self.chain, dumps(list(return_val)), now, now),
+                )
+            self._inserts += 1
+            if self._inserts % TRIM_EVERY == 1:
+                self.trim()
+        except Exception as e:
+            logger.warning(f"LLM cache update failed for {self.chain}: {str(e)}")
+
+    def trim(self) -> int:
+        """Deletes expired entries, then the least recently used past the size cap."""
+        with self._connect() as conn:
+            expired = conn.execute(
+                "DELETE FROM responses WHERE created_at <= ?", (time.time() - self.ttl,)
+            ).rowcount
+            excess = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_entries
+            evicted = conn.execute(
+                "DELETE FROM responses WHERE key IN"
+                " (SELECT key FROM responses ORDER BY last_used LIMIT ?)",
+                (max(excess, 0),),
+            ).rowcount
+        if expired or evicted:
+            logger.debug(f"LLM cache: {expired} expired, {evicted} evicted")
+            metrics.REGISTRY.inc(
+                "alfred_llm_cache_evictions_total",
+                expired + evicted,
+                help="LLM response cache entries removed by expiry or the size cap.",
+            )
+        return expired + evicted
+
+    def clear(self, **kwargs: Any) -> None:
+        """Deletes this chain's entries."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM responses WHERE chain = ?", (self.chain,))
+
+
+def enabled_chains() -> set:
+    return {name.strip() for name in settings.SETTINGS.llm_cache_chains.split(",") if name.strip()}
+
+
+@lru_cache
+def get_cache(chain: str) -> Optional[SQLiteResponseCache]:
+    """The cache for ``chain``, or None when it is not in ``settings.llm_cache_chains``."""
+    if chain not in enabled_chains():
+        return None
+    return SQLiteResponseCache(
+        settings.SETTINGS.llm_cache_path,
+        chain,
+        ttl=settings.SETTINGS.llm_cache_ttl,
+        max_entries=settings.SETTINGS.llm_cache_max_entries,
+    )
+
+
+__all__ = ["SQLiteResponseCache", "cache_key", "enabled_chains", "get_cache"]
@@ -0,0 +1,237 @@
+"""Write-behind buffer for recall memories.
+
+``save_recall_memory`` used to embed and upsert each memory before the tool
+returned, so every save cost the agent an embedding round trip and a
+Pinecone write. It now hands the memory to ``RecallMemoryBuffer`` and
+returns at once. A background thread flushes the buffer every
+``settings.memory_flush_interval`` seconds, or as soon as
+``settings.memory_flush_size`` memories are waiting, with one embedding
+request and one upsert per batch.
+
+Until its upsert has returned a memory is served from the buffer:
+``search_memory`` embeds ``pending(user_id)`` and merges it with the
+Pinecone matches by similarity to the query, so a memory saved earlier in
+the turn is visible in the same process. A failed
+flush puts the batch back at the front of the buffer for the next attempt,
+up to ``settings.memory_flush_attempts`` attempts per memory; and while the
+index is down the buffer holds at most ``settings.memory_buffer_max_size``
+memories, dropping the oldest. Dropped memories are logged and counted in
+``alfred_recall_memories_dropped_total``.
+``stop()`` flushes whatever is left; the API calls it from its lifespan and
+other hosts get it at interpreter exit.
+"""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import threading
+import uuid
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from lang_memgpt import _constants as constants
+from lang_memgpt import _metrics as metrics
+from lang_memgpt import _settings as settings
+from lang_memgpt import _utils as utils
+
+logger = logging.getLogger(__name__)
+
+# Pinecone accepts at most this many vectors per upsert request
+UPSERT_BATCH_SIZE = 100
+
+
+class PendingMemory(NamedTuple):
+    user_id: str
+    memory: str
+    path: str
+    timestamp: datetime
+    # Failed writes so far
+    attempts: int = 0
+
+
+def new_memory(user_id: str, memory: str) -> PendingMemory:
+    """A recall memory with its id and timestamp fixed at save time."""
+    path = constants.INSERT_PATH.format(user_id=user_id, event_id=str(uuid.uuid4()))
+    return PendingMemory(user_id, memory, path, datetime.now(tz=timezone.utc))
+
+
+def to_vectors(items: List[PendingMemory], vectors: List[List[float]]) -> List[Dict[str, Any]]:
+    """Pinecone records for ``items``, in the layout ``search_memory`` filters on."""
+    return [
+        {
+            "id": item.path,
+            "values": vector,
+            "metadata": {
+                constants.PAYLOAD_KEY: item.memory,
+                constants.PATH_KEY: item.path,
+                constants.TIMESTAMP_KEY: item.timestamp,
+                constants.TYPE_KEY: "recall",
+                "user_id": item.user_id,
+            },
+        }
+        for item, vector in zip(items, vectors)
+    ]
+
+
+def write_memories(items: List[PendingMemory]) -> None:
+    """Embed ``items`` in one request and upsert them in as few as possible."""
+    vectors = utils.get_embeddings().embed_documents([item.memory for item in items])
+    records = to_vectors(items, vectors)
+    index = utils.get_index()
+    for start in range(0, len(records), UPSERT_BATCH_SIZE):
+        index.upsert(
+            vectors=records[start:start + UPSERT_BATCH_SIZE],
+            namespace=settings.SETTINGS.pinecone_namespace,
+        )
+
+
+class RecallMemoryBuffer:
+    """Batches recall-memory writes on a background thread."""
+
+    def __init__(
+        self,
+        flush_interval: float = 2.0,
+        flush_size: int = 32,
+        max_attempts: int = 5,
+        max_size: int = 10000,
+    ) -> None:
+        self.flush_interval = flush_interval
+        self.flush_size = max(1, flush_size)
+        self.max_attempts = max(1, max_attempts)
+        self.max_size = max(self.flush_size, max_size)
+        self._pending: List[PendingMemory] = []
+        self._inflight: List[PendingMemory] = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._flushing = threading.Lock()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._work, name="recall-memory-flusher", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> int:
+        """Stop the flusher and write out everything still pending."""
+        with self._wakeup:
+            self._stopping = True
+            self._wakeup.notify_all()
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout)
+        return self.flush()
+
+    def add(self, user_id: str, memory: str) -> PendingMemory:
+        """Queue ``memory`` for ``user_id`` and return without waiting for the write."""
+        item = new_memory(user_id, memory)
+        with self._wakeup:
+            self._pending.append(item)
+            overflow = self._pending[:max(0, len(self._pending) + len(self._inflight) - self.max_size)]
+            del self._pending[:len(overflow)]
+            size = len(self._pending)
+            if size >= self.flush_size:
+                self._wakeup.notify_all()
+        metrics.REGISTRY.inc("alfred_recall_memories_buffered_total", help="Recall memories queued for writing.")
+        _drop(overflow, "overflow")
+        metrics.REGISTRY.set_gauge(
+            "alfred_recall_memories_pending", size, help="Recall memories waiting to be written."
+        )
+        return item
+
+    def pending(self, user_id: str) -> List[str]:
+        """Memories saved for ``user_id`` that are not yet in the index, newest first."""
+        with self._lock:
+            items = self._inflight + self._pending
+        return [item.memory for item in reversed(items) if item.user_id == user_id]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pending) + len(self._inflight)
+
+    def flush(self) -> int:
+        """Write out every pending memory now. Returns how many were written."""
+        written = 0
+        with self._flushing:
+            while True:
+                with self._lock:
+                    batch = self._pending[:self.flush_size]
+                    if not batch:
+                        break
+                    del self._pending[:len(batch)]
+                    self._inflight = batch
+                try:
+                    with metrics.span("memory", "flush", memories=len(batch)):
+                        write_memories(batch)
+                except Exception as e:
+                    logger.error(f"[MEMORY] Failed to write {len(batch)} recall memories: {str(e)}")
+                    metrics.REGISTRY.inc(
+                        "alfred_recall_memory_flush_errors_total", help="Recall-memory flushes that failed."
+                    )
+                    retry = [item._replace(attempts=item.attempts + 1) for item in batch]
+                    expired = [item for item in retry if item.attempts >= self.max_attempts]
+                    with self._lock:
+                        self._pending[:0] = [item for item in retry if item.attempts < self.max_attempts]
+                        self._inflight = []
+                    _drop(expired, "retries")
+                    break
+                with self._lock:
+                    self._inflight = []
+                    size = len(self._pending)
+                written += len(batch)
+                metrics.REGISTRY.inc(
+                    "alfred_recall_memories_written_total", len(batch), help="Recall memories written to the index."
+                )
+                metrics.REGISTRY.set_gauge(
+                    "alfred_recall_memories_pending", size, help="Recall memories waiting to be written."
+                )
+        return written
+
+    def _work(self) -> None:
+        while True:
+            with self._wakeup:
+                if not self._stopping and len(self._pending) < self.flush_size:
+                    self._wakeup.wait(self.flush_interval)
+                if self._stopping:
+                    return
+            self.flush()
+
+
+def _drop(items: List[PendingMemory], reason: str) -> None:
+    if not items:
+        return
+    logger.error(f"[MEMORY] Dropping {len(items)} recall memories ({reason}): "
+                 f"{', '.join(item.path for item in items)}")
+    metrics.REGISTRY.inc(
+        "alfred_recall_memories_dropped_total", len(items),
+        help="Recall memories dropped without being written.", reason=reason,
+    )
+
+
+@lru_cache
+def get_memory_buffer() -> RecallMemoryBuffer:
+    """Return the process-wide buffer, starting its flusher on first use."""
+    buffer = RecallMemoryBuffer(
+        flush_interval=settings.SETTINGS.memory_flush_interval,
+        flush_size=settings.SETTINGS.memory_flush_size,
+        max_attempts=settings.SETTINGS.memory_flush_attempts,
+        max_size=settings.SETTINGS.memory_buffer_max_size,
+    )
+    buffer.start()
+    atexit.register(buffer.stop, timeout=10)
+    return buffer
+
+
+__all__ = [
+    "PendingMemory",
+    "RecallMemoryBuffer",
+    "get_memory_buffer",
+    "new_memory",
+    "to_vectors",
+    "write_memories",
+]
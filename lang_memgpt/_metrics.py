@@ -0,0 +1,344 @@
+"""Structured timing spans and Prometheus-style metrics.
+
+Spans are recorded two ways:
+
+* ``span(kind, name)`` is a context manager for code we own (embedding and
+  Pinecone calls, RAG stages). Attributes such as token counts or cache hits
+  can be added to the yielded dict before the block exits.
+* ``MetricsCallbackHandler`` is a LangChain callback handler that turns graph
+  node, tool, chat model and retriever runs into spans, so nested runnables
+  are timed without touching their code.
+
+Every finished span feeds the process-wide ``REGISTRY`` (rendered on
+``/metrics``) and, when one is active, the current ``RequestTrace`` (rendered
+as a ``Server-Timing`` header or a debug field on the chat response).
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+# Graph nodes in lang_memgpt.graph that get their own spans.
+GRAPH_NODES = ("load_memories", "agent", "tools")
+
+# Histogram bucket upper bounds, in seconds.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(**labels: Any) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    body = ",".join(
+        '{}="{}"'.format(k, v.replace("\\", "\\\\").replace('"', '\\"'))
+        for k, v in labels
+    )
+    return "{" + body + "}"
+
+
+class MetricsRegistry:
+    """Thread-safe in-process counters, gauges and histograms."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[Labels, float]] = defaultdict(lambda: defaultdict(float))
+        self._gauges: Dict[str, Dict[Labels, float]] = defaultdict(dict)
+        self._histograms: Dict[str, Dict[Labels, List[float]]] = defaultdict(dict)
+        self._help: Dict[str, str] = {}
+
+    def inc(self, metric: str, value: float = 1, help: str = "", **labels: Any) -> None:
+        """Add ``value`` to a counter."""
+        with self._lock:
+            self._help.setdefault(metric, help)
+            self._counters[metric][_labels(**labels)] += value
+
+    def set_gauge(self, metric: str, value: float, help: str = "", **labels: Any) -> None:
+        """Set a gauge to ``value``."""
+        with self._lock:
+            self._help.setdefault(metric, help)
+            self._gauges[metric][_labels(**labels)] = value
+
+    def observe(self, metric: str, value: float, help: str = "", **labels: Any) -> None:
+        """Record ``value`` in a histogram."""
+        key = _labels(**labels)
+        with self._lock:
+            self._help.setdefault(metric, help)
+            # Layout: one slot per bucket, then +Inf, sum.
+            hist = self._histograms[metric].setdefault(key, [0.0] * (len(BUCKETS) + 2))
+            for i, bound in enumerate(BUCKETS):
+                if value <= bound:
+                    hist[i] += 1
+            hist[len(BUCKETS)] += 1
+            hist[len(BUCKETS) + 1] += value
+
+    def counter_value(self, metric: str, **labels: Any) -> float:
+        """Return the current value of a counter (0 if never incremented)."""
+        with self._lock:
+            return self._counters.get(metric, {}).get(_labels(**labels), 0.0)
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# HELP {name} {self._help.get(name, '')}")
+                lines.append(f"# TYPE {name} counter")
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{name}{_format_labels(labels)} {value:g}")
+            for name, series in sorted(self._gauges.items()):
+                lines.append(f"# HELP {name} {self._help.get(name, '')}")
+                lines.append(f"# TYPE {name} gauge")
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{name}{_format_labels(labels)} {value:g}")
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f"# HELP {name} {self._help.get(name, '')}")
+                lines.append(f"# TYPE {name} histogram")
+                for labels, hist in sorted(series.items()):
+                    for i, bound in enumerate(BUCKETS):
+                        le = _format_labels(labels + (("le", f"{bound:g}"),))
+                        lines.append(f"{name}_bucket{le} {hist[i]:g}")
+                    le = _format_labels(labels + (("le", "+Inf"),))
+                    lines.append(f"{name}_bucket{le} {hist[len(BUCKETS)]:g}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {hist[-1]:g}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {hist[len(BUCKETS)]:g}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+class RequestTrace:
+    """Spans recorded while handling a single chat request."""
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.spans: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def add(self, record: Dict[str, Any]) -> None:
+        with self._lock:
+            self.spans.append(record)
+
+    def totals(self) -> Dict[str, float]:
+        """Return total milliseconds per ``kind.name``, in first-seen order."""
+        totals: Dict[str, float] = {}
+        with self._lock:
+            for s in self.spans:
+                key = f"{s['kind']}.{s['name']}"
+                totals[key] = totals.get(key, 0.0) + s["duration_ms"]
+        return totals
+
+    def server_timing(self) -> str:
+        """Render the per-stage totals as a ``Server-Timing`` header value."""
+        entries = [
+            f"{key.replace('.', '_')};dur={ms:.1f}" for key, ms in self.totals().items()
+        ]
+        total = (time.perf_counter() - self.started) * 1000
+        entries.append(f"total;dur={total:.1f}")
+        return ", ".join(entries)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the full span list plus per-stage totals for debug output."""
+        with self._lock:
+            spans = list(self.spans)
+        return {
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 1),
+            "totals_ms": {k: round(v, 1) for k, v in self.totals().items()},
+            "spans": spans,
+        }
+
+
+_current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("alfred_trace", default=None)
+
+
+@contextmanager
+def request_trace() -> Iterator[RequestTrace]:
+    """Collect spans for the enclosed request into a fresh ``RequestTrace``."""
+    trace = RequestTrace()
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+def current_trace() -> Optional[RequestTrace]:
+    """Return the trace of the request being handled, if any."""
+    return _current_trace.get()
+
+
+def record(
+    kind: str,
+    name: str,
+    duration: float,
+    attrs: Optional[Dict[str, Any]] = None,
+    trace: Optional[RequestTrace] = None,
+) -> None:
+    """Record a finished span of ``duration`` seconds."""
+    attrs = attrs or {}
+    REGISTRY.observe(
+        "alfred_span_duration_seconds",
+        duration,
+        help="Duration of instrumented operations.",
+        kind=kind,
+        name=name,
+    )
+    if attrs.get("error"):
+        REGISTRY.inc("alfred_span_errors_total", help="Failed instrumented operations.", kind=kind, name=name)
+    for token_type in ("prompt_tokens", "completion_tokens"):
+        if attrs.get(token_type):
+            REGISTRY.inc(
+                "alfred_tokens_total",
+                attrs[token_type],
+                help="Tokens consumed by model calls.",
+                kind=kind,
+                name=name,
+                type=token_type.split("_")[0],
+            )
+    if "cache_hit" in attrs:
+        REGISTRY.inc(
+            "alfred_cache_lookups_total",
+            help="Cache lookups by outcome.",
+            kind=kind,
+            name=name,
+            result="hit" if attrs["cache_hit"] else "miss",
+        )
+    trace = trace or _current_trace.get()
+    if trace is not None:
+        trace.add({"kind": kind, "name": name, "duration_ms": round(duration * 1000, 2), **attrs})
+
+
+@contextmanager
+def span(kind: str, name: str, **attrs: Any) -> Iterator[Dict[str, Any]]:
+    """Time the enclosed block and record it as a span.
+
+    Example:
+        >>> with span("pinecone", "query") as attrs:
+        ...     response = index.query(...)
+        ...     attrs["matches"] = len(response["matches"])
+    """
+    start = time.perf_counter()
+    try:
+        yield attrs
+    except BaseException:
+        attrs["error"] = True
+        raise
+    finally:
+        record(kind, name, time.perf_counter() - start, attrs)
+
+
+def _token_usage(response: LLMResult) -> Dict[str, int]:
+    for generations in response.generations:
+        for gen in generations:
+            usage = getattr(getattr(gen, "message", None), "usage_metadata", None)
+            if usage:
+                return {
+                    "prompt_tokens": usage.get("input_tokens", 0),
+                    "completion_tokens": usage.get("output_tokens", 0),
+                }
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    return {
+        "prompt_tokens": usage.get("prompt_tokens", 0),
+        "completion_tokens": usage.get("completion_tokens", 0),
+    }
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """Record LangChain runs (graph nodes, tools, models, retrievers) as spans."""
+
+    run_inline = True
+
+    def __init__(self, trace: Optional[RequestTrace] = None) -> None:
+        self.trace = trace
+        self._runs: Dict[UUID, Tuple[str, str, float, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id: UUID, kind: str, name: str, **attrs: Any) -> None:
+        with self._lock:
+            self._runs[run_id] = (kind, name, time.perf_counter(), attrs)
+
+    def _end(self, run_id: UUID, **attrs: Any) -> None:
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        kind, name, start, start_attrs = run
+        record(kind, name, time.perf_counter() - start, {**start_attrs, **attrs}, self.trace)
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, **kwargs: Any) -> None:
+        name = kwargs.get("name") or ""
+        if name not in GRAPH_NODES:
+            return
+        with self._lock:
+            parent = self._runs.get(parent_run_id) if parent_run_id else None
+        # LangGraph wraps each node callable in a runnable of the same name;
+        # only time the outermost one.
+        if parent is not None and parent[1] == name:
+            return
+        self._start(run_id, "node", name)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs: Any) -> None:
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs: Any) -> None:
+        self._end(run_id, error=True)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs: Any) -> None:
+        name = kwargs.get("name") or (serialized or {}).get("name", "tool")
+        self._start(run_id, "tool", name)
+
+    def on_tool_end(self, output, *, run_id, **kwargs: Any) -> None:
+        self._end(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs: Any) -> None:
+        self._end(run_id, error=True)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs: Any) -> None:
+        params = kwargs.get("invocation_params") or {}
+        name = params.get("model_name") or params.get("model") or (serialized or {}).get("name", "llm")
+        self._start(run_id, "llm", name)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs: Any) -> None:
+        params = kwargs.get("invocation_params") or {}
+        name = params.get("model_name") or params.get("model") or (serialized or {}).get("name", "llm")
+        self._start(run_id, "llm", name)
+
+    def on_llm_end(self, response: LLMResult, *, run_id, **kwargs: Any) -> None:
+        self._end(run_id, **_token_usage(response))
+
+    def on_llm_error(self, error, *, run_id, **kwargs: Any) -> None:
+        self._end(run_id, error=True)
+
+    def on_retriever_start(self, serialized, query, *, run_id, **kwargs: Any) -> None:
+        self._start(run_id, "retriever", kwargs.get("name") or "retriever")
+
+    def on_retriever_end(self, documents, *, run_id, **kwargs: Any) -> None:
+        self._end(run_id, documents=len(documents))
+
+    def on_retriever_error(self, error, *, run_id, **kwargs: Any) -> None:
+        self._end(run_id, error=True)
+
+
+__all__ = [
+    "REGISTRY",
+    "MetricsCallbackHandler",
+    "RequestTrace",
+    "current_trace",
+    "record",
+    "request_trace",
+    "span",
+]
@@ -0,0 +1,111 @@
+"""Chat models by role.
+
+Each chain asks for the model of its role instead of building its own
+client with the library default model:
+
+- ``agent``: the conversational agent; a request may override the model
+  through ``configurable["model"]``.
+- ``router``: datasource routing for questions the local router is unsure of.
+- ``grader``: the yes/no retrieval, hallucination and answer graders.
+- ``generator``: RAG answer generation.
+- ``summarizer``: document summaries built at ingestion.
+
+Model name, request timeout and ``max_tokens`` come from
+``settings.<role>_model``, ``<role>_timeout`` and ``<role>_max_tokens``, so
+routing and grading can run on a small low-latency model while the agent
+stays on a large one. Every OpenAI client shares one pooled pair of HTTP
+clients, so connections are reused across roles instead of each chain
+opening its own.
+"""
+
+from __future__ import annotations
+
+import logging
+from functools import lru_cache
+from typing import Any, NamedTuple, Optional, Tuple
+
+import httpx
+from langchain.chat_models import init_chat_model
+from langchain_openai import ChatOpenAI
+
+from lang_memgpt import _limits as limits
+from lang_memgpt import _settings as settings
+
+logger = logging.getLogger(__name__)
+
+ROLES = ("agent", "router", "grader", "generator", "summarizer")
+
+# Model name prefixes served by OpenAI, whose clients can share the pool
+OPENAI_PREFIXES = ("gpt-", "o1", "o3", "o4", "chatgpt-")
+
+
+class ModelConfig(NamedTuple):
+    model: str
+    timeout: float
+    max_tokens: Optional[int]
+
+
+def role_config(role: str) -> ModelConfig:
+    if role not in ROLES:
+        raise ValueError(f"Unknown model role '{role}'. Expected one of: {', '.join(ROLES)}")
+    values = settings.SETTINGS
+    return ModelConfig(
+        model=getattr(values, f"{role}_model"),
+        timeout=getattr(values, f"{role}_timeout"),
+        max_tokens=getattr(values, f"{role}_max_tokens") or None,
+    )
+
+
+@lru_cache
+def get_http_clients() -> Tuple[httpx.Client, httpx.AsyncClient]:
+    """The sync and async HTTP clients shared by every OpenAI client."""
+    pool = httpx.Limits(
+        max_connections=settings.SETTINGS.openai_max_connections,
+        max_keepalive_connections=settings.SETTINGS.openai_max_connections,
+    )
+    return httpx.Client(limits=pool), httpx.AsyncClient(limits=pool)
+
+
+def http_client_kwargs() -> dict:
+    http_client, http_async_client = get_http_clients()
+    return {"http_client": http_client, "http_async_client": http_async_client}
+
+
+def get_chat_model(role: str, **kwargs: Any) -> ChatOpenAI:
+    """
+    A temperature-0 OpenAI chat model for ``role``, with the shared rate
+    limiter and HTTP pool. ``kwargs`` (e.g. ``cache``) are passed through.
+    """
+    config = role_config(role)
+    return ChatOpenAI(
+        model=config.model,
+        temperature=0,
+        timeout=config.timeout,
+        max_tokens=config.max_tokens,
+        rate_limiter=limits.get_rate_limiter("llm"),
+        **http_client_kwargs(),
+        **kwargs,
+    )
+
+
+@lru_cache(maxsize=8)
+def get_agent_model(model: Optional[str] = None):
+    """
+    The agent's model: ``model`` when a request names one, else
+    ``settings.agent_model``. Any provider ``init_chat_model`` supports works;
+    OpenAI models share the HTTP pool.
+    """
+    config = role_config("agent")
+    name = model or config.model
+    kwargs = http_client_kwargs() if name.startswith(OPENAI_PREFIXES) else {}
+    logger.debug(f"Agent model: {name}")
+    return init_chat_model(
+        name,
+        timeout=config.timeout,
+        max_tokens=config.max_tokens,
+        rate_limiter=limits.get_rate_limiter("llm"),
+        **kwargs,
+    )
+
+
+__all__ = ["ROLES", "ModelConfig", "get_agent_model", "get_chat_model", "get_http_clients", "role_config"]
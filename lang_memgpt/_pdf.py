@@ -0,0 +1,132 @@
+"""PDF text extraction backends.
+
+Ingestion reads PDFs through ``extract_pages``, which streams one
+``Document`` per page from the backend selected by ``PDF_BACKEND``:
+
+- ``pymupdf`` (default): MuPDF via PyMuPDF. Larger files are split into page
+  ranges extracted in parallel by a process pool; pages are yielded in order
+  as soon as their range is done. The pool's workers run ``_pdf_worker``
+  under ``forkserver``, so they never inherit the server's threads or locks,
+  and the API starts the pool with ``start_process_pool`` rather than from
+  a job thread.
+- ``pypdf``: the pure-Python parser used by ``PyPDFLoader``, kept as a
+  fallback and as the benchmark baseline (``benchmarks/pdf_extraction.py``).
+
+Page metadata matches ``PyPDFLoader`` (``source`` and 0-based ``page``) plus
+``total_pages`` and, for PyMuPDF, ``blocks``: the page's text block bounding
+boxes as a JSON list of ``[x0, y0, x1, y1]`` (a string, since vector store
+metadata must be scalar).
+"""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Callable, Dict, Iterator
+
+from langchain_core.documents import Document
+
+from lang_memgpt import _pdf_worker as pdf_worker
+from lang_memgpt import _settings as settings
+
+logger = logging.getLogger(__name__)
+
+# Pages per task handed to a worker process; files with at most this many
+# pages are extracted in-process, where pool overhead would dominate.
+PAGES_PER_TASK = 8
+
+BACKENDS: Dict[str, Callable[[str], Iterator[Document]]] = {}
+
+
+def register(name: str):
+    def decorator(func: Callable[[str], Iterator[Document]]) -> Callable[[str], Iterator[Document]]:
+        BACKENDS[name] = func
+        return func
+    return decorator
+
+
+def _page_document(path: str, total_pages: int, page: int, text: str, blocks: str = "") -> Document:
+    metadata = {"source": path, "page": page, "total_pages": total_pages}
+    if blocks:
+        metadata["blocks"] = blocks
+    return Document(page_content=text, metadata=metadata)
+
+
+@register("pypdf")
+def extract_pypdf(path: str) -> Iterator[Document]:
+    from pypdf import PdfReader
+
+    reader = PdfReader(path)
+    total_pages = len(reader.pages)
+    for page, pdf_page in enumerate(reader.pages):
+        yield _page_document(path, total_pages, page, pdf_page.extract_text() or "")
+
+
+@lru_cache(maxsize=1)
+def get_process_pool() -> ProcessPoolExecutor:
+    # Forking a threaded server copies locks other threads hold; a fork
+    # server (or spawn) starts workers from a clean single-threaded process.
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+    if context.get_start_method() == "forkserver":
+        context.set_forkserver_preload([pdf_worker.__name__])
+    return ProcessPoolExecutor(max_workers=settings.SETTINGS.pdf_workers, mp_context=context)
+
+
+def start_process_pool() -> None:
+    """Create the pool and its workers now, when parallel extraction is enabled."""
+    if settings.SETTINGS.pdf_backend.lower() == "pymupdf" and settings.SETTINGS.pdf_workers > 1:
+        get_process_pool().submit(pdf_worker.warm_up).result()
+
+
+def shutdown_process_pool() -> None:
+    if get_process_pool.cache_info().currsize:
+        get_process_pool().shutdown(cancel_futures=True)
+        get_process_pool.cache_clear()
+
+
+@register("pymupdf")
+def extract_pymupdf(path: str) -> Iterator[Document]:
+    import pymupdf
+
+    with pymupdf.open(path) as document:
+        total_pages = document.page_count
+
+    starts = range(0, total_pages, PAGES_PER_TASK)
+    if settings.SETTINGS.pdf_workers <= 1 or total_pages <= PAGES_PER_TASK:
+        futures = []
+        ranges = (pdf_worker.extract_range(path, start, min(start + PAGES_PER_TASK, total_pages)) for start in starts)
+    else:
+        pool = get_process_pool()
+        futures = [
+            pool.submit(pdf_worker.extract_range, path, start, min(start + PAGES_PER_TASK, total_pages))
+            for start in starts
+        ]
+        ranges = (future.result() for future in futures)
+    try:
+        for pages in ranges:
+            for page, text, blocks in pages:
+                yield _page_document(path, total_pages, page, text, blocks)
+    finally:
+        # The consumer stopped early (e.g. a cancelled job): drop queued ranges.
+        for future in futures:
+            future.cancel()
+
+
+def extract_pages(path: str, backend: str = "") -> Iterator[Document]:
+    """
+    Streams one document per page of a PDF, in page order.
+
+    Args:
+        path (str): Path of the PDF file.
+        backend (str): Backend name; defaults to ``settings.pdf_backend``.
+
+    Raises:
+        ValueError: If the backend is unknown.
+    """
+    name = (backend or settings.SETTINGS.pdf_backend).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown PDF backend '{name}'. Use one of: {', '.join(sorted(BACKENDS))}")
+    return BACKENDS[name](path)
@@ -0,0 +1,38 @@
+"""Page extraction run inside the PDF process pool.
+
+Worker processes are started with ``forkserver`` (``spawn`` where that is
+unavailable) and import only this module, so it depends on nothing but
+PyMuPDF: no settings, no models, no vector stores. ``_pdf`` calls
+``extract_range`` in-process for small files as well.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import List, Tuple
+
+# (page number, text, blocks JSON)
+PageText = Tuple[int, str, str]
+
+
+def warm_up() -> None:
+    """Import PyMuPDF in the worker before the first real task."""
+    import pymupdf  # noqa: F401
+
+
+def extract_range(path: str, start: int, stop: int) -> List[PageText]:
+    """Text and block boxes for pages [start, stop)."""
+    import pymupdf
+
+    pages = []
+    with pymupdf.open(path) as document:
+        for page in range(start, stop):
+            # Text blocks only (type 0), in reading order.
+            blocks = [b for b in document[page].get_text("blocks", sort=True) if b[6] == 0]
+            text = "\n".join(b[4].strip() for b in blocks)
+            boxes = json.dumps([[round(c, 1) for c in b[:4]] for b in blocks])
+            pages.append((page, text, boxes))
+    return pages
+
+
+__all__ = ["PageText", "extract_range", "warm_up"]
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from typing import List, Optional, Dict, Any
 
+from langchain_core.documents import Document
 from langchain_core.messages import AnyMessage
 from langgraph.graph import add_messages
 from typing_extensions import Annotated, TypedDict
@@ -37,6 +38,28 @@ class State(TypedDict):
     """Optional: Graded documents for relevance scoring."""
 
 
+class RetrievalState(TypedDict, total=False):
+    question: str
+    """The question to retrieve documents for."""
+    filename: str
+    """Optional ingested file name limiting retrieval to one document."""
+    documents: List[Document]
+    """Retrieved documents; only the relevant ones after grading."""
+    web_search: bool
+    """Whether grading found irrelevant documents, so web results are needed."""
+
+
+class CorrectiveRagState(RetrievalState, total=False):
+    web_documents: Optional[List[Document]]
+    """Web search results, searched speculatively or after grading."""
+    generation: str
+    """The generated answer."""
+    generations: int
+    """How many answers have been generated so far."""
+    generation_grade: Optional[str]
+    """"useful", "not useful" or "not supported"; None once no regeneration is allowed."""
+
+
 class RetrieveInput(BaseModel):
     state: Dict[str, Any]
 
@@ -51,4 +74,6 @@ class ToolCallInput(BaseModel):
 __all__ = [
     "State",
     "GraphConfig",
+    "RetrievalState",
+    "CorrectiveRagState",
 ]
\ No newline at end of file
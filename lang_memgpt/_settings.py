@@ -7,6 +7,10 @@ from typing import Literal
 load_dotenv(dotenv_path=os.path.join(
     os.path.dirname(__file__), ".env"))  # Dynamic path resolution
 
+# Every file the service writes (document index, tables, job database) lives
+# under one data root unless its own variable overrides it.
+DATA_ROOT = os.path.abspath(os.getenv("DATA_ROOT", os.path.join(os.path.dirname(__file__), "data")))
+
 
 class Settings(BaseSettings):
     # API Keys for embeddings and tools
@@ -16,7 +20,151 @@ class Settings(BaseSettings):
     pinecone_environment: str = os.getenv("PINECONE_ENVIRONMENT", "")
     pinecone_index_name: str = os.getenv("PINECONE_INDEX_NAME", "")
     pinecone_namespace: str = os.getenv("PINECONE_NAMESPACE", "default")
-    model: str = os.getenv("EMBEDDING_MODEL", "text-embedding-ada-002")
+    embedding_model: str = os.getenv("EMBEDDING_MODEL", "text-embedding-ada-002")
+    log_level: str = os.getenv("LOG_LEVEL", "INFO").upper()
+
+    # Upstream endpoints and local storage (overridable for offline benchmarks)
+    aviationweather_url: str = os.getenv(
+        "AVIATIONWEATHER_URL", "https://aviationweather.gov/api/data/dataserver")
+    newsdata_url: str = os.getenv("NEWSDATA_URL", "https://newsdata.io/api/1/latest")
+    data_root: str = DATA_ROOT
+    # Document corpus: the Chroma collection and its search segments
+    chroma_persist_directory: str = os.getenv("CHROMA_PERSIST_DIRECTORY", os.path.join(DATA_ROOT, "corpus"))
+    docs_directory: str = os.getenv("DOCS_DIRECTORY", os.path.abspath(
+        os.path.join(os.path.dirname(__file__), "..", "docs")))
+
+    # Per-user document namespaces: uploads are stored in
+    # UPLOADS_DIRECTORY/<namespace>, and each user's corpus keeps at most
+    # NAMESPACE_MAX_CHUNKS chunks, evicting the least recently searched
+    # documents beyond that (0 disables the quota).
+    uploads_directory: str = os.getenv("UPLOADS_DIRECTORY", os.path.join(DATA_ROOT, "uploads"))
+    namespace_max_chunks: int = int(os.getenv("NAMESPACE_MAX_CHUNKS", "20000"))
+    # Searches note which documents they used in memory; the times are written
+    # to the registry at most every DOCUMENT_TOUCH_INTERVAL seconds and before
+    # the quota is enforced.
+    document_touch_interval: float = float(os.getenv("DOCUMENT_TOUCH_INTERVAL", "60"))
+
+    # Document uploads (/api/upload)
+    max_upload_bytes: int = int(os.getenv("MAX_UPLOAD_BYTES", str(50 * 1024 * 1024)))
+
+    # Background ingestion jobs
+    jobs_db_path: str = os.getenv("JOBS_DB_PATH", os.path.join(DATA_ROOT, "jobs.sqlite3"))
+    ingest_workers: int = int(os.getenv("INGEST_WORKERS", "2"))
+    # A running job is requeued when its process stops renewing its lease
+    # for this many seconds (processes may share the jobs database).
+    job_lease_seconds: float = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+    # Chunks per embedding request, and tokens per request (the provider
+    # caps a request at 300k tokens and 2048 inputs).
+    ingest_batch_size: int = int(os.getenv("INGEST_BATCH_SIZE", "512"))
+    embedding_batch_tokens: int = int(os.getenv("EMBEDDING_BATCH_TOKENS", "100000"))
+    ingest_tool_wait: float = float(os.getenv("INGEST_TOOL_WAIT", "5"))
+
+    # Recall memories are written behind the agent (see _memory_buffer): a
+    # batch is embedded and upserted every MEMORY_FLUSH_INTERVAL seconds or
+    # once MEMORY_FLUSH_SIZE memories are waiting. MEMORY_WRITE_BEHIND=false
+    # writes each memory before save_recall_memory returns.
+    memory_write_behind: bool = os.getenv("MEMORY_WRITE_BEHIND", "true").lower() in ("1", "true", "yes")
+    memory_flush_interval: float = float(os.getenv("MEMORY_FLUSH_INTERVAL", "2"))
+    memory_flush_size: int = int(os.getenv("MEMORY_FLUSH_SIZE", "32"))
+    # While the index is failing, a memory is retried on this many flushes
+    # and at most this many are held; beyond either, memories are dropped.
+    memory_flush_attempts: int = int(os.getenv("MEMORY_FLUSH_ATTEMPTS", "5"))
+    memory_buffer_max_size: int = int(os.getenv("MEMORY_BUFFER_MAX_SIZE", "10000"))
+    # Recall-memory consolidation (see _consolidation): memories at or above
+    # MEMORY_MERGE_THRESHOLD cosine similarity are merged into the newest
+    # one, and past MEMORY_MAX_PER_USER (0 = no cap) the oldest are evicted.
+    # The API runs it every MEMORY_CONSOLIDATION_INTERVAL seconds (0 = never).
+    memory_merge_threshold: float = float(os.getenv("MEMORY_MERGE_THRESHOLD", "0.93"))
+    memory_max_per_user: int = int(os.getenv("MEMORY_MAX_PER_USER", "2000"))
+    memory_consolidation_interval: float = float(os.getenv("MEMORY_CONSOLIDATION_INTERVAL", str(24 * 3600)))
+
+    # Chunks at/above this estimated Jaccard similarity are stored once
+    # (exact duplicates always are); above 1 disables near-duplicate checks.
+    dedup_threshold: float = float(os.getenv("DEDUP_THRESHOLD", "0.85"))
+
+    # Document vector index: "int8", "float16" or "float32" codes in memory;
+    # the top k * RESCORE_OVERSAMPLE candidates are re-scored in float32.
+    vector_quantization: str = os.getenv("VECTOR_QUANTIZATION", "int8")
+    rescore_oversample: int = int(os.getenv("RESCORE_OVERSAMPLE", "4"))
+
+    # Document summaries built at ingestion for the document_summary tool:
+    # at most SUMMARY_MAX_SECTIONS section summaries per document, each from
+    # up to SUMMARY_SECTION_TOKENS tokens of text.
+    document_summaries: bool = os.getenv("DOCUMENT_SUMMARIES", "true").lower() in ("1", "true", "yes")
+    summary_section_tokens: int = int(os.getenv("SUMMARY_SECTION_TOKENS", "3000"))
+    summary_max_sections: int = int(os.getenv("SUMMARY_MAX_SECTIONS", "16"))
+
+    # PDF extraction: "pymupdf" (parallel across PDF_WORKERS processes) or "pypdf"
+    pdf_backend: str = os.getenv("PDF_BACKEND", "pymupdf")
+    pdf_workers: int = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+    # Ingested CSVs are stored as Parquet tables for query_table. Only the
+    # text columns are embedded: TABLE_TEXT_COLUMNS (comma-separated), or by
+    # default every string column with long values.
+    tables_directory: str = os.getenv("TABLES_DIRECTORY", os.path.join(DATA_ROOT, "tables"))
+    table_text_columns: str = os.getenv("TABLE_TEXT_COLUMNS", "")
+
+    # Fuel densities for weight/volume conversions, in lbs per US gallon
+    fuel_densities: str = os.getenv("FUEL_DENSITIES", "jp-5=6.8,jp-8=6.7,jet-a=6.7,avgas=6.0")
+    default_fuel: str = os.getenv("DEFAULT_FUEL", "jp-5")
+
+    # Answer simple calculator/unit/date requests without the agent
+    fast_path_enabled: bool = os.getenv("FAST_PATH_ENABLED", "true").lower() in ("1", "true", "yes")
+
+    # Local question router: cosine similarity to the closest document
+    # centroid at/above which we use the vectorstore, at/below which we use
+    # web search. In between, the LLM router decides.
+    router_vectorstore_threshold: float = float(os.getenv("ROUTER_VECTORSTORE_THRESHOLD", "0.80"))
+    router_websearch_threshold: float = float(os.getenv("ROUTER_WEBSEARCH_THRESHOLD", "0.72"))
+    # In the corrective-RAG tool, search the web alongside retrieval and
+    # grading when the local router is unsure, instead of asking the LLM router
+    speculative_web_search: bool = os.getenv("SPECULATIVE_WEB_SEARCH", "true").lower() in ("1", "true", "yes")
+
+    # Admission control for /api/chat
+    max_concurrent_chats: int = int(os.getenv("MAX_CONCURRENT_CHATS", "8"))
+    max_concurrent_chats_per_user: int = int(os.getenv("MAX_CONCURRENT_CHATS_PER_USER", "2"))
+    chat_queue_size: int = int(os.getenv("CHAT_QUEUE_SIZE", "32"))
+    chat_queue_timeout: float = float(os.getenv("CHAT_QUEUE_TIMEOUT", "20"))
+
+    # Per-upstream rate limits in requests per second (0 disables the limit)
+    llm_rps: float = float(os.getenv("LLM_RPS", "8"))
+    embeddings_rps: float = float(os.getenv("EMBEDDINGS_RPS", "10"))
+    pinecone_rps: float = float(os.getenv("PINECONE_RPS", "20"))
+    tavily_rps: float = float(os.getenv("TAVILY_RPS", "2"))
+    newsdata_rps: float = float(os.getenv("NEWSDATA_RPS", "1"))
+    aviationweather_rps: float = float(os.getenv("AVIATIONWEATHER_RPS", "5"))
+
+    # Chat models per role (see _models): the agent stays on a large model
+    # while routing and yes/no grading run on a small, fast one. Each role
+    # has a request timeout in seconds and a max_tokens cap (0 = no cap).
+    agent_model: str = os.getenv("AGENT_MODEL", "gpt-4o")
+    agent_timeout: float = float(os.getenv("AGENT_TIMEOUT", "60"))
+    agent_max_tokens: int = int(os.getenv("AGENT_MAX_TOKENS", "0"))
+    router_model: str = os.getenv("ROUTER_MODEL", "gpt-4o-mini")
+    router_timeout: float = float(os.getenv("ROUTER_TIMEOUT", "10"))
+    router_max_tokens: int = int(os.getenv("ROUTER_MAX_TOKENS", "64"))
+    grader_model: str = os.getenv("GRADER_MODEL", "gpt-4o-mini")
+    grader_timeout: float = float(os.getenv("GRADER_TIMEOUT", "10"))
+    grader_max_tokens: int = int(os.getenv("GRADER_MAX_TOKENS", "64"))
+    generator_model: str = os.getenv("GENERATOR_MODEL", "gpt-4o-mini")
+    generator_timeout: float = float(os.getenv("GENERATOR_TIMEOUT", "30"))
+    generator_max_tokens: int = int(os.getenv("GENERATOR_MAX_TOKENS", "1024"))
+    summarizer_model: str = os.getenv("SUMMARIZER_MODEL", "gpt-4o-mini")
+    summarizer_timeout: float = float(os.getenv("SUMMARIZER_TIMEOUT", "60"))
+    summarizer_max_tokens: int = int(os.getenv("SUMMARIZER_MAX_TOKENS", "512"))
+    # The agent prompt shows the time rounded down to this many seconds
+    prompt_time_granularity: int = int(os.getenv("PROMPT_TIME_GRANULARITY", "60"))
+    # Connections kept by the HTTP client pool shared by every OpenAI client
+    openai_max_connections: int = int(os.getenv("OPENAI_MAX_CONNECTIONS", "32"))
+
+    # Persistent response cache for the temperature-0 chains named in
+    # LLM_CACHE_CHAINS (comma-separated; empty disables it). Entries expire
+    # after LLM_CACHE_TTL seconds; past LLM_CACHE_MAX_ENTRIES the least
+    # recently used are evicted.
+    llm_cache_path: str = os.getenv("LLM_CACHE_PATH", os.path.join(DATA_ROOT, "llm_cache.sqlite3"))
+    llm_cache_chains: str = os.getenv("LLM_CACHE_CHAINS", "router,retrieval_grader,hallucination_grader,answer_grader")
+    llm_cache_ttl: float = float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+    llm_cache_max_entries: int = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "100000"))
 
 
 SETTINGS = Settings()
@@ -0,0 +1,126 @@
+"""Hierarchical document summaries built at ingestion time.
+
+A document's pages (or table rows) are packed into at most
+``settings.summary_max_sections`` consecutive sections. Each section is
+summarized on its own (a title line, then a few sentences), and the section
+summaries are rolled up into one document summary. The summary and the
+outline of section titles, page ranges and summaries are stored in the
+document registry, so overview questions are answered with a lookup
+instead of a retrieval pass.
+
+Each section sends at most ``settings.summary_section_tokens`` tokens to the
+model (the start of longer sections), which bounds the cost per document.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Dict, List, NamedTuple
+
+from langchain_core.documents import Document
+from langchain_core.runnables import Runnable
+
+from lang_memgpt import _chunking as chunking
+from lang_memgpt import _settings as settings
+
+logger = logging.getLogger(__name__)
+
+# Section summaries requested at once from the model
+SUMMARY_CONCURRENCY = 4
+
+
+class Section(NamedTuple):
+    unit: str  # "page" or "row"
+    first: int
+    last: int
+    text: str
+
+    @property
+    def label(self) -> str:
+        first, last = self.first + (self.unit == "page"), self.last + (self.unit == "page")
+        return f"{self.unit} {first}" if first == last else f"{self.unit}s {first}-{last}"
+
+
+def _position(document: Document) -> int:
+    metadata = document.metadata
+    return int(metadata.get("page", metadata.get("row_id", 0)))
+
+
+def sections(pages: List[Document], section_tokens: int = 0, max_sections: int = 0) -> List[Section]:
+    """Packs consecutive pages into sections of similar token counts."""
+    section_tokens = section_tokens or settings.SETTINGS.summary_section_tokens
+    max_sections = max_sections or settings.SETTINGS.summary_max_sections
+    encoding = chunking.get_encoding()
+    tokens = [encoding.encode_ordinary(page.page_content) for page in pages]
+    target = max(section_tokens, -(-sum(len(t) for t in tokens) // max_sections))
+    unit = "row" if pages and "table" in pages[0].metadata else "page"
+
+    result = []
+    start = 0
+    count = 0
+    for i, page_tokens in enumerate(tokens):
+        count += len(page_tokens)
+        if count >= target or i == len(pages) - 1:
+            section = [t for page in tokens[start:i + 1] for t in page][:section_tokens]
+            result.append(Section(unit, _position(pages[start]), _position(pages[i]), encoding.decode(section)))
+            start, count = i + 1, 0
+    return [section for section in result if section.text.strip()]
+
+
+def _title_and_summary(text: str, section: Section) -> Dict[str, str]:
+    lines = [line.strip() for line in text.strip().splitlines() if line.strip()]
+    if len(lines) < 2:
+        return {"title": section.label.capitalize(), "pages": section.label, "summary": text.strip()}
+    title = lines[0].lstrip("#*").strip().removeprefix("Title:").strip().strip("*")
+    return {"title": title, "pages": section.label, "summary": " ".join(lines[1:])}
+
+
+def summarize_document(
+    filename: str,
+    pages: List[Document],
+    section_chain: Runnable,
+    document_chain: Runnable,
+) -> Dict[str, object]:
+    """
+    Builds a document's summary and outline.
+
+    Args:
+        filename (str): Shown to the model for context.
+        pages (List[Document]): The document's pages or rows, in order.
+        section_chain (Runnable): Maps ``{"filename", "pages", "text"}`` to a
+            title line followed by the section summary.
+        document_chain (Runnable): Maps ``{"filename", "outline"}`` to the
+            document summary.
+
+    Returns:
+        ``{"summary": str, "outline": [{"title", "pages", "summary"}]}``
+    """
+    parts = sections(pages)
+    if not parts:
+        return {"summary": "", "outline": []}
+    texts = section_chain.batch(
+        [{"filename": filename, "pages": section.label, "text": section.text} for section in parts],
+        config={"max_concurrency": SUMMARY_CONCURRENCY},
+    )
+    outline = [_title_and_summary(text, section) for text, section in zip(texts, parts)]
+    if len(outline) == 1:
+        summary = outline[0]["summary"]
+    else:
+        summary = document_chain.invoke({
+            "filename": filename,
+            "outline": "\n".join(f"- {o['title']} ({o['pages']}): {o['summary']}" for o in outline),
+        }).strip()
+    logger.debug(f"Summarized {filename} from {len(parts)} sections")
+    return {"summary": summary, "outline": outline}
+
+
+def format_summary(filename: str, summary: str, outline: List[Dict[str, str]]) -> str:
+    """Markdown summary and outline, as returned by the ``document_summary`` tool."""
+    lines = [f"# {filename}", "", summary]
+    if len(outline) > 1:
+        lines += ["", "## Outline"]
+        lines += [f"- **{o['title']}** ({o['pages']}): {o['summary']}" for o in outline]
+    return "\n".join(lines)
+
+
+__all__ = ["Section", "format_summary", "sections", "summarize_document"]
@@ -1,23 +1,67 @@
 from __future__ import annotations
 
+import asyncio
 from functools import lru_cache
+from typing import Any, Awaitable, Callable, List
 import uuid
 
 import langsmith
+from langchain_community.tools.tavily_search import TavilySearchResults
+from langchain_core.embeddings import Embeddings
 from langchain_core.runnables import RunnableConfig
 from langchain_openai import OpenAIEmbeddings
 # from langchain_fireworks import FireworksEmbeddings
 from pinecone import Pinecone
 
+from lang_memgpt import _limits as limits
+from lang_memgpt import _metrics as metrics
+from lang_memgpt import _models as models
 from lang_memgpt import _schemas as schemas
 from lang_memgpt import _settings as settings
 
 _DEFAULT_DELAY = 60  # seconds
 
 
+class RateLimitedIndex:
+    """Proxy around a Pinecone index that applies the shared Pinecone limiter.
+
+    Each call is also recorded as a ``pinecone`` span. Every method has an
+    async twin prefixed with ``a`` (``aquery``, ``aupsert``, ``afetch``) for
+    code on the event loop: it waits for the limiter without blocking and
+    runs the client's blocking request in a worker thread.
+    """
+
+    def __init__(self, index: Any) -> None:
+        self._index = index
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("a") and not hasattr(self._index, name) and callable(getattr(self._index, name[1:], None)):
+            return self._async_call(name[1:])
+        attr = getattr(self._index, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args: Any, **kwargs: Any) -> Any:
+            limits.get_rate_limiter("pinecone").acquire()
+            with metrics.span("pinecone", name):
+                return attr(*args, **kwargs)
+
+        return call
+
+    def _async_call(self, name: str) -> Callable[..., Awaitable[Any]]:
+        attr = getattr(self._index, name)
+
+        async def call(*args: Any, **kwargs: Any) -> Any:
+            await limits.get_rate_limiter("pinecone").aacquire()
+            with metrics.span("pinecone", name):
+                return await asyncio.to_thread(attr, *args, **kwargs)
+
+        return call
+
+
 def get_index():
     pc = Pinecone(api_key=settings.SETTINGS.pinecone_api_key)
-    return pc.Index(settings.SETTINGS.pinecone_index_name)
+    return RateLimitedIndex(pc.Index(settings.SETTINGS.pinecone_index_name))
 
 
 @langsmith.traceable
@@ -26,7 +70,7 @@ def ensure_configurable(config: RunnableConfig) -> schemas.GraphConfig:
     configurable = config.get("configurable", {})
     if not configurable:
         configurable = {
-            "model": "gpt-4o-mini",
+            "model": settings.SETTINGS.agent_model,
             "user_id": "default_user",
             "thread_id": str(uuid.uuid4())
         }
@@ -36,16 +80,76 @@ def ensure_configurable(config: RunnableConfig) -> schemas.GraphConfig:
         **configurable,
         **schemas.GraphConfig(
             delay=configurable.get("delay", _DEFAULT_DELAY),
-            model=configurable.get("model", settings.SETTINGS.model),
+            model=configurable.get("model", settings.SETTINGS.agent_model),
             thread_id=configurable["thread_id"],
             user_id=configurable["user_id"],
         ),
     }
 
 
+class RateLimitedEmbeddings(Embeddings):
+    """Embeddings wrapper that applies the shared embeddings limiter.
+
+    Each call is also recorded as an ``embeddings`` span.
+    """
+
+    def __init__(self, embeddings: Embeddings) -> None:
+        self.embeddings = embeddings
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        limits.get_rate_limiter("embeddings").acquire()
+        with metrics.span("embeddings", "embed_documents", inputs=len(texts)):
+            return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        limits.get_rate_limiter("embeddings").acquire()
+        with metrics.span("embeddings", "embed_query", inputs=1):
+            return self.embeddings.embed_query(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        await limits.get_rate_limiter("embeddings").aacquire()
+        with metrics.span("embeddings", "embed_documents", inputs=len(texts)):
+            return await self.embeddings.aembed_documents(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        await limits.get_rate_limiter("embeddings").aacquire()
+        with metrics.span("embeddings", "embed_query", inputs=1):
+            return await self.embeddings.aembed_query(text)
+
+
 @lru_cache
 def get_embeddings():
-    return OpenAIEmbeddings(model="text-embedding-ada-002")
+    return RateLimitedEmbeddings(OpenAIEmbeddings(
+        model=settings.SETTINGS.embedding_model,
+        **models.http_client_kwargs(),
+    ))
+
+
+@lru_cache
+def get_document_embeddings():
+    """Embeddings for pre-chunked documents (see ``_chunking``).
+
+    Chunks already fit the model's context and arrive in token-budget batches,
+    so the client neither re-tokenizes them nor splits the batch further.
+    """
+    return RateLimitedEmbeddings(OpenAIEmbeddings(
+        model=settings.SETTINGS.embedding_model,
+        check_embedding_ctx_length=False,
+        chunk_size=settings.SETTINGS.ingest_batch_size,
+        **models.http_client_kwargs(),
+    ))
+
+
+class RateLimitedTavilySearch(TavilySearchResults):
+    """Tavily search tool that applies the shared Tavily limiter."""
+
+    def _run(self, query: str, run_manager=None):
+        limits.get_rate_limiter("tavily").acquire()
+        return super()._run(query, run_manager=run_manager)
+
+    async def _arun(self, query: str, run_manager=None):
+        await limits.get_rate_limiter("tavily").aacquire()
+        return await super()._arun(query, run_manager=run_manager)
 
 
 __all__ = ["ensure_configurable"]
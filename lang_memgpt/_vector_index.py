@@ -0,0 +1,350 @@
+"""Compact on-disk vector index segments with scalar quantization.
+
+Vectors are L2-normalized, so cosine similarity is a dot product, and kept in
+two forms:
+
+- ``codes.npy``: quantized copy scanned for every query, as ``float16``
+  (2 bytes/dim), ``int8`` (1 byte/dim plus one float32 scale per vector in
+  ``scales.npy``) or ``float32``.
+- ``vectors.npy``: full-precision float32, only read for the top
+  ``k * oversample`` candidates, which are re-scored exactly.
+
+Texts and JSON metadata are concatenated into ``texts.bin`` and
+``metadata.bin`` with ``*_offsets.npy`` row boundaries (and row ids, when
+given, into ``ids.bin``), and ``index.json``
+records the quantization, count, dimension and named row ranges
+(``groups``, e.g. the rows of each document) that a search can be limited
+to. Every file of a segment is
+memory-mapped read-only, so worker processes serving the same segment share
+its pages through the OS page cache instead of each holding a copy.
+
+``SegmentStore`` keeps generations of segments under one directory. Writers
+publish a complete new segment and then atomically replace the ``CURRENT``
+file naming it; readers check ``CURRENT`` on each access and swap to the new
+segment when it changes. ``SegmentStore.update`` builds the next generation
+from the live one under the publish lock, so a writer can apply just its own
+changes without losing another process's.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import json
+import logging
+import os
+import shutil
+import threading
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+QUANTIZATIONS = ("int8", "float16", "float32")
+
+# Rows scored per block, so int8 codes are widened to float32 a block at a
+# time rather than for the whole matrix.
+SCORE_BLOCK_ROWS = 1024
+
+
+class _BlobRows(Sequence):
+    """Rows of a concatenated UTF-8 blob, decoded on access."""
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray, parse=None) -> None:
+        self.blob = blob
+        self.offsets = offsets
+        self.parse = parse
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self[i] for i in range(*row.indices(len(self)))]
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError(row)
+        value = self.blob[self.offsets[row]:self.offsets[row + 1]].tobytes().decode("utf-8")
+        return self.parse(value) if self.parse else value
+
+
+def _write_blob(path: str, values: List[str]) -> None:
+    encoded = [v.encode("utf-8") for v in values]
+    with open(f"{path}.bin", "wb") as f:
+        for value in encoded:
+            f.write(value)
+    np.save(f"{path}_offsets.npy", np.concatenate(([0], np.cumsum([len(v) for v in encoded]))).astype(np.int64))
+
+
+def _read_blob(path: str, parse=None) -> _BlobRows:
+    offsets = np.load(f"{path}_offsets.npy", mmap_mode="r")
+    # np.memmap cannot map an empty file.
+    blob = np.memmap(f"{path}.bin", dtype=np.uint8, mode="r") if offsets[-1] else np.zeros(0, np.uint8)
+    return _BlobRows(blob, offsets, parse)
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def quantize(vectors: np.ndarray, quantization: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Codes (and per-vector scales for int8) for normalized float32 vectors."""
+    if quantization == "float32":
+        return vectors.astype(np.float32), None
+    if quantization == "float16":
+        return vectors.astype(np.float16), None
+    if quantization == "int8":
+        scales = np.abs(vectors).max(axis=1, initial=0.0) / 127.0
+        scales = np.maximum(scales, 1e-12).astype(np.float32)
+        codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+        return codes, scales
+    raise ValueError(f"Unknown quantization '{quantization}'. Use one of: {', '.join(QUANTIZATIONS)}")
+
+
+class VectorIndex:
+    """Quantized vectors with exact re-scoring, plus their documents.
+
+    Attributes:
+        quantization: "int8", "float16" or "float32".
+        texts: Document text per row.
+        metadatas: Metadata dict per row.
+        groups: Named lists of ``[start, end)`` row ranges.
+        ids: Id per row (e.g. the Chroma chunk id), or None.
+    """
+
+    def __init__(
+        self,
+        codes: np.ndarray,
+        scales: Optional[np.ndarray],
+        vectors: np.ndarray,
+        texts: Sequence[str],
+        metadatas: Sequence[Dict[str, Any]],
+        quantization: str,
+        groups: Optional[Dict[str, List[Tuple[int, int]]]] = None,
+        ids: Optional[Sequence[str]] = None,
+    ) -> None:
+        self.codes = codes
+        self.scales = scales
+        self.vectors = vectors
+        self.texts = texts
+        self.metadatas = metadatas
+        self.quantization = quantization
+        self.groups = groups or {}
+        self.ids = ids
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    @property
+    def dim(self) -> int:
+        return self.codes.shape[1] if self.codes.ndim == 2 else 0
+
+    @property
+    def resident_bytes(self) -> int:
+        """Bytes of vector data held in memory (full-precision rows are mapped)."""
+        return self.codes.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    @classmethod
+    def build(
+        cls,
+        embeddings: Sequence[Sequence[float]],
+        texts: List[str],
+        metadatas: List[Dict[str, Any]],
+        quantization: str = "int8",
+        groups: Optional[Dict[str, List[Tuple[int, int]]]] = None,
+        ids: Optional[List[str]] = None,
+    ) -> "VectorIndex":
+        if len(texts):
+            vectors = normalize(np.asarray(embeddings, dtype=np.float32).reshape(len(texts), -1))
+        else:
+            vectors = np.zeros((0, 0), dtype=np.float32)
+        codes, scales = quantize(vectors, quantization)
+        return cls(codes, scales, vectors, list(texts), list(metadatas), quantization, groups,
+                   list(ids) if ids is not None else None)
+
+    def group_rows(self, names: Sequence[str]) -> np.ndarray:
+        """Sorted rows in any of the named groups."""
+        ranges = [np.arange(start, end) for name in names for start, end in self.groups.get(name, ())]
+        return np.unique(np.concatenate(ranges)) if ranges else np.zeros(0, dtype=np.int64)
+
+    def approximate_scores(self, query: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Dot products of the query with every row (or ``rows``), from the quantized codes."""
+        count = len(self) if rows is None else len(rows)
+        scores = np.empty(count, dtype=np.float32)
+        for start in range(0, count, SCORE_BLOCK_ROWS):
+            if rows is None:
+                block = self.codes[start:start + SCORE_BLOCK_ROWS]
+            else:
+                block = self.codes[rows[start:start + SCORE_BLOCK_ROWS]]
+            scores[start:start + len(block)] = block.astype(np.float32, copy=False) @ query
+        if self.scales is not None:
+            scores *= self.scales if rows is None else self.scales[rows]
+        return scores
+
+    def search(
+        self, query: Sequence[float], k: int = 4, oversample: int = 4, rows: Optional[np.ndarray] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        Top ``k`` rows by cosine similarity as ``(row, score)``, best first.
+
+        The quantized scan keeps ``k * oversample`` candidates, which are then
+        re-scored with the full-precision vectors. ``rows`` (sorted) limits
+        the scan to those rows, e.g. ``group_rows`` of one document.
+        """
+        if rows is not None:
+            rows = np.asarray(rows, dtype=np.int64)
+        count = len(self) if rows is None else len(rows)
+        if not count or k <= 0:
+            return []
+        query = normalize(np.asarray(query, dtype=np.float32))
+        scores = self.approximate_scores(query, rows)
+        candidates = min(count, max(k, k * oversample))
+        if candidates < count:
+            picked = np.argpartition(-scores, candidates - 1)[:candidates]
+        else:
+            picked = np.arange(count)
+        picked = np.sort(picked if rows is None else rows[picked])  # sequential reads from the memory map
+        exact = np.asarray(self.vectors[picked], dtype=np.float32) @ query
+        order = np.argsort(-exact)[:k]
+        return [(int(picked[i]), float(exact[i])) for i in order]
+
+    def save(self, directory: str) -> None:
+        """Writes the index to ``directory``, replacing any index there."""
+        parent = os.path.dirname(os.path.abspath(directory))
+        os.makedirs(parent, exist_ok=True)
+        tmp_dir = f"{directory}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+
+        np.save(os.path.join(tmp_dir, "codes.npy"), self.codes)
+        if self.scales is not None:
+            np.save(os.path.join(tmp_dir, "scales.npy"), self.scales)
+        np.save(os.path.join(tmp_dir, "vectors.npy"), np.asarray(self.vectors, dtype=np.float32))
+        _write_blob(os.path.join(tmp_dir, "texts"), list(self.texts))
+        _write_blob(os.path.join(tmp_dir, "metadata"), [json.dumps(m) for m in self.metadatas])
+        if self.ids is not None:
+            _write_blob(os.path.join(tmp_dir, "ids"), list(self.ids))
+        with open(os.path.join(tmp_dir, "index.json"), "w") as f:
+            json.dump({
+                "quantization": self.quantization, "count": len(self), "dim": self.dim, "groups": self.groups,
+            }, f)
+
+        old_dir = f"{directory}.old"
+        shutil.rmtree(old_dir, ignore_errors=True)
+        if os.path.exists(directory):
+            os.replace(directory, old_dir)
+        os.replace(tmp_dir, directory)
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> "VectorIndex":
+        """
+        Opens a saved index. With ``mmap`` (the default) every array is mapped
+        read-only and shared between processes; otherwise codes are copied
+        into process memory.
+        """
+        with open(os.path.join(directory, "index.json")) as f:
+            manifest = json.load(f)
+        mode = "r" if mmap else None
+        scales_path = os.path.join(directory, "scales.npy")
+        ids_path = os.path.join(directory, "ids")
+        return cls(
+            codes=np.load(os.path.join(directory, "codes.npy"), mmap_mode=mode),
+            scales=np.load(scales_path, mmap_mode=mode) if os.path.exists(scales_path) else None,
+            vectors=np.load(os.path.join(directory, "vectors.npy"), mmap_mode="r"),
+            texts=_read_blob(os.path.join(directory, "texts")),
+            metadatas=_read_blob(os.path.join(directory, "metadata"), json.loads),
+            quantization=manifest["quantization"],
+            groups={name: [tuple(r) for r in ranges] for name, ranges in manifest.get("groups", {}).items()},
+            # Segments written before row ids were stored have none.
+            ids=_read_blob(ids_path) if os.path.exists(f"{ids_path}_offsets.npy") else None,
+        )
+
+
+class SegmentStore:
+    """Generations of read-only index segments under ``root``.
+
+    ``CURRENT`` holds the live generation number; ``gen-<n>`` directories
+    hold the segments. The newest ``keep`` generations are kept on disk so
+    readers that have not swapped yet can still open theirs.
+    """
+
+    def __init__(self, root: str, keep: int = 2) -> None:
+        self.root = root
+        self.keep = max(1, keep)
+        self._lock = threading.Lock()
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._generation = 0
+        self._index: Optional[VectorIndex] = None
+
+    @property
+    def _current_path(self) -> str:
+        return os.path.join(self.root, "CURRENT")
+
+    def segment_path(self, generation: int) -> str:
+        return os.path.join(self.root, f"gen-{generation:06d}")
+
+    def generation(self) -> int:
+        """The live generation number, 0 when nothing has been published."""
+        try:
+            with open(self._current_path) as f:
+                return int(f.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def publish(self, index: VectorIndex) -> int:
+        """Writes ``index`` as the next generation and makes it live."""
+        return self.update(lambda live: index)
+
+    def update(self, build: Callable[[Optional[VectorIndex]], VectorIndex]) -> int:
+        """
+        Publishes ``build(live)`` as the next generation, where ``live`` is
+        the segment live at that moment (None before the first publish).
+        ``build`` runs under the publish lock, so no other writer publishes
+        in between.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        # Serialize publishers across processes (e.g. two ingestion workers).
+        with open(os.path.join(self.root, ".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            live = self.generation()
+            index = build(VectorIndex.load(self.segment_path(live)) if live else None)
+            generation = live + 1
+            index.save(self.segment_path(generation))
+            tmp_path = f"{self._current_path}.tmp"
+            with open(tmp_path, "w") as f:
+                f.write(str(generation))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self._current_path)
+            for name in os.listdir(self.root):
+                if name.startswith("gen-") and name[4:].isdigit() and int(name[4:]) <= generation - self.keep:
+                    shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+        logger.info(f"Published index generation {generation} with {len(index)} vectors at {self.root}")
+        return generation
+
+    def current(self) -> Optional[VectorIndex]:
+        """The live segment, reopened only when ``CURRENT`` changed."""
+        try:
+            stat = os.stat(self._current_path)
+        except FileNotFoundError:
+            return None
+        stamp = (stat.st_mtime_ns, stat.st_ino)
+        with self._lock:
+            if stamp != self._stamp:
+                generation = self.generation()
+                if generation != self._generation or self._index is None:
+                    self._index = VectorIndex.load(self.segment_path(generation))
+                    self._generation = generation
+                self._stamp = stamp
+            return self._index
+
+
+@lru_cache(maxsize=None)
+def get_segment_store(root: str) -> SegmentStore:
+    """One store per directory and process, so the mapped segment is reused."""
+    return SegmentStore(root)
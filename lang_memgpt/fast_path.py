@@ -0,0 +1,132 @@
+"""Deterministic answers for simple calculator, unit and date requests.
+
+``process_chat`` calls ``answer`` on the latest user message before running
+the graph. When the whole message is an unambiguous arithmetic expression,
+unit conversion or date offset, it is answered locally with the same parsing
+the corresponding tool uses, with no memory lookup and no LLM call. Anything
+less certain returns None and takes the normal agent path.
+"""
+
+from __future__ import annotations
+
+import re
+from datetime import datetime, timezone
+from typing import NamedTuple, Optional
+
+from lang_memgpt.tools.calculator_tool import evaluate
+from lang_memgpt.tools.date_time_tool import add_days
+from lang_memgpt.tools.unit_converter_tool import convert, parse_conversion
+
+
+class FastPathAnswer(NamedTuple):
+    intent: str
+    content: str
+
+
+# Trailing punctuation and polite wrappers that don't change the request.
+_TRIM_RE = re.compile(r"^\s*(?:please\s+|hey\s+alfred,?\s+|alfred,?\s+)*|[\s?.!]*$", re.IGNORECASE)
+
+# "3 + 5 * 2", "what is (12.5 / 4)^2?", "calculate 7*6"
+_CALC_RE = re.compile(
+    r"^(?:(?:what(?:'s| is)|(?P<verb>calculate|compute|evaluate))\s+)?"
+    r"(?P<expr>[-+(\s]*\d[\d.\s()]*(?:(?:\*\*|//|[-+*/^%])[-+(\s]*\d[\d.\s()]*)+)(?:\s*=)?$",
+    re.IGNORECASE,
+)
+# Digit groups joined only by "-" or "/" are usually dates, phone numbers or
+# phrases ("2025-03-01", "555-1234", "10/12/2024", "24/7"). They are only
+# arithmetic with a calculation verb or spaces around the operator.
+_DATE_LIKE_RE = re.compile(r"^\d+(?:-\d+)+$|^\d+(?:/\d+)+$")
+
+# "convert 16k lbs of jp-8 to gallons", "500 miles in km", "20 kts to km/h"
+_CONVERT_RE = re.compile(
+    r"^(?:(?:convert|change|what is|what's)\s+)?[\d,.]+k?\s*[a-z][a-z\d/\s-]*\s+(?:to|in)\s+[a-z][a-z\d/\s-]*$",
+    re.IGNORECASE,
+)
+
+# "what is today's date", "what's the date"
+_TODAY_RE = re.compile(
+    r"^(?:what(?:'s| is)\s+)?(?:today'?s date|the date(?:\s+today)?|date today)$",
+    re.IGNORECASE,
+)
+
+# "2025-03-01 plus 10 days", "10 days after 2025-03-01", "30 days from today", "5 days ago"
+_DATE_PLUS_RE = re.compile(
+    r"^(?:what(?:'s| is)\s+(?:the date\s+)?)?(?P<date>\d{4}-\d{2}-\d{2}|today)\s*"
+    r"(?P<op>plus|minus|\+|-)\s*(?P<days>\d+)\s+days?$",
+    re.IGNORECASE,
+)
+_DAYS_FROM_RE = re.compile(
+    r"^(?:what(?:'s| is)\s+(?:the date\s+)?)?(?:the date\s+)?(?P<days>\d+)\s+days?\s+"
+    r"(?:(?P<dir>from|after|before)\s+(?P<date>\d{4}-\d{2}-\d{2}|today|now)|(?P<ago>ago))$",
+    re.IGNORECASE,
+)
+
+
+def _today() -> str:
+    return datetime.now(tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+def _calculator(text: str) -> Optional[FastPathAnswer]:
+    match = _CALC_RE.match(text)
+    if not match:
+        return None
+    expression = " ".join(match.group("expr").split())
+    if not match.group("verb") and _DATE_LIKE_RE.match(expression):
+        return None
+    try:
+        result = evaluate(expression)
+    except (ValueError, ArithmeticError, TypeError):
+        return None
+    if isinstance(result, float) and result.is_integer():
+        result = int(result)
+    return FastPathAnswer("calculator", f"{expression} = {result}")
+
+
+def _unit_conversion(text: str) -> Optional[FastPathAnswer]:
+    if not _CONVERT_RE.match(text):
+        return None
+    try:
+        parsed = parse_conversion(text)
+        if parsed is None:
+            return None
+        return FastPathAnswer("unit_conversion", convert(*parsed))
+    except ValueError:
+        return None
+
+
+def _date(text: str) -> Optional[FastPathAnswer]:
+    if _TODAY_RE.match(text):
+        return FastPathAnswer("date", f"Today is {_today()} (UTC).")
+
+    if match := _DATE_PLUS_RE.match(text):
+        base = match.group("date").lower()
+        days = int(match.group("days")) * (-1 if match.group("op") in ("minus", "-") else 1)
+    elif match := _DAYS_FROM_RE.match(text):
+        base = (match.group("date") or "today").lower()
+        days = int(match.group("days")) * (-1 if match.group("ago") or match.group("dir") == "before" else 1)
+    else:
+        return None
+
+    start = _today() if base in ("today", "now") else base
+    try:
+        return FastPathAnswer("date", f"{start} {'+' if days >= 0 else '-'} {abs(days)} days = {add_days(start, days)}")
+    except ValueError:
+        return None
+
+
+_MATCHERS = (_calculator, _unit_conversion, _date)
+
+
+def answer(message: str) -> Optional[FastPathAnswer]:
+    """Answer ``message`` locally if it is an unambiguous calculator, unit or date request."""
+    text = _TRIM_RE.sub("", message or "")
+    if not text or len(text) > 120:
+        return None
+    for matcher in _MATCHERS:
+        result = matcher(text)
+        if result is not None:
+            return result
+    return None
+
+
+__all__ = ["FastPathAnswer", "answer"]
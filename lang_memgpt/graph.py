@@ -11,23 +11,18 @@ from __future__ import annotations
 import asyncio
 import json
 import logging
-import uuid
 from datetime import datetime, timezone
+from functools import lru_cache
 from typing import Optional, Tuple, List, Dict, Any
 import sys
 
 import langsmith
 import tiktoken
-from langchain.chat_models import init_chat_model
-from lang_memgpt.RAG_Structure.route_question import route_question
-from langchain_community.tools.tavily_search import TavilySearchResults
 from langchain_core.messages import AIMessage, SystemMessage, HumanMessage
 from langchain_core.messages.utils import get_buffer_string
-from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.runnables.config import (
     RunnableConfig,
     ensure_config,
-    get_executor_for_config,
 )
 from langchain_core.tools import tool
 from langgraph.graph import START, END, StateGraph
@@ -35,34 +30,38 @@ from langgraph.prebuilt import ToolNode
 from typing_extensions import Literal
 
 from lang_memgpt import _constants as constants
+from lang_memgpt import fast_path
+from lang_memgpt import _memory_buffer as memory_buffer
+from lang_memgpt import _metrics as metrics
+from lang_memgpt import _models as models
+from lang_memgpt import _prompts as prompts
 from lang_memgpt import _schemas as schemas
 from lang_memgpt import _settings as settings
 from lang_memgpt import _utils as utils
 
 # RAG pipeline imports
-from lang_memgpt.RAG_Structure.decision_logic import decide_to_generate
-from lang_memgpt.RAG_Structure.nodes.generate import generate
-from lang_memgpt.RAG_Structure.nodes.ingestion import ingest_data
-from lang_memgpt.RAG_Structure.nodes.retrieve import retrieve
-from lang_memgpt.RAG_Structure.nodes.grade_documents import grade_documents
-from lang_memgpt.RAG_Structure.nodes.web_search import web_search
-from lang_memgpt.RAG_Structure.chains.router import question_router
-from lang_memgpt.RAG_Structure.chains import answer_grader, generation, hallucination_grader, retrieval_grader, router
-from lang_memgpt.RAG_Structure.grade_generation import grade_generation_grounded_in_documents_and_question as grade_generation
+from lang_memgpt.RAG_Structure.crag import corrective_rag
+from lang_memgpt.RAG_Structure.nodes.ingestion import ingest_data, ingestion_status
+from lang_memgpt.RAG_Structure.nodes.retrieve import retrieve, retrieve_node
 
 # Tools from lang_memgpt/tools
 from lang_memgpt.tools import (
     get_metar_data,
     get_taf_data,
     calculate,
+    calculate_batch,
     unit_converter,
+    unit_converter_batch,
     date_time_tool,
-    fetch_latest_news
+    fetch_latest_news,
+    list_tables,
+    query_table,
+    document_summary,
 )
 
 # Configure logging to stdout
 logging.basicConfig(
-    level=logging.DEBUG,
+    level=settings.SETTINGS.log_level,
     stream=sys.stdout,
     format="%(asctime)s %(levelname)s %(name)s %(message)s"
 )
@@ -72,7 +71,7 @@ logger = logging.getLogger("memory")
 _EMPTY_VEC = [0.00001] * 1536
 
 # Initialize the search tool
-search_tool = TavilySearchResults(max_results=1)
+search_tool = utils.RateLimitedTavilySearch(max_results=1)
 tools = [search_tool]
 
 @tool
@@ -82,42 +81,29 @@ async def save_recall_memory(memory: str) -> str:
     """
     config = ensure_config()
     configurable = utils.ensure_configurable(config)
-    embeddings = utils.get_embeddings()
-    vector = await embeddings.aembed_query(memory)
-    current_time = datetime.now(tz=timezone.utc)
-    path = constants.INSERT_PATH.format(
-        user_id=configurable["user_id"],
-        event_id=str(uuid.uuid4()),
-    )
-    documents = [{
-        "id": path,
-        "values": vector,
-        "metadata": {
-            constants.PAYLOAD_KEY: memory,
-            constants.PATH_KEY: path,
-            constants.TIMESTAMP_KEY: current_time,
-            constants.TYPE_KEY: "recall",
-            "user_id": configurable["user_id"],
-        },
-    }]
-    utils.get_index().upsert(
-        vectors=documents,
+    if settings.SETTINGS.memory_write_behind:
+        memory_buffer.get_memory_buffer().add(configurable["user_id"], memory)
+        return memory
+    item = memory_buffer.new_memory(configurable["user_id"], memory)
+    vector = await utils.get_embeddings().aembed_query(memory)
+    await utils.get_index().aupsert(
+        vectors=memory_buffer.to_vectors([item], [vector]),
         namespace=settings.SETTINGS.pinecone_namespace,
     )
     return memory
 
 @tool
-def search_memory(query: str, top_k: int = 5) -> List[str]:
+async def search_memory(query: str, top_k: int = 5) -> List[str]:
     """
     Search for memories in the database based on semantic similarity.
     """
     config = ensure_config()
     configurable = utils.ensure_configurable(config)
     embeddings = utils.get_embeddings()
-    vector = embeddings.embed_query(query)
+    vector = await embeddings.aembed_query(query)
 
     with langsmith.trace("query", inputs={"query": query, "top_k": top_k}) as rt:
-        response = utils.get_index().query(
+        response = await utils.get_index().aquery(
             vector=vector,
             filter={
                 "user_id": {"$eq": configurable["user_id"]},
@@ -128,9 +114,27 @@ def search_memory(query: str, top_k: int = 5) -> List[str]:
             top_k=top_k,
         )
         rt.end(outputs={"response": response})
+    scored = [(m.get("score", 0.0), m["metadata"][constants.PAYLOAD_KEY]) for m in response.get("matches") or []]
+    # Memories saved in this process but not yet written are served from the
+    # write-behind buffer, ranked against the matches by the same similarity.
+    if settings.SETTINGS.memory_write_behind:
+        pending = memory_buffer.get_memory_buffer().pending(configurable["user_id"])
+        if pending:
+            vectors = await embeddings.aembed_documents(pending)
+            scored += [(_cosine(vector, v), memory) for v, memory in zip(vectors, pending)]
+            scored.sort(key=lambda s: s[0], reverse=True)
+    return list(dict.fromkeys(memory for _, memory in scored))[:top_k]
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    norms = sum(x * x for x in a) ** 0.5 * sum(y * y for y in b) ** 0.5
+    return sum(x * y for x, y in zip(a, b)) / norms if norms else 0.0
+
+def _core_memories(path: str, response: Dict[str, Any]) -> List[str]:
     memories = []
-    if matches := response.get("matches"):
-        memories = [m["metadata"][constants.PAYLOAD_KEY] for m in matches]
+    if vectors := response.get("vectors"):
+        document = vectors[path]
+        payload = document["metadata"][constants.PAYLOAD_KEY]
+        memories = json.loads(payload)["memories"]
     return memories
 
 @langsmith.traceable
@@ -142,12 +146,16 @@ def fetch_core_memories(user_id: str) -> Tuple[str, List[str]]:
     response = utils.get_index().fetch(
         ids=[path], namespace="core_memories"
     )
-    memories = []
-    if vectors := response.get("vectors"):
-        document = vectors[path]
-        payload = document["metadata"][constants.PAYLOAD_KEY]
-        memories = json.loads(payload)["memories"]
-    return path, memories
+    return path, _core_memories(path, response)
+
+@langsmith.traceable
+async def afetch_core_memories(user_id: str) -> Tuple[str, List[str]]:
+    """``fetch_core_memories`` without blocking the event loop."""
+    path = constants.PATCH_PATH.format(user_id=user_id)
+    response = await utils.get_index().afetch(
+        ids=[path], namespace="core_memories"
+    )
+    return path, _core_memories(path, response)
 
 @tool
 def store_core_memory(memory: str, index: Optional[int] = None) -> str:
@@ -188,119 +196,61 @@ all_tools = tools + [
     get_metar_data,
     get_taf_data,
     calculate,
+    calculate_batch,
     unit_converter,
+    unit_converter_batch,
     date_time_tool,
     fetch_latest_news,
+    list_tables,
+    query_table,
+    document_summary,
     ingest_data,
-    route_question,
+    ingestion_status,
     retrieve,
-    web_search,
-    grade_documents,
-    grade_generation,
+    corrective_rag,
 ]
 
 def ensure_docstring(func):
     if not func.__doc__:
-        print(f"[TOOL DEBUG] Adding docstring to {func.__name__}", flush=True)
+        logger.debug(f"[TOOL DEBUG] Adding docstring to {func.__name__}")
         func.__doc__ = "No description provided."
     if "(dict)" in func.__doc__:
-        print(f"Tool with (dict) in docstring: {func.__name__}", flush=True)
+        logger.debug(f"Tool with (dict) in docstring: {func.__name__}")
     return func
 
-all_tools = [ensure_docstring(t) for t in all_tools]
-
-
-prompt = ChatPromptTemplate.from_messages(
-    [
-        (
-            "system",
-            "You are a helpful assistant called Alfred with advanced long-term memory"
-            " capabilities. Powered by a stateless LLM, you must rely on"
-            " external memory to store information between conversations."
-            " Utilize the available memory tools to store and retrieve"
-            " important details that will help you better attend to the user's"
-            " needs and understand their context.\n\n"
-            "Memory Usage Guidelines:\n"
-            "1. Actively use memory tools (save_core_memory, save_recall_memory)"
-            " to build a comprehensive understanding of the user.\n"
-            "2. Make informed suppositions and extrapolations based on stored"
-            " memories.\n"
-            "3. Regularly reflect on past interactions to identify patterns and"
-            " preferences.\n"
-            "4. Update your mental model of the user with each new piece of"
-            " information.\n"
-            "5. Cross-reference new information with existing memories for"
-            " consistency.\n"
-            "6. Prioritize storing emotional context and personal values"
-            " alongside facts.\n"
-            "7. Use memory to anticipate needs and tailor responses to the"
-            " user's style.\n"
-            "8. Recognize and acknowledge changes in the user's situation or"
-            " perspectives over time.\n"
-            "9. Leverage memories to provide personalized examples and"
-            " analogies.\n"
-            "10. Recall past challenges or successes to inform current"
-            " problem-solving.\n"
-            "11. Alfred can also process (i.e., ingest documents), index, and query PDF, CSV, Excel, and Word documents "
-            "stored in a dedicated document database for research and analysis tasks.\n"
-            "12. Use document processing tools to analyze uploaded PDFs or Excel files and"
-            " summarize key insights.\n"
-            "13. For long or complex queries, break them into smaller parts and retrieve"
-            " relevant document sections incrementally.\n"
-            "14. Use the retrieve tool when queries explicitly reference external documents"
-            " such as PDFs, reports, or data analysis. Avoid using retrieve for general queries.\n"
-            "15. Before deciding to retrieve document data, evaluate whether the query explicitly mentions"
-            " document analysis, files, or content extraction. Otherwise, default to responding directly or"
-            " leveraging memory tools.\n"
-            "16. Use the newsdata_tool for any requests regarding current events.\n\n"
-            "## Core Memories\n"
-            "Core memories are fundamental to understanding the user and are"
-            " always available:\n{core_memories}\n\n"
-            "## Recall Memories\n"
-            "Recall memories are contextually retrieved based on the current"
-            " conversation:\n{recall_memories}\n\n"
-            "When handling document queries:"
-            "- Use 'retrieve' with both filename and query parameters"
-            "- Example: retrieve(filename=\"doc.pdf\", query=\"what is this about?\")"
-            "- Always include the document name in retrieval requests"
-            "## Instructions\n"
-            "Engage with the user naturally, as a trusted colleague or friend."
-            " There's no need to explicitly mention your memory capabilities."
-            " Instead, seamlessly incorporate your understanding of the user"
-            " into your responses. Be attentive to subtle cues and underlying"
-            " emotions. Adapt your communication style to match the user's"
-            " preferences and current emotional state. Use tools to persist"
-            " information you want to retain in the next conversation. If you"
-            " do call tools, all text preceding the tool call is an internal"
-            " message. Respond AFTER calling the tool, once you have"
-            " confirmation that the tool completed successfully. Always provide responses in markdown format, using headers, bullets, and other formatting as approrpriate.\n\n"
-            # "Always provide the URL, if you use the web_search tool. The URL in the format `[{url}]({url})`.\n\n"
-            "Current system time: {current_time}\n\n",
-            
-        ),
-        ("placeholder", "{messages}"),
-    ]
-)
+all_tools = prompts.sorted_tools([ensure_docstring(t) for t in all_tools])
+
+
+@lru_cache(maxsize=8)
+def bound_agent(model: Optional[str]):
+    """The agent prompt and model with the tools bound, built once per model."""
+    return prompts.agent_prompt | models.get_agent_model(model).bind_tools(all_tools)
+
 
 def prepare_tool_args(tool_name: str, raw_args: Dict[str, Any], last_human_message: str = None) -> Dict[str, Any]:
     """Prepare and validate tool arguments."""
     try:
-        print(f"[TOOL DEBUG] prepare_tool_args called for: {tool_name}", flush=True)
-        print(f"[TOOL DEBUG] Raw args: {raw_args}", flush=True)
-        print(f"[TOOL DEBUG] Last human message: {last_human_message}", flush=True)
+        logger.debug("[TOOL DEBUG] prepare_tool_args called for: %s", tool_name)
+        logger.debug("[TOOL DEBUG] Raw args: %s", raw_args)
+        logger.debug("[TOOL DEBUG] Last human message: %s", last_human_message)
 
         if tool_name == "retrieve":
             try:
-                print("[TOOL DEBUG] Creating retrieve state", flush=True)
-                state = {"state": {"question": last_human_message or "Please provide information about the document"}}
-                print(f"[TOOL DEBUG] Created retrieve state: {state}", flush=True)
-                return state
+                # Keep the model's query and filename; fall back to the user's
+                # message when it gave no query.
+                args = {
+                    "query": raw_args.get("query") or last_human_message
+                    or "Please provide information about the document",
+                    "filename": raw_args.get("filename") or raw_args.get("file_name") or "",
+                }
+                logger.debug("[TOOL DEBUG] Prepared retrieve args: %s", args)
+                return args
             except Exception as e:
-                print(f"[TOOL ERROR] Error creating retrieve state: {str(e)}", flush=True)
+                logger.error(f"[TOOL ERROR] Error creating retrieve state: {str(e)}")
                 raise
         return raw_args
     except Exception as e:
-        print(f"[TOOL ERROR] Error in prepare_tool_args: {str(e)}", flush=True)
+        logger.error(f"[TOOL ERROR] Error in prepare_tool_args: {str(e)}")
         raise
 
 async def agent(state: schemas.State, config: RunnableConfig) -> schemas.State:
@@ -315,24 +265,15 @@ async def agent(state: schemas.State, config: RunnableConfig) -> schemas.State:
         The updated state with the agent's response.
     """
     logger.debug("Entering agent function")
-    print(f"[GRAPH] Entering agent function with state {state}", flush=True)
+    logger.debug("[GRAPH] Entering agent function with state %s", state)
     configurable = utils.ensure_configurable(config)
-    llm = init_chat_model(configurable["model"])
-    
-    # Ensure all tools have descriptions and check for "(dict)" in the docstring
-    for tool in all_tools:
-        if not tool.__doc__:
-            tool.__doc__ = "No description provided."
-        if "(dict)" in tool.__doc__:
-            print(f"Tool with (dict) in docstring: {tool.__name__}", flush=True)
-            
-    bound = prompt | llm.bind_tools(all_tools)
-    # print(f"[GRAPH] Bound: {bound}", flush=True)
+    # Tools were checked for docstrings when all_tools was built.
+    bound = bound_agent(configurable["model"])
 
     messages = state.get("messages", [])
     core_memories = state.get("core_memories", [])
     recall_memories = state.get("recall_memories", [])
-    current_time = datetime.now(tz=timezone.utc).isoformat()
+    current_time = prompts.current_time(settings.SETTINGS.prompt_time_granularity)
 
     prediction = await bound.ainvoke({
         "messages": messages,
@@ -341,7 +282,7 @@ async def agent(state: schemas.State, config: RunnableConfig) -> schemas.State:
         "current_time": current_time,
     })
 
-    print(f"[GRAPH] Prediction: {prediction}", flush=True)
+    logger.debug("[GRAPH] Prediction: %s", prediction)
 
     # Log any tool calls if they are provided in the prediction.
     tool_calls = []
@@ -350,10 +291,10 @@ async def agent(state: schemas.State, config: RunnableConfig) -> schemas.State:
     elif isinstance(prediction, dict):
         tool_calls = prediction.get("additional_kwargs", {}).get("tool_calls", [])
     else:
-        print("[GRAPH] Unknown prediction structure; unable to extract tool calls.", flush=True)
+        logger.debug("[GRAPH] Unknown prediction structure; unable to extract tool calls.")
 
     for tc in tool_calls:
-        print(f"[GRAPH] [TOOL CALL] Name: {tc['function']['name']} Arguments: {tc['function']['arguments']}", flush=True)
+        logger.debug("[GRAPH] [TOOL CALL] Name: %s Arguments: %s", tc['function']['name'], tc['function']['arguments'])
 
     return {
         "messages": prediction,
@@ -361,7 +302,7 @@ async def agent(state: schemas.State, config: RunnableConfig) -> schemas.State:
         "recall_memories": recall_memories
     }
 
-def load_memories(state: schemas.State, config: RunnableConfig) -> schemas.State:
+async def load_memories(state: schemas.State, config: RunnableConfig) -> schemas.State:
     """
     Load core and recall memories for the current conversation.
 
@@ -379,13 +320,10 @@ def load_memories(state: schemas.State, config: RunnableConfig) -> schemas.State
     convo_str = get_buffer_string(state.get("messages", []))
     convo_str = tokenizer.decode(tokenizer.encode(convo_str)[:2048])
 
-    with get_executor_for_config(config) as executor:
-        futures = [
-            executor.submit(fetch_core_memories, user_id),
-            executor.submit(search_memory.invoke, convo_str),
-        ]
-        _, core_memories = futures[0].result()
-        recall_memories = futures[1].result()
+    (_, core_memories), recall_memories = await asyncio.gather(
+        afetch_core_memories(user_id),
+        search_memory.ainvoke(convo_str, config),
+    )
 
     return {
         "core_memories": core_memories,
@@ -420,7 +358,7 @@ builder = StateGraph(schemas.State, schemas.GraphConfig)
 builder.add_node("load_memories", load_memories)
 builder.add_node("agent", agent)
 builder.add_node("tools", ToolNode(all_tools))
-builder.add_node("RETRIEVE", retrieve)
+builder.add_node("RETRIEVE", retrieve_node)
 
 # Define the main flow: start -> load memories -> agent.
 builder.add_edge(START, "load_memories")
@@ -445,7 +383,9 @@ async def process_chat(messages: List[Dict[str, str]], config: Dict[str, Any]) -
     """
     Process chat messages through the memory graph.
 
-    This function converts raw messages into typed messages, then invokes the graph.
+    Simple calculator, unit-conversion and date requests are answered by
+    ``fast_path`` without invoking the graph. Otherwise this function converts
+    raw messages into typed messages, then invokes the graph.
     If the graph returns a tool call (finish_reason == 'tool_calls'), it executes the tool,
     appends the tool result to the conversation state, and re-invokes the graph until a final
     assistant message is produced.
@@ -459,6 +399,19 @@ async def process_chat(messages: List[Dict[str, str]], config: Dict[str, Any]) -
     Returns:
         A dict with {"messages": [{"role": "assistant", "content": final_text}]}.
     """
+    # Unambiguous calculator/unit/date requests skip memory loading and the LLM.
+    last_message = messages[-1] if messages else {}
+    if settings.SETTINGS.fast_path_enabled and last_message.get("role") == "user":
+        with metrics.span("fast_path", "match") as attrs:
+            quick = fast_path.answer(last_message.get("content", ""))
+            attrs["intent"] = quick.intent if quick else None
+        if quick:
+            metrics.REGISTRY.inc(
+                "alfred_fast_path_total", help="Chat turns answered without the agent.", intent=quick.intent
+            )
+            logger.debug("[PROCESS DEBUG] Fast path answered %s request", quick.intent)
+            return {"messages": [{"role": "assistant", "content": quick.content}]}
+
     # Convert raw messages into LangChain messages.
     try:
         formatted_messages = []
@@ -473,35 +426,43 @@ async def process_chat(messages: List[Dict[str, str]], config: Dict[str, Any]) -
                 formatted_messages.append(SystemMessage(content=content))
             else:
                 formatted_messages.append(HumanMessage(content=content))
-        print(f"Formatted messages: {formatted_messages}", flush=True)
+        logger.debug("Formatted messages: %s", formatted_messages)
 
         # Build initial state.
         state = {"messages": formatted_messages}
-        _config = config  # pass through config as received
+        # Pass config through as received, adding a handler that times graph
+        # nodes, tools and model calls into the current request's trace.
+        _config = {
+            **config,
+            "callbacks": [
+                *(config.get("callbacks") or []),
+                metrics.MetricsCallbackHandler(metrics.current_trace()),
+            ],
+        }
 
         # Loop until the agent produces a final answer (i.e. no pending tool call).
         while True:
             try:
-                print("[PROCESS DEBUG] Starting new iteration", flush=True)
+                logger.debug("[PROCESS DEBUG] Starting new iteration")
                 result = await memgraph.ainvoke(input=state, config=_config)
                 
                 try:
                     tool_calls = []
-                    print(f"[PROCESS DEBUG] Result type: {result}", flush=True)
+                    logger.debug("[PROCESS DEBUG] Result: %s", result)
                     last_msg = result.get("messages", [])[-1] if isinstance(result.get("messages"), list) else result.get("messages")
-                    print(f"[PROCESS DEBUG] Last message type: {type(last_msg)}", flush=True)
-                    print(f"[PROCESS DEBUG] Last message: {last_msg}", flush=True)
+                    logger.debug("[PROCESS DEBUG] Last message type: %s", type(last_msg))
+                    logger.debug("[PROCESS DEBUG] Last message: %s", last_msg)
                     
                     if hasattr(last_msg, "additional_kwargs"):
-                        print("[PROCESS DEBUG] Extracting tool_calls from additional_kwargs", flush=True)
+                        logger.debug("[PROCESS DEBUG] Extracting tool_calls from additional_kwargs")
                         tool_calls = last_msg.additional_kwargs.get("tool_calls", [])
                     elif isinstance(last_msg, dict):
-                        print("[PROCESS DEBUG] Extracting tool_calls from dict", flush=True)
+                        logger.debug("[PROCESS DEBUG] Extracting tool_calls from dict")
                         tool_calls = last_msg.get("additional_kwargs", {}).get("tool_calls", [])
                     
-                    print(f"[PROCESS DEBUG] Found tool_calls: {tool_calls}", flush=True)
+                    logger.debug("[PROCESS DEBUG] Found tool_calls: %s", tool_calls)
                 except Exception as e:
-                    print(f"[PROCESS ERROR] Error extracting tool calls: {str(e)}", flush=True)
+                    logger.error(f"[PROCESS ERROR] Error extracting tool calls: {str(e)}")
                     raise
 
                 if tool_calls:
@@ -509,49 +470,50 @@ async def process_chat(messages: List[Dict[str, str]], config: Dict[str, Any]) -
                     tool_name = tc["function"]["name"]
                     
                     try:
-                        print(f"[PROCESS DEBUG] Processing tool: {tool_name}", flush=True)
+                        logger.debug("[PROCESS DEBUG] Processing tool: %s", tool_name)
                         tool_args = json.loads(tc["function"]["arguments"])
-                        print(f"[PROCESS DEBUG] Parsed tool arguments: {tool_args}", flush=True)
+                        logger.debug("[PROCESS DEBUG] Parsed tool arguments: %s", tool_args)
                     except Exception as e:
-                        print(f"[PROCESS ERROR] Error parsing tool arguments: {str(e)}", flush=True)
+                        logger.error(f"[PROCESS ERROR] Error parsing tool arguments: {str(e)}")
                         tool_args = {}
 
                     try:
-                        print("[PROCESS DEBUG] Looking for last human message", flush=True)
+                        logger.debug("[PROCESS DEBUG] Looking for last human message")
                         last_human = next((
                             (m.content if hasattr(m, "content") else m.get("content"))
                             for m in reversed(state["messages"])
                             if (hasattr(m, "role") and m.role == "user") or 
                                (isinstance(m, dict) and m.get("role") == "user")
                         ), "No message found")
-                        print(f"[PROCESS DEBUG] Found last human message: {last_human}", flush=True)
+                        logger.debug("[PROCESS DEBUG] Found last human message: %s", last_human)
                     except Exception as e:
-                        print(f"[PROCESS ERROR] Error finding last human message: {str(e)}", flush=True)
+                        logger.error(f"[PROCESS ERROR] Error finding last human message: {str(e)}")
                         last_human = ""
 
                     if tool_name == "retrieve":
                         try:
-                            print("[PROCESS DEBUG] Preparing retrieve tool arguments", flush=True)
+                            logger.debug("[PROCESS DEBUG] Preparing retrieve tool arguments")
                             tool_args = prepare_tool_args(tool_name, tool_args, last_human)
-                            print(f"[PROCESS DEBUG] Prepared retrieve arguments: {tool_args}", flush=True)
+                            logger.debug("[PROCESS DEBUG] Prepared retrieve arguments: %s", tool_args)
                         except Exception as e:
-                            print(f"[PROCESS ERROR] Error preparing retrieve arguments: {str(e)}", flush=True)
+                            logger.error(f"[PROCESS ERROR] Error preparing retrieve arguments: {str(e)}")
                             raise
 
                     try:
-                        print(f"[PROCESS DEBUG] Looking for tool function: {tool_name}", flush=True)
+                        logger.debug("[PROCESS DEBUG] Looking for tool function: %s", tool_name)
                         tool_func = next((t for t in all_tools if t.__name__ == tool_name), None)
                         if tool_func is None:
                             raise ValueError(f"Tool {tool_name} not found")
                         
-                        print(f"[PROCESS DEBUG] Executing tool with args: {tool_args}", flush=True)
+                        logger.debug("[PROCESS DEBUG] Executing tool with args: %s", tool_args)
                         if asyncio.iscoroutinefunction(tool_func):
                             tool_result = await tool_func(**tool_args)
                         else:
                             tool_result = tool_func(**tool_args)
-                        print(f"[PROCESS DEBUG] Tool execution successful: {str(tool_result)[:100]}...", flush=True)
+                        if logger.isEnabledFor(logging.DEBUG):
+                            logger.debug("[PROCESS DEBUG] Tool execution successful: %s...", str(tool_result)[:100])
                     except Exception as e:
-                        print(f"[PROCESS ERROR] Error executing tool: {str(e)}", flush=True)
+                        logger.error(f"[PROCESS ERROR] Error executing tool: {str(e)}")
                         raise
 
                     # Append tool result as a system message to the conversation.
@@ -564,7 +526,7 @@ async def process_chat(messages: List[Dict[str, str]], config: Dict[str, Any]) -
                     break
 
             except Exception as e:
-                print(f"[PROCESS ERROR] Critical error in process_chat: {str(e)}", flush=True)
+                logger.error(f"[PROCESS ERROR] Critical error in process_chat: {str(e)}")
                 return {"messages": [{"role": "assistant", "content": f"I encountered an error: {str(e)}"}]}
 
         # Extract final assistant text.
@@ -579,7 +541,7 @@ async def process_chat(messages: List[Dict[str, str]], config: Dict[str, Any]) -
         
         return {"messages": [{"role": "assistant", "content": final_ai_content}]}
     except Exception as e:
-        print(f"[PROCESS_CHAT] Error: {e}", flush=True)
+        logger.error(f"[PROCESS_CHAT] Error: {e}")
         return {"messages": [{"role": "assistant", "content": f"An error occurred: {e}"}]}
 
 __all__ = ["memgraph", "process_chat"]
@@ -0,0 +1,28 @@
+import logging
+
+from benchmarks import fakes
+from benchmarks import run
+from lang_memgpt.RAG_Structure.nodes import ingestion
+
+
+def test_failed_ingestion_is_counted_as_an_error(monkeypatch) -> None:
+    def failing_ingest(paths, progress=None):
+        ingestion.logger.error("Unexpected error during vector store creation: disk full")
+        return "An unexpected error occurred while creating the vector store: disk full"
+
+    monkeypatch.setattr(ingestion, "ingest_paths", failing_ingest)
+    result = run.bench_ingestion(fakes.FakeEmbeddings(latency=0))
+    assert result["errors"] == 1
+    assert result["first_error"].endswith("disk full")
+
+
+def test_exceptions_and_only_package_errors_are_counted() -> None:
+    result = {}
+    with run._count_errors(result):
+        # Third-party noise, e.g. Chroma's telemetry client.
+        logging.getLogger("chromadb").handle(logging.LogRecord(
+            "chromadb", logging.ERROR, "/site-packages/chromadb/telemetry.py", 1,
+            "Failed to send telemetry event", None, None,
+        ))
+        raise RuntimeError("boom")
+    assert result == {"errors": 1, "first_error": "RuntimeError: boom"}
@@ -0,0 +1,52 @@
+from langchain_core.documents import Document
+
+from lang_memgpt import _chunking as chunking
+
+PARAGRAPH = " ".join(f"Sentence number {i} talks about agent memory and paging." for i in range(12))
+TEXT = "\n\n".join([PARAGRAPH] * 6)
+
+
+def test_chunks_cover_text_on_sentence_boundaries() -> None:
+    chunks = list(chunking.split_text(TEXT, chunk_tokens=60))
+    encoding = chunking.get_encoding()
+
+    assert sum(count for _, _, count in chunks) == len(encoding.encode(TEXT))
+    assert "".join(text for _, text, _ in chunks).replace(" ", "").replace("\n", "") == \
+        TEXT.replace(" ", "").replace("\n", "")
+    for start, text, count in chunks:
+        assert count <= 60
+        assert TEXT[start:start + len(text)] == text
+        assert text.endswith(".")
+
+
+def test_paragraph_breaks_are_preferred() -> None:
+    text = "First paragraph. Still first.\n\nSecond one. And more words here."
+    # The window reaches past the paragraph break and the next sentence end.
+    window = len(chunking.get_encoding().encode("First paragraph. Still first.\n\nSecond one. And"))
+    chunks = list(chunking.split_text(text, window))
+    assert chunks[0][1] == "First paragraph. Still first."
+
+
+def test_overlap_repeats_tokens() -> None:
+    plain = list(chunking.split_text(TEXT, chunk_tokens=60))
+    overlapped = list(chunking.split_text(TEXT, chunk_tokens=60, overlap_tokens=10))
+    assert len(overlapped) > len(plain)
+    assert overlapped[1][0] < plain[1][0]
+
+
+def test_split_documents_and_token_batches() -> None:
+    documents = [Document(page_content=TEXT, metadata={"source": "a.pdf", "page": 3})]
+    chunks = chunking.split_documents(documents, chunk_tokens=60)
+    assert all(c.metadata["page"] == 3 and c.metadata["token_count"] <= 60 for c in chunks)
+
+    batches = list(chunking.token_batches(chunks, max_tokens=150, max_items=100))
+    assert [c for batch in batches for c in batch] == chunks
+    assert all(sum(c.metadata["token_count"] for c in batch) <= 150 for batch in batches)
+    assert len(list(chunking.token_batches(chunks, max_tokens=10**6, max_items=3))) == -(-len(chunks) // 3)
+
+
+def test_token_offsets_match_tiktoken() -> None:
+    text = "Loïc Barrault — 大型概念模型. Naïve café ünïcode.\n\n" * 5
+    encoding = chunking.get_encoding()
+    tokens = encoding.encode(text)
+    assert chunking._token_offsets(encoding, text, tokens).tolist() == encoding.decode_with_offsets(tokens)[1]
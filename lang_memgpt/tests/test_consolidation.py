@@ -0,0 +1,92 @@
+from lang_memgpt import _consolidation as consolidation
+from lang_memgpt import _constants as constants
+from lang_memgpt import _jobs as jobs
+from lang_memgpt import _settings as settings
+from lang_memgpt import _utils as utils
+
+
+class FakeIndex:
+    """Serverless-style listing, fetch and delete over an in-memory namespace."""
+
+    def __init__(self) -> None:
+        self.vectors = {}
+        self.deletes = []
+
+    def add(self, user_id, event_id, text, timestamp, vector):
+        path = constants.INSERT_PATH.format(user_id=user_id, event_id=event_id)
+        self.vectors[path] = {
+            "values": vector,
+            "metadata": {
+                constants.PAYLOAD_KEY: text,
+                constants.PATH_KEY: path,
+                constants.TIMESTAMP_KEY: timestamp,
+                constants.TYPE_KEY: "recall",
+                "user_id": user_id,
+            },
+        }
+
+    def list(self, prefix, namespace):
+        ids = sorted(i for i in self.vectors if i.startswith(prefix))
+        for start in range(0, len(ids), 2):
+            yield ids[start:start + 2]
+
+    def fetch(self, ids, namespace):
+        return {"vectors": {i: self.vectors[i] for i in ids}}
+
+    def delete(self, ids, namespace):
+        self.deletes.append(list(ids))
+        for i in ids:
+            del self.vectors[i]
+
+    def texts(self, user_id):
+        return sorted(v["metadata"][constants.PAYLOAD_KEY] for v in self.vectors.values()
+                      if v["metadata"]["user_id"] == user_id)
+
+
+def _index() -> FakeIndex:
+    index = FakeIndex()
+    index.add("ana", "1", "Ana flies gliders", "2025-01-01T00:00:00+00:00", [0.0, 0.0, 1.0])
+    index.add("ana", "2", "Ana lives in Ohio", "2025-01-02T00:00:00+00:00", [0.0, 1.0, 0.0])
+    index.add("ana", "3", "Ana enjoys flying gliders", "2025-01-03T00:00:00+00:00", [1.0, 0.0, 0.0])
+    index.add("ana", "4", "ana  flies gliders", "2025-01-04T00:00:00+00:00", [0.99, 0.1, 0.0])
+    index.add("bo", "5", "Bo keeps bees", "2025-01-01T00:00:00+00:00", [1.0, 0.0, 0.0])
+    return index
+
+
+def test_dry_run_reports_without_deleting() -> None:
+    index = _index()
+    report = consolidation.consolidate_user("ana", dry_run=True, threshold=0.95, max_memories=0, index=index)
+
+    assert (report.scanned, report.kept, index.deletes) == (4, 2, [])
+    # A near-duplicate by embedding and one identical after normalization,
+    # both folded into the newest memory.
+    [group] = report.groups
+    assert [m.text for m in group] == ["ana  flies gliders", "Ana enjoys flying gliders", "Ana flies gliders"]
+    assert "Would delete 2." in report.format()
+
+
+def test_duplicates_and_oldest_memories_are_deleted_in_bulk() -> None:
+    index = _index()
+    report = consolidation.consolidate_user("ana", threshold=0.95, max_memories=1, index=index)
+
+    assert [m.text for m in report.evicted] == ["Ana lives in Ohio"]
+    assert len(index.deletes) == 1 and len(index.deletes[0]) == 3
+    assert index.texts("ana") == ["ana  flies gliders"]
+    assert index.texts("bo") == ["Bo keeps bees"]
+
+    # Nothing left to merge: a second pass is a no-op.
+    again = consolidation.consolidate_user("ana", threshold=0.95, max_memories=1, index=index)
+    assert (again.scanned, again.deleted_ids, len(index.deletes)) == (1, [], 1)
+
+
+def test_job_consolidates_every_user(monkeypatch) -> None:
+    index = _index()
+    monkeypatch.setattr(utils, "get_index", lambda: index)
+    monkeypatch.setattr(settings.SETTINGS, "memory_write_behind", False)
+    monkeypatch.setattr(settings.SETTINGS, "memory_merge_threshold", 0.95)
+    monkeypatch.setattr(settings.SETTINGS, "memory_max_per_user", 0)
+
+    assert consolidation.list_users(index) == ["ana", "bo"]
+    result = jobs.HANDLERS["consolidate"]([], lambda **counts: None)
+    assert result == "Consolidated recall memories of 2 user(s); deleted 2."
+    assert index.texts("ana") == ["Ana lives in Ohio", "ana  flies gliders"]
@@ -0,0 +1,227 @@
+import asyncio
+import os
+import zlib
+from typing import List
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from lang_memgpt import _corpus as corpus
+from lang_memgpt import _settings as settings
+
+
+class WordEmbeddings(Embeddings):
+    """Bag-of-words vectors, so texts sharing words are close."""
+
+    def __init__(self) -> None:
+        self.texts_embedded = 0
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(64)
+        for word in text.lower().split():
+            vector[zlib.crc32(word.encode()) % 64] += 1
+        return vector.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.texts_embedded += len(texts)
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+PAGES = [
+    Document(page_content="MemGPT pages memory between context tiers.",
+             metadata={"source": "/docs/MemGPT.pdf", "page": 0, "document_id": "aaaa"}),
+    Document(page_content="Large concept models predict sentence embeddings.",
+             metadata={"source": "/docs/lcm.pdf", "page": 3, "document_id": "bbbb"}),
+]
+
+
+def test_documents_are_embedded_once_and_searchable(tmp_path) -> None:
+    embeddings = WordEmbeddings()
+    index = corpus.CorpusIndex(str(tmp_path), embeddings, embeddings)
+    assert index.is_empty()
+
+    report = index.add_documents(PAGES + [PAGES[0]])
+    assert (report.chunks_out, report.saved) == (2, 1)
+    assert embeddings.texts_embedded == 2
+
+    [best] = index.search("concept models sentence", k=1)
+    assert best.page_content == PAGES[1].page_content and best.metadata["page"] == 3
+    assert [d.page_content for d in asyncio.run(index.asearch("MemGPT memory tiers", k=1))] == [PAGES[0].page_content]
+
+    # Another process opening the same root sees the published segment.
+    reopened = corpus.CorpusIndex(str(tmp_path), embeddings, embeddings)
+    assert len(reopened.current()) == 2 and embeddings.texts_embedded == 2
+
+
+def test_collection_without_segment_is_published_on_first_search(tmp_path) -> None:
+    embeddings = WordEmbeddings()
+    index = corpus.CorpusIndex(str(tmp_path), embeddings, embeddings)
+    index.vectorstore.add_documents(PAGES)
+    assert index.segments.current() is None
+
+    assert index.search("MemGPT memory", k=1)[0].metadata["source"] == "/docs/MemGPT.pdf"
+    assert index.segments.generation() == 1
+
+
+def test_search_scoped_to_a_file(tmp_path) -> None:
+    embeddings = WordEmbeddings()
+    index = corpus.CorpusIndex(str(tmp_path), embeddings, embeddings)
+    shared = "Both papers cite the transformer architecture of Vaswani and colleagues at length."
+    index.add_documents(PAGES + [
+        Document(page_content="Memory tiers for large models.", metadata={"source": "/docs/lcm.pdf", "page": 5, "document_id": "bbbb"}),
+        Document(page_content=shared, metadata={"source": "/docs/MemGPT.pdf", "page": 2, "document_id": "aaaa"}),
+        Document(page_content=shared, metadata={"source": "/docs/lcm.pdf", "page": 9, "document_id": "bbbb"}),
+    ])
+
+    lcm = index.registry.get("bbbb")
+    assert (lcm.filename, lcm.first_page, lcm.last_page, lcm.chunks) == ("lcm.pdf", 3, 5, 2)
+    assert (lcm.first_chunk, lcm.last_chunk) == ("bbbb:000000", "bbbb:000001")
+    assert [d.document_id for d in index.registry.find("LCM")] == ["bbbb"]
+
+    assert PAGES[0].page_content in [d.page_content for d in index.search("memory tiers", k=4)]
+    scoped = index.search("memory tiers", k=4, filename="lcm.pdf")
+    # lcm.pdf's own chunks plus the passage deduplicated into MemGPT.pdf's
+    assert sorted(d.page_content for d in scoped) == sorted([PAGES[1].page_content, "Memory tiers for large models.", shared])
+    # Unknown names search everything.
+    assert len(index.search("memory tiers", k=4, filename="other.pdf")) == 4
+
+    index.remove_document("bbbb")
+    index.publish()
+    assert index.registry.find("lcm.pdf") == []
+    assert {d.metadata["document_id"] for d in index.search("memory", k=4)} == {"aaaa"}
+
+
+def test_removing_a_document_keeps_passages_other_documents_share(tmp_path) -> None:
+    embeddings = WordEmbeddings()
+    index = corpus.CorpusIndex(str(tmp_path), embeddings, embeddings)
+    shared = "Both papers cite the transformer architecture of Vaswani and colleagues at length."
+    index.add_documents(PAGES + [
+        Document(page_content=shared, metadata={"source": "/docs/MemGPT.pdf", "page": 2, "document_id": "aaaa"}),
+        Document(page_content=shared, metadata={"source": "/docs/lcm.pdf", "page": 9, "document_id": "bbbb"}),
+    ])
+
+    # The shared passage is stored once, under MemGPT.pdf; removing that
+    # document hands it to lcm.pdf instead of deleting it.
+    assert index.remove_document("aaaa") == 1
+    index.publish()
+    scoped = index.search("transformer architecture", k=4, filename="lcm.pdf")
+    assert sorted(d.page_content for d in scoped) == sorted([PAGES[1].page_content, shared])
+    [passage] = [d for d in scoped if d.page_content == shared]
+    assert passage.metadata["document_id"] == "bbbb" and passage.metadata["sources"] == '["lcm.pdf:p9"]'
+    assert index.registry.get("bbbb").chunks == 2
+
+    assert index.remove_document("bbbb") == 2
+    index.publish()
+    assert index.is_empty()
+
+
+def test_passages_already_stored_are_not_embedded_again(tmp_path) -> None:
+    embeddings = WordEmbeddings()
+    index = corpus.CorpusIndex(str(tmp_path), embeddings, embeddings)
+    shared = "Both papers cite the transformer architecture of Vaswani and colleagues at length."
+    index.add_documents([PAGES[0], Document(page_content=shared,
+                                            metadata={"source": "/docs/MemGPT.pdf", "page": 2, "document_id": "aaaa"})])
+
+    report = index.add_documents([PAGES[1], Document(page_content=shared,
+                                                     metadata={"source": "/docs/lcm.pdf", "page": 9, "document_id": "bbbb"})])
+    assert (report.chunks_out, report.stored_duplicates) == (1, 1)
+    assert embeddings.texts_embedded == 3 and len(index.current()) == 3
+    scoped = index.search("transformer architecture", k=4, filename="lcm.pdf")
+    assert sorted(d.page_content for d in scoped) == sorted([PAGES[1].page_content, shared])
+    [passage] = [d for d in scoped if d.page_content == shared]
+    assert passage.metadata["sources"] == '["MemGPT.pdf:p2", "lcm.pdf:p9"]' and passage.metadata["duplicates"] == 1
+
+    # The later document keeps the passage when the first one goes.
+    assert index.remove_document("aaaa") == 1
+    index.publish()
+    assert shared in [d.page_content for d in index.search("transformer architecture", k=4, filename="lcm.pdf")]
+
+
+def test_quota_evicts_least_recently_used_documents(tmp_path) -> None:
+    embeddings = WordEmbeddings()
+    files = tmp_path / "uploads"
+    files.mkdir()
+    index = corpus.CorpusIndex(str(tmp_path / "corpus"), embeddings, embeddings, "user-a", max_chunks=2,
+                               files_directory=str(files))
+    for i, text in enumerate(["alpha notes on gliders", "bravo notes on rotors", "charlie notes on jets"]):
+        (files / f"{i}.pdf").write_text("")
+        index.add_documents([Document(page_content=text, metadata={"source": f"{i}.pdf", "document_id": f"doc{i}"})])
+    index.search("alpha gliders", k=1)  # doc0 is now more recently used than doc1
+
+    evicted = index.enforce_quota(keep={"doc2"})
+    assert [info.document_id for info in evicted] == ["doc1"]
+    assert sorted(p.name for p in files.iterdir()) == ["0.pdf", "2.pdf"]
+    assert len(index.current()) == 2 and index.registry.total_chunks() == 2
+
+
+def test_user_searches_cover_their_namespace_and_the_global_one(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(settings.SETTINGS, "uploads_directory", str(tmp_path / "uploads"))
+    embeddings = WordEmbeddings()
+    shared = corpus.CorpusIndex(str(tmp_path / "global"), embeddings, embeddings)
+    alice = corpus.CorpusIndex(str(tmp_path / "alice"), embeddings, embeddings, corpus.user_namespace("alice"))
+    bob = corpus.CorpusIndex(str(tmp_path / "bob"), embeddings, embeddings, corpus.user_namespace("bob"))
+    shared.add_documents([PAGES[0]])
+    alice.add_documents([Document(page_content="Alice's memory tier budget.", metadata={"source": "budget.pdf", "document_id": "cccc"})])
+    bob.add_documents([Document(page_content="Bob's memory tier secrets.", metadata={"source": "secrets.pdf", "document_id": "dddd"})])
+
+    query = embeddings.embed_query("memory tier")
+    found = corpus._merge([alice, shared], query, k=4, filename="")
+    assert {d.metadata["document_id"] for d in found} == {"cccc", "aaaa"}
+    # A file name found in one namespace limits the search to it.
+    assert [d.metadata["document_id"] for d in corpus._merge([alice, shared], query, 4, "budget")] == ["cccc"]
+
+    assert corpus.user_namespace("alice") != corpus.user_namespace("Alice")
+    upload = os.path.join(corpus.namespace_files_directory(corpus.user_namespace("a/../b")), "x.pdf")
+    assert corpus.namespace_for_path(upload) == corpus.user_namespace("a/../b")
+    assert corpus.namespace_for_path(str(tmp_path / "docs" / "x.pdf")) == corpus.GLOBAL_NAMESPACE
+
+
+def test_publish_reads_back_only_changed_chunks(tmp_path, monkeypatch) -> None:
+    embeddings = WordEmbeddings()
+    index = corpus.CorpusIndex(str(tmp_path), embeddings, embeddings)
+    index.add_documents([PAGES[0]])
+    read = []
+    get = type(index.vectorstore._collection).get
+
+    def counting_get(self, ids=None, **kwargs):
+        if "embeddings" in (kwargs.get("include") or []):
+            read.extend(ids or ["<all>"])
+        return get(self, ids=ids, **kwargs)
+
+    monkeypatch.setattr(type(index.vectorstore._collection), "get", counting_get)
+    index.add_documents([PAGES[1]])
+    assert read == ["bbbb:000000"]
+    assert [d.page_content for d in index.search("concept models sentence", k=1)] == [PAGES[1].page_content]
+
+    del read[:]
+    index.remove_document("aaaa")
+    index.publish()
+    assert read == ["aaaa:000000"] and list(index.current().ids) == ["bbbb:000000"]
+
+    # A segment out of step with the collection (e.g. a writer crashed
+    # before publishing) is rebuilt from the whole collection.
+    index.vectorstore.add_documents([PAGES[0]], ids=["aaaa:000000"])
+    index.publish()
+    assert len(index.current()) == 2
+
+
+def test_searches_touch_the_registry_at_most_once_per_interval(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(settings.SETTINGS, "document_touch_interval", 3600)
+    embeddings = WordEmbeddings()
+    index = corpus.CorpusIndex(str(tmp_path), embeddings, embeddings)
+    index.add_documents(PAGES)
+    ingested = index.registry.get("aaaa").last_used
+    touches = []
+    monkeypatch.setattr(index.registry, "touch", lambda last_used, touch=index.registry.touch: (
+        touches.append(dict(last_used)), touch(last_used)))
+
+    for _ in range(5):
+        index.search("MemGPT memory tiers", k=1)
+    assert touches == [] and index.registry.get("aaaa").last_used == ingested
+
+    index.flush_last_used()
+    assert list(touches[0]) == ["aaaa"] and index.registry.get("aaaa").last_used > ingested
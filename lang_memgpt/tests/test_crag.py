@@ -0,0 +1,111 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.runnables import RunnableLambda
+
+from lang_memgpt import _corpus as corpus
+from lang_memgpt.RAG_Structure import crag
+from lang_memgpt.RAG_Structure import grade_generation
+from lang_memgpt.RAG_Structure.nodes import generate, grade_documents, web_search
+
+CONFIG = {"configurable": {"user_id": "test-user"}}
+DOCUMENTS = [
+    Document(page_content="MemGPT pages memory between context tiers.", metadata={"source": "/docs/MemGPT.pdf"}),
+    Document(page_content="A recipe for pizza dough.", metadata={"source": "/docs/recipes.pdf"}),
+]
+
+
+def _router(datasource):
+    async def alocal_route(question, user_id=None):
+        return datasource
+
+    return SimpleNamespace(alocal_route=alocal_route)
+
+
+@pytest.fixture
+def upstreams(monkeypatch):
+    """Fake upstreams: retrieval, grading and generation take 0.15s each, search 0.3s."""
+    calls = {"search": 0, "contexts": []}
+
+    async def search(question, user_id=None, k=4, filename=""):
+        await asyncio.sleep(0.15)
+        return list(DOCUMENTS)
+
+    async def grade(inputs):
+        await asyncio.sleep(0.15 / len(DOCUMENTS))
+        return SimpleNamespace(binary_score="no" if "pizza" in inputs["document"] else "yes")
+
+    async def tavily(inputs):
+        calls["search"] += 1
+        await asyncio.sleep(0.3)
+        return [{"content": "Web result on MemGPT."}]
+
+    async def answer(inputs):
+        calls["contexts"].append([d.page_content for d in inputs["context"]])
+        await asyncio.sleep(0.15)
+        return "MemGPT manages memory tiers."
+
+    monkeypatch.setattr(corpus, "asearch", search)
+    monkeypatch.setattr(grade_documents, "retrieval_grader", RunnableLambda(grade))
+    monkeypatch.setattr(web_search, "web_search_tool", RunnableLambda(tavily))
+    monkeypatch.setattr(generate, "generation_chain", RunnableLambda(answer))
+    async def passing_grade(inputs):
+        await asyncio.sleep(0.05)
+        return SimpleNamespace(binary_score=True)
+
+    passing = RunnableLambda(passing_grade)
+    monkeypatch.setattr(grade_generation, "hallucination_grader", passing)
+    monkeypatch.setattr(grade_generation, "answer_grader", passing)
+    monkeypatch.setattr(crag, "get_local_router", lambda: _router(None))
+    return calls
+
+
+async def test_uncertain_route_searches_while_retrieving_and_grading(upstreams) -> None:
+    start = time.perf_counter()
+    answer = await crag.corrective_rag.ainvoke({"question": "How does MemGPT manage memory?"}, CONFIG)
+    elapsed = time.perf_counter() - start
+
+    assert answer == "MemGPT manages memory tiers.\n\nSources: MemGPT.pdf, web search"
+    # The irrelevant chunk is dropped and the speculative results are reused.
+    assert upstreams["search"] == 1
+    assert upstreams["contexts"] == [[DOCUMENTS[0].page_content, "Web result on MemGPT."]]
+    # retrieve + grade (0.3s) overlap the search (0.3s), then generate (0.15s);
+    # run one after the other they take 0.75s.
+    assert elapsed < 0.6
+
+
+async def test_speculative_results_are_discarded_when_documents_are_relevant(upstreams, monkeypatch) -> None:
+    monkeypatch.setattr(grade_documents, "retrieval_grader",
+                        RunnableLambda(lambda inputs: SimpleNamespace(binary_score="yes")))
+
+    answer = await crag.corrective_rag.ainvoke({"question": "How does MemGPT manage memory?"}, CONFIG)
+    assert answer.endswith("Sources: MemGPT.pdf, recipes.pdf")
+    assert upstreams["search"] == 1
+    assert upstreams["contexts"] == [[d.page_content for d in DOCUMENTS]]
+
+
+async def test_confident_routes_skip_the_speculative_search(upstreams, monkeypatch) -> None:
+    monkeypatch.setattr(crag, "get_local_router", lambda: _router("websearch"))
+    assert (await crag.corrective_rag.ainvoke({"question": "Weather in Paris?"}, CONFIG)).endswith("Sources: web search")
+    assert upstreams["contexts"] == [["Web result on MemGPT."]]
+
+    # Naming a file always retrieves; the search only follows the grades.
+    monkeypatch.setattr(crag, "get_local_router", lambda: pytest.fail("the router was consulted"))
+    upstreams["contexts"].clear()
+    await crag.corrective_rag.ainvoke({"question": "What are context tiers?", "filename": "MemGPT.pdf"}, CONFIG)
+    assert upstreams["search"] == 2
+    assert upstreams["contexts"] == [[DOCUMENTS[0].page_content, "Web result on MemGPT."]]
+
+
+async def test_concurrent_questions_do_not_block_each_other(upstreams) -> None:
+    # Retrieval, both graders and generation are awaited, so two questions
+    # overlap instead of queueing behind each other on the event loop.
+    start = time.perf_counter()
+    answers = await asyncio.gather(*(
+        crag.corrective_rag.ainvoke({"question": "How does MemGPT manage memory?"}, CONFIG) for _ in range(2)
+    ))
+    assert all(a.startswith("MemGPT manages memory tiers.") for a in answers)
+    assert time.perf_counter() - start < 0.9
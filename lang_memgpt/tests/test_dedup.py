@@ -0,0 +1,46 @@
+import json
+
+import numpy as np
+from langchain_core.documents import Document
+
+from lang_memgpt import _dedup as dedup
+
+ABSTRACT = (
+    "MemGPT manages memory tiers to provide extended context within the limited context window "
+    "of a large language model, using interrupts to manage control flow between itself and the user."
+)
+
+
+def _chunk(text, **metadata):
+    return Document(page_content=text, metadata=metadata)
+
+
+def test_exact_and_near_duplicates_are_collapsed() -> None:
+    chunks = [
+        _chunk(ABSTRACT, source="/docs/MemGPT.pdf", page=0),
+        _chunk("Situational awareness predicts rapid capability growth this decade.", source="/docs/sa.pdf", page=4),
+        _chunk("  " + ABSTRACT.upper() + "\n", source="/docs/AI_ML.pdf", page=2),
+        _chunk(ABSTRACT.replace("the user.", "the user!") + " See also", table="arxiv", row_id=17),
+    ]
+    kept, report = dedup.deduplicate(chunks, threshold=0.8)
+
+    assert (report.chunks_in, report.exact_duplicates, report.near_duplicates, report.saved) == (4, 1, 1, 2)
+    assert [c.page_content for c in kept] == [ABSTRACT, chunks[1].page_content]
+    assert json.loads(kept[0].metadata["sources"]) == ["MemGPT.pdf:p0", "AI_ML.pdf:p2", "arxiv#row17"]
+    assert kept[0].metadata["duplicates"] == 2
+    assert kept[1].metadata["duplicates"] == 0
+
+
+def test_threshold_above_one_keeps_near_duplicates() -> None:
+    chunks = [_chunk(ABSTRACT, source="a.pdf"), _chunk(ABSTRACT + " See also", source="b.pdf")]
+    kept, report = dedup.deduplicate(chunks, threshold=1.1)
+    assert len(kept) == 2 and report.saved == 0
+
+
+def test_minhash_estimates_jaccard() -> None:
+    words = [f"w{i}" for i in range(400)]
+    a = dedup.minhash(" ".join(words))
+    b = dedup.minhash(" ".join(words[:300] + [f"x{i}" for i in range(100)]))
+    # 296 shared shingles out of 496 in the union
+    assert abs(np.mean(a == b) - 296 / 496) < 0.12
+    assert np.array_equal(a, dedup.minhash(" ".join(words)))
@@ -0,0 +1,56 @@
+import pytest
+
+from lang_memgpt import fast_path, graph
+
+
+@pytest.mark.parametrize(
+    "message, intent, content",
+    [
+        ("3 + 5 * 2", "calculator", "3 + 5 * 2 = 13"),
+        ("What is 12.5 / 4?", "calculator", "12.5 / 4 = 3.125"),
+        ("(2 + 3)^2", "calculator", "(2 + 3)^2 = 25"),
+        ("Convert 16k lbs of fuel to gallons.", "unit_conversion", "16,000.0 pounds = 2,352.94 gallons (JP-5 at 6.8 lbs/gal)"),
+        ("500 miles in km", "unit_conversion", "500.0 miles = 804.67 km"),
+        ("convert 1.5k lbs to kg", "unit_conversion", "1,500.0 pounds = 680.39 kg"),
+        ("10 - 4", "calculator", "10 - 4 = 6"),
+        ("calculate 24/6", "calculator", "24/6 = 4"),
+        ("2025-03-01 plus 10 days", "date", "2025-03-01 + 10 days = 2025-03-11"),
+        ("10 days before 2025-01-05", "date", "2025-01-05 - 10 days = 2024-12-26"),
+    ],
+)
+def test_fast_path_answers(message, intent, content) -> None:
+    assert fast_path.answer(message) == (intent, content)
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        "Hi Alfred, how are you today?",
+        "What's the weather at KNKX right now?",
+        "convert my files to pdf",
+        "3 ft to parsec",
+        "1/0",
+        "2025-03-01",
+        "555-1234",
+        "555-867-5309",
+        "10/12/2024",
+        "What is 9/11?",
+        "24/7",
+        "2025-02-30 plus 1 day",
+    ],
+)
+def test_fast_path_declines(message) -> None:
+    assert fast_path.answer(message) is None
+
+
+async def test_process_chat_skips_graph(monkeypatch) -> None:
+    class NoGraph:
+        async def ainvoke(self, *args, **kwargs):
+            raise AssertionError("graph should not run")
+
+    monkeypatch.setattr(graph, "memgraph", NoGraph())
+    response = await graph.process_chat(
+        [{"role": "user", "content": "calculate 7*6"}],
+        {"configurable": {"user_id": "test-user"}},
+    )
+    assert response == {"messages": [{"role": "assistant", "content": "7*6 = 42"}]}
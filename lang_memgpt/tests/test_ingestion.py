@@ -0,0 +1,43 @@
+from langchain_core.documents import Document
+
+from lang_memgpt import _corpus as corpus
+from lang_memgpt import _pdf as pdf
+from lang_memgpt import _settings as settings
+from lang_memgpt.RAG_Structure import local_router
+from lang_memgpt.RAG_Structure.nodes import ingestion
+from lang_memgpt.tests.test_corpus import WordEmbeddings
+
+
+def test_pdf_that_fails_part_way_is_not_ingested(tmp_path, monkeypatch) -> None:
+    embeddings = WordEmbeddings()
+    index = corpus.CorpusIndex(str(tmp_path / "corpus"), embeddings, embeddings)
+    monkeypatch.setattr(corpus, "get_corpus_index", lambda: index)
+    monkeypatch.setattr(corpus, "get_namespace_index", lambda namespace: index)
+    centroids = local_router.CentroidIndex(str(tmp_path / "router_centroids.npz"))
+    monkeypatch.setattr(ingestion, "get_centroid_index", lambda namespace: centroids)
+    monkeypatch.setattr(settings.SETTINGS, "document_summaries", False)
+
+    broken, good = tmp_path / "broken.pdf", tmp_path / "good.pdf"
+    broken.write_bytes(b"%PDF broken")
+    good.write_bytes(b"%PDF good")
+    fail = {"broken.pdf": True}
+
+    def extract_pages(path, backend=""):
+        name = path.rsplit("/", 1)[-1]
+        yield Document(page_content=f"First page of {name} about gliders.", metadata={"source": path, "page": 0})
+        if fail.get(name):
+            raise RuntimeError("damaged xref table")
+        yield Document(page_content=f"Second page of {name} about bees.", metadata={"source": path, "page": 1})
+
+    monkeypatch.setattr(pdf, "extract_pages", extract_pages)
+
+    ingestion.ingest_paths([str(broken), str(good)])
+    assert index.registry.get(corpus.file_digest(str(broken))) is None
+    assert index.registry.get(corpus.file_digest(str(good))) is not None
+    assert {d.metadata["source"] for d in index.search("first page gliders", k=4)} == {str(good)}
+
+    # The next run picks the file up again instead of skipping it as unchanged.
+    fail.clear()
+    result = ingestion.ingest_paths([str(broken), str(good)])
+    assert "'unchanged_files': ['good.pdf']" in result
+    assert index.registry.get(corpus.file_digest(str(broken))) is not None
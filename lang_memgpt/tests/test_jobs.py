@@ -0,0 +1,136 @@
+import threading
+
+import pytest
+
+from lang_memgpt import _jobs as jobs
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = jobs.JobQueue(jobs.JobStore(str(tmp_path / "jobs.sqlite3")), workers=1, poll_interval=0.05)
+    queue.start()
+    yield queue
+    queue.stop(timeout=5)
+
+
+def test_job_runs_and_reports_progress(queue) -> None:
+    @jobs.register("test-count")
+    def handler(paths, progress):
+        for i, _ in enumerate(paths, start=1):
+            progress(files_total=len(paths), files_done=i, pages=2 * i)
+        progress(chunks_total=3, chunks_embedded=3)
+        return "done"
+
+    job = queue.wait(queue.submit("test-count", ["a.pdf", "b.pdf"]), timeout=5)
+    assert job["status"] == jobs.SUCCEEDED
+    assert job["result"] == "done"
+    assert (job["files_done"], job["pages"], job["chunks_embedded"]) == (2, 4, 3)
+
+
+def test_running_job_can_be_cancelled(queue) -> None:
+    started = threading.Event()
+    release = threading.Event()
+
+    @jobs.register("test-block")
+    def handler(paths, progress):
+        started.set()
+        release.wait(5)
+        progress(files_done=1)
+        return "not reached"
+
+    job_id = queue.submit("test-block", ["a.pdf"])
+    assert started.wait(5)
+    assert queue.cancel(job_id)["cancel_requested"]
+    release.set()
+    assert queue.wait(job_id, timeout=5)["status"] == jobs.CANCELLED
+
+
+def test_queued_job_cancelled_without_running(tmp_path) -> None:
+    store = jobs.JobStore(str(tmp_path / "jobs.sqlite3"))
+    job_id = store.create("test-count", ["a.pdf"])
+    assert store.request_cancel(job_id)["status"] == jobs.CANCELLED
+    assert store.claim_next() is None
+
+
+def test_active_job_found_by_paths(tmp_path) -> None:
+    store = jobs.JobStore(str(tmp_path / "jobs.sqlite3"))
+    alice = store.create("ingest", ["docs/a.pdf", "uploads/alice/b.pdf"])
+    bob = store.create("ingest", ["docs/a.pdf", "uploads/bob/c.pdf"])
+    assert store.find_active("ingest")["id"] == alice
+    assert store.find_active("ingest", ["docs/a.pdf", "uploads/bob/c.pdf"])["id"] == bob
+    assert store.find_active("ingest", ["docs/a.pdf"]) is None
+
+
+def test_scheduled_job_created_once_per_interval(tmp_path) -> None:
+    # Two processes sharing the database run the same schedule.
+    first = jobs.JobStore(str(tmp_path / "jobs.sqlite3"))
+    second = jobs.JobStore(str(tmp_path / "jobs.sqlite3"))
+    job_id = first.create_if_due("consolidate", [], interval=3600)
+    assert job_id and second.create_if_due("consolidate", [], interval=3600) is None
+
+    # Still skipped while the job is active, however old it is.
+    assert second.create_if_due("consolidate", [], interval=0) is None
+    second.finish(job_id, jobs.SUCCEEDED)
+    assert second.create_if_due("consolidate", [], interval=3600) is None
+    assert second.create_if_due("consolidate", [], interval=0)
+
+
+def test_failed_handler_marks_job_failed(queue) -> None:
+    @jobs.register("test-fail")
+    def handler(paths, progress):
+        raise RuntimeError("boom")
+
+    job = queue.wait(queue.submit("test-fail", []), timeout=5)
+    assert job["status"] == jobs.FAILED
+    assert job["error"] == "boom"
+
+
+def test_only_jobs_with_expired_leases_are_requeued(tmp_path, monkeypatch) -> None:
+    store = jobs.JobStore(str(tmp_path / "jobs.sqlite3"))
+    job_id = store.create("test-lease", ["a.pdf"])
+    assert store.claim_next("host-a:1", lease=30)["id"] == job_id
+
+    # Another process starting up leaves the live job alone.
+    assert store.requeue_expired() == 0
+    assert store.claim_next("host-b:2", lease=30) is None
+    assert store.renew("host-a:1", lease=30) == 1
+
+    # Once its owner stops renewing, the job goes to the next claimant...
+    now = jobs.time.time()
+    monkeypatch.setattr(jobs.time, "time", lambda: now + 60)
+    assert store.claim_next("host-b:2", lease=30)["id"] == job_id
+
+    # ...and the stale owner can neither report progress nor finish it.
+    assert store.update_progress(job_id, owner="host-a:1", files_done=1) is True
+    assert store.finish(job_id, jobs.SUCCEEDED, owner="host-a:1") is False
+    assert store.finish(job_id, jobs.SUCCEEDED, owner="host-b:2") is True
+    assert store.get(job_id)["status"] == jobs.SUCCEEDED
+
+
+def test_heartbeat_keeps_a_long_job_from_running_twice(tmp_path) -> None:
+    runs = []
+    started = threading.Event()
+    release = threading.Event()
+
+    @jobs.register("test-slow")
+    def handler(paths, progress):
+        runs.append(threading.current_thread().name)
+        started.set()
+        release.wait(5)
+        return "done"
+
+    path = str(tmp_path / "jobs.sqlite3")
+    first = jobs.JobQueue(jobs.JobStore(path), workers=1, poll_interval=0.05, lease=0.3)
+    second = jobs.JobQueue(jobs.JobStore(path), workers=1, poll_interval=0.05, lease=0.3)
+    first.start()
+    try:
+        job_id = first.submit("test-slow", [])
+        assert started.wait(5)
+        second.start()
+        release.wait(1.0)  # several lease lengths
+        release.set()
+        assert first.wait(job_id, timeout=5)["status"] == jobs.SUCCEEDED
+    finally:
+        first.stop(timeout=5)
+        second.stop(timeout=5)
+    assert len(runs) == 1
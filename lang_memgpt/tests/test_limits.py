@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from lang_memgpt._limits import AdmissionController, AdmissionRejected, TokenBucket
+
+
+def test_token_bucket_non_blocking() -> None:
+    bucket = TokenBucket(requests_per_second=1, max_bucket_size=2)
+    assert bucket.acquire(blocking=False)
+    assert bucket.acquire(blocking=False)
+    assert not bucket.acquire(blocking=False)
+
+
+def test_token_bucket_disabled() -> None:
+    bucket = TokenBucket(requests_per_second=0)
+    assert all(bucket.acquire(blocking=False) for _ in range(100))
+
+
+async def test_admission_per_user_cap_queues() -> None:
+    controller = AdmissionController(
+        max_concurrent=4, max_per_user=1, max_queue=4, queue_timeout=1
+    )
+    controller._avg_service = 0.05
+    order = []
+
+    async def run(tag: str) -> None:
+        async with controller.admit("alice"):
+            order.append(f"{tag}-start")
+            await asyncio.sleep(0.05)
+            order.append(f"{tag}-end")
+
+    await asyncio.gather(run("a"), run("b"))
+    assert order == ["a-start", "a-end", "b-start", "b-end"]
+
+
+async def test_admission_rejects_when_queue_full() -> None:
+    controller = AdmissionController(
+        max_concurrent=1, max_per_user=1, max_queue=0, queue_timeout=1
+    )
+    async with controller.admit("alice"):
+        with pytest.raises(AdmissionRejected) as exc_info:
+            async with controller.admit("bob"):
+                pass
+    assert exc_info.value.retry_after >= 1
+
+
+async def test_admission_rejects_after_deadline() -> None:
+    controller = AdmissionController(
+        max_concurrent=1, max_per_user=1, max_queue=4, queue_timeout=0.05
+    )
+    controller._avg_service = 0.01
+    async with controller.admit("alice"):
+        with pytest.raises(AdmissionRejected):
+            async with controller.admit("bob"):
+                pass
+    assert controller.waiting == 0
+    assert controller.active == 0
+
+
+async def test_throttled_index_calls_do_not_block_the_event_loop(monkeypatch) -> None:
+    from lang_memgpt import _limits as limits
+    from lang_memgpt import _utils as utils
+
+    bucket = TokenBucket(requests_per_second=5, max_bucket_size=1)
+    monkeypatch.setattr(limits, "get_rate_limiter", lambda upstream: bucket)
+
+    class Index:
+        def query(self, **kwargs):
+            return {"matches": []}
+
+    index = utils.RateLimitedIndex(Index())
+    ticks = 0
+
+    async def ticker() -> None:
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    task = asyncio.create_task(ticker())
+    try:
+        # The second call waits ~0.2s for a token, while the loop keeps running.
+        results = [await index.aquery(top_k=1), await index.aquery(top_k=1)]
+    finally:
+        task.cancel()
+    assert results == [{"matches": []}] * 2
+    assert ticks >= 5
+    assert index.query(top_k=1) == {"matches": []}
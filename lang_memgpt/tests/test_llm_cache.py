@@ -0,0 +1,64 @@
+import time
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.prompts import ChatPromptTemplate
+
+from lang_memgpt import _llm_cache as llm_cache
+from lang_memgpt import _settings as settings
+from lang_memgpt._metrics import REGISTRY
+
+PROMPT = ChatPromptTemplate.from_messages([("system", "Grade the document."), ("human", "{document}")])
+
+
+def _chain(cache, responses=("yes", "no", "maybe")):
+    model = FakeListChatModel(responses=list(responses), cache=cache)
+    return PROMPT | model, model
+
+
+def _requests(chain: str, result: str) -> float:
+    return REGISTRY.counter_value("alfred_llm_cache_requests_total", chain=chain, result=result)
+
+
+async def test_repeated_inputs_are_served_from_the_cache(tmp_path) -> None:
+    cache = llm_cache.SQLiteResponseCache(str(tmp_path / "cache.sqlite3"), "grader", ttl=60, max_entries=10)
+    chain, model = _chain(cache)
+    hits, misses = _requests("grader", "hit"), _requests("grader", "miss")
+
+    assert chain.invoke({"document": "a"}).content == "yes"
+    assert chain.invoke({"document": "b"}).content == "no"
+    assert (await chain.ainvoke({"document": "a"})).content == "yes"
+    assert model.i == 2  # the third call never reached the model
+    assert (_requests("grader", "hit") - hits, _requests("grader", "miss") - misses) == (1, 2)
+
+    # Another process (a new cache on the same file) sees the entries, but
+    # other model parameters are a different key.
+    reopened = llm_cache.SQLiteResponseCache(cache.path, "grader", ttl=60, max_entries=10)
+    chain, model = _chain(reopened)
+    assert chain.invoke({"document": "b"}).content == "no" and model.i == 0
+    assert (PROMPT | model.bind(stop=["\n"])).invoke({"document": "b"}).content == "yes"
+
+
+def test_expired_and_least_recently_used_entries_are_evicted(tmp_path, monkeypatch) -> None:
+    cache = llm_cache.SQLiteResponseCache(str(tmp_path / "cache.sqlite3"), "grader", ttl=60, max_entries=2)
+    chain, model = _chain(cache, responses=("1", "2", "3", "4", "5"))
+    for document in ("a", "b", "c"):
+        chain.invoke({"document": document})
+    chain.invoke({"document": "a"})  # b is now the least recently used
+    assert cache.trim() == 1
+    assert chain.invoke({"document": "a"}).content == "1"
+    assert chain.invoke({"document": "b"}).content == "4" and model.i == 4
+
+    now = time.time()
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now + 61)
+    assert chain.invoke({"document": "c"}).content == "5"
+    assert cache.trim() == 2  # a and b expired, c was just stored
+
+
+def test_caches_are_switched_on_per_chain(monkeypatch) -> None:
+    monkeypatch.setattr(settings.SETTINGS, "llm_cache_chains", "router, answer_grader")
+    llm_cache.get_cache.cache_clear()
+    try:
+        assert llm_cache.get_cache("router").chain == "router"
+        assert llm_cache.get_cache("retrieval_grader") is None
+    finally:
+        llm_cache.get_cache.cache_clear()
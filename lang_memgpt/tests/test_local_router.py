@@ -0,0 +1,126 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from lang_memgpt._metrics import REGISTRY
+from lang_memgpt.RAG_Structure.local_router import CentroidIndex, LocalRouter
+
+
+class AxisEmbeddings:
+    """Maps known questions onto fixed 3-d vectors and counts calls."""
+
+    vectors = {
+        "about the paper": [1.0, 0.0, 0.0],
+        "weather tomorrow": [0.0, 1.0, 0.0],
+        "somewhat related": [0.75, 0.66, 0.0],
+    }
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def embed_query(self, text):
+        self.calls += 1
+        return self.vectors[text]
+
+    async def aembed_query(self, text):
+        return self.embed_query(text)
+
+
+class StubLLMRouter:
+    def __init__(self) -> None:
+        self.inputs = []
+
+    def invoke(self, inputs):
+        self.inputs.append(inputs)
+        return SimpleNamespace(datasource="vectorstore")
+
+    async def ainvoke(self, inputs):
+        return self.invoke(inputs)
+
+
+def _router(tmp_path, centroids=None):
+    index = CentroidIndex(str(tmp_path / "centroids.npz"))
+    if centroids:
+        index.update(
+            {name: np.asarray(v, dtype=np.float32) * 2 for name, v in centroids.items()},
+            {name: 2 for name in centroids},
+        )
+    llm = StubLLMRouter()
+    router = LocalRouter(
+        index, AxisEmbeddings(), llm, vectorstore_threshold=0.8, websearch_threshold=0.6
+    )
+    return router, llm
+
+
+def test_confident_decisions_skip_llm(tmp_path) -> None:
+    router, llm = _router(tmp_path, {"paper.pdf": [1.0, 0.0, 0.0]})
+    assert router.route("about the paper") == "vectorstore"
+    assert router.route("weather tomorrow") == "websearch"
+    assert llm.inputs == []
+
+
+def test_ambiguous_question_falls_back_with_topics(tmp_path) -> None:
+    router, llm = _router(tmp_path, {"large_concept_models.pdf": [1.0, 0.0, 0.0]})
+    before = REGISTRY.counter_value("alfred_router_decisions_total", method="llm", datasource="vectorstore")
+    assert router.route("somewhat related") == "vectorstore"
+    assert llm.inputs == [{"question": "somewhat related", "topics": "large concept models"}]
+    assert REGISTRY.counter_value("alfred_router_decisions_total", method="llm", datasource="vectorstore") == before + 1
+
+
+def test_empty_index_routes_to_websearch(tmp_path) -> None:
+    router, llm = _router(tmp_path)
+    assert router.route("about the paper") == "websearch"
+    assert router.embeddings.calls == 0
+
+
+def test_question_embeddings_are_cached(tmp_path) -> None:
+    router, _ = _router(tmp_path, {"paper.pdf": [1.0, 0.0, 0.0]})
+    router.route("about the paper")
+    router.route("about the paper")
+    assert router.embeddings.calls == 1
+
+
+async def test_async_routing_shares_the_embedding_cache(tmp_path) -> None:
+    router, llm = _router(tmp_path, {"paper.pdf": [1.0, 0.0, 0.0]})
+    assert await router.aroute("about the paper") == "vectorstore"
+    assert router.route("about the paper") == "vectorstore"
+    assert await router.aroute("somewhat related") == "vectorstore"
+    assert router.embeddings.calls == 2 and len(llm.inputs) == 1
+
+
+def test_centroids_persist(tmp_path) -> None:
+    _router(tmp_path, {"paper.pdf": [0.0, 3.0, 4.0]})
+    names, matrix = CentroidIndex(str(tmp_path / "centroids.npz")).snapshot()
+    assert names == ["paper.pdf"]
+    np.testing.assert_allclose(matrix[0], [0.0, 0.6, 0.8], atol=1e-6)
+
+
+def test_users_are_routed_against_their_own_and_global_documents(tmp_path) -> None:
+    shared, ana = CentroidIndex(str(tmp_path / "global.npz")), CentroidIndex(str(tmp_path / "ana.npz"))
+    ana.update({"d1": np.asarray([1.0, 0.0, 0.0], dtype=np.float32)}, {"d1": 1}, {"d1": "glider_log.pdf"})
+    shared.update({"d2": np.asarray([0.0, 0.0, 1.0], dtype=np.float32)}, {"d2": 1}, {"d2": "manual.pdf"})
+    indexes = {"ana": [ana, shared], None: [shared]}
+    router = LocalRouter(lambda user_id: indexes.get(user_id, [shared]), AxisEmbeddings(), StubLLMRouter(),
+                         vectorstore_threshold=0.8, websearch_threshold=0.6)
+
+    assert router.route("about the paper", "ana") == "vectorstore"
+    assert router.route("about the paper", "bo") == "websearch"
+
+    # Labels persist, and removed documents stop attracting questions.
+    assert CentroidIndex(str(tmp_path / "ana.npz")).snapshot()[0] == ["glider_log.pdf"]
+    ana.remove(["d1"])
+    assert router.route("about the paper", "ana") == "websearch"
+    assert CentroidIndex(str(tmp_path / "ana.npz")).snapshot()[0] == []
+
+
+def test_processes_sharing_the_file_merge_and_see_each_others_writes(tmp_path) -> None:
+    path = str(tmp_path / "centroids.npz")
+    first, second = CentroidIndex(path), CentroidIndex(path)
+    first.update({"aaaa": np.array([1.0, 0.0])}, {"aaaa": 1}, {"aaaa": "MemGPT.pdf"})
+    # The second copy was loaded before the first write; it must not drop it.
+    second.update({"bbbb": np.array([0.0, 1.0])}, {"bbbb": 1}, {"bbbb": "lcm.pdf"})
+    assert first.snapshot()[0] == ["MemGPT.pdf", "lcm.pdf"]
+
+    first.remove(["bbbb"])
+    assert second.snapshot()[0] == ["MemGPT.pdf"]
+    assert CentroidIndex(path).snapshot()[0] == ["MemGPT.pdf"]
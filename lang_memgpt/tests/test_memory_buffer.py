@@ -0,0 +1,167 @@
+import threading
+import time
+
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from lang_memgpt import _constants as constants
+from lang_memgpt import _memory_buffer as memory_buffer
+from lang_memgpt import _metrics as metrics
+from lang_memgpt import _settings as settings
+from lang_memgpt import _utils as utils
+from lang_memgpt import graph
+
+
+class CountingEmbeddings(Embeddings):
+    def __init__(self) -> None:
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(t)), 1.0] for t in texts]
+
+    def embed_query(self, text):
+        return [float(len(text)), 1.0]
+
+
+class FakeIndex:
+    def __init__(self) -> None:
+        self.upserts = []
+        self.fail = False
+        self.written = threading.Event()
+
+    def upsert(self, vectors, namespace):
+        if self.fail:
+            raise RuntimeError("pinecone unavailable")
+        self.upserts.append(vectors)
+        self.written.set()
+
+    def query(self, vector, filter, namespace, include_metadata, top_k):
+        records = [r for batch in self.upserts for r in batch if r["metadata"]["user_id"] == filter["user_id"]["$eq"]]
+        scored = sorted(records, key=lambda r: -graph._cosine(vector, r["values"]))
+        return {"matches": [{"metadata": r["metadata"], "score": graph._cosine(vector, r["values"])}
+                            for r in scored[:top_k]]}
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    embeddings, index = CountingEmbeddings(), FakeIndex()
+    monkeypatch.setattr(utils, "get_embeddings", lambda: embeddings)
+    monkeypatch.setattr(utils, "get_index", lambda: utils.RateLimitedIndex(index))
+    return embeddings, index
+
+
+def test_saves_are_batched_into_one_embedding_call_and_upsert(backend) -> None:
+    embeddings, index = backend
+    buffer = memory_buffer.RecallMemoryBuffer(flush_interval=60, flush_size=3)
+    buffer.start()
+    try:
+        buffer.add("ana", "Ana flies gliders")
+        buffer.add("bo", "Bo keeps bees")
+        assert not index.upserts and buffer.pending("ana") == ["Ana flies gliders"]
+        buffer.add("ana", "Ana lives in Ohio")  # reaches flush_size
+        assert index.written.wait(5)
+    finally:
+        buffer.stop(timeout=5)
+
+    assert embeddings.calls == [["Ana flies gliders", "Bo keeps bees", "Ana lives in Ohio"]]
+    [records] = index.upserts
+    assert [r["metadata"]["user_id"] for r in records] == ["ana", "bo", "ana"]
+    assert records[0]["id"] == records[0]["metadata"][constants.PATH_KEY]
+    assert records[0]["metadata"][constants.TYPE_KEY] == "recall"
+    assert len(buffer) == 0 and buffer.pending("ana") == []
+
+
+def test_stop_writes_what_is_left_and_failures_are_retried(backend) -> None:
+    embeddings, index = backend
+    buffer = memory_buffer.RecallMemoryBuffer(flush_interval=60, flush_size=10)
+    buffer.add("ana", "first")
+    index.fail = True
+    assert buffer.flush() == 0
+    assert buffer.pending("ana") == ["first"]  # kept for the next attempt
+
+    buffer.add("ana", "second")
+    index.fail = False
+    assert buffer.stop() == 2
+    assert [r["metadata"][constants.PAYLOAD_KEY] for r in index.upserts[0]] == ["first", "second"]
+
+
+def test_memories_are_dropped_after_max_attempts_or_past_max_size(backend) -> None:
+    _, index = backend
+    dropped = "alfred_recall_memories_dropped_total"
+    retries_before = metrics.REGISTRY.counter_value(dropped, reason="retries")
+    overflow_before = metrics.REGISTRY.counter_value(dropped, reason="overflow")
+    buffer = memory_buffer.RecallMemoryBuffer(flush_interval=60, flush_size=2, max_attempts=2, max_size=3)
+    index.fail = True
+
+    buffer.add("ana", "first")
+    assert buffer.flush() == 0 and buffer.pending("ana") == ["first"]
+    buffer.add("ana", "second")
+    assert buffer.flush() == 0
+    # "first" failed twice and is gone; "second" has one attempt left.
+    assert buffer.pending("ana") == ["second"]
+    assert metrics.REGISTRY.counter_value(dropped, reason="retries") == retries_before + 1
+
+    for memory in ("third", "fourth", "fifth"):
+        buffer.add("ana", memory)
+    # Only the newest max_size memories are held.
+    assert buffer.pending("ana") == ["fifth", "fourth", "third"]
+    assert metrics.REGISTRY.counter_value(dropped, reason="overflow") == overflow_before + 1
+
+    index.fail = False
+    assert buffer.flush() == 3
+
+
+def test_interval_flushes_a_partial_batch(backend) -> None:
+    _, index = backend
+    buffer = memory_buffer.RecallMemoryBuffer(flush_interval=0.05, flush_size=100)
+    buffer.start()
+    try:
+        started = time.perf_counter()
+        buffer.add("ana", "Ana flies gliders")
+        assert index.written.wait(5)
+        assert time.perf_counter() - started < 2
+    finally:
+        buffer.stop(timeout=5)
+
+
+async def test_pending_memories_are_searchable_before_the_flush(backend, monkeypatch) -> None:
+    _, index = backend
+    buffer = memory_buffer.RecallMemoryBuffer(flush_interval=60, flush_size=100)
+    monkeypatch.setattr(memory_buffer, "get_memory_buffer", lambda: buffer)
+    monkeypatch.setattr(settings.SETTINGS, "memory_write_behind", True)
+    config = {"configurable": {"user_id": "ana"}}
+
+    saved = await graph.save_recall_memory.ainvoke({"memory": "Ana flies gliders"}, config)
+    assert saved == "Ana flies gliders" and not index.upserts
+    assert await graph.search_memory.ainvoke({"query": "hobbies"}, config) == ["Ana flies gliders"]
+    assert await graph.search_memory.ainvoke({"query": "hobbies"}, {"configurable": {"user_id": "bo"}}) == []
+
+    buffer.flush()
+    # Written once, returned once.
+    assert await graph.search_memory.ainvoke({"query": "hobbies"}, config) == ["Ana flies gliders"]
+
+
+class KeywordEmbeddings(CountingEmbeddings):
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [self.embed_query(t) for t in texts]
+
+    def embed_query(self, text):
+        return [float("glider" in text), float("bee" in text), 0.1]
+
+
+async def test_pending_memories_are_ranked_with_the_matches(backend, monkeypatch) -> None:
+    _, index = backend
+    monkeypatch.setattr(utils, "get_embeddings", KeywordEmbeddings)
+    buffer = memory_buffer.RecallMemoryBuffer(flush_interval=60, flush_size=100)
+    monkeypatch.setattr(memory_buffer, "get_memory_buffer", lambda: buffer)
+    monkeypatch.setattr(settings.SETTINGS, "memory_write_behind", True)
+    config = {"configurable": {"user_id": "ana"}}
+    buffer.add("ana", "Ana flies gliders")
+    buffer.flush()
+    buffer.add("ana", "Ana keeps bees")
+
+    # A pending memory does not push out a closer match from the index.
+    assert await graph.search_memory.ainvoke({"query": "gliders", "top_k": 1}, config) == ["Ana flies gliders"]
+    assert await graph.search_memory.ainvoke({"query": "bees", "top_k": 1}, config) == ["Ana keeps bees"]
@@ -0,0 +1,28 @@
+from langchain_core.language_models import FakeListChatModel
+
+from lang_memgpt import _metrics as metrics
+
+
+def test_span_records_into_trace_and_registry() -> None:
+    registry_before = metrics.REGISTRY.counter_value(
+        "alfred_cache_lookups_total", kind="test", name="lookup", result="hit"
+    )
+    with metrics.request_trace() as trace:
+        with metrics.span("test", "lookup") as attrs:
+            attrs["cache_hit"] = True
+    assert [s["name"] for s in trace.spans] == ["lookup"]
+    assert "test_lookup;dur=" in trace.server_timing()
+    assert (
+        metrics.REGISTRY.counter_value(
+            "alfred_cache_lookups_total", kind="test", name="lookup", result="hit"
+        )
+        == registry_before + 1
+    )
+    assert 'alfred_span_duration_seconds_count{kind="test",name="lookup"}' in metrics.REGISTRY.render()
+
+
+def test_callback_handler_times_model_calls() -> None:
+    trace = metrics.RequestTrace()
+    llm = FakeListChatModel(responses=["ok"])
+    llm.invoke("hi", config={"callbacks": [metrics.MetricsCallbackHandler(trace)]})
+    assert [s["kind"] for s in trace.spans] == ["llm"]
@@ -0,0 +1,30 @@
+import pytest
+
+from lang_memgpt import _models as models
+from lang_memgpt import _settings as settings
+
+
+def test_roles_get_their_own_model_and_limits(monkeypatch) -> None:
+    monkeypatch.setattr(settings.SETTINGS, "grader_model", "gpt-4o-mini")
+    monkeypatch.setattr(settings.SETTINGS, "grader_timeout", 5.0)
+    monkeypatch.setattr(settings.SETTINGS, "grader_max_tokens", 16)
+    monkeypatch.setattr(settings.SETTINGS, "agent_max_tokens", 0)
+
+    grader = models.get_chat_model("grader")
+    assert (grader.model_name, grader.request_timeout, grader.max_tokens, grader.temperature) == (
+        "gpt-4o-mini", 5.0, 16, 0
+    )
+    assert models.role_config("agent").max_tokens is None
+    with pytest.raises(ValueError, match="Unknown model role"):
+        models.role_config("critic")
+
+
+def test_clients_share_one_http_pool() -> None:
+    grader, generator = models.get_chat_model("grader"), models.get_chat_model("generator")
+    http_client, http_async_client = models.get_http_clients()
+    assert grader.http_client is generator.http_client is http_client
+    assert grader.http_async_client is generator.http_async_client is http_async_client
+
+    agent = models.get_agent_model("gpt-4o")
+    assert agent is models.get_agent_model("gpt-4o")
+    assert agent.http_client is http_client
@@ -0,0 +1,47 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from lang_memgpt import _pdf as pdf
+from lang_memgpt import _settings as settings
+
+SAMPLE_PDF = os.path.join(os.path.dirname(__file__), "..", "..", "docs", "large_concept_models.pdf")
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_pymupdf_streams_pages_in_order(monkeypatch, workers) -> None:
+    monkeypatch.setattr(settings.SETTINGS, "pdf_workers", workers)
+    pages = list(pdf.extract_pages(SAMPLE_PDF, "pymupdf"))
+
+    assert [p.metadata["page"] for p in pages] == list(range(len(pages)))
+    assert {p.metadata["total_pages"] for p in pages} == {len(pages)}
+    assert "Large Concept Models" in pages[0].page_content
+    boxes = json.loads(pages[0].metadata["blocks"])
+    assert boxes and all(len(box) == 4 for box in boxes)
+
+
+def test_backends_agree_on_pages() -> None:
+    pypdf_pages = list(pdf.extract_pages(SAMPLE_PDF, "pypdf"))
+    pymupdf_pages = list(pdf.extract_pages(SAMPLE_PDF, "pymupdf"))
+    assert len(pypdf_pages) == len(pymupdf_pages) > pdf.PAGES_PER_TASK
+    assert pypdf_pages[0].metadata["source"] == pymupdf_pages[0].metadata["source"]
+
+
+def test_unknown_backend() -> None:
+    with pytest.raises(ValueError, match="Unknown PDF backend"):
+        pdf.extract_pages(SAMPLE_PDF, "pdfminer")
+
+
+def test_pool_workers_import_only_the_worker_module() -> None:
+    # What a forkserver/spawn worker imports to unpickle its task.
+    code = (
+        "import sys, lang_memgpt._pdf_worker;"
+        "print(sorted(m for m in sys.modules if m.startswith(('lang_memgpt', 'langchain'))))"
+    )
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+    output = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == "['lang_memgpt', 'lang_memgpt._pdf_worker']"
+    assert pdf.get_process_pool()._mp_context.get_start_method() in ("forkserver", "spawn")
@@ -0,0 +1,77 @@
+import json
+from datetime import datetime, timezone
+from typing import Any, List
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from lang_memgpt import _models as models
+from lang_memgpt import _prompts as prompts
+from lang_memgpt import graph
+
+
+class RecordingChatModel(BaseChatModel):
+    """Records each request's tools and messages, as the provider sees them."""
+
+    requests: List[Any] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "recording"
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        self.requests.append((kwargs.get("tools"), messages))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="ok"))])
+
+    def bind_tools(self, tools, **kwargs: Any):
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+
+def _prefix(tools, messages: List[BaseMessage]) -> bytes:
+    """The bytes every request must start with: tool schemas, then the instructions."""
+    return (json.dumps(tools) + messages[0].content).encode()
+
+
+async def test_prompt_prefix_is_byte_identical_across_turns_and_users(monkeypatch) -> None:
+    model = RecordingChatModel(requests=[])
+    monkeypatch.setattr(models, "get_agent_model", lambda name=None: model)
+    graph.bound_agent.cache_clear()
+    try:
+        first = [HumanMessage(content="Hi, I'm Ana. I fly gliders.")]
+        await graph.agent(
+            {"messages": first, "core_memories": ["Ana flies gliders"], "recall_memories": []},
+            {"configurable": {"user_id": "ana"}},
+        )
+        second = first + [AIMessage(content="", tool_calls=[{"name": "search_memory", "args": {}, "id": "c1"}]),
+                          ToolMessage(content="[]", tool_call_id="c1")]
+        await graph.agent(
+            {"messages": second, "core_memories": ["Ana flies gliders"], "recall_memories": ["Ana lives in Ohio"]},
+            {"configurable": {"user_id": "ana"}},
+        )
+        await graph.agent(
+            {"messages": [HumanMessage(content="Weather at KNKX?")], "core_memories": [], "recall_memories": []},
+            {"configurable": {"user_id": "bo"}},
+        )
+    finally:
+        graph.bound_agent.cache_clear()
+
+    prefixes = {_prefix(tools, messages) for tools, messages in model.requests}
+    assert len(model.requests) == 3 and len(prefixes) == 1
+    tools, messages = model.requests[1]
+    assert [t["function"]["name"] for t in tools] == sorted(t["function"]["name"] for t in tools)
+    assert messages[0].content == prompts.SYSTEM_PROMPT
+    # The conversation follows the instructions unchanged; memories and time come last.
+    assert messages[1:-1] == second
+    # As a human message: some providers reject a system message after the conversation.
+    assert isinstance(messages[-1], HumanMessage) and messages[-1].content.startswith("[Context for Alfred")
+    assert "Ana lives in Ohio" in messages[-1].content and "Current system time:" in messages[-1].content
+    assert [type(m) for m in messages].count(SystemMessage) == 1
+
+
+def test_time_is_rounded_down() -> None:
+    now = datetime(2025, 3, 1, 12, 34, 56, 789000, tzinfo=timezone.utc)
+    assert prompts.current_time(60, now) == "2025-03-01T12:34:00+00:00"
+    assert prompts.current_time(900, now) == "2025-03-01T12:30:00+00:00"
+    assert prompts.current_time(0, now) == "2025-03-01T12:34:56+00:00"
@@ -0,0 +1,62 @@
+from langchain_core.documents import Document
+from langchain_core.runnables import RunnableLambda
+
+from lang_memgpt import _corpus as corpus
+from lang_memgpt import _settings as settings
+from lang_memgpt import _summaries as summaries
+from lang_memgpt.tests.test_corpus import WordEmbeddings
+from lang_memgpt.tools.summary_tool import document_summary
+
+PAGES = [
+    Document(page_content=f"Page {i} on memory tiers. " * 40, metadata={"source": "/docs/MemGPT.pdf", "page": i})
+    for i in range(6)
+]
+
+
+def test_sections_pack_consecutive_pages() -> None:
+    parts = summaries.sections(PAGES, section_tokens=250, max_sections=4)
+    assert [(s.first, s.last) for s in parts] == [(0, 1), (2, 3), (4, 5)]
+    assert parts[0].label == "pages 1-2" and parts[0].text.startswith("Page 0")
+
+    # A long document is split into at most max_sections sections.
+    assert len(summaries.sections(PAGES, section_tokens=10, max_sections=2)) == 2
+
+
+def test_summarize_document_rolls_sections_up(monkeypatch) -> None:
+    monkeypatch.setattr(settings.SETTINGS, "summary_section_tokens", 250)
+    section_calls = []
+
+    def summarize_section(inputs):
+        section_calls.append(inputs["pages"])
+        return f"**Memory, {inputs['pages']}**\nHow memory is paged in {inputs['pages']}."
+
+    document_chain = RunnableLambda(lambda inputs: f"Overview of {inputs['outline'].count('- ')} sections.")
+    result = summaries.summarize_document(
+        "MemGPT.pdf", PAGES, RunnableLambda(summarize_section), document_chain
+    )
+    assert len(section_calls) == len(result["outline"]) > 1
+    assert result["summary"] == f"Overview of {len(section_calls)} sections."
+    assert result["outline"][0] == {
+        "title": "Memory, page 1", "pages": "page 1", "summary": "How memory is paged in page 1."
+    }
+
+
+async def test_tool_serves_stored_summaries(tmp_path, monkeypatch) -> None:
+    embeddings = WordEmbeddings()
+    index = corpus.CorpusIndex(str(tmp_path), embeddings, embeddings)
+    index.add_documents([Document(page_content="MemGPT pages memory.", metadata={"source": "MemGPT.pdf", "document_id": "aaaa"}),
+                         Document(page_content="Concept models.", metadata={"source": "lcm.pdf", "document_id": "bbbb"})])
+    index.registry.set_summary("aaaa", "MemGPT is an OS for LLM memory. It pages context.",
+                               [{"title": "Intro", "pages": "page 1", "summary": "Motivation."},
+                                {"title": "Design", "pages": "pages 2-5", "summary": "Memory tiers."}])
+    monkeypatch.setattr(corpus, "user_indexes", lambda user_id: [index])
+
+    assert await document_summary.ainvoke({}) == (
+        "MemGPT.pdf: MemGPT is an OS for LLM memory.\nlcm.pdf: (no summary yet)"
+    )
+    text = await document_summary.ainvoke({"filename": "memgpt"})
+    assert text.startswith("# MemGPT.pdf\n\nMemGPT is an OS") and "- **Design** (pages 2-5): Memory tiers." in text
+    assert "no summary yet" in await document_summary.ainvoke({"filename": "lcm.pdf"})
+
+    index.remove_document("aaaa")
+    assert index.registry.get_summary("aaaa") is None
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from lang_memgpt import _vector_index as vector_index
+
+
+def _corpus(n=2000, dim=64, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((20, dim))
+    vectors = centers[rng.integers(0, 20, n)] + 0.3 * rng.standard_normal((n, dim))
+    texts = [f"chunk {i}" for i in range(n)]
+    return vectors, texts, [{"row": i} for i in range(n)]
+
+
+@pytest.mark.parametrize("quantization, bytes_per_dim", [("int8", 1), ("float16", 2), ("float32", 4)])
+def test_rescored_search_matches_exact(quantization, bytes_per_dim) -> None:
+    vectors, texts, metadatas = _corpus()
+    index = vector_index.VectorIndex.build(vectors, texts, metadatas, quantization)
+    exact = vector_index.normalize(vectors)
+
+    queries = np.random.default_rng(1).standard_normal((20, vectors.shape[1]))
+    for query in queries:
+        expected = np.argsort(-(exact @ vector_index.normalize(query)))[:5]
+        assert [row for row, _ in index.search(query, k=5)] == expected.tolist()
+
+    assert index.codes.nbytes == len(texts) * vectors.shape[1] * bytes_per_dim
+    # float64 vectors take 8 bytes per dimension
+    assert vectors.nbytes / index.resident_bytes >= 0.9 * 8 / bytes_per_dim
+
+
+def test_save_and_load_round_trip(tmp_path) -> None:
+    vectors, texts, metadatas = _corpus(n=300)
+    index = vector_index.VectorIndex.build(vectors, texts, metadatas, "int8", groups={"doc": [(0, 10), (40, 50)]})
+    index.save(str(tmp_path / "index"))
+    index.save(str(tmp_path / "index"))  # replaces the previous index
+
+    loaded = vector_index.VectorIndex.load(str(tmp_path / "index"))
+    assert all(isinstance(a, np.memmap) for a in (loaded.codes, loaded.scales, loaded.vectors))
+    assert loaded.codes.dtype == np.int8 and loaded.quantization == "int8"
+    assert list(loaded.texts) == texts and loaded.metadatas[7] == {"row": 7}
+    assert loaded.texts[-1] == "chunk 299" and loaded.metadatas[1:3] == [{"row": 1}, {"row": 2}]
+    assert not isinstance(vector_index.VectorIndex.load(str(tmp_path / "index"), mmap=False).codes, np.memmap)
+    assert loaded.search(vectors[42], k=1) == [(42, pytest.approx(1.0, abs=1e-5))]
+    assert loaded.groups == {"doc": [(0, 10), (40, 50)]}
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["index"]
+
+
+def test_search_limited_to_rows() -> None:
+    vectors, texts, metadatas = _corpus(n=500)
+    index = vector_index.VectorIndex.build(vectors, texts, metadatas, "int8", groups={"a": [(100, 200)], "b": [(450, 452)]})
+    rows = index.group_rows(["a", "b", "missing"])
+    assert len(rows) == 102
+
+    exact = vector_index.normalize(vectors)
+    query = vectors[7]
+    expected = rows[np.argsort(-(exact[rows] @ vector_index.normalize(query)))[:3]]
+    assert [row for row, _ in index.search(query, k=3, rows=rows)] == expected.tolist()
+    assert index.search(query, k=3, rows=index.group_rows(["missing"])) == []
+
+
+def test_unknown_quantization() -> None:
+    with pytest.raises(ValueError, match="Unknown quantization"):
+        vector_index.VectorIndex.build([[1.0, 0.0]], ["a"], [{}], "pq")
+
+
+def test_segment_store_swaps_generations(tmp_path) -> None:
+    writer = vector_index.SegmentStore(str(tmp_path), keep=2)
+    reader = vector_index.SegmentStore(str(tmp_path))  # e.g. another worker process
+    assert reader.current() is None
+
+    assert writer.publish(vector_index.VectorIndex.build([[1.0, 0.0]], ["first"], [{}])) == 1
+    first = reader.current()
+    assert list(first.texts) == ["first"]
+    assert reader.current() is first  # unchanged generation is not reopened
+
+    for generation, text in [(2, "second"), (3, "third")]:
+        index = vector_index.VectorIndex.build([[1.0, 0.0], [0.0, 1.0]], [text, "other"], [{}, {}])
+        assert writer.publish(index) == generation
+    assert reader.current().texts[0] == "third"
+    assert sorted(p.name for p in tmp_path.iterdir() if p.name.startswith("gen-")) == ["gen-000002", "gen-000003"]
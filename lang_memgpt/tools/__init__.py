@@ -3,10 +3,12 @@
 # Import tools from individual files
 from .metar_tool import get_metar_data
 from .taf_tools import get_taf_data
-from .calculator_tool import calculate
-from .unit_converter_tool import unit_converter
+from .calculator_tool import calculate, calculate_batch
+from .unit_converter_tool import unit_converter, unit_converter_batch
 from .date_time_tool import date_time_tool
 from .newsdata_tool import fetch_latest_news
+from .table_tool import list_tables, query_table
+from .summary_tool import document_summary
 
 
 # Expose tools to external modules
@@ -14,7 +16,12 @@ __all__ = [
     "get_metar_data",
     "get_taf_data",
     "calculate",
+    "calculate_batch",
     "unit_converter",
+    "unit_converter_batch",
     "date_time_tool",
     "fetch_latest_news",
+    "list_tables",
+    "query_table",
+    "document_summary",
 ]
@@ -1,6 +1,148 @@
 from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Optional, Sequence, Union
+from functools import lru_cache
+import ast
+import math
+
+import numpy as np
+
+def _float_result(func):
+    # math.floor and math.ceil return ints, which would let ** build huge
+    # integers again (floor(9) ** floor(9) ** floor(9)); keep them floats.
+    def wrapper(*args: float) -> float:
+        return float(func(*args))
+
+    return wrapper
+
+
+def _round(value: float, ndigits: float = 0) -> float:
+    # Like floor and ceil, but constants are floats, so the digit count
+    # arrives as one.
+    return float(round(value, int(ndigits)))
+
+
+# Functions and constants available in expressions, for scalar evaluation
+# (math) and for batch evaluation over arrays (NumPy).
+SCALAR_FUNCTIONS = {
+    "sqrt": math.sqrt, "exp": math.exp, "log": math.log, "log10": math.log10, "log2": math.log2,
+    "sin": math.sin, "cos": math.cos, "tan": math.tan,
+    "asin": math.asin, "acos": math.acos, "atan": math.atan, "atan2": math.atan2,
+    "radians": math.radians, "degrees": math.degrees, "hypot": math.hypot,
+    "floor": _float_result(math.floor), "ceil": _float_result(math.ceil), "abs": abs,
+    "round": _round, "min": min, "max": max,
+}
+ARRAY_FUNCTIONS = {
+    "sqrt": np.sqrt, "exp": np.exp, "log": np.log, "log10": np.log10, "log2": np.log2,
+    "sin": np.sin, "cos": np.cos, "tan": np.tan,
+    "asin": np.arcsin, "acos": np.arccos, "atan": np.arctan, "atan2": np.arctan2,
+    "radians": np.radians, "degrees": np.degrees, "hypot": np.hypot,
+    "floor": np.floor, "ceil": np.ceil, "abs": np.abs, "round": np.round, "min": np.minimum, "max": np.maximum,
+}
+CONSTANTS = {"pi": math.pi, "e": math.e, "tau": math.tau}
+
+_ALLOWED_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Call, ast.Name, ast.Load, ast.Constant,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow, ast.UAdd, ast.USub,
+)
+
+
+class CompiledExpression:
+    """A validated expression compiled to a code object.
+
+    Attributes:
+        expression: The normalized source text.
+        variables: Names in the expression that must be bound at evaluation.
+    """
+
+    def __init__(self, expression: str, code: Any, variables: frozenset) -> None:
+        self.expression = expression
+        self.code = code
+        self.variables = variables
+
+    def evaluate(self, variables: Optional[Dict[str, float]] = None) -> float:
+        bound = {name: float(value) for name, value in (variables or {}).items()}
+        namespace = {**CONSTANTS, **SCALAR_FUNCTIONS, **bound}
+        self._check_bound(namespace)
+        result = eval(self.code, {"__builtins__": {}}, namespace)
+        if isinstance(result, complex):
+            raise ValueError("Result is not a real number.")
+        return result
+
+    def evaluate_batch(self, variables: Dict[str, Sequence[float]]) -> np.ndarray:
+        """Evaluate once over arrays of bindings; scalars broadcast."""
+        arrays = {name: np.asarray(values, dtype=np.float64) for name, values in variables.items()}
+        namespace = {**CONSTANTS, **ARRAY_FUNCTIONS, **arrays}
+        self._check_bound(namespace)
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            result = eval(self.code, {"__builtins__": {}}, namespace)
+        size = np.broadcast_shapes(*(a.shape for a in arrays.values())) if arrays else ()
+        return np.broadcast_to(np.asarray(result, dtype=np.float64), size)
+
+    def _check_bound(self, namespace: Dict[str, Any]) -> None:
+        missing = sorted(self.variables - namespace.keys())
+        if missing:
+            raise ValueError(f"Unbound variables: {', '.join(missing)}")
+
+
+class _FloatConstants(ast.NodeTransformer):
+    # Float arithmetic raises OverflowError instead of building huge integers
+    # (e.g. 9 ** 9 ** 9), which keeps evaluation time bounded.
+    def visit_Constant(self, node: ast.Constant) -> ast.Constant:
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            raise ValueError(f"Unsupported constant: {node.value!r}")
+        return ast.copy_location(ast.Constant(float(node.value)), node)
+
+
+@lru_cache(maxsize=512)
+def compile_expression(expression: str) -> CompiledExpression:
+    """
+    Parses and validates an arithmetic expression and compiles it.
+
+    Supports + - * / // % and ** (or ^), parentheses, the functions in
+    SCALAR_FUNCTIONS, the constants pi, e and tau, and free variables.
+
+    Raises:
+        ValueError: If the expression is invalid or uses anything else.
+    """
+    source = expression.strip().replace("^", "**")
+    try:
+        tree = ast.parse(source, mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"Invalid expression: {expression}") from e
+
+    variables = set()
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise ValueError(f"Unsupported syntax: {type(node).__name__}")
+        if isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id not in SCALAR_FUNCTIONS or node.keywords:
+                raise ValueError(f"Unsupported function call in: {expression}")
+        elif isinstance(node, ast.Name) and node.id not in SCALAR_FUNCTIONS and node.id not in CONSTANTS:
+            if node.id.startswith("_"):
+                raise ValueError(f"Unsupported name: {node.id}")
+            variables.add(node.id)
+
+    tree = ast.fix_missing_locations(_FloatConstants().visit(tree))
+    return CompiledExpression(source, compile(tree, "<expression>", "eval"), frozenset(variables))
+
+
+def evaluate(expression: str, variables: Optional[Dict[str, float]] = None) -> float:
+    """
+    Evaluates an arithmetic expression with standard precedence.
+
+    All arithmetic is in double precision, so evaluation time stays bounded;
+    integers beyond 2**53 are approximate (``10**20 + 1`` gives ``1e20``).
+
+    Raises:
+        ZeroDivisionError: On division by zero.
+        ValueError: If the expression is invalid.
+    """
+    return compile_expression(expression).evaluate(variables)
+
+
+def _number(value: float) -> Union[int, float]:
+    return int(value) if float(value).is_integer() else float(value)
 
 
 @tool
@@ -10,69 +152,59 @@ async def calculate(
     config: Optional[RunnableConfig] = None
 ) -> Optional[float]:
     """
-    Evaluate a basic mathematical expression with +, -, *, /.
+    Evaluate a mathematical expression with + - * / // % and ** (or ^),
+    parentheses, functions (sqrt, exp, log, log10, log2, sin, cos, tan, asin,
+    acos, atan, atan2, radians, degrees, hypot, floor, ceil, abs, round, min,
+    max) and the constants pi, e and tau. Results are double precision:
+    integers above 2**53 (about 9e15) are rounded.
 
     Args:
         expression (str): The mathematical expression to evaluate.
         config (Optional[RunnableConfig]): Optional runtime configuration.
 
     Returns:
-        Optional[float]: The result of the calculation, or None if an error occurs.
+        Optional[float]: The result of the calculation, or an error message.
 
     Example Usage:
-        calculate("3 + 5 * 2 - 4 / 2")
-
-    Raises:
-        ValueError: If the expression is invalid or contains unsupported operations.
+        calculate("3 + 5 * 2 - sqrt(16) / 2")
     """
-    import re
-    import operator
-
     try:
-        # Supported operators
-        operators = {
-            '+': operator.add,
-            '-': operator.sub,
-            '*': operator.mul,
-            '/': operator.truediv
-        }
-
-        # Tokenize expression (numbers and operators)
-        tokens = re.findall(r'\d+\.?\d*|[+\-*/]', expression.replace(' ', ''))
-
-        # Parse tokens into valid numbers or operators
-        def parse_token(token):
-            try:
-                return float(token)  # Convert numbers
-            except ValueError:
-                if token in operators:
-                    return token  # Valid operator
-                raise ValueError(f"Unsupported token: {token}")
-
-        # Process tokens
-        tokens = [parse_token(token) for token in tokens]
-
-        # Evaluate the expression (left-to-right)
-        result = tokens[0]  # Start with the first number
-        i = 1
-        while i < len(tokens):
-            operator = tokens[i]
-            number = tokens[i + 1]
-
-            # Handle division by zero
-            if operator == '/' and number == 0:
-                raise ZeroDivisionError("Division by zero is not allowed.")
-
-            # Perform operation
-            result = operators[operator](result, number)
-            i += 2  # Move to next operator and number
-
-        return result
+        return _number(evaluate(expression))
 
     except ZeroDivisionError as e:
         # Handle division by zero
         return f"Error: {e}"
 
+    except OverflowError:
+        return "Error: Result is too large."
+
     except Exception as e:
         # Handle general errors
         return f"Error evaluating expression: {e}"
+
+
+@tool
+async def calculate_batch(
+    expression: str,
+    variables: Dict[str, List[float]],
+    config: Optional[RunnableConfig] = None
+) -> Union[List[float], str]:
+    """
+    Evaluate one expression over columns of values in a single call, e.g. a
+    fuel formula for every row of a table. Supports the same syntax as
+    calculate, with variable names bound to equal-length lists of numbers.
+
+    Args:
+        expression (str): The expression, e.g. "lbs / density".
+        variables (Dict[str, List[float]]): Values for each variable, e.g.
+            {"lbs": [16000, 12000], "density": [6.8, 6.8]}.
+
+    Returns:
+        List[float]: One result per row, or an error message.
+    """
+    try:
+        results = compile_expression(expression).evaluate_batch(variables)
+        return [_number(round(float(v), 10)) if math.isfinite(v) else float(v) for v in np.atleast_1d(results)]
+
+    except Exception as e:
+        return f"Error evaluating expression: {e}"
@@ -1,8 +1,24 @@
 from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
 from typing import Any, List, Optional, Annotated
-import datetime
-from datetime import timedelta
+from datetime import datetime, timedelta
+
+
+def add_days(date_str: str, days_to_add: int) -> str:
+    """
+    Adds days_to_add days to a YYYY-MM-DD date and returns it in the same format.
+
+    Raises:
+        ValueError: If the date is invalid.
+    """
+    # Parse the input date string
+    date = datetime.strptime(date_str, "%Y-%m-%d")
+
+    # Perform the date adjustment
+    new_date = date + timedelta(days=days_to_add)
+
+    # Return the new date in string format
+    return new_date.strftime("%Y-%m-%d")
 
 
 @tool
@@ -24,14 +40,7 @@ async def date_time_tool(
         str: The resulting date in YYYY-MM-DD format, or an error message.
     """
     try:
-        # Parse the input date string
-        date = datetime.strptime(date_str, "%Y-%m-%d")
-
-        # Perform the date adjustment
-        new_date = date + timedelta(days=days_to_add)
-
-        # Return the new date in string format
-        return new_date.strftime("%Y-%m-%d")
+        return add_days(date_str, days_to_add)
 
     except ValueError as e:
         # Return a friendly error message if the date format is invalid
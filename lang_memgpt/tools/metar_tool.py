@@ -4,6 +4,9 @@ import xml.etree.ElementTree as ET  # For XML parsing
 from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
 
+from lang_memgpt import _limits as limits
+from lang_memgpt import _settings as settings
+
 
 @tool
 async def get_metar_data(
@@ -27,7 +30,7 @@ async def get_metar_data(
     """
 
     # Aviation Weather API endpoint
-    base_url = "https://aviationweather.gov/api/data/dataserver"
+    base_url = settings.SETTINGS.aviationweather_url
 
     # Base parameters for METAR data retrieval
     params = {
@@ -47,6 +50,7 @@ async def get_metar_data(
             params["stationString"] = station
 
             try:
+                await limits.get_rate_limiter("aviationweather").aacquire()
                 # Make the API request
                 async with session.get(base_url, params=params) as response:
                     if response.status == 200:
@@ -3,6 +3,9 @@ import aiohttp
 from dotenv import load_dotenv
 from langchain.tools import tool
 
+from lang_memgpt import _limits as limits
+from lang_memgpt import _settings as settings
+
 # Load environment variables from .env file
 load_dotenv()
 API_KEY = os.getenv('NEWSDATA_API_KEY')
@@ -22,7 +25,7 @@ async def fetch_latest_news(query, language='en', category=None, country=None):
     Returns:
         dict: JSON response containing news articles or error details.
     """
-    base_url = "https://newsdata.io/api/1/latest"
+    base_url = settings.SETTINGS.newsdata_url
     params = {
         'apikey': API_KEY,
         'q': query,
@@ -35,6 +38,7 @@ async def fetch_latest_news(query, language='en', category=None, country=None):
     params = {k: v for k, v in params.items() if v is not None}
 
     try:
+        await limits.get_rate_limiter("newsdata").aacquire()
         async with aiohttp.ClientSession() as session:
             async with session.get(base_url, params=params) as response:
                 response.raise_for_status()
@@ -1,88 +1,46 @@
-import os
-import tempfile
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.document_loaders import PyPDFLoader
-from langchain_community.vectorstores import SKLearnVectorStore
-from langchain_openai import OpenAIEmbeddings
+import asyncio
 from langchain.tools import tool
-import csv
-from langchain.document_loaders.csv_loader import CSVLoader
+from langchain_core.runnables import ensure_config
 import logging
-from ..RAG_Structure.nodes.ingestion import ingest_data  # Fix import
+from ..RAG_Structure.nodes.ingestion import document_paths, ingest_data  # Fix import
 from ..RAG_Structure.nodes.retrieve import retrieve
+from .. import _corpus as corpus
+from .. import _jobs as jobs
+from .. import _settings as settings
+from .. import _utils as utils
 
 logger = logging.getLogger(__name__)
 
-# Add these constants at the top
-BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-PDF_DIR = os.path.join(BASE_DIR, "data", "pdf_docs")
-CSV_DIR = os.path.join(BASE_DIR, "data", "csv_docs")
-VECTOR_STORE_DIR = os.path.join(BASE_DIR, "data", "vector_store")
-VECTOR_STORE_PATH = os.path.join(VECTOR_STORE_DIR, "vector_store.parquet")
-
-# Create directories if they don't exist
-os.makedirs(PDF_DIR, exist_ok=True)
-os.makedirs(CSV_DIR, exist_ok=True)
-os.makedirs(VECTOR_STORE_DIR, exist_ok=True)
-
-# Async Tool for RAG with Parquet Storage
-
 
 @tool
-async def document_retriever(query: str) -> str:
+async def document_retriever(query: str, filename: str = "") -> str:
     """
-    Query PDF and CSV documents stored in respective folders using SKLearn Vector DB with Parquet serialization.
+    Query the PDF and CSV documents in the docs folder using the shared document index.
 
     Args:
         query (str): The search query for retrieving relevant document content.
+        filename (str): Optional file name to search only that document.
     Returns:
         str: Top matches from the PDF and CSV documents.
     """
-    embedding_model = OpenAIEmbeddings()
-
     try:
-        if os.path.exists(VECTOR_STORE_PATH):
-            vector_store = SKLearnVectorStore(
-                embedding=embedding_model,
-                persist_path=VECTOR_STORE_PATH,
-                serializer="parquet"
-            )
-        else:
-            # Load documents
-            documents = []
-            for directory, extensions in [(PDF_DIR, ".pdf"), (CSV_DIR, ".csv")]:
-                if os.path.exists(directory):
-                    for filename in os.listdir(directory):
-                        if filename.endswith(extensions):
-                            file_path = os.path.join(directory, filename)
-                            try:
-                                loader = PyPDFLoader(file_path) if extensions == ".pdf" else CSVLoader(file_path)
-                                documents.extend(loader.load())
-                            except Exception as e:
-                                logger.error(f"Error loading {filename}: {str(e)}")
-                                continue
-
-            # Process documents
-            if documents:
-                text_splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50)
-                doc_chunks = text_splitter.split_documents(documents)
-                
-                vector_store = SKLearnVectorStore.from_documents(
-                    documents=doc_chunks,
-                    embedding=embedding_model,
-                    persist_path=VECTOR_STORE_PATH,
-                    serializer="parquet",
-                )
-                vector_store.persist()
-            else:
+        user_id = utils.ensure_configurable(ensure_config())["user_id"]
+        if corpus.is_empty(user_id):
+            # Ingesting can take minutes; do it in a background job and only
+            # answer from the index once it is ready.
+            paths = document_paths(user_id)
+            if not paths:
                 return "No documents available to search."
+            # Only a job covering this user's files can make their index ready.
+            queue = jobs.get_job_queue()
+            active = queue.store.find_active("ingest", paths)
+            job_id = active["id"] if active else queue.submit("ingest", paths)
+            job = await asyncio.to_thread(queue.wait, job_id, settings.SETTINGS.ingest_tool_wait)
+            if job["status"] != jobs.SUCCEEDED or corpus.is_empty(user_id):
+                return f"The document index is not ready yet. {jobs.describe(job)}"
 
-        # Perform search
-        retriever = vector_store.as_retriever()
-        results = retriever.get_relevant_documents(query)
-        
-        # Fix the syntax error in this line
-        return "\n".join([f"[{i+1}] {doc.page_content}" for i, doc in enumerate(results[:3])])
+        documents = await corpus.asearch(query, user_id=user_id, k=3, filename=filename)
+        return "\n".join([f"[{i+1}] {doc.page_content}" for i, doc in enumerate(documents)])
     except Exception as e:
         logger.error(f"Error in document retriever: {str(e)}")
         return f"Error searching documents: {str(e)}"
@@ -0,0 +1,48 @@
+"""Document summaries and outlines built at ingestion time."""
+
+from langchain_core.runnables import ensure_config
+from langchain_core.tools import tool
+
+from lang_memgpt import _corpus as corpus
+from lang_memgpt import _summaries as summaries
+from lang_memgpt import _utils as utils
+
+
+def _first_sentence(text: str) -> str:
+    sentence = text.strip().split(". ", 1)[0]
+    return sentence if sentence.endswith(".") else sentence + "."
+
+
+@tool
+async def document_summary(filename: str = "") -> str:
+    """
+    Summary and outline of an ingested document. Use this instead of retrieve
+    for overview questions such as "what is this document about?" or
+    "summarize the MemGPT paper". Without a filename, lists the ingested
+    documents with a one-line summary each.
+
+    Args:
+        filename (str): Document file name, e.g. "MemGPT.pdf" or "memgpt".
+
+    Returns:
+        str: The document summary and its section outline.
+    """
+    indexes = corpus.user_indexes(utils.ensure_configurable(ensure_config())["user_id"])
+
+    if not filename.strip():
+        lines = []
+        for index in indexes:
+            for info in index.registry.all():
+                stored = index.registry.get_summary(info.document_id)
+                about = _first_sentence(stored["summary"]) if stored and stored["summary"] else "(no summary yet)"
+                lines.append(f"{info.filename}: {about}")
+        return "\n".join(lines) or "No documents have been ingested yet."
+
+    for index in indexes:
+        for info in index.registry.find(filename):
+            stored = index.registry.get_summary(info.document_id)
+            if stored and stored["summary"]:
+                return summaries.format_summary(info.filename, stored["summary"], stored["outline"])
+            return (f"{info.filename} has no summary yet (summaries are built during ingestion). "
+                    "Use retrieve to search its contents.")
+    return f"No ingested document matches '{filename}'. Call document_summary() to list documents."
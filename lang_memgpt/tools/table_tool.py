@@ -0,0 +1,339 @@
+"""Columnar storage and querying for ingested CSV files.
+
+Ingestion converts each CSV to a Parquet table (one per file, with a
+``row_id`` column) instead of embedding every row. Exact questions such as
+"how many papers in 2023" are answered by ``query_table`` with vectorized
+pandas filters and aggregates; only long free-text columns (titles,
+abstracts, notes) are embedded, one document per row tagged with its
+``row_id`` so search hits can be joined back to the table.
+
+Tables belong to the corpus namespace of their CSV file (see ``_corpus``):
+global ones live in ``settings.tables_directory``, a user's under
+``users/<namespace>`` in it. A user sees their own tables and the global
+ones, theirs first when names clash; a table is deleted with its document.
+"""
+
+from __future__ import annotations
+
+import ast
+import os
+import re
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+from langchain_core.documents import Document
+from langchain_core.runnables import RunnableConfig, ensure_config
+from langchain_core.tools import tool
+
+from lang_memgpt import _corpus as corpus
+from lang_memgpt import _settings as settings
+from lang_memgpt import _utils as utils
+
+ROW_ID = "row_id"
+
+# String columns whose mean length reaches this are treated as free text and
+# embedded; shorter ones (ids, categories, dates) are only queried.
+TEXT_COLUMN_MIN_LENGTH = 64
+
+AGGREGATES = ("count", "sum", "mean", "min", "max", "nunique")
+MAX_RESULT_ROWS = 50
+
+_NAME_RE = re.compile(r"[^a-z0-9]+")
+_CONDITION_RE = re.compile(
+    r"^\s*(?:(?P<part>year|month)\(\s*)?(?P<column>`[^`]+`|\w+)\s*\)?\s*"
+    r"(?P<op>==|!=|>=|<=|>|<|=|(?:contains|startswith|in)\b)\s*(?P<value>.+?)\s*$",
+    re.IGNORECASE,
+)
+_AND_RE = re.compile(r"\s+and\s+", re.IGNORECASE)
+
+
+class TableInfo(NamedTuple):
+    name: str
+    path: str
+    source: str
+    rows: int
+    columns: List[str]
+    text_columns: List[str]
+
+
+def table_name(path: str) -> str:
+    """Table name for a CSV file, e.g. ``docs/arXiv.csv`` -> ``arxiv``."""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return _NAME_RE.sub("_", stem.lower()).strip("_") or "table"
+
+
+def _table_directory(namespace: str) -> str:
+    if namespace == corpus.GLOBAL_NAMESPACE:
+        return settings.SETTINGS.tables_directory
+    return os.path.join(settings.SETTINGS.tables_directory, "users", namespace)
+
+
+def _table_path(name: str, namespace: str = corpus.GLOBAL_NAMESPACE) -> str:
+    return os.path.join(_table_directory(namespace), f"{name}.parquet")
+
+
+def _text_columns(table: pa.Table) -> List[str]:
+    configured = [c.strip() for c in settings.SETTINGS.table_text_columns.split(",") if c.strip()]
+    if configured:
+        return [c for c in table.column_names if c in configured]
+    columns = []
+    for field in table.schema:
+        if field.name == ROW_ID or not pa.types.is_string(field.type):
+            continue
+        mean_length = pc.mean(pc.utf8_length(table[field.name])).as_py()
+        if (mean_length or 0) >= TEXT_COLUMN_MIN_LENGTH:
+            columns.append(field.name)
+    return columns
+
+
+def store_csv(path: str, namespace: Optional[str] = None, document_id: str = "") -> TableInfo:
+    """
+    Converts a CSV file to a Parquet table in its namespace's tables directory.
+
+    The table gets a ``row_id`` column (the 0-based row number) and records
+    its source file, text columns and ``document_id`` in the schema metadata.
+    ``namespace`` defaults to the one of the directory the file is in.
+    """
+    namespace = namespace or corpus.namespace_for_path(path)
+    table = pa_csv.read_csv(path)
+    if ROW_ID not in table.column_names:
+        table = table.add_column(0, ROW_ID, pa.array(range(table.num_rows), pa.int64()))
+    text_columns = _text_columns(table)
+    table = table.replace_schema_metadata({
+        b"source": os.path.basename(path).encode(),
+        b"text_columns": ",".join(text_columns).encode(),
+        b"document_id": document_id.encode(),
+    })
+
+    name = table_name(path)
+    target = _table_path(name, namespace)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    tmp_path = f"{target}.tmp"
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, target)
+    return TableInfo(name, target, path, table.num_rows, table.column_names, text_columns)
+
+
+def row_documents(info: TableInfo) -> List[Document]:
+    """One document per row with text in the table's text columns."""
+    if not info.text_columns:
+        return []
+    rows = pq.read_table(info.path, columns=[ROW_ID] + info.text_columns).to_pylist()
+    documents = []
+    for row in rows:
+        text = "\n".join(f"{c}: {row[c]}" for c in info.text_columns if row[c])
+        if text:
+            documents.append(Document(
+                page_content=text,
+                metadata={"source": info.source, "table": info.name, ROW_ID: row[ROW_ID]},
+            ))
+    return documents
+
+
+def _read_info(path: str) -> TableInfo:
+    schema = pq.read_schema(path)
+    metadata = schema.metadata or {}
+    text = metadata.get(b"text_columns", b"").decode()
+    return TableInfo(
+        os.path.basename(path)[: -len(".parquet")], path, metadata.get(b"source", b"").decode(),
+        pq.read_metadata(path).num_rows,
+        schema.names, [c for c in text.split(",") if c],
+    )
+
+
+def list_table_infos(user_id: Optional[str] = None) -> List[TableInfo]:
+    """The tables ``user_id`` can query: their own, then global ones they do not shadow."""
+    infos: Dict[str, TableInfo] = {}
+    for namespace in corpus.user_namespaces(user_id):
+        directory = _table_directory(namespace)
+        if not os.path.isdir(directory):
+            continue
+        for filename in sorted(os.listdir(directory)):
+            name = filename[: -len(".parquet")]
+            if filename.endswith(".parquet") and name not in infos:
+                infos[name] = _read_info(os.path.join(directory, filename))
+    return sorted(infos.values(), key=lambda info: info.name)
+
+
+@corpus.on_remove
+def remove_table(namespace: str, document: corpus.DocumentInfo) -> None:
+    """Deletes a removed CSV document's table, unless a newer version has replaced it."""
+    if document.kind != "table":
+        return
+    path = _table_path(document.ref, namespace)
+    if not os.path.exists(path):
+        return
+    owner = (pq.read_schema(path).metadata or {}).get(b"document_id", b"").decode()
+    if owner in ("", document.document_id):
+        os.remove(path)
+
+
+@lru_cache(maxsize=8)
+def _load(path: str, mtime: float) -> pd.DataFrame:
+    return pq.read_table(path).to_pandas(date_as_object=False)
+
+
+def load_table(name: str, user_id: Optional[str] = None) -> pd.DataFrame:
+    """
+    Loads a table ``user_id`` can query, cached until the Parquet file changes.
+
+    Raises:
+        ValueError: If no table with that name exists.
+    """
+    for namespace in corpus.user_namespaces(user_id):
+        path = _table_path(table_name(name), namespace)
+        if os.path.exists(path):
+            return _load(path, os.path.getmtime(path))
+    available = ", ".join(info.name for info in list_table_infos(user_id)) or "none"
+    raise ValueError(f"Unknown table '{name}'. Available tables: {available}")
+
+
+def _column(frame: pd.DataFrame, name: str) -> str:
+    name = name.strip("`")
+    if name not in frame.columns:
+        raise ValueError(f"Unknown column '{name}'. Columns: {', '.join(map(str, frame.columns))}")
+    return name
+
+
+def _literal(text: str):
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return text.strip("'\"")
+
+
+def _mask(frame: pd.DataFrame, where: str) -> pd.Series:
+    mask = pd.Series(True, index=frame.index)
+    for clause in filter(None, (c.strip() for c in _AND_RE.split(where.strip()))):
+        match = _CONDITION_RE.match(clause)
+        if not match:
+            raise ValueError(f"Cannot parse condition: {clause}")
+        series = frame[_column(frame, match["column"])]
+        if match["part"]:
+            series = getattr(pd.to_datetime(series, errors="coerce").dt, match["part"].lower())
+        op, value = match["op"].lower(), _literal(match["value"])
+        if op == "contains":
+            mask &= series.astype("string").str.contains(str(value), case=False, regex=False).fillna(False)
+        elif op == "startswith":
+            mask &= series.astype("string").str.lower().str.startswith(str(value).lower()).fillna(False)
+        elif op == "in":
+            mask &= series.isin(value if isinstance(value, (list, tuple, set)) else [value])
+        else:
+            mask &= {
+                "==": series.__eq__, "=": series.__eq__, "!=": series.__ne__,
+                ">": series.__gt__, ">=": series.__ge__, "<": series.__lt__, "<=": series.__le__,
+            }[op](value)
+    return mask
+
+
+def run_query(
+    table: str,
+    where: str = "",
+    columns: Optional[List[str]] = None,
+    group_by: Optional[str] = None,
+    aggregate: str = "",
+    sort_by: Optional[str] = None,
+    descending: bool = False,
+    limit: int = 10,
+    user_id: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    Filters, aggregates and sorts a table ``user_id`` can query.
+
+    Raises:
+        ValueError: On unknown tables or columns and unparseable conditions.
+    """
+    frame = load_table(table, user_id)
+    frame = frame[_mask(frame, where)] if where.strip() else frame
+
+    if aggregate:
+        func, _, target = aggregate.partition(":")
+        func = func.strip().lower()
+        if func not in AGGREGATES:
+            raise ValueError(f"Unknown aggregate '{func}'. Use one of: {', '.join(AGGREGATES)}")
+        target = _column(frame, target.strip()) if target.strip() else None
+        if func != "count" and target is None:
+            raise ValueError(f"Aggregate '{func}' needs a column, e.g. '{func}:<column>'")
+        label = f"{func}_{target}" if target else "count"
+        if group_by:
+            grouped = frame.groupby(_column(frame, group_by), dropna=False)
+            result = grouped.size() if target is None else grouped[target].agg(func)
+            frame = result.rename(label).reset_index()
+            sort_by = sort_by or label
+        else:
+            value = len(frame) if target is None else frame[target].agg(func)
+            return pd.DataFrame({label: [value.item() if hasattr(value, "item") else value]})
+    elif columns:
+        frame = frame[[_column(frame, c) for c in columns]]
+
+    if sort_by:
+        frame = frame.sort_values(_column(frame, sort_by), ascending=not descending)
+    return frame.head(max(1, min(limit, MAX_RESULT_ROWS)))
+
+
+def _user_id() -> Optional[str]:
+    return utils.ensure_configurable(ensure_config()).get("user_id")
+
+
+@tool
+async def list_tables(config: Optional[RunnableConfig] = None) -> str:
+    """
+    List the tables created from ingested CSV files, with their row counts
+    and columns. Use this before query_table to find table and column names.
+
+    Returns:
+        str: One line per table.
+    """
+    infos = list_table_infos(_user_id())
+    if not infos:
+        return "No tables have been ingested yet."
+    return "\n".join(
+        f"{info.name} ({info.rows:,} rows): {', '.join(info.columns)}" for info in infos
+    )
+
+
+@tool
+async def query_table(
+    table: str,
+    where: str = "",
+    columns: Optional[List[str]] = None,
+    group_by: Optional[str] = None,
+    aggregate: str = "",
+    sort_by: Optional[str] = None,
+    descending: bool = False,
+    limit: int = 10,
+    config: Optional[RunnableConfig] = None,
+) -> str:
+    """
+    Query a table ingested from a CSV file with exact filters, counts and
+    aggregates, e.g. "how many papers were published in 2023" is
+    query_table("arxiv", where="year(published) == 2023", aggregate="count").
+
+    Args:
+        table (str): Table name from list_tables, e.g. "arxiv".
+        where (str): Conditions joined by "and". Each is "<column> <op> <value>"
+            with op one of == != > >= < <= contains startswith in; wrap a
+            date column in year(...) or month(...) to compare its parts.
+        columns (List[str]): Columns to return (ignored with aggregate).
+        group_by (str): Column to group by before aggregating.
+        aggregate (str): "count", or "sum:<column>", "mean:<column>",
+            "min:<column>", "max:<column>", "nunique:<column>".
+        sort_by (str): Column to sort by.
+        descending (bool): Sort in descending order.
+        limit (int): Maximum rows to return (up to 50).
+
+    Returns:
+        str: The matching rows or aggregate values, or an error message.
+    """
+    try:
+        result = run_query(table, where, columns, group_by, aggregate, sort_by, descending, limit, _user_id())
+    except (ValueError, KeyError, TypeError) as e:
+        return f"Error: {e}"
+    if result.empty:
+        return "No matching rows."
+    return result.to_string(index=False, max_colwidth=200)
@@ -0,0 +1,58 @@
+import math
+
+import pytest
+
+from lang_memgpt.tools.calculator_tool import calculate, calculate_batch, compile_expression, evaluate
+
+
+@pytest.mark.parametrize(
+    "expression, expected",
+    [
+        ("3 + 5 * 2", 13),
+        ("(3 + 5) * 2", 16),
+        ("2 ^ 3 ^ 2", 512),
+        ("-2 ** 2", -4),
+        ("7 // 2 + 7 % 2", 4),
+        ("sqrt(16) + max(1, 2) * pi", 4 + 2 * math.pi),
+        ("hypot(3, 4)", 5),
+    ],
+)
+def test_evaluate_precedence_and_functions(expression, expected) -> None:
+    assert evaluate(expression) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize(
+    "expression",
+    ["__import__('os')", "().__class__", "[1, 2]", "lambda: 1", "'a' * 3", "open('x')", "abs(x=1)"],
+)
+def test_rejects_unsafe_syntax(expression) -> None:
+    with pytest.raises(ValueError):
+        compile_expression(expression)
+
+
+def test_compiled_expressions_are_cached() -> None:
+    assert compile_expression("1 + x") is compile_expression("1 + x")
+    assert evaluate("1 + x", {"x": 2}) == 3
+
+
+async def test_calculate_reports_errors() -> None:
+    assert await calculate.ainvoke({"expression": "1 / 0"}) == "Error: float division by zero"
+    assert await calculate.ainvoke({"expression": "9 ** 9 ** 9"}) == "Error: Result is too large."
+    assert "Unbound variables: y" in await calculate.ainvoke({"expression": "y + 1"})
+
+
+async def test_integer_valued_functions_cannot_build_huge_integers() -> None:
+    # floor/ceil/round results and bound variables stay floats, so ** overflows
+    # instead of computing a multi-million-bit integer.
+    assert await calculate.ainvoke({"expression": "floor(9) ** floor(9) ** floor(9)"}) == "Error: Result is too large."
+    assert await calculate.ainvoke({"expression": "round(9) ** ceil(9) ** round(9.2)"}) == "Error: Result is too large."
+    assert isinstance(evaluate("floor(2.5)"), float) and evaluate("round(2.567, 2)") == 2.57
+    with pytest.raises(OverflowError):
+        evaluate("x ** x ** x", {"x": 9})
+
+
+async def test_calculate_batch_over_columns() -> None:
+    result = await calculate_batch.ainvoke(
+        {"expression": "lbs / density", "variables": {"lbs": [6800, 13600], "density": [6.8]}}
+    )
+    assert result == [1000, 2000]
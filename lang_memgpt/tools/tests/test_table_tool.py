@@ -0,0 +1,83 @@
+import os
+
+import pytest
+
+from lang_memgpt import _corpus as corpus
+from lang_memgpt import _settings as settings
+from lang_memgpt.tools.table_tool import list_tables, query_table, remove_table, row_documents, run_query, store_csv
+
+ABSTRACT = "A study of long-context memory for language model agents with paging. "
+
+
+@pytest.fixture
+def arxiv(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings.SETTINGS, "tables_directory", str(tmp_path / "tables"))
+    monkeypatch.setattr(settings.SETTINGS, "table_text_columns", "")
+    path = tmp_path / "arXiv.csv"
+    path.write_text(
+        "id,title,abstract,category,published,citations\n"
+        f'2301.1,MemGPT,"{ABSTRACT}",cs.AI,2023-01-10,40\n'
+        f'2305.2,Large Concept Models,"{ABSTRACT}",cs.CL,2023-05-02,12\n'
+        f'2401.3,Situational Awareness,"{ABSTRACT}",cs.AI,2024-01-20,7\n'
+    )
+    return store_csv(str(path))
+
+
+def test_store_csv_embeds_only_text_columns(arxiv) -> None:
+    assert (arxiv.name, arxiv.rows, arxiv.text_columns) == ("arxiv", 3, ["abstract"])
+    documents = row_documents(arxiv)
+    assert [d.metadata["row_id"] for d in documents] == [0, 1, 2]
+    assert documents[0].page_content == f"abstract: {ABSTRACT}"
+    assert documents[0].metadata["table"] == "arxiv"
+
+
+def test_run_query_filters_and_aggregates(arxiv) -> None:
+    count = run_query("arXiv", where="year(published) == 2023", aggregate="count")
+    assert count["count"].tolist() == [2]
+
+    grouped = run_query("arxiv", group_by="category", aggregate="sum:citations", descending=True)
+    assert grouped.values.tolist() == [["cs.AI", 47], ["cs.CL", 12]]
+
+    rows = run_query("arxiv", where="category in ['cs.AI'] and citations > 10", columns=["title"])
+    assert rows["title"].tolist() == ["MemGPT"]
+
+
+async def test_tools_report_schema_and_errors(arxiv) -> None:
+    assert await list_tables.ainvoke({}) == (
+        "arxiv (3 rows): row_id, id, title, abstract, category, published, citations"
+    )
+    assert "Available tables: arxiv" in await query_table.ainvoke({"table": "papers"})
+    assert "Unknown column 'year'" in await query_table.ainvoke({"table": "arxiv", "where": "year == 2023"})
+    result = await query_table.ainvoke(
+        {"table": "arxiv", "sort_by": "citations", "descending": True, "columns": ["title", "citations"], "limit": 1}
+    )
+    assert result.split("\n")[1].split() == ["MemGPT", "40"]
+
+
+def _document(document_id: str) -> corpus.DocumentInfo:
+    return corpus.DocumentInfo(document_id, "arXiv.csv", "arxiv", "table", None, None, 3, "", "", 0.0, 0.0)
+
+
+async def test_tables_are_private_to_their_user(arxiv, tmp_path) -> None:
+    path = tmp_path / "ana" / "arXiv.csv"
+    path.parent.mkdir()
+    path.write_text("id,title\n1,Ana's glider log\n")
+    ana = corpus.user_namespace("ana")
+    mine = store_csv(str(path), ana, document_id="d-ana")
+    assert mine.path != arxiv.path and os.path.exists(arxiv.path)
+
+    as_ana = {"configurable": {"user_id": "ana"}}
+    as_bo = {"configurable": {"user_id": "bo"}}
+    # Ana's table shadows the global one of the same name; Bo only sees the global one.
+    assert await list_tables.ainvoke({}, as_ana) == "arxiv (1 rows): row_id, id, title"
+    assert await list_tables.ainvoke({}, as_bo) == (
+        "arxiv (3 rows): row_id, id, title, abstract, category, published, citations"
+    )
+    assert "glider log" in await query_table.ainvoke({"table": "arxiv", "columns": ["title"]}, as_ana)
+    assert "glider log" not in await query_table.ainvoke({"table": "arxiv", "columns": ["title"]}, as_bo)
+
+    # Removing a replaced version leaves its successor; removing the current one deletes it.
+    remove_table(ana, _document("d-old"))
+    assert os.path.exists(mine.path)
+    remove_table(ana, _document("d-ana"))
+    assert not os.path.exists(mine.path) and os.path.exists(arxiv.path)
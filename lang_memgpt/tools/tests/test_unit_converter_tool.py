@@ -0,0 +1,63 @@
+import pytest
+
+from lang_memgpt.tools.unit_converter_tool import (
+    conversion_for,
+    convert_many,
+    parse_conversion,
+    unit_converter,
+    unit_converter_batch,
+)
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("convert 500 miles to km", "500.0 miles = 804.67 km"),
+        ("500 miles to meters", "500.0 miles = 804,672.00 meters"),
+        ("100 c to f", "100.0 celsius = 212.00 fahrenheit"),
+        ("300 kelvin to fahrenheit", "300.0 kelvin = 80.33 fahrenheit"),
+        ("16k lbs of fuel to gallons", "16,000.0 pounds = 2,352.94 gallons (JP-5 at 6.8 lbs/gal)"),
+        ("10 kg of jp-5 to gallons", "10.0 kg = 3.24 gallons (JP-5 at 6.8 lbs/gal)"),
+    ],
+)
+async def test_unit_converter_multi_hop(query, expected) -> None:
+    assert await unit_converter.ainvoke(query) == expected
+
+
+async def test_dimension_mismatch_is_reported() -> None:
+    assert await unit_converter.ainvoke("5 ft to kg") == "Error: Cannot convert feet (length) to kg (mass)."
+
+
+def test_fuel_type_is_parsed_and_applied() -> None:
+    parsed = parse_conversion("16k lbs of jp-8 to gallons")
+    assert parsed == (16000.0, "pounds", "gallons", "jp-8")
+    assert conversion_for("pounds", "gallons", "jp-8")[0] == pytest.approx(1 / 6.7)
+    with pytest.raises(ValueError, match="Unknown fuel type"):
+        conversion_for("pounds", "gallons", "kerosene")
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("1.5k lbs to kg", (1500.0, "pounds", "kg", None)),
+        ("2.5k feet to meters", (2500.0, "feet", "meters", None)),
+        ("5kg to lbs", (5.0, "kg", "pounds", None)),
+        ("5 kg to lbs", (5.0, "kg", "pounds", None)),
+    ],
+)
+def test_k_suffix_multiplies_by_a_thousand(query, expected) -> None:
+    assert parse_conversion(query) == expected
+
+
+def test_round_trip_is_identity() -> None:
+    values = [-40.0, 0.0, 37.5]
+    there = convert_many(values, "celsius", "fahrenheit")
+    assert there[0] == pytest.approx(-40.0)
+    assert convert_many(there, "fahrenheit", "celsius") == pytest.approx(values)
+
+
+async def test_batch_conversion() -> None:
+    result = await unit_converter_batch.ainvoke(
+        {"values": [6800, 13600], "from_unit": "lbs", "to_unit": "gal", "fuel": "JP-5"}
+    )
+    assert result == [1000.0, 2000.0]
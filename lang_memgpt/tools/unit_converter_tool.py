@@ -1,18 +1,266 @@
 from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
-from typing import Any, List, Optional
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from collections import deque
 import re
 
+from lang_memgpt import _settings as settings
+
+# Every supported unit and its dimension
+UNITS = {
+    # Length
+    "meters": "length", "feet": "length", "inches": "length", "yards": "length",
+    "cm": "length", "mm": "length", "km": "length",
+    "miles": "length", "statute": "length", "nautical": "length",
+    # Mass
+    "kg": "mass", "grams": "mass", "pounds": "mass", "ounces": "mass", "tonnes": "mass",
+    # Volume
+    "liters": "volume", "ml": "volume", "gallons": "volume", "quarts": "volume", "cubic meters": "volume",
+    # Temperature
+    "celsius": "temperature", "fahrenheit": "temperature", "kelvin": "temperature",
+    # Speed
+    "knots": "speed", "kph": "speed", "mph": "speed", "mps": "speed",
+    # Pressure
+    "inhg": "pressure", "hpa": "pressure", "mb": "pressure", "psi": "pressure",
+}
+
+# Direct conversions: (from_unit, to_unit, scale, offset) meaning
+# to = from * scale + offset. Inverses and multi-hop paths are derived.
+EDGES = [
+    # Length
+    ("meters", "feet", 3.28084, 0),
+    ("feet", "inches", 12, 0),
+    ("yards", "feet", 3, 0),
+    ("meters", "cm", 100, 0),
+    ("meters", "mm", 1000, 0),
+    ("km", "meters", 1000, 0),
+    ("miles", "km", 1.609344, 0),
+    ("statute", "miles", 1, 0),
+    ("nautical", "meters", 1852, 0),
+    # Mass
+    ("kg", "pounds", 2.20462262, 0),
+    ("kg", "grams", 1000, 0),
+    ("pounds", "ounces", 16, 0),
+    ("tonnes", "kg", 1000, 0),
+    # Volume
+    ("gallons", "liters", 3.785411784, 0),
+    ("liters", "ml", 1000, 0),
+    ("gallons", "quarts", 4, 0),
+    ("cubic meters", "liters", 1000, 0),
+    # Temperature
+    ("celsius", "fahrenheit", 9 / 5, 32),
+    ("celsius", "kelvin", 1, 273.15),
+    # Speed
+    ("knots", "kph", 1.852, 0),
+    ("mph", "kph", 1.609344, 0),
+    ("mps", "kph", 3.6, 0),
+    # Pressure
+    ("inhg", "hpa", 33.8639, 0),
+    ("hpa", "mb", 1, 0),
+    ("psi", "hpa", 68.9476, 0),
+]
+
+# Aliases for unit names
+UNIT_ALIASES = {
+    "miles": "miles", "mi": "miles",
+    "nautical miles": "nautical", "nm": "nautical", "nmi": "nautical",
+    "statute miles": "statute", "statute": "statute", "sm": "statute",
+    "kilometers": "km", "km": "km",
+    "meters": "meters", "m": "meters",
+    "feet": "feet", "ft": "feet", "foot": "feet",
+    "inches": "inches", "inch": "inches",
+    "yards": "yards", "yd": "yards",
+    "centimeters": "cm", "cm": "cm",
+    "millimeters": "mm", "mm": "mm",
+    "pounds": "pounds", "lbs": "pounds", "lb": "pounds",
+    "kg": "kg", "kilograms": "kg", "kgs": "kg",
+    "grams": "grams", "g": "grams",
+    "ounces": "ounces", "oz": "ounces",
+    "tonnes": "tonnes", "metric tons": "tonnes",
+    "celsius": "celsius", "c": "celsius",
+    "fahrenheit": "fahrenheit", "f": "fahrenheit",
+    "kelvin": "kelvin",
+    "liters": "liters", "l": "liters", "litres": "liters",
+    "milliliters": "ml", "ml": "ml",
+    "gallons": "gallons", "gal": "gallons",
+    "quarts": "quarts", "qt": "quarts",
+    "cubic meters": "cubic meters", "m3": "cubic meters",
+    "knots": "knots", "kts": "knots", "kt": "knots",
+    "kph": "kph", "km/h": "kph", "kmh": "kph",
+    "mph": "mph",
+    "mps": "mps", "m/s": "mps",
+    "inhg": "inhg", "inches of mercury": "inhg",
+    "hpa": "hpa", "hectopascals": "hpa",
+    "mb": "mb", "millibars": "mb",
+    "psi": "psi",
+}
+
+# Fuel names as they appear in queries, mapped to FUEL_DENSITIES keys
+FUEL_RE = re.compile(r"\b(jp-?5|jp-?8|jet[- ]?a(?:-?1)?|avgas|100ll)\b")
+_FUEL_NAMES = {"jp5": "jp-5", "jp8": "jp-8", "jeta": "jet-a", "jeta1": "jet-a", "100ll": "avgas", "avgas": "avgas"}
+
+# Filler words removed before parsing, and the query pattern itself
+FILLER_RE = re.compile(r"\b(?:of|for|the|fuel|jet fuel)\b")
+# The value may carry a "k" (thousands) suffix, as in "16k lbs"; a "k"
+# followed by letters starts a unit instead ("5kg").
+QUERY_RE = re.compile(
+    r"(convert|change|what is)?\s*(?P<value>[\d,.]+)(?P<thousands>k(?![a-z]))?\s*"
+    r"(?P<from_unit>[a-zA-Z/\d\s]+?)\s+(to|in)\s+(?P<to_unit>[a-zA-Z/\d\s]+)")
+
+Conversion = Tuple[float, float]  # (scale, offset)
+
+
+class ConversionQuery(NamedTuple):
+    value: float
+    from_unit: str
+    to_unit: str
+    fuel: Optional[str]
+
+
+def _fuel_densities(spec: str) -> Dict[str, float]:
+    """Parse 'jp-5=6.8,jp-8=6.7' (lbs per US gallon) into a dict."""
+    densities = {}
+    for item in spec.split(","):
+        if "=" in item:
+            name, value = item.split("=", 1)
+            densities[name.strip().lower()] = float(value)
+    return densities
+
+
+def _closure(edges: List[Tuple[str, str, float, float]]) -> Dict[Tuple[str, str], Conversion]:
+    """All-pairs conversions: walk the graph from every unit, composing maps."""
+    graph: Dict[str, List[Tuple[str, Conversion]]] = {unit: [] for unit in UNITS}
+    for src, dst, scale, offset in edges:
+        graph[src].append((dst, (scale, offset)))
+        graph[dst].append((src, (1 / scale, -offset / scale)))
+
+    table = {}
+    for start in UNITS:
+        seen = {start: (1.0, 0.0)}
+        queue = deque([start])
+        while queue:
+            unit = queue.popleft()
+            a1, b1 = seen[unit]
+            for nxt, (a2, b2) in graph[unit]:
+                if nxt not in seen:
+                    seen[nxt] = (a2 * a1, a2 * b1 + b2)
+                    queue.append(nxt)
+        for unit, conversion in seen.items():
+            table[(start, unit)] = conversion
+    return table
+
+
+for _src, _dst, _, _ in EDGES:
+    assert UNITS[_src] == UNITS[_dst], f"Edge {_src}->{_dst} crosses dimensions"
+
+FUEL_DENSITIES = _fuel_densities(settings.SETTINGS.fuel_densities)
+DEFAULT_FUEL = settings.SETTINGS.default_fuel.lower()
+
+# Same-dimension conversions, plus one table per fuel type where mass and
+# volume are joined by that fuel's density.
+TABLE = _closure(EDGES)
+FUEL_TABLES = {
+    fuel: _closure(EDGES + [("gallons", "pounds", density, 0)])
+    for fuel, density in FUEL_DENSITIES.items()
+}
+
+
+def conversion_for(from_unit: str, to_unit: str, fuel: Optional[str] = None) -> Conversion:
+    """
+    Returns (scale, offset) converting from_unit to to_unit.
+
+    Mass and volume convert through a fuel density; fuel defaults to
+    DEFAULT_FUEL.
+
+    Raises:
+        ValueError: For unknown units, mismatched dimensions or unknown fuels.
+    """
+    for unit in (from_unit, to_unit):
+        if unit not in UNITS:
+            raise ValueError(f"Unsupported unit: {unit}.")
+    dims = {UNITS[from_unit], UNITS[to_unit]}
+    if len(dims) == 1:
+        return TABLE[(from_unit, to_unit)]
+    if dims != {"mass", "volume"}:
+        raise ValueError(
+            f"Cannot convert {from_unit} ({UNITS[from_unit]}) to {to_unit} ({UNITS[to_unit]})."
+        )
+    fuel = fuel or DEFAULT_FUEL
+    if fuel not in FUEL_TABLES:
+        raise ValueError(f"Unknown fuel type: {fuel}. Known: {', '.join(sorted(FUEL_TABLES))}.")
+    return FUEL_TABLES[fuel][(from_unit, to_unit)]
+
+
+def parse_conversion(query: str) -> Optional[ConversionQuery]:
+    """
+    Parses a conversion query into (value, from_unit, to_unit, fuel).
+
+    Unit names are mapped through UNIT_ALIASES. Returns None if the query
+    does not look like a conversion.
+    """
+    query = query.lower()
+    fuel = None
+    if fuel_match := FUEL_RE.search(query):
+        fuel = _FUEL_NAMES.get(re.sub(r"[- ]", "", fuel_match.group(1)), fuel_match.group(1))
+        query = FUEL_RE.sub("", query)
+
+    # Remove filler words and normalize the query
+    query = " ".join(FILLER_RE.sub("", query).split())
+
+    # Parse the query using regex
+    match = QUERY_RE.match(query)
+    if not match:
+        return None
+
+    # Extract values and units from query
+    value = float(match.group("value").replace(",", ""))
+    if match.group("thousands"):
+        value *= 1000
+    from_unit = match.group("from_unit").strip()
+    to_unit = match.group("to_unit").strip()
+
+    # Map aliases to standard unit names
+    return ConversionQuery(
+        value, UNIT_ALIASES.get(from_unit, from_unit), UNIT_ALIASES.get(to_unit, to_unit), fuel
+    )
+
+
+def _fuel_note(from_unit: str, to_unit: str, fuel: Optional[str]) -> str:
+    if UNITS.get(from_unit) == UNITS.get(to_unit):
+        return ""
+    fuel = fuel or DEFAULT_FUEL
+    return f" ({fuel.upper()} at {FUEL_DENSITIES[fuel]} lbs/gal)"
+
+
+def convert(value: float, from_unit: str, to_unit: str, fuel: Optional[str] = None) -> str:
+    """
+    Converts value between two standard unit names.
+
+    Raises:
+        ValueError: If there is no conversion between the units.
+    """
+    scale, offset = conversion_for(from_unit, to_unit, fuel)
+    result = value * scale + offset
+    return f"{value:,} {from_unit} = {result:,.2f} {to_unit}{_fuel_note(from_unit, to_unit, fuel)}"
+
+
+def convert_many(values: List[float], from_unit: str, to_unit: str, fuel: Optional[str] = None) -> List[float]:
+    """Converts every value with a single table lookup."""
+    scale, offset = conversion_for(from_unit, to_unit, fuel)
+    return [value * scale + offset for value in values]
+
 
 @tool
 async def unit_converter(
     query: str, config: Optional[RunnableConfig] = None
 ) -> str:
     """
-    Converts units like weight, temperature, distance, and aviation fuel (JP-5).
+    Converts units of length, weight, volume, temperature, speed and pressure,
+    including multi-step conversions (e.g. miles to meters) and fuel weight to
+    volume for JP-5, JP-8, Jet A and avgas (JP-5 unless another fuel is named).
 
     Args:
-        query (str): Input query (e.g., 'convert 500 miles to km' or '16k lbs of fuel to gallons').
+        query (str): Input query (e.g., 'convert 500 miles to km' or '16k lbs of jp-8 to gallons').
 
     Returns:
         str: Converted value or error message.
@@ -21,79 +269,50 @@ async def unit_converter(
         unit_converter('convert 15k lbs to kg')
     """
     try:
-        # Conversion factors for supported unit conversions
-        conversions = {
-            # Length
-            "meters_to_feet": 3.28084,
-            "feet_to_meters": 0.3048,
-            "miles_to_km": 1.60934,
-            "km_to_miles": 0.621371,
-            "nautical_to_statute": 1.15078,  # NM to statute miles
-            "statute_to_nautical": 0.868976,  # Statute miles to NM
-            # Weight
-            "kg_to_pounds": 2.20462,
-            "pounds_to_kg": 0.453592,
-            # Volume
-            "liters_to_gallons": 0.264172,
-            "gallons_to_liters": 3.78541,
-            # Temperature
-            "celsius_to_fahrenheit": lambda x: (x * 9 / 5) + 32,
-            "fahrenheit_to_celsius": lambda x: (x - 32) * 5 / 9,
-            # JP-5 Fuel (6.8 lbs/gal)
-            "pounds_to_gallons": 1 / 6.8,
-            "gallons_to_pounds": 6.8,
-        }
-
-        # Aliases for unit names
-        unit_aliases = {
-            "miles": "miles", "mi": "miles",
-            "nautical miles": "nautical", "nm": "nautical",
-            "statute miles": "statute", "statute": "statute",
-            "kilometers": "km", "km": "km",
-            "meters": "meters", "m": "meters",
-            "feet": "feet", "ft": "feet",
-            "pounds": "pounds", "lbs": "pounds",
-            "kg": "kg", "kilograms": "kg",
-            "celsius": "celsius", "c": "celsius",
-            "fahrenheit": "fahrenheit", "f": "fahrenheit",
-            "liters": "liters", "l": "liters",
-            "gallons": "gallons", "gal": "gallons",
-        }
-
-        # Remove filler words and normalize the query
-        filler_words = ["of", "for", "the", "fuel", "jet fuel"]
-        query = re.sub(r'\b(?:' + '|'.join(filler_words) +
-                       r')\b', '', query.lower()).strip()
-
-        # Parse the query using regex
-        match = re.match(
-            r"(convert|change|what is)?\s*([\d,.kK]+)\s*([a-zA-Z\s]+)\s*(to|in)\s*([a-zA-Z\s]+)", query)
+        parsed = parse_conversion(query)
 
         # Error if input does not match expected format
-        if not match:
+        if parsed is None:
             return "Error: Could not parse input. Example: 'convert 15k lbs to kg'."
 
-        # Extract values and units from query
-        value = float(match.group(2).replace("k", "000").replace(",", ""))
-        from_unit = match.group(3).strip().lower()
-        to_unit = match.group(5).strip().lower()
-
-        # Map aliases to standard unit names
-        from_unit = unit_aliases.get(from_unit, from_unit)
-        to_unit = unit_aliases.get(to_unit, to_unit)
-
-        # Perform the conversion if valid
-        key = f"{from_unit}_to_{to_unit}"
-        if key in conversions:
-            conversion = conversions[key]
-            # Handle callable conversions (temperature)
-            result = conversion(value) if callable(
-                conversion) else value * conversion
-            return f"{value:,} {from_unit} = {result:,.2f} {to_unit}"
-        else:
-            # Unsupported conversion
-            return f"Error: Unsupported conversion from {from_unit} to {to_unit}."
+        return convert(*parsed)
+
+    except ValueError as e:
+        # Unsupported conversion
+        return f"Error: {str(e)}"
 
     except Exception as e:
         # General error handling
         return f"Error: {str(e)}"
+
+
+@tool
+async def unit_converter_batch(
+    values: List[float],
+    from_unit: str,
+    to_unit: str,
+    fuel: Optional[str] = None,
+    config: Optional[RunnableConfig] = None
+) -> Any:
+    """
+    Converts a list of quantities from one unit to another in one call.
+
+    Args:
+        values (List[float]): The quantities to convert.
+        from_unit (str): Unit of the values, e.g. 'lbs'.
+        to_unit (str): Target unit, e.g. 'gallons'.
+        fuel (Optional[str]): Fuel type for weight/volume conversions
+            (jp-5, jp-8, jet-a, avgas). Defaults to JP-5.
+
+    Returns:
+        List[float]: Converted values rounded to 2 decimals, or an error message.
+    """
+    try:
+        from_unit = UNIT_ALIASES.get(from_unit.strip().lower(), from_unit.strip().lower())
+        to_unit = UNIT_ALIASES.get(to_unit.strip().lower(), to_unit.strip().lower())
+        if fuel:
+            fuel = _FUEL_NAMES.get(re.sub(r"[- ]", "", fuel.lower()), fuel.lower())
+        return [round(v, 2) for v in convert_many(values, from_unit, to_unit, fuel)]
+
+    except ValueError as e:
+        return f"Error: {str(e)}"
@@ -290,7 +290,7 @@ How may I assist you today?`,
 
       {/* File Upload Drawer */}
       <Drawer anchor="right" open={isDrawerOpen} onClose={() => setIsDrawerOpen(false)}>
-        <FileUpload onClose={handleFileUploadSuccess} />
+        <FileUpload onClose={handleFileUploadSuccess} onUploaded={handleFileUpload} />
       </Drawer>
 
       {/* Acknowledgment Snackbar */}
@@ -1,56 +1,44 @@
 import React, { useState } from 'react';
 import { Button, Box, Typography, CircularProgress } from '@mui/material';
 import CloudUploadIcon from '@mui/icons-material/CloudUpload';
-import { useChat } from '../hooks/useChat';
+import { uploadFile } from '../services/api';
 
-const FileUpload = ({ onClose }) => {
+const FileUpload = ({ onClose, onUploaded }) => {
   const [uploading, setUploading] = useState(false);
   const [error, setError] = useState(null);
-  const { sendMessage } = useChat(); // Use the global chat hook
 
-  const handleFileChange = (event) => {
+  const handleFileChange = async (event) => {
     const file = event.target.files[0];
     if (!file) return;
 
-    const reader = new FileReader();
+    try {
+      setUploading(true);
+      setError(null);
 
-    reader.onload = async () => {
-      try {
-        setUploading(true);
-        setError(null);
+      // Send the file itself as multipart form data; the server ingests it
+      // in the background and returns a document id.
+      const result = await uploadFile(file);
 
-        // Construct the file upload message.
-        // Format: "File uploaded: <filename>\nContent: <DataURL>"
-        const fileMessageContent = `File uploaded: ${file.name}\nContent: ${reader.result}`;
-
-        // Await the API call.
-        await sendMessage(fileMessageContent);
-
-        // After a successful upload, close the uploader.
-        if (onClose) {
-          onClose();
-        }
-      } catch (err) {
-        console.error('Error during file upload submission:', err);
-        setError(err.message || 'File upload failed');
-      } finally {
-        setUploading(false);
+      if (onUploaded) {
+        onUploaded(result);
       }
-    };
 
-    reader.onerror = () => {
-      setError('Error reading file.');
+      // After a successful upload, close the uploader.
+      if (onClose) {
+        onClose();
+      }
+    } catch (err) {
+      console.error('Error during file upload submission:', err);
+      setError(err.message || 'File upload failed');
+    } finally {
       setUploading(false);
-    };
-
-    // Read the file as a Data URL (base64 encoded)
-    reader.readAsDataURL(file);
+    }
   };
 
   return (
     <Box sx={{ mb: 2, p: 2 }}>
       <input
-        accept=".pdf,.csv,.xlsx,.doc,.docx"
+        accept=".pdf,.csv"
         style={{ display: 'none' }}
         id="file-upload"
         type="file"
@@ -72,7 +60,7 @@ const FileUpload = ({ onClose }) => {
         </Typography>
       )}
       <Typography variant="caption" display="block" sx={{ mt: 1 }}>
-        Supported formats: PDF, CSV, Excel, Word
+        Supported formats: PDF, CSV
       </Typography>
     </Box>
   );
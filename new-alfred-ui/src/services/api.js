@@ -56,4 +56,33 @@ export const sendMessage = async (messages, configurable = {}) => {
   }
 };
 
-export default { sendMessage };
+/**
+ * Uploads a document as multipart form data. The server streams it to disk
+ * and ingests it in the background.
+ *
+ * @param {File} file - The file selected by the user.
+ * @returns {Promise<object>} - Resolves to { document_id, filename, bytes, status }.
+ */
+export const uploadFile = async (file) => {
+  try {
+    const secureApiUrl = getSecureUrl(API_URL);
+    const formData = new FormData();
+    formData.append('file', file, file.name);
+    const response = await fetch(`${secureApiUrl}/api/upload`, {
+      method: 'POST',
+      body: formData,
+    });
+
+    if (!response.ok) {
+      const errorData = await response.json();
+      throw new Error(errorData.detail || `HTTP error! status: ${response.status}`);
+    }
+
+    return await response.json();
+  } catch (error) {
+    console.error('Upload Error:', error);
+    throw error;
+  }
+};
+
+export default { sendMessage, uploadFile };